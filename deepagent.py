@@ -1,71 +1,11 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from src.llms import get_model
-from langchain.agents.middleware import TodoListMiddleware
-from deepagents.middleware.filesystem import FilesystemMiddleware
-from deepagents.middleware.subagents import SubAgentMiddleware
-from deepagents import create_deep_agent, CompiledSubAgent
-
-from src.tools.todo_tools import *
-from src.prompts.orchestrator import get_orchestrator_prompt
-from src.subagents.html_analyser import html_analyser_agent
-from src.subagents.tsx_styling_agent import tsx_styling_agent
-
-import os
 import warnings
 import logging
 
-# Try to import BaseCallbackHandler from different possible locations
-try:
-    from langchain.callbacks.base import BaseCallbackHandler
-except ImportError:
-    try:
-        from langchain_core.callbacks.base_callback import BaseCallbackHandler
-    except ImportError:
-        # Fallback: create a minimal callback handler
-        class BaseCallbackHandler:
-            pass
-
-
-from deepagents.backends import (
-    CompositeBackend,
-    FilesystemBackend,
-    StateBackend
-)
-
-
-html_anlyser_subagent = CompiledSubAgent(
-    name="html_analyser",
-    description="agent specialized for suggesting styling changes" \
-    " to tsx file based on html snippet and project tsx files",
-    runnable=html_analyser_agent
-)
-
-tsx_styling_subagent = CompiledSubAgent(
-    name="tsx_styling_agent",
-    description="agent specialized for applying styling changes from the scratch pad" \
-    " to tsx files by reading proposed diffs and executing modifications",
-    runnable=tsx_styling_agent
-)
-
-subagents =[html_anlyser_subagent, tsx_styling_subagent]
-
-def create_backend(runtime):
-    return CompositeBackend(
-        default=StateBackend(runtime),
-
-        routes={
-            "/agent/": FilesystemBackend(
-                root_dir=os.path.abspath('C:/litiumdeepagents/ecom/trendcart'), virtual_mode=True
-            ),
-
-            "/project/": FilesystemBackend(
-                root_dir=os.path.abspath("C:/ecommerce/trendcart/gleemart-fe"), virtual_mode=True
-            )
-        }
-    )
-
+from src.agent import build_orchestrator, run_step
+from src.callbacks import LoggingCallback, start_background_logging
 
 # You must:
 # - Use /agent/* only for logs, plans, or TODOs
@@ -86,63 +26,14 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
-# Custom callback to print intermediate steps
-class AgentDebugCallback(BaseCallbackHandler):
-    """Custom callback handler for debugging agent execution"""
-
-    def __init__(self):
-        super().__init__()
-        self.raise_error = False
-        self.ignore_chain = False
-        self.ignore_agent = False
-        self.ignore_llm = False
-        self.ignore_chat_model = False
-        self.ignore_retriever = False
-        self.ignore_tool = False
-        self.ignore_custom_event = False
 
-    def on_tool_start(self, serialized, input_str, **kwargs):
-        print(f"\n🔧 TOOL CALLED: {serialized.get('name', 'unknown')}")
-        print(f"   Input: {input_str}")
+# The step cache is opt-in (set LITIUM_STEP_CACHE=.step_cache, or pass
+# --step-cache to `python -m src run`): its key covers the target and
+# reference files only, so a step whose agent reads other files can be stale.
 
-    def on_tool_end(self, output, **kwargs):
-        output_str = str(output)
-        print(f"✅ TOOL OUTPUT: {output_str[:200] if len(output_str) > 200 else output_str}")
-
-    def on_tool_error(self, error, **kwargs):
-        print(f"❌ TOOL ERROR: {error}")
-
-    def on_agent_action(self, action, **kwargs):
-        print(f"\n🤖 AGENT ACTION: {action.tool}")
-        print(f"   Input: {action.tool_input}")
-
-    def on_chain_start(self, serialized, inputs, **kwargs):
-        if isinstance(serialized, dict) and 'name' in serialized:
-            print(f"\n▶️  CHAIN START: {serialized['name']}")
-
-    def on_chain_end(self, outputs, **kwargs):
-        if outputs:
-            output_str = str(outputs)
-            print(f"✅ CHAIN OUTPUT: {output_str[:200] if len(output_str) > 200 else output_str}")
-
-    def on_text(self, text, **kwargs):
-        if isinstance(text, str) and text.strip():
-            print(f"\n💬 TEXT: {text}")
-
-
-model = get_model("reliable")
-# tools = [read_tsx]
-
-# Use the orchestrator prompt from src/prompts/orchestrator.py
-orchestrator_prompt = get_orchestrator_prompt()
-
-agent = create_deep_agent(
-    model=model,
-    # tools=tools,
-    system_prompt=orchestrator_prompt,
-    backend = create_backend,
-
-)
+# Orchestrator with the html_analyser and tsx_styling_agent subagents
+# (see src/agent.py); `python -m src run` is the CLI equivalent of this script.
+agent = build_orchestrator()
 
 
 # input_content = '''{
@@ -184,17 +75,12 @@ print("=" * 80)
 print("🚀 STARTING DEEP AGENT EXECUTION")
 print("=" * 80)
 
-# Create callback handler
-debug_callback = AgentDebugCallback()
+# Trace tool calls, chains and model turns to stderr from a background thread
+start_background_logging()
+debug_callback = LoggingCallback()
 
-# Invoke agent with callbacks
-result = agent.invoke(
-    {"messages":
-    [{"role": "user",
-      "content": input_content}]
-    },
-    config={"callbacks": [debug_callback]}
-)
+# Invoke agent with callbacks; /project/ writes are committed only if the step succeeds
+result = run_step(agent, input_content, callbacks=[debug_callback])
 
 # Print all messages from the agent
 print("\n" + "=" * 80)
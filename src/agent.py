@@ -0,0 +1,274 @@
+"""Orchestrator assembly and single-step execution.
+
+The orchestrator and its subagents are built on demand so callers only pay
+for what they use:
+- ``SUBAGENTS`` maps each subagent name to the module and builder that create
+  it; a subagent's module (and its prompts and tools) is imported only when
+  that subagent is requested
+- ``build_orchestrator`` accepts an explicit model so tests, benchmarks and
+  long-lived workers can inject their own
+- ``run_step`` invokes the orchestrator on one step JSON inside a
+  ``/project/`` transaction (``arun_step`` is its async counterpart); with
+  ``LITIUM_PROFILE`` set, each step is profiled (see ``src.profiling``),
+  with ``LITIUM_STEP_CACHE`` set, unchanged steps are replayed from the
+  step cache (see ``src.step_cache``), a step without
+  ``reference_files`` gets the most similar components of the project
+  (see ``src.retrieval.components``) and the step's snippet is sent in
+  canonical form, expanded back in what the step writes (see
+  ``src.snippets.canonical``), with its large fields passed by reference
+  (see ``src.handles``)
+- the orchestrator loads the step's target and reference files into state
+  and writes the sources its subagents change back to ``/project/`` (see
+  ``src.middleware.step_files``)
+"""
+
+import importlib
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, Optional
+
+
+@dataclass(frozen=True)
+class SubAgentSpec:
+    """Where to find a compiled subagent and how it is exposed to the orchestrator.
+
+    Attributes:
+        name: Subagent name used by the ``task`` tool
+        description: Description shown to the orchestrator
+        module: Module that defines the builder
+        builder: Builder function name, called as ``builder(model=...)``
+        projection: Name of the ``StateProjection`` in ``src.subagents.projection``
+        model: Name of the model the builder uses by default
+    """
+
+    name: str
+    description: str
+    module: str
+    builder: str
+    projection: str
+    model: str
+
+
+SUBAGENTS: dict[str, SubAgentSpec] = {
+    "html_analyser": SubAgentSpec(
+        name="html_analyser",
+        description="agent specialized for suggesting styling changes"
+        " to tsx file based on html snippet and project tsx files",
+        module="src.subagents.html_analyser",
+        builder="build_html_analyser_agent",
+        projection="HTML_ANALYSER_PROJECTION",
+        model="reliable",
+    ),
+    "tsx_styling_agent": SubAgentSpec(
+        name="tsx_styling_agent",
+        description="agent specialized for applying styling changes from the scratch pad"
+        " to tsx files by reading proposed diffs and executing modifications",
+        module="src.subagents.tsx_styling_agent",
+        builder="build_tsx_styling_agent",
+        projection="TSX_STYLING_PROJECTION",
+        model="smart",
+    ),
+}
+
+DEFAULT_SUBAGENTS = tuple(SUBAGENTS)
+
+
+def build_subagent(name: str, model: Any = None):
+    """Import and build one compiled subagent by name.
+
+    Args:
+        name: Key in ``SUBAGENTS``
+        model: Chat model for the subagent (default: the subagent's own default)
+
+    Returns:
+        ``CompiledSubAgent`` wrapped with the subagent's state projection
+
+    Raises:
+        ValueError: If the name is not a known subagent
+    """
+    if name not in SUBAGENTS:
+        raise ValueError(f"Unknown subagent '{name}'. Available: {', '.join(SUBAGENTS)}")
+    from deepagents import CompiledSubAgent
+
+    from src.subagents import projection
+
+    spec = SUBAGENTS[name]
+    builder = getattr(importlib.import_module(spec.module), spec.builder)
+    return CompiledSubAgent(
+        name=spec.name,
+        description=spec.description,
+        runnable=projection.project_subagent(builder(model=model), getattr(projection, spec.projection)),
+    )
+
+
+def build_orchestrator(
+    model: Any = None,
+    subagents: Iterable[str] = DEFAULT_SUBAGENTS,
+    subagent_model: Any = None,
+    backend: Any = None,
+):
+    """Build the orchestrator deep agent.
+
+    Args:
+        model: Chat model or model name for the orchestrator (default: "reliable")
+        subagents: Names of the subagents to attach
+        subagent_model: Chat model shared by all subagents, or a mapping of
+            subagent name to model (default: each subagent's own default)
+        backend: Filesystem backend (default: ``create_backend()``)
+
+    Returns:
+        Compiled orchestrator graph
+    """
+    from deepagents import create_deep_agent
+
+    from src.backends import create_backend
+    from src.llms import get_model
+    from src.middleware import StepFilesMiddleware, ToolMemoMiddleware
+    from src.prompts.orchestrator import get_orchestrator_prompt
+    from src.step_cache import register_agent
+
+    if model is None or isinstance(model, str):
+        model = get_model(model or "reliable")
+    models = {
+        name: (subagent_model.get(name) if isinstance(subagent_model, dict) else subagent_model)
+        for name in subagents
+    }
+    agent = create_deep_agent(
+        model=model,
+        system_prompt=get_orchestrator_prompt(),
+        backend=backend or create_backend(),
+        middleware=[StepFilesMiddleware(), ToolMemoMiddleware()],
+        subagents=[build_subagent(name, models[name]) for name in subagents],
+    )
+    register_agent(agent, {"orchestrator": model, **{name: m or SUBAGENTS[name].model for name, m in models.items()}})
+    return agent
+
+
+def _step_inputs(step: str, files: Optional[dict]) -> dict:
+    from deepagents.backends.utils import create_file_data
+
+    inputs = {"messages": [{"role": "user", "content": step}]}
+    if files:
+        inputs["files"] = {
+            path: create_file_data(value) if isinstance(value, str) else value for path, value in files.items()
+        }
+    return inputs
+
+
+def _canonical_step(step: str):
+    from src.snippets.canonical import canonical_enabled, canonicalize_step
+
+    return canonicalize_step(step) if canonical_enabled() else (step, None)
+
+
+class _StepRun:
+    """One step run inside its transaction, as set up by ``_step_run``.
+
+    Attributes:
+        inputs: Graph input for the step
+        config: Run config (callbacks)
+        result: Final state, once replayed from the step cache or ``finish``ed
+    """
+
+    def __init__(self, agent, step: str, files: Optional[dict], config: Optional[dict], transaction, table, cache):
+        from src.step_cache import agent_versions
+
+        self.inputs = _step_inputs(step, files)
+        self.config = config
+        self.result: Optional[dict] = None
+        self.entry = None
+        self._transaction = transaction
+        self._table = table
+        self._cache = cache
+        self.key = cache.key(step, agent_versions(agent), transaction, files) if cache else None
+        entry = cache.get(self.key) if cache else None
+        if entry is not None:
+            self.result = cache.replay(entry, transaction, step)
+        self._start = time.perf_counter()
+
+    def finish(self, result: dict) -> None:
+        """Expand the agent's final state and record it for the step cache."""
+        from src.snippets import expand_result
+
+        self.result = expand_result(result, self._transaction, self._table)
+        if self._cache:
+            self.entry = self._cache.record(self.result, self._transaction, time.perf_counter() - self._start)
+
+
+@contextmanager
+def _step_run(
+    agent, step: str, callbacks: Optional[list], project: Optional[str], files: Optional[dict]
+) -> Iterator[_StepRun]:
+    """Prepare a step, open its transaction and cache what it committed.
+
+    Shared by ``run_step`` and ``arun_step``: the step gets its reference
+    files, canonical snippet and handles, the profiler is attached with
+    ``LITIUM_PROFILE`` set, and the run is replayed from the step cache when
+    possible. The block runs the agent unless ``run.result`` is already set.
+    """
+    from src.backends import project_transaction
+    from src.handles import store_step_fields
+    from src.profiling import StepProfiler, profile_dir
+    from src.retrieval.components import suggest_references
+    from src.snippets import use_table
+    from src.step_cache import step_cache
+
+    step = suggest_references(step, project)
+    step, table = _canonical_step(step)
+    step = store_step_fields(step, project)
+    cache = step_cache()
+    profiler = StepProfiler() if profile_dir() else None
+    if profiler:
+        callbacks = [*(callbacks or []), profiler]
+    config = {"callbacks": callbacks} if callbacks else None
+    try:
+        with use_table(table), project_transaction(project) as transaction:
+            run = _StepRun(agent, step, files, config, transaction, table, cache)
+            yield run
+        # Only steps whose writes were committed are cached
+        if run.entry is not None:
+            cache.put(run.key, run.entry)
+    finally:
+        if profiler:
+            profiler.write()
+
+
+def run_step(
+    agent,
+    step: str,
+    callbacks: Optional[list] = None,
+    project: Optional[str] = None,
+    files: Optional[dict] = None,
+) -> dict:
+    """Run the orchestrator on one step and commit its ``/project/`` writes.
+
+    Args:
+        agent: Compiled orchestrator graph
+        step: Step JSON (as text) sent as the user message
+        callbacks: Optional LangChain callback handlers
+        project: Project (from its ``workingproject.config``) the step targets;
+            may be omitted when only one project is configured
+        files: Initial state files (path -> content or ``FileData``)
+
+    Returns:
+        Final agent state
+    """
+    with _step_run(agent, step, callbacks, project, files) as run:
+        if run.result is None:
+            run.finish(agent.invoke(run.inputs, config=run.config))
+    return run.result
+
+
+async def arun_step(
+    agent,
+    step: str,
+    callbacks: Optional[list] = None,
+    project: Optional[str] = None,
+    files: Optional[dict] = None,
+) -> dict:
+    """Async version of ``run_step``; the transaction follows the calling task."""
+    with _step_run(agent, step, callbacks, project, files) as run:
+        if run.result is None:
+            run.finish(await agent.ainvoke(run.inputs, config=run.config))
+    return run.result
@@ -0,0 +1,25 @@
+"""Storage backends for the agent filesystem tools."""
+
+from src.backends.factory import ProjectRoute, create_backend, project_transaction
+from src.backends.indexed_filesystem import IndexedFilesystemBackend
+from src.backends.pool import BackendPool, ProjectConfig, get_pool
+from src.backends.locking import ConflictError, LockingBackend, LockTimeout, PathLockManager
+from src.backends.trigram_index import TrigramIndex
+from src.backends.write_buffer import CommitError, TransactionalBackend
+
+__all__ = [
+    "create_backend",
+    "project_transaction",
+    "ProjectRoute",
+    "BackendPool",
+    "ProjectConfig",
+    "get_pool",
+    "IndexedFilesystemBackend",
+    "TrigramIndex",
+    "TransactionalBackend",
+    "CommitError",
+    "LockingBackend",
+    "PathLockManager",
+    "ConflictError",
+    "LockTimeout",
+]
@@ -0,0 +1,150 @@
+"""Factory for the composite backend used by the orchestrator.
+
+Routes:
+- ``/agent/``: logs, plans and TODOs on the project's agent workspace
+- ``/project/``: the Next.js storefront being styled, with trigram-indexed
+  grep/glob so searches do not walk the whole tree on every call, writes
+  buffered per step until ``project_transaction()`` commits them, and
+  per-path locks so concurrent steps cannot overwrite each other's changes
+- everything else: ephemeral files in agent state
+
+Both roots come from the project's ``workingproject.config`` through the
+process-wide ``BackendPool`` (see ``src.backends.pool``). deepagents takes a
+backend instance, not a per-runtime factory, so the two disk routes are
+``ProjectRoute`` backends that look up the step's project on every call.
+"""
+
+from contextlib import contextmanager
+from typing import Optional
+
+from deepagents.backends import CompositeBackend, StateBackend
+from deepagents.backends.protocol import (
+    BackendProtocol,
+    DeleteResult,
+    EditResult,
+    FileDownloadResponse,
+    FileUploadResponse,
+    GlobResult,
+    GrepResult,
+    LsResult,
+    ReadResult,
+    WriteResult,
+)
+
+from src.backends.pool import get_pool
+
+
+@contextmanager
+def project_transaction(project: Optional[str] = None):
+    """Scope a step's ``/project/`` writes to one atomic commit.
+
+    Writes made by the agent inside the block are buffered in memory and
+    applied together when the block exits normally. If the block raises,
+    the buffer is discarded and the frontend tree is left untouched.
+    Backends created inside the block route to ``project``.
+
+    Args:
+        project: Project name from its config (default: the only configured
+            project, or the one selected by an enclosing ``use()``)
+
+    Yields:
+        The transactional ``/project/`` backend
+    """
+    with get_pool().use(get_pool().resolve(project)) as backends:
+        with backends.project.transaction() as transaction:
+            yield transaction
+
+
+def _configured_project() -> Optional[str]:
+    """The ``project`` of the running graph's ``configurable`` config, if any."""
+    from langgraph.config import get_config
+
+    try:
+        return get_config().get("configurable", {}).get("project")
+    except RuntimeError:  # not called from inside a graph run
+        return None
+
+
+class ProjectRoute(BackendProtocol):
+    """Route backend that forwards to the current project's backend.
+
+    The project is resolved on every call: the ``project`` key of the run's
+    ``configurable`` config, else the enclosing ``BackendPool.use()`` block
+    (``project_transaction`` opens one), else the only configured project.
+    One composite backend instance can therefore serve every project.
+
+    Attributes:
+        role: ``"agent"`` or ``"project"``, the ``ProjectBackends`` field to use
+    """
+
+    def __init__(self, role: str):
+        if role not in ("agent", "project"):
+            raise ValueError(f"Unknown route role '{role}'")
+        self.role = role
+
+    @property
+    def target(self) -> BackendProtocol:
+        """The backend of the project selected for the current call."""
+        return getattr(get_pool().get(_configured_project()), self.role)
+
+    def __getattr__(self, name):
+        if name == "role":
+            raise AttributeError(name)
+        return getattr(self.target, name)
+
+    def ls(self, path: str) -> LsResult:
+        return self.target.ls(path)
+
+    def read(self, file_path: str, offset: int = 0, limit: int = 2000) -> ReadResult:
+        return self.target.read(file_path, offset, limit)
+
+    def grep(
+        self,
+        pattern: str,
+        path: str | None = None,
+        glob: str | None = None,
+        *,
+        max_count: int | None = None,
+    ) -> GrepResult:
+        return self.target.grep(pattern, path, glob, max_count=max_count)
+
+    def glob(self, pattern: str, path: str | None = None) -> GlobResult:
+        return self.target.glob(pattern, path)
+
+    def write(self, file_path: str, content: str) -> WriteResult:
+        return self.target.write(file_path, content)
+
+    def edit(
+        self,
+        file_path: str,
+        old_string: str,
+        new_string: str,
+        replace_all: bool = False,
+    ) -> EditResult:
+        return self.target.edit(file_path, old_string, new_string, replace_all)
+
+    def delete(self, file_path: str) -> DeleteResult:
+        return self.target.delete(file_path)
+
+    def upload_files(self, files: list[tuple[str, bytes]]) -> list[FileUploadResponse]:
+        return self.target.upload_files(files)
+
+    def download_files(self, paths: list[str]) -> list[FileDownloadResponse]:
+        return self.target.download_files(paths)
+
+
+def create_backend() -> CompositeBackend:
+    """Create the composite backend shared by every run of the orchestrator.
+
+    Returns:
+        CompositeBackend routing ``/agent/`` and ``/project/`` to disk (the
+        project is picked per call, see ``ProjectRoute``) and everything
+        else to agent state
+    """
+    return CompositeBackend(
+        default=StateBackend(),
+        routes={
+            "/agent/": ProjectRoute("agent"),
+            "/project/": ProjectRoute("project"),
+        },
+    )
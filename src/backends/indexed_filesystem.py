@@ -0,0 +1,202 @@
+"""Filesystem backend that answers grep and glob from a trigram index.
+
+``IndexedFilesystemBackend`` behaves exactly like deepagents'
+``FilesystemBackend`` for reads and writes. Literal grep and glob calls are
+served from a ``TrigramIndex`` when it can answer them, and fall back to the
+regular directory walk otherwise (index still building, pattern shorter than
+three bytes, searches inside excluded directories, grep context lines).
+
+Paths may contain Next.js catch-all segments (``[...slug]``, ``[[...slug]]``):
+only a ``..`` segment counts as traversal, where ``FilesystemBackend``
+rejects any path containing ``..``.
+"""
+
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from deepagents.backends import FilesystemBackend
+from deepagents.backends.filesystem import _raise_if_symlink_loop
+from deepagents.backends.protocol import DeleteResult, EditResult, GlobResult, GrepMatch, GrepResult, WriteResult
+from deepagents.backends.utils import InvalidGlobPatternError, compile_grep_include_glob
+
+from src.backends.paths import relative_search_root, relative_to
+from src.backends.trigram_index import TrigramIndex, iter_matching_lines
+
+
+class IndexedFilesystemBackend(FilesystemBackend):
+    """``FilesystemBackend`` with trigram-indexed ``grep`` and ``glob``.
+
+    The index only supports ``virtual_mode=True`` roots; with
+    ``virtual_mode=False`` every call goes straight to the parent class.
+    """
+
+    def __init__(
+        self,
+        root_dir: str | Path | None = None,
+        virtual_mode: bool = True,
+        max_file_size_mb: int = 10,
+        *,
+        index: Optional[TrigramIndex] = None,
+        index_dir: str | Path | None = None,
+        refresh_interval: float = 30.0,
+        build_in_background: bool = True,
+    ):
+        """Initialize the backend and kick off the index build.
+
+        Args:
+            root_dir: Root directory of the project tree
+            virtual_mode: Virtual path mode, see ``FilesystemBackend``
+            max_file_size_mb: Size cap of indexed files and of the fallback grep
+            index: Pre-built index to share between backends on the same root
+            index_dir: Where to persist the index (default: per-root cache dir)
+            refresh_interval: Seconds after which a query triggers a background
+                refresh to pick up edits made outside this backend
+            build_in_background: Start the initial refresh immediately
+        """
+        super().__init__(root_dir=root_dir, virtual_mode=virtual_mode, max_file_size_mb=max_file_size_mb)
+        self.index = index or TrigramIndex(self.cwd, index_dir=index_dir, max_file_size=max_file_size_mb * 1024 * 1024)
+        self.refresh_interval = refresh_interval
+        if build_in_background:
+            self.index.refresh_in_background()
+
+    def _resolve_path(self, key: str) -> Path:
+        """Resolve a virtual path, rejecting ``..`` segments rather than any ``..``.
+
+        Raises:
+            ValueError: If the path traverses upwards or resolves outside the root
+        """
+        if not self.virtual_mode:
+            return super()._resolve_path(key)
+        vpath = key if key.startswith("/") else "/" + key
+        if ".." in vpath.replace("\\", "/").split("/") or vpath.startswith("~"):
+            raise ValueError("Path traversal not allowed")
+        full = (self.cwd / vpath.lstrip("/")).resolve()
+        try:
+            full.relative_to(self.cwd)
+        except ValueError:
+            raise ValueError(f"Path:{full} outside root directory: {self.cwd}") from None
+        _raise_if_symlink_loop(full)
+        return full
+
+    def _usable_index(self) -> Optional[TrigramIndex]:
+        """Return the index if it can serve queries, scheduling a refresh if stale."""
+        if not self.virtual_mode:
+            return None
+        if time.time() - self.index.last_refresh > self.refresh_interval:
+            self.index.refresh_in_background()
+        return self.index if self.index.ready else None
+
+    def grep(
+        self,
+        pattern: str,
+        path: str | None = None,
+        glob: str | None = None,
+        *,
+        max_count: int | None = None,
+        context_lines: int = 0,
+    ) -> GrepResult:
+        """Search for a literal text pattern, using the trigram index when possible.
+
+        Args:
+            pattern: Literal string to search for (NOT regex)
+            path: Directory or file path to search in (default: root)
+            glob: Optional glob pattern to filter which files to search
+            max_count: Optional total cap on returned matches across all files
+            context_lines: Context lines around each match (disables the index)
+
+        Returns:
+            ``GrepResult`` with matches sorted by path and line number
+        """
+        index = self._usable_index()
+        search_root = relative_search_root(path)
+        if index is None or context_lines or index.is_excluded(search_root + "/"):
+            return super().grep(pattern, path, glob, max_count=max_count, context_lines=context_lines)
+
+        glob_refusal = self._refused_grep_glob_error(glob)
+        if glob_refusal is not None:
+            return GrepResult(error=glob_refusal, matches=[])
+        candidates = index.candidates(pattern)
+        if candidates is None:
+            return super().grep(pattern, path, glob, max_count=max_count)
+
+        matcher = compile_grep_include_glob(glob) if glob else None
+        matches: list[GrepMatch] = []
+        for rel in candidates:
+            scoped = relative_to(rel, search_root)
+            if scoped is None or (matcher is not None and not matcher(scoped)):
+                continue
+            for line_number, text in iter_matching_lines(str(self.cwd / rel), pattern):
+                if max_count is not None and len(matches) >= max_count:
+                    return GrepResult(matches=matches, truncated=True)
+                matches.append({"path": "/" + rel, "line": line_number, "text": text})
+        return GrepResult(matches=matches)
+
+    def glob(self, pattern: str, path: str | None = None) -> GlobResult:
+        """Find files matching a glob pattern, using the indexed file list when possible.
+
+        Args:
+            pattern: Glob pattern (same contract as ``FilesystemBackend.glob``)
+            path: Base directory to search from (default: root)
+
+        Returns:
+            ``GlobResult`` with matching files sorted by path
+        """
+        index = self._usable_index()
+        search_root = relative_search_root(path)
+        if index is None or index.is_excluded(search_root + "/"):
+            return super().glob(pattern, path)
+
+        try:
+            matcher = compile_grep_include_glob(pattern)
+        except InvalidGlobPatternError as e:
+            return GlobResult(error=str(e), matches=None)
+        files = index.files()
+        if files is None:
+            return super().glob(pattern, path)
+
+        prefix = search_root + "/" if search_root else ""
+        results = [
+            {
+                "path": "/" + rel,
+                "is_dir": False,
+                "size": size,
+                "modified_at": datetime.fromtimestamp(mtime_ns / 1e9).isoformat(),
+            }
+            for rel, size, mtime_ns in files
+            if rel.startswith(prefix) and matcher(rel[len(prefix):])
+        ]
+        return GlobResult(matches=results)
+
+    def write(self, file_path: str, content: str) -> WriteResult:
+        """Write a file and mark it dirty in the index."""
+        result = super().write(file_path, content)
+        if result.error is None:
+            self.index.mark_dirty(file_path)
+        return result
+
+    def edit(
+        self,
+        file_path: str,
+        old_string: str,
+        new_string: str,
+        replace_all: bool = False,
+    ) -> EditResult:
+        """Edit a file and mark it dirty in the index."""
+        result = super().edit(file_path, old_string, new_string, replace_all)
+        if result.error is None:
+            self.index.mark_dirty(file_path)
+        return result
+
+    def delete(self, file_path: str) -> DeleteResult:
+        """Delete a file or directory and mark what it removed dirty in the index."""
+        prefix = file_path.strip("/") + "/"
+        files = self.index.files() or []
+        result = super().delete(file_path)
+        if result.error is None:
+            self.index.mark_dirty(file_path)
+            for rel, _, _ in files:
+                if rel.startswith(prefix):
+                    self.index.mark_dirty(rel)
+        return result
@@ -0,0 +1,407 @@
+"""Per-path locking and optimistic version checks for shared project roots.
+
+Two steps working on the same ``/project/`` tree can read-modify-write the
+same component and silently lose one side's changes. This module provides:
+- ``PathLockManager``: per-path reader/writer locks, held in-process with a
+  condition variable and across processes with lock files (``fcntl.flock``
+  on POSIX, ``msvcrt.locking`` on Windows, where readers lock exclusively)
+- ``LockingBackend``: a ``FilesystemBackend`` wrapper that reads under a
+  read lock, records the content hash it saw, and only writes under a write
+  lock when the file on disk still has that hash
+
+A stale write is refused with a precise conflict message naming the file and
+both hashes; the agent has to re-read the file and redo its change.
+``TransactionalBackend`` uses ``guarded_commit`` to apply the same check to a
+whole buffered batch at commit time.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from deepagents.backends import FilesystemBackend
+from deepagents.backends.protocol import (
+    BackendProtocol,
+    DeleteResult,
+    EditResult,
+    FileDownloadResponse,
+    FileUploadResponse,
+    GlobResult,
+    GrepResult,
+    LsResult,
+    ReadResult,
+    WriteResult,
+)
+
+from src.backends.write_buffer import CommitError
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Seconds to wait for a lock before giving up
+DEFAULT_LOCK_TIMEOUT = 30.0
+
+_POLL_INTERVAL = 0.01
+
+
+class LockTimeout(TimeoutError):
+    """Raised when a path lock could not be acquired in time."""
+
+
+class ConflictError(CommitError):
+    """Raised when a file changed on disk after the step read it."""
+
+    def __init__(self, path: str, expected: Optional[str], actual: Optional[str]):
+        self.path = path
+        self.expected = expected
+        self.actual = actual
+        super().__init__(conflict_message(path, expected, actual))
+
+
+def conflict_message(path: str, expected: Optional[str], actual: Optional[str]) -> str:
+    """Describe a version conflict for the agent."""
+    seen = expected[:12] if expected else "missing"
+    now = actual[:12] if actual else "deleted"
+    return (
+        f"Conflict: '{path}' was changed by another run since it was read "
+        f"(read version {seen}, current version {now}). Re-read the file and apply the change again."
+    )
+
+
+def default_lock_dir(root: Path) -> Path:
+    """Return the lock file directory for ``root``.
+
+    Honours ``LITIUM_LOCK_DIR``; otherwise uses a per-root folder under
+    ``~/.cache/litiumdeepagents/locks`` so the project tree stays clean.
+    """
+    base = os.environ.get("LITIUM_LOCK_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "litiumdeepagents", "locks"
+    )
+    digest = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:16]
+    return Path(base) / digest
+
+
+def content_version(data: Optional[bytes]) -> Optional[str]:
+    """Return the version (SHA-256 hex) of file bytes, None for a missing file."""
+    return None if data is None else hashlib.sha256(data).hexdigest()
+
+
+class _RWLock:
+    """Writer-preferring reader/writer lock."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+        self.users = 0
+
+    def acquire(self, exclusive: bool, deadline: float) -> bool:
+        with self._cond:
+            if exclusive:
+                self._waiting_writers += 1
+                try:
+                    while self._writer or self._readers:
+                        if not self._cond.wait(max(deadline - time.monotonic(), 0)) and time.monotonic() >= deadline:
+                            return False
+                    self._writer = True
+                finally:
+                    self._waiting_writers -= 1
+            else:
+                while self._writer or self._waiting_writers:
+                    if not self._cond.wait(max(deadline - time.monotonic(), 0)) and time.monotonic() >= deadline:
+                        return False
+                self._readers += 1
+            return True
+
+    def release(self, exclusive: bool) -> None:
+        with self._cond:
+            if exclusive:
+                self._writer = False
+            else:
+                self._readers -= 1
+            self._cond.notify_all()
+
+
+class PathLockManager:
+    """Reader/writer locks per virtual path, within and across processes.
+
+    Attributes:
+        lock_dir: Directory holding one lock file per locked path, or None
+            for in-process locking only
+        timeout: Default seconds to wait for a lock
+    """
+
+    def __init__(self, lock_dir: str | Path | None = None, timeout: float = DEFAULT_LOCK_TIMEOUT):
+        self.lock_dir = Path(lock_dir) if lock_dir else None
+        self.timeout = timeout
+        self._locks: dict[str, _RWLock] = {}
+        self._guard = threading.Lock()
+        if self.lock_dir is not None:
+            self.lock_dir.mkdir(parents=True, exist_ok=True)
+
+    def _local(self, path: str) -> _RWLock:
+        with self._guard:
+            lock = self._locks.get(path)
+            if lock is None:
+                lock = self._locks[path] = _RWLock()
+            lock.users += 1
+            return lock
+
+    def _forget(self, path: str, lock: _RWLock) -> None:
+        with self._guard:
+            lock.users -= 1
+            if lock.users == 0:
+                self._locks.pop(path, None)
+
+    def _file_lock(self, path: str, exclusive: bool, deadline: float) -> Optional[int]:
+        if self.lock_dir is None:
+            return None
+        name = hashlib.sha1(path.encode("utf-8")).hexdigest() + ".lock"
+        fd = os.open(self.lock_dir / name, os.O_RDWR | os.O_CREAT, 0o644)
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                return fd
+            except OSError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise LockTimeout(f"Timed out waiting for the lock on '{path}' held by another process")
+                time.sleep(_POLL_INTERVAL)
+
+    @staticmethod
+    def _file_unlock(fd: Optional[int]) -> None:
+        if fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    @contextmanager
+    def _hold(self, path: str, exclusive: bool, timeout: Optional[float]) -> Iterator[None]:
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        lock = self._local(path)
+        try:
+            if not lock.acquire(exclusive, deadline):
+                raise LockTimeout(f"Timed out waiting for the {'write' if exclusive else 'read'} lock on '{path}'")
+            try:
+                fd = self._file_lock(path, exclusive, deadline)
+                try:
+                    yield
+                finally:
+                    self._file_unlock(fd)
+            finally:
+                lock.release(exclusive)
+        finally:
+            self._forget(path, lock)
+
+    def read_lock(self, path: str, timeout: Optional[float] = None):
+        """Hold a shared lock on ``path`` for the duration of the block."""
+        return self._hold(path, False, timeout)
+
+    def write_lock(self, path: str, timeout: Optional[float] = None):
+        """Hold an exclusive lock on ``path`` for the duration of the block."""
+        return self._hold(path, True, timeout)
+
+    @contextmanager
+    def write_locks(self, paths: Iterable[str], timeout: Optional[float] = None) -> Iterator[None]:
+        """Hold exclusive locks on several paths, acquired in sorted order."""
+        with ExitStack() as stack:
+            for path in sorted(set(paths)):
+                stack.enter_context(self.write_lock(path, timeout))
+            yield
+
+
+def _virtual(path: str) -> str:
+    return "/" + path.replace("\\", "/").strip("/")
+
+
+class LockingBackend(BackendProtocol):
+    """Serialize access to a ``FilesystemBackend`` per path and refuse stale writes.
+
+    Versions seen by reads are tracked per ``session()`` (one per step), so a
+    step only conflicts with changes it did not see. Attributes not defined
+    here (``cwd``, ``index``, ``_resolve_path``...) are forwarded to ``inner``.
+
+    Attributes:
+        inner: The wrapped filesystem backend
+        locks: The lock manager shared by every backend on the same root
+    """
+
+    def __init__(self, inner: FilesystemBackend, locks: Optional[PathLockManager] = None):
+        """Wrap ``inner``.
+
+        Args:
+            inner: Filesystem backend that owns the tree on disk
+            locks: Lock manager to share; by default one with lock files
+                under ``default_lock_dir(inner.cwd)``
+        """
+        self.inner = inner
+        self.locks = locks or PathLockManager(default_lock_dir(inner.cwd))
+        self._default_versions: dict[str, Optional[str]] = {}
+        self._versions: ContextVar[Optional[dict]] = ContextVar(f"versions_{id(self)}", default=None)
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    @contextmanager
+    def session(self) -> Iterator["LockingBackend"]:
+        """Track read versions separately for the duration of the block."""
+        token = self._versions.set({})
+        try:
+            yield self
+        finally:
+            self._versions.reset(token)
+
+    def _seen(self) -> dict[str, Optional[str]]:
+        versions = self._versions.get()
+        return self._default_versions if versions is None else versions
+
+    def _disk_version(self, path: str) -> Optional[str]:
+        target = self.inner._resolve_path(path)
+        return content_version(target.read_bytes()) if target.is_file() else None
+
+    def observe(self, path: str, data: Optional[bytes]) -> None:
+        """Record that the current session saw ``data`` (None: missing) at ``path``."""
+        self._seen()[_virtual(path)] = content_version(data)
+
+    def check(self, path: str) -> Optional[str]:
+        """Return a conflict message if ``path`` changed since this session read it.
+
+        Must be called while holding the path's write lock.
+        """
+        path = _virtual(path)
+        seen = self._seen()
+        if path not in seen:
+            return None
+        current = self._disk_version(path)
+        if current != seen[path]:
+            return conflict_message(path, seen[path], current)
+        return None
+
+    @contextmanager
+    def guarded_commit(self, paths: Iterable[str]) -> Iterator[None]:
+        """Write-lock ``paths`` and verify none changed since this session read them.
+
+        Raises:
+            ConflictError: For the first path whose on-disk version moved
+            LockTimeout: If the locks could not be acquired in time
+        """
+        paths = [_virtual(p) for p in paths]
+        with self.locks.write_locks(paths):
+            seen = self._seen()
+            for path in sorted(paths):
+                if path in seen:
+                    current = self._disk_version(path)
+                    if current != seen[path]:
+                        raise ConflictError(path, seen[path], current)
+            yield
+            for path in paths:
+                seen[path] = self._disk_version(path)
+
+    def read(self, file_path: str, offset: int = 0, limit: int = 2000) -> ReadResult:
+        """Read a file under its read lock and record the version seen."""
+        path = _virtual(file_path)
+        try:
+            with self.locks.read_lock(path):
+                result = self.inner.read(file_path, offset, limit)
+                version = self._disk_version(path)
+        except (LockTimeout, OSError, ValueError) as e:
+            return ReadResult(error=f"Error reading file '{file_path}': {e}")
+        self._seen()[path] = version
+        return result
+
+    def write(self, file_path: str, content: str) -> WriteResult:
+        """Write a file if it has not changed since this session read it."""
+        path = _virtual(file_path)
+        try:
+            with self.locks.write_lock(path):
+                conflict = self.check(path)
+                if conflict:
+                    return WriteResult(error=conflict)
+                result = self.inner.write(file_path, content)
+                if result.error is None:
+                    self._seen()[path] = self._disk_version(path)
+                return result
+        except (LockTimeout, OSError, ValueError) as e:
+            return WriteResult(error=f"Error writing file '{file_path}': {e}")
+
+    def edit(
+        self,
+        file_path: str,
+        old_string: str,
+        new_string: str,
+        replace_all: bool = False,
+    ) -> EditResult:
+        """Edit a file if it has not changed since this session read it."""
+        path = _virtual(file_path)
+        try:
+            with self.locks.write_lock(path):
+                conflict = self.check(path)
+                if conflict:
+                    return EditResult(error=conflict)
+                result = self.inner.edit(file_path, old_string, new_string, replace_all)
+                if result.error is None:
+                    self._seen()[path] = self._disk_version(path)
+                return result
+        except (LockTimeout, OSError, ValueError) as e:
+            return EditResult(error=f"Error editing file '{file_path}': {e}")
+
+    def delete(self, file_path: str) -> DeleteResult:
+        """Delete a file if it has not changed since this session read it."""
+        path = _virtual(file_path)
+        try:
+            with self.locks.write_lock(path):
+                conflict = self.check(path)
+                if conflict:
+                    return DeleteResult(error=conflict)
+                result = self.inner.delete(file_path)
+                if result.error is None:
+                    self._seen()[path] = None
+                return result
+        except (LockTimeout, OSError, ValueError) as e:
+            return DeleteResult(error=f"Error deleting file '{file_path}': {e}")
+
+    def ls(self, path: str) -> LsResult:
+        """List a directory (no locking needed)."""
+        return self.inner.ls(path)
+
+    def grep(
+        self,
+        pattern: str,
+        path: str | None = None,
+        glob: str | None = None,
+        *,
+        max_count: int | None = None,
+    ) -> GrepResult:
+        """Search file contents (not locked; results are a snapshot)."""
+        return self.inner.grep(pattern, path, glob, max_count=max_count)
+
+    def glob(self, pattern: str, path: str | None = None) -> GlobResult:
+        """Find files matching a glob pattern."""
+        return self.inner.glob(pattern, path)
+
+    def upload_files(self, files: list[tuple[str, bytes]]) -> list[FileUploadResponse]:
+        """Upload files, each under its write lock."""
+        with self.locks.write_locks(_virtual(path) for path, _ in files):
+            return self.inner.upload_files(files)
+
+    def download_files(self, paths: list[str]) -> list[FileDownloadResponse]:
+        """Download files (not locked)."""
+        return self.inner.download_files(paths)
@@ -0,0 +1,32 @@
+"""Virtual path helpers shared by the project backends.
+
+Backends routed by ``CompositeBackend`` receive virtual paths such as
+``/components/products`` with the route prefix already stripped. These helpers
+convert them to root-relative POSIX paths ('' meaning the root itself).
+"""
+
+from pathlib import PurePosixPath
+from typing import Optional
+
+
+def relative_search_root(path: Optional[str]) -> str:
+    """Normalize a virtual search path to a root-relative prefix ('' = root)."""
+    if path is None:
+        return ""
+    rel = path.replace("\\", "/").strip("/")
+    return "" if rel == "." else rel
+
+
+def relative_to(relpath: str, root: str) -> Optional[str]:
+    """Return ``relpath`` relative to the search ``root``, or None if outside it.
+
+    A search root that names a file matches that file, relative to which the
+    path is just its basename (the same convention ripgrep uses for globs).
+    """
+    if not root:
+        return relpath
+    if relpath == root:
+        return PurePosixPath(relpath).name
+    if relpath.startswith(root + "/"):
+        return relpath[len(root) + 1:]
+    return None
@@ -0,0 +1,261 @@
+"""Config-driven pool of per-project filesystem backends.
+
+Each storefront is described by a ``workingproject.config`` file (JSON with
+``project_name``, ``frontend``, ``backend``...). ``BackendPool`` loads one
+or more of them and keeps one set of backends per project:
+- ``/project/``: the project's ``frontend`` tree (indexed, locked and
+  transactional, see ``src.backends.factory``)
+- ``/agent/``: the project's agent workspace, ``agent_root`` from the config
+  or ``<LITIUM_AGENT_BASE>/<project_name>``
+
+Roots are checked when a project's backends are built: a Windows drive path
+(``C:/...``) on another platform is refused instead of being created as a
+relative ``C:`` directory.
+
+Backends are built on first use and reused afterwards, so the trigram index
+and lock manager of a project are shared by every step that targets it. The
+project a step targets is selected with ``BackendPool.use(name)`` (or the
+``project`` key of the run's ``configurable`` config); a pool with a single
+project uses it by default.
+"""
+
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from deepagents.backends import FilesystemBackend
+
+from src.backends.indexed_filesystem import IndexedFilesystemBackend
+from src.backends.locking import LockingBackend
+from src.backends.write_buffer import TransactionalBackend
+
+
+# Parent of the per-project agent workspaces when a config has no agent_root
+DEFAULT_AGENT_BASE = os.environ.get(
+    "LITIUM_AGENT_BASE",
+    "C:/litiumdeepagents/ecom" if os.name == "nt" else os.path.expanduser("~/litiumdeepagents/ecom"),
+)
+
+# Config files loaded by the default pool (os.pathsep-separated)
+CONFIG_ENV = "LITIUM_PROJECT_CONFIGS"
+DEFAULT_CONFIG = "workingproject.config"
+
+_current_project: ContextVar[Optional[str]] = ContextVar("current_project", default=None)
+
+
+_DRIVE = re.compile(r"^[A-Za-z]:(/|$)")
+
+
+def _foreign_drive(path: str) -> bool:
+    """Whether ``path`` is a Windows drive path while not running on Windows."""
+    return os.name != "nt" and bool(_DRIVE.match(path))
+
+
+def _normalize(path: str) -> str:
+    """Turn a config path (possibly with backslashes) into an absolute POSIX-style path.
+
+    Windows drive paths are kept as they are on other platforms, where
+    ``abspath`` would make them relative to the working directory.
+    """
+    path = path.replace("\\", "/")
+    return path if _foreign_drive(path) else os.path.abspath(path)
+
+
+@dataclass(frozen=True)
+class ProjectConfig:
+    """Roots of one storefront project.
+
+    Attributes:
+        name: ``project_name`` from the config
+        frontend_root: Next.js tree served under ``/project/``
+        agent_root: Agent workspace served under ``/agent/``
+        backend_root: Litium backend tree (not routed, kept for tools)
+        settings: The full parsed config
+    """
+
+    name: str
+    frontend_root: str
+    agent_root: str
+    backend_root: Optional[str] = None
+    settings: dict = field(default_factory=dict, compare=False, repr=False)
+
+    @classmethod
+    def from_dict(cls, data: dict, agent_base: str = DEFAULT_AGENT_BASE) -> "ProjectConfig":
+        """Build a config from parsed ``workingproject.config`` JSON.
+
+        Raises:
+            ValueError: If ``project_name`` or ``frontend`` is missing
+        """
+        missing = [key for key in ("project_name", "frontend") if not data.get(key)]
+        if missing:
+            raise ValueError(f"Project config is missing {', '.join(missing)}")
+        name = data["project_name"]
+        return cls(
+            name=name,
+            frontend_root=_normalize(data["frontend"]),
+            agent_root=_normalize(data.get("agent_root") or f"{agent_base}/{name}"),
+            backend_root=_normalize(data["backend"]) if data.get("backend") else None,
+            settings=data,
+        )
+
+    @classmethod
+    def from_file(cls, path: str | Path, agent_base: str = DEFAULT_AGENT_BASE) -> "ProjectConfig":
+        """Load a ``workingproject.config`` file."""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        try:
+            return cls.from_dict(data, agent_base)
+        except ValueError as e:
+            raise ValueError(f"{path}: {e}") from e
+
+
+@dataclass
+class ProjectBackends:
+    """The shared backends of one project."""
+
+    config: ProjectConfig
+    agent: FilesystemBackend
+    project: TransactionalBackend
+
+
+class BackendPool:
+    """Build and reuse backends for every configured project."""
+
+    def __init__(self, configs: Iterable[ProjectConfig] = ()):
+        self._configs: dict[str, ProjectConfig] = {}
+        self._backends: dict[str, ProjectBackends] = {}
+        self._lock = threading.Lock()
+        for config in configs:
+            self.add(config)
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str | Path], agent_base: str = DEFAULT_AGENT_BASE) -> "BackendPool":
+        """Create a pool from ``workingproject.config`` files."""
+        return cls(ProjectConfig.from_file(path, agent_base) for path in paths)
+
+    def add(self, config: ProjectConfig) -> None:
+        """Register a project (replacing an unused one with the same name).
+
+        Raises:
+            ValueError: If a project with that name already has live backends
+        """
+        with self._lock:
+            if config.name in self._backends and self._configs[config.name] != config:
+                raise ValueError(f"Project '{config.name}' is already in use with different roots")
+            self._configs[config.name] = config
+
+    def remove(self, name: str) -> None:
+        """Unregister a project and drop its backends (a no-op for unknown names)."""
+        with self._lock:
+            self._configs.pop(name, None)
+            self._backends.pop(name, None)
+
+    @property
+    def projects(self) -> list[str]:
+        """Names of the configured projects."""
+        return sorted(self._configs)
+
+    def resolve(self, name: Optional[str] = None) -> str:
+        """Return the project to use: ``name``, the current ``use()`` block, or the only project.
+
+        Raises:
+            LookupError: If no project can be determined or it is unknown
+        """
+        name = name or _current_project.get()
+        if name is None:
+            if len(self._configs) != 1:
+                raise LookupError(
+                    f"No project selected; choose one of: {', '.join(self.projects) or '(none configured)'}"
+                )
+            return next(iter(self._configs))
+        if name not in self._configs:
+            raise LookupError(f"Unknown project '{name}'; configured: {', '.join(self.projects) or '(none)'}")
+        return name
+
+    def config(self, name: Optional[str] = None) -> ProjectConfig:
+        """Return a project's config without building its backends."""
+        return self._configs[self.resolve(name)]
+
+    def get(self, name: Optional[str] = None) -> ProjectBackends:
+        """Return (building on first use) the backends of a project.
+
+        Raises:
+            LookupError: If the project cannot be resolved
+            ValueError: If a root of the project cannot exist on this platform
+        """
+        name = self.resolve(name)
+        with self._lock:
+            backends = self._backends.get(name)
+            if backends is None:
+                config = self._configs[name]
+                for setting, root in (
+                    ("frontend", config.frontend_root),
+                    ("agent_root (or LITIUM_AGENT_BASE)", config.agent_root),
+                ):
+                    if _foreign_drive(root):
+                        raise ValueError(
+                            f"Project '{name}': '{root}' is a Windows path; set {setting} to a path on this machine"
+                        )
+                backends = self._backends[name] = ProjectBackends(
+                    config=config,
+                    agent=FilesystemBackend(root_dir=config.agent_root, virtual_mode=True),
+                    project=TransactionalBackend(
+                        LockingBackend(IndexedFilesystemBackend(root_dir=config.frontend_root, virtual_mode=True))
+                    ),
+                )
+            return backends
+
+    @contextmanager
+    def use(self, name: str) -> Iterator[ProjectBackends]:
+        """Route backend requests made inside the block to project ``name``."""
+        backends = self.get(name)
+        token = _current_project.set(backends.config.name)
+        try:
+            yield backends
+        finally:
+            _current_project.reset(token)
+
+    def for_runtime(self, runtime: Any) -> ProjectBackends:
+        """Return the backends for a tool runtime, honouring ``configurable.project``."""
+        return self.get(runtime_project(runtime))
+
+
+def runtime_project(runtime: Any) -> Optional[str]:
+    """The ``configurable.project`` of a tool runtime's run config, if any."""
+    config = getattr(runtime, "config", None) or {}
+    return config.get("configurable", {}).get("project")
+
+
+def config_paths() -> list[Path]:
+    """Return the config files of the default pool.
+
+    ``LITIUM_PROJECT_CONFIGS`` lists them (separated by ``os.pathsep``);
+    otherwise ``workingproject.config`` in the working directory or the
+    repository root is used.
+    """
+    configured = os.environ.get(CONFIG_ENV)
+    if configured:
+        return [Path(p) for p in configured.split(os.pathsep) if p]
+    for base in (Path.cwd(), Path(__file__).resolve().parents[2]):
+        if (base / DEFAULT_CONFIG).is_file():
+            return [base / DEFAULT_CONFIG]
+    return []
+
+
+_pool: Optional[BackendPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> BackendPool:
+    """Return the process-wide pool, loading the configs on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BackendPool.from_files(config_paths())
+        return _pool
@@ -0,0 +1,554 @@
+"""Trigram index over a project tree for fast literal grep and glob.
+
+This module implements a small codesearch-style index:
+- Every indexed file is broken into the set of byte trigrams it contains
+- Postings (trigram -> sorted doc ids) live in a single file that is
+  memory-mapped read-only, so the index costs page cache rather than heap
+- A literal query is answered by intersecting the postings of its trigrams
+  and verifying only the surviving candidate files
+
+The index is refreshed incrementally from file mtimes. Changed and new files
+are extracted in a process pool into temporary segments which are merged with
+the existing postings; stale doc ids are tombstoned instead of rewritten and
+the index is compacted once tombstones dominate.
+"""
+
+import bisect
+import hashlib
+import heapq
+import json
+import logging
+import mmap
+import os
+import stat
+import struct
+import threading
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Directories never worth indexing in a Next.js tree
+DEFAULT_EXCLUDED_DIRS = frozenset({"node_modules", ".git", ".next", ".turbo"})
+
+# Files larger than this are listed (for glob) but not searchable
+DEFAULT_MAX_FILE_SIZE = 1024 * 1024
+
+# Below this many changed files the extraction runs inline instead of
+# paying for process pool start-up
+INLINE_EXTRACTION_THRESHOLD = 64
+
+# Files per worker segment
+SEGMENT_CHUNK_SIZE = 512
+
+# Compact (full rebuild) once this fraction of doc ids are tombstones
+COMPACTION_RATIO = 0.3
+
+_MAGIC = b"LTRGM001"
+_HEADER = struct.Struct("<II")
+_HEADER_SIZE = len(_MAGIC) + _HEADER.size
+_UINT32 = "I" if array("I").itemsize == 4 else "L"
+
+_SEARCHABLE = 1
+_DELETED = 2
+
+
+def default_index_dir(root: Path) -> Path:
+    """Return the cache directory used for the index of ``root``.
+
+    Honours ``LITIUM_INDEX_DIR``; otherwise uses a per-root folder under
+    ``~/.cache/litiumdeepagents/trigram`` so the project tree itself is
+    never written to.
+    """
+    base = os.environ.get("LITIUM_INDEX_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "litiumdeepagents", "trigram"
+    )
+    digest = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:16]
+    return Path(base) / digest
+
+
+def trigrams_of(data: bytes) -> set[int]:
+    """Return the distinct trigrams of ``data`` packed into 24-bit ints."""
+    return {
+        int.from_bytes(data[i:i + 3], "big")
+        for i in range(len(data) - 2)
+    }
+
+
+def _extract(full_path: str, max_file_size: int) -> Optional[set[int]]:
+    """Read one file and return its trigrams, or None if it is not searchable."""
+    try:
+        with open(full_path, "rb") as f:
+            data = f.read(max_file_size + 1)
+    except OSError:
+        return None
+    if len(data) > max_file_size or b"\0" in data:
+        return None
+    try:
+        data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    return trigrams_of(data)
+
+
+def _write_segment(path: str, postings: dict[int, list[int]]) -> None:
+    """Write a postings map to ``path`` in the on-disk segment format."""
+    keys = array(_UINT32, sorted(postings))
+    offsets = array(_UINT32, [0])
+    flat = array(_UINT32)
+    for key in keys:
+        flat.extend(postings[key])
+        offsets.append(len(flat))
+    with open(path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(_HEADER.pack(len(keys), len(flat)))
+        keys.tofile(f)
+        offsets.tofile(f)
+        flat.tofile(f)
+
+
+def _build_segment(
+    root: str,
+    relpaths: list[str],
+    first_doc_id: int,
+    out_path: str,
+    max_file_size: int,
+) -> list[bool]:
+    """Extract ``relpaths`` into a segment file (runs in a worker process).
+
+    Doc ids are assigned sequentially from ``first_doc_id`` so that segments
+    built for consecutive chunks can be concatenated without re-sorting.
+
+    Returns:
+        Per-file searchable flags in ``relpaths`` order
+    """
+    postings: dict[int, list[int]] = {}
+    searchable = []
+    for doc_id, rel in enumerate(relpaths, first_doc_id):
+        grams = _extract(os.path.join(root, rel), max_file_size)
+        searchable.append(grams is not None)
+        for gram in grams or ():
+            postings.setdefault(gram, []).append(doc_id)
+    _write_segment(out_path, postings)
+    return searchable
+
+
+class _Segment:
+    """Read-only, memory-mapped view of a segment or postings file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"Not a trigram segment: {path}")
+        nkeys, npostings = _HEADER.unpack_from(self._mm, len(_MAGIC))
+        view = memoryview(self._mm)
+        start = _HEADER_SIZE
+        self.keys = view[start:start + 4 * nkeys].cast(_UINT32)
+        start += 4 * nkeys
+        self.offsets = view[start:start + 4 * (nkeys + 1)].cast(_UINT32)
+        start += 4 * (nkeys + 1)
+        self.postings = view[start:start + 4 * npostings].cast(_UINT32)
+
+    def lookup(self, gram: int) -> memoryview:
+        """Return the postings for ``gram`` (empty if absent)."""
+        i = bisect.bisect_left(self.keys, gram)
+        if i == len(self.keys) or self.keys[i] != gram:
+            return self.postings[0:0]
+        return self.postings[self.offsets[i]:self.offsets[i + 1]]
+
+    def raw_postings(self, index: int) -> memoryview:
+        """Return the raw bytes of the postings at key position ``index``."""
+        return self.postings[self.offsets[index]:self.offsets[index + 1]].cast("B")
+
+    def close(self) -> None:
+        for view in (self.keys, self.offsets, self.postings):
+            view.release()
+        self._mm.close()
+
+
+def _merge_segments(segments: list[_Segment], out_path: str) -> None:
+    """K-way merge segments whose doc id ranges are disjoint and ascending.
+
+    Postings for a key are concatenated in segment order, so the result stays
+    sorted as long as ``segments`` is ordered by doc id range.
+    """
+    def tagged(seg_no: int) -> Iterator[tuple[int, int, int]]:
+        for pos, key in enumerate(segments[seg_no].keys):
+            yield key, seg_no, pos
+
+    merged_keys = heapq.merge(*(tagged(n) for n in range(len(segments))))
+    keys = array(_UINT32)
+    offsets = array(_UINT32, [0])
+    tmp_postings = out_path + ".postings"
+    total = 0
+    with open(tmp_postings, "wb") as body:
+        for key, seg_no, pos in merged_keys:
+            if not keys or keys[-1] != key:
+                if keys:
+                    offsets.append(total)
+                keys.append(key)
+            chunk = segments[seg_no].raw_postings(pos)
+            body.write(chunk)
+            total += len(chunk) // 4
+        if keys:
+            offsets.append(total)
+    with open(out_path, "wb") as f, open(tmp_postings, "rb") as body:
+        f.write(_MAGIC)
+        f.write(_HEADER.pack(len(keys), total))
+        keys.tofile(f)
+        offsets.tofile(f)
+        while chunk := body.read(1 << 20):
+            f.write(chunk)
+    os.remove(tmp_postings)
+
+
+class TrigramIndex:
+    """Incrementally maintained trigram index over a directory tree.
+
+    Paths are stored relative to ``root`` using forward slashes. The index is
+    safe to query from many threads while a refresh runs in the background;
+    a refresh builds a new generation on disk and swaps it in atomically.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        index_dir: str | Path | None = None,
+        excluded_dirs: Iterable[str] = DEFAULT_EXCLUDED_DIRS,
+        max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+        max_workers: Optional[int] = None,
+    ):
+        """Initialize the index and load any previously persisted generation.
+
+        Args:
+            root: Directory to index
+            index_dir: Where postings and the manifest are stored
+                (default: ``default_index_dir(root)``)
+            excluded_dirs: Directory names skipped at any depth
+            max_file_size: Files above this size are not searchable
+            max_workers: Process pool size for extraction (default: CPU count)
+        """
+        self.root = Path(root).resolve()
+        self.index_dir = Path(index_dir) if index_dir else default_index_dir(self.root)
+        self.excluded_dirs = frozenset(excluded_dirs)
+        self.max_file_size = max_file_size
+        self.max_workers = max_workers
+
+        self._refresh_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._background: Optional[threading.Thread] = None
+        self._segment: Optional[_Segment] = None
+        self._generation = 0
+        self._paths: list[str] = []
+        self._mtimes: list[int] = []
+        self._sizes: list[int] = []
+        self._flags = bytearray()
+        self._ids: dict[str, int] = {}
+        self._dirty: set[str] = set()
+        self.last_refresh: float = 0.0
+
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+
+    @property
+    def ready(self) -> bool:
+        """Whether a generation of the index is loaded."""
+        return self._segment is not None
+
+    def is_excluded(self, relpath: str) -> bool:
+        """Whether ``relpath`` falls under an excluded directory."""
+        return any(part in self.excluded_dirs for part in relpath.split("/")[:-1])
+
+    def candidates(self, pattern: str) -> Optional[list[str]]:
+        """Return the files that may contain the literal ``pattern``.
+
+        The result is a superset of the true matches among indexed files plus
+        every file written since the last refresh (see ``mark_dirty``).
+
+        Returns:
+            Sorted relative paths, or None if the index cannot narrow the
+            search (not built yet, or the pattern is shorter than a trigram)
+        """
+        data = pattern.encode("utf-8")
+        with self._state_lock:
+            segment = self._segment
+            if segment is None or len(data) < 3:
+                return None
+            postings = sorted((segment.lookup(g) for g in trigrams_of(data)), key=len)
+            doc_ids = set(postings[0])
+            for plist in postings[1:]:
+                if not doc_ids:
+                    break
+                doc_ids.intersection_update(plist)
+            found = {
+                self._paths[d] for d in doc_ids
+                if self._flags[d] == _SEARCHABLE
+            }
+            found.update(self._dirty)
+        return sorted(found)
+
+    def files(self) -> Optional[list[tuple[str, int, int]]]:
+        """Return ``(relpath, size, mtime_ns)`` for every live indexed file.
+
+        Returns:
+            Sorted file entries, or None if the index is not built yet
+        """
+        with self._state_lock:
+            if self._segment is None:
+                return None
+            entries = [
+                (self._paths[d], self._sizes[d], self._mtimes[d])
+                for rel, d in self._ids.items()
+                if rel not in self._dirty
+            ]
+            dirty = list(self._dirty)
+        # Written or deleted since the last refresh: the disk is the truth
+        for rel in dirty:
+            try:
+                st = os.stat(self.root / rel)
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                entries.append((rel, st.st_size, st.st_mtime_ns))
+        return sorted(entries)
+
+    def mark_dirty(self, relpath: str) -> None:
+        """Record that ``relpath`` was written or deleted and must be verified on every query."""
+        with self._state_lock:
+            self._dirty.add(relpath.strip("/"))
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def refresh_in_background(self) -> threading.Thread:
+        """Start (or return the already running) background refresh thread."""
+        with self._state_lock:
+            if self._background is None or not self._background.is_alive():
+                self._background = threading.Thread(
+                    target=self._refresh_logged, name="trigram-index-refresh", daemon=True
+                )
+                self._background.start()
+            return self._background
+
+    def _refresh_logged(self) -> None:
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Trigram index refresh failed for %s", self.root)
+
+    def refresh(self) -> bool:
+        """Bring the index up to date with the tree on disk.
+
+        Returns:
+            True if a new generation was written, False if nothing changed
+        """
+        with self._refresh_lock:
+            started = time.monotonic()
+            dirty_before = set(self._dirty)
+            current = self._scan()
+
+            with self._state_lock:
+                ids = dict(self._ids)
+                mtimes, sizes = self._mtimes, self._sizes
+            changed = sorted(
+                rel for rel, st in current.items()
+                if rel not in ids or (mtimes[ids[rel]], sizes[ids[rel]]) != st
+            )
+            removed = [rel for rel in ids if rel not in current]
+            if not changed and not removed and self._segment is not None:
+                self._clear_dirty(dirty_before)
+                self.last_refresh = time.time()
+                return False
+
+            stale = sum(1 for f in self._flags if f & _DELETED) + len(removed) + len(changed)
+            full = self._segment is None or stale > COMPACTION_RATIO * max(len(current), 1)
+            self._build_generation(current, changed, removed, full)
+            self._clear_dirty(dirty_before)
+            self.last_refresh = time.time()
+            logger.info(
+                "Trigram index for %s: %d file(s) re-indexed (%s) in %.2fs",
+                self.root, len(current) if full else len(changed),
+                "full" if full else "incremental", time.monotonic() - started,
+            )
+            return True
+
+    def _clear_dirty(self, indexed: set[str]) -> None:
+        with self._state_lock:
+            self._dirty.difference_update(indexed)
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        """Walk the tree and return ``relpath -> (mtime_ns, size)``."""
+        found: dict[str, tuple[int, int]] = {}
+        stack = [(str(self.root), "")]
+        while stack:
+            directory, prefix = stack.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_symlink():
+                            continue
+                        if entry.is_dir():
+                            if entry.name not in self.excluded_dirs:
+                                stack.append((entry.path, prefix + entry.name + "/"))
+                        elif entry.is_file():
+                            st = entry.stat()
+                            found[prefix + entry.name] = (st.st_mtime_ns, st.st_size)
+                    except OSError:
+                        continue
+        return found
+
+    def _build_generation(
+        self,
+        current: dict[str, tuple[int, int]],
+        changed: list[str],
+        removed: list[str],
+        full: bool,
+    ) -> None:
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        generation = self._generation + 1
+
+        if full:
+            paths, mtimes, sizes, flags = [], [], [], bytearray()
+            to_index = sorted(current)
+        else:
+            paths = list(self._paths)
+            mtimes = list(self._mtimes)
+            sizes = list(self._sizes)
+            flags = bytearray(self._flags)
+            for rel in removed + changed:
+                doc_id = self._ids.get(rel)
+                if doc_id is not None:
+                    flags[doc_id] |= _DELETED
+            to_index = changed
+
+        first_id = len(paths)
+        chunks = [to_index[i:i + SEGMENT_CHUNK_SIZE] for i in range(0, len(to_index), SEGMENT_CHUNK_SIZE)]
+        segment_paths = [
+            str(self.index_dir / f"segment-{generation}-{n}.tmp") for n in range(len(chunks))
+        ]
+        searchable = self._extract_chunks(chunks, first_id, segment_paths)
+
+        for rel, ok in zip(to_index, searchable):
+            mtime, size = current[rel]
+            paths.append(rel)
+            mtimes.append(mtime)
+            sizes.append(size)
+            flags.append(_SEARCHABLE if ok else 0)
+
+        postings_name = f"postings-{generation}.bin"
+        postings_path = str(self.index_dir / postings_name)
+        inputs = [] if full or self._segment is None else [self._segment]
+        new_segments = [_Segment(p) for p in segment_paths]
+        try:
+            _merge_segments(inputs + new_segments, postings_path)
+        finally:
+            for seg in new_segments:
+                seg.close()
+            for p in segment_paths:
+                os.remove(p)
+
+        manifest = {
+            "version": 1,
+            "root": str(self.root),
+            "generation": generation,
+            "postings": postings_name,
+            "docs": [[p, m, s, f] for p, m, s, f in zip(paths, mtimes, sizes, flags)],
+        }
+        tmp_manifest = self.index_dir / "manifest.json.tmp"
+        tmp_manifest.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(tmp_manifest, self.index_dir / "manifest.json")
+
+        self._install(generation, _Segment(postings_path), paths, mtimes, sizes, flags)
+        self._remove_stale_files(postings_name)
+
+    def _extract_chunks(
+        self, chunks: list[list[str]], first_id: int, out_paths: list[str]
+    ) -> list[bool]:
+        """Build one segment per chunk, in a process pool for large batches."""
+        starts = []
+        next_id = first_id
+        for chunk in chunks:
+            starts.append(next_id)
+            next_id += len(chunk)
+
+        total = next_id - first_id
+        if total < INLINE_EXTRACTION_THRESHOLD:
+            results = [
+                _build_segment(str(self.root), chunk, start, out, self.max_file_size)
+                for chunk, start, out in zip(chunks, starts, out_paths)
+            ]
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = [
+                    pool.submit(_build_segment, str(self.root), chunk, start, out, self.max_file_size)
+                    for chunk, start, out in zip(chunks, starts, out_paths)
+                ]
+                results = [f.result() for f in futures]
+        return [ok for chunk_result in results for ok in chunk_result]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _install(self, generation, segment, paths, mtimes, sizes, flags) -> None:
+        ids = {p: d for d, p in enumerate(paths) if not flags[d] & _DELETED}
+        with self._state_lock:
+            # The previous segment is not closed explicitly: queries that
+            # grabbed it keep it alive and the mapping is released on GC.
+            self._segment = segment
+            self._generation = generation
+            self._paths, self._mtimes, self._sizes = paths, mtimes, sizes
+            self._flags = flags
+            self._ids = ids
+
+    def _load(self) -> None:
+        manifest_path = self.index_dir / "manifest.json"
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+            if manifest.get("version") != 1 or manifest.get("root") != str(self.root):
+                return
+            segment = _Segment(str(self.index_dir / manifest["postings"]))
+        except (OSError, ValueError, KeyError):
+            return
+        docs = manifest["docs"]
+        self._install(
+            manifest["generation"],
+            segment,
+            [d[0] for d in docs],
+            [d[1] for d in docs],
+            [d[2] for d in docs],
+            bytearray(d[3] for d in docs),
+        )
+
+    def _remove_stale_files(self, keep: str) -> None:
+        for entry in self.index_dir.iterdir():
+            if entry.name.startswith(("postings-", "segment-")) and entry.name != keep:
+                try:
+                    entry.unlink()
+                except OSError:
+                    # Still mapped (Windows) or already gone; retried next refresh
+                    pass
+
+
+def iter_matching_lines(full_path: str, pattern: str) -> Iterator[tuple[int, str]]:
+    """Yield ``(line_number, line)`` for lines of a file containing ``pattern``."""
+    try:
+        with open(full_path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if pattern in line:
+                    yield line_number, line.rstrip("\n")
+    except (OSError, UnicodeDecodeError):
+        return
@@ -0,0 +1,540 @@
+"""Transactional write buffer over a filesystem backend.
+
+``TransactionalBackend`` keeps every write, edit and delete of a step in
+memory. Reads, ls, grep and glob see the buffered view, so the agent works
+against its own pending changes while the tree on disk stays untouched.
+
+When the step succeeds, ``commit()`` applies the whole batch at once:
+1. Every new file is written to a temp file next to its target and fsynced
+2. All temp files are renamed over their targets (atomic per file)
+3. Deleted files are renamed aside next to themselves
+4. Each touched directory is fsynced once, then the renamed-aside files are
+   removed, and so are directories deleted as a whole (a directory delete is
+   buffered as the deletion of every file under it)
+
+When the wrapped backend provides ``guarded_commit`` (``LockingBackend``),
+steps 2-4 run under write locks on every touched path, after checking that
+none of them changed on disk since the step read them.
+
+If anything fails before the renames nothing on disk has changed; if a rename
+fails, the files already replaced are restored from their original contents
+and the deleted ones are moved back. ``rollback()`` simply drops the buffer.
+
+Each ``transaction()`` block gets its own buffer (tracked in a context
+variable), so steps running concurrently in one process do not see or commit
+each other's changes. Outside a transaction nothing is buffered: every write,
+edit and delete is committed on its own, straight away. File contents are
+kept byte for byte, line endings included.
+"""
+
+import os
+import threading
+import uuid
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+from deepagents.backends import FilesystemBackend
+from deepagents.backends.protocol import (
+    BackendProtocol,
+    DeleteResult,
+    EditResult,
+    FileData,
+    FileDownloadResponse,
+    FileUploadResponse,
+    GlobResult,
+    GrepMatch,
+    GrepResult,
+    LsResult,
+    ReadResult,
+    WriteResult,
+)
+from deepagents.backends.utils import (
+    InvalidGlobPatternError,
+    compile_grep_include_glob,
+    perform_string_replacement,
+    slice_read_response,
+)
+
+from src.backends.paths import relative_search_root, relative_to
+
+
+class CommitError(RuntimeError):
+    """Raised when a buffered batch could not be applied to disk."""
+
+
+def _virtual(path: str) -> str:
+    """Normalize a virtual path to a leading-slash POSIX form."""
+    return "/" + path.replace("\\", "/").strip("/")
+
+
+def _within(path: str, directory: str) -> bool:
+    """Whether virtual ``path`` is ``directory`` or lies under it."""
+    return path == directory or path.startswith(directory.rstrip("/") + "/")
+
+
+def _crlf(text: str) -> str:
+    """Convert the line endings of ``text`` to CRLF."""
+    return text.replace("\r\n", "\n").replace("\n", "\r\n")
+
+
+class _Buffer:
+    """Pending writes and deletions (files, and directories removed as a whole) of one transaction."""
+
+    __slots__ = ("pending", "deleted", "deleted_dirs")
+
+    def __init__(self):
+        self.pending: dict[str, str] = {}
+        self.deleted: set[str] = set()
+        self.deleted_dirs: set[str] = set()
+
+
+class TransactionalBackend(BackendProtocol):
+    """Buffer writes to a ``FilesystemBackend`` and apply them in one batch.
+
+    Attributes:
+        inner: The wrapped filesystem backend that owns the tree on disk
+    """
+
+    def __init__(self, inner: FilesystemBackend):
+        self.inner = inner
+        self._lock = threading.RLock()
+        self._active: ContextVar[Optional[_Buffer]] = ContextVar(f"transaction_{id(self)}", default=None)
+
+    @property
+    def _buffer(self) -> _Buffer:
+        # Outside a transaction there is nothing pending (see _write_through)
+        return self._active.get() or _Buffer()
+
+    @property
+    def _pending(self) -> dict[str, str]:
+        return self._buffer.pending
+
+    @property
+    def _deleted(self) -> set[str]:
+        return self._buffer.deleted
+
+    # ------------------------------------------------------------------
+    # Transaction control
+    # ------------------------------------------------------------------
+
+    @property
+    def pending_writes(self) -> dict[str, str]:
+        """Copy of the buffered writes as ``virtual path -> new content``."""
+        with self._lock:
+            return dict(self._pending)
+
+    @property
+    def pending_deletes(self) -> set[str]:
+        """Copy of the buffered deletions."""
+        with self._lock:
+            return set(self._deleted)
+
+    def rollback(self) -> None:
+        """Discard every buffered change."""
+        with self._lock:
+            self._pending.clear()
+            self._deleted.clear()
+            self._buffer.deleted_dirs.clear()
+
+    def commit(self) -> list[str]:
+        """Apply all buffered changes to disk as one batch.
+
+        Returns:
+            Virtual paths that were written or deleted
+
+        Raises:
+            CommitError: If the batch could not be applied. The tree on disk
+                is left as it was before the call and the buffer is kept, so
+                the caller can retry or ``rollback()``.
+        """
+        with self._lock:
+            writes = dict(self._pending)
+            deletes = set(self._deleted)
+            dirs = set(self._buffer.deleted_dirs)
+            if not writes and not deletes and not dirs:
+                return []
+
+            targets = {path: self.inner._resolve_path(path) for path in writes}
+            staged: dict[str, Path] = {}
+            try:
+                for path, content in writes.items():
+                    staged[path] = self._stage(targets[path], content)
+            except (OSError, UnicodeEncodeError) as e:
+                for tmp in staged.values():
+                    tmp.unlink(missing_ok=True)
+                raise CommitError(f"Failed to stage '{path}': {e}") from e
+
+            guard = getattr(self.inner, "guarded_commit", None)
+            try:
+                with guard(set(writes) | deletes) if guard else nullcontext():
+                    self._apply(staged, targets, deletes)
+            except BaseException:
+                for tmp in staged.values():
+                    tmp.unlink(missing_ok=True)
+                raise
+
+            self._remove_dirs(dirs)
+            self._notify_index(set(writes) | deletes)
+            self._pending.clear()
+            self._deleted.clear()
+            self._buffer.deleted_dirs.clear()
+            return sorted(set(writes) | deletes | dirs)
+
+    def _apply(self, staged: dict[str, Path], targets: dict[str, Path], deletes: set[str]) -> None:
+        """Rename staged files over their targets and deleted files aside, all or nothing."""
+        originals = {
+            path: target.read_bytes() if target.is_file() else None
+            for path, target in targets.items()
+        }
+        removed = {path: self.inner._resolve_path(path) for path in sorted(deletes)}
+        replaced: list[str] = []
+        moved: dict[Path, Path] = {}
+        try:
+            for path, tmp in staged.items():
+                os.replace(tmp, targets[path])
+                replaced.append(path)
+            for path, target in removed.items():
+                if target.is_file():
+                    aside = target.with_name(f".{target.name}.{uuid.uuid4().hex}.deleted")
+                    os.replace(target, aside)
+                    moved[target] = aside
+        except OSError as e:
+            for target, aside in moved.items():
+                os.replace(aside, target)
+            self._restore(replaced, targets, originals)
+            raise CommitError(f"Failed to commit '{path}', batch rolled back: {e}") from e
+
+        for directory in {target.parent for target in [*targets.values(), *removed.values()]}:
+            self._fsync_dir(directory)
+        for aside in moved.values():
+            aside.unlink(missing_ok=True)
+
+    def _remove_dirs(self, dirs: set[str]) -> None:
+        """Remove deleted directories once their files are gone (those still holding files are kept)."""
+        for path in sorted(dirs, key=len, reverse=True):
+            top = self.inner._resolve_path(path)
+            for directory, _, _ in sorted(os.walk(top), key=lambda entry: len(entry[0]), reverse=True):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    pass
+
+    @contextmanager
+    def transaction(self) -> Iterator["TransactionalBackend"]:
+        """Buffer the block's changes separately and commit them if it succeeds.
+
+        The block (and any threads it starts with a copied context) gets a
+        fresh buffer; if it raises, that buffer is rolled back. Read versions
+        tracked by a wrapped ``LockingBackend`` are scoped to the block too.
+        """
+        session = getattr(self.inner, "session", None)
+        with self._batch(), session() if session else nullcontext():
+            try:
+                yield self
+            except BaseException:
+                self.rollback()
+                raise
+            self.commit()
+
+    @contextmanager
+    def _batch(self) -> Iterator[_Buffer]:
+        """Give the block a fresh buffer."""
+        buffer = _Buffer()
+        token = self._active.set(buffer)
+        try:
+            yield buffer
+        finally:
+            self._active.reset(token)
+
+    def _write_through(self, change, result_type, action: str):
+        """Commit a single change made outside a transaction."""
+        with self._batch():
+            result = change()
+            if result.error is None:
+                try:
+                    self.commit()
+                except (CommitError, TimeoutError, OSError) as e:
+                    return result_type(error=f"Error {action}: {e}")
+        return result
+
+    @staticmethod
+    def _stage(target: Path, content: str) -> Path:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        return tmp
+
+    @staticmethod
+    def _restore(replaced: list[str], targets: dict[str, Path], originals: dict[str, Optional[bytes]]) -> None:
+        for path in replaced:
+            original = originals[path]
+            if original is None:
+                targets[path].unlink(missing_ok=True)
+            else:
+                targets[path].write_bytes(original)
+
+    @staticmethod
+    def _fsync_dir(directory: Path) -> None:
+        # Directories cannot be opened for fsync on Windows; the renames are
+        # still atomic there, only their durability is left to the OS.
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _notify_index(self, paths) -> None:
+        index = getattr(self.inner, "index", None)
+        if index is not None:
+            for path in paths:
+                index.mark_dirty(path)
+
+    # ------------------------------------------------------------------
+    # Buffered view
+    # ------------------------------------------------------------------
+
+    def _current_content(self, path: str) -> Optional[str]:
+        """Return the buffered or on-disk content of a file, None if missing."""
+        if path in self._pending:
+            return self._pending[path]
+        if path in self._deleted:
+            return None
+        target = self.inner._resolve_path(path)
+        data = target.read_bytes() if target.is_file() else None
+        observe = getattr(self.inner, "observe", None)
+        if observe is not None:
+            observe(path, data)
+        return None if data is None else data.decode("utf-8")
+
+    def content(self, file_path: str) -> Optional[str]:
+        """Return the full buffered or on-disk content of a file, None if missing."""
+        path = _virtual(file_path)
+        with self._lock:
+            try:
+                return self._current_content(path)
+            except (ValueError, OSError, RuntimeError, UnicodeDecodeError):
+                return None
+
+    def read(self, file_path: str, offset: int = 0, limit: int = 2000) -> ReadResult:
+        """Read a file, preferring the buffered content."""
+        path = _virtual(file_path)
+        with self._lock:
+            if path in self._pending:
+                file_data = FileData(content=self._pending[path], encoding="utf-8")
+                return slice_read_response(file_data, offset, limit)
+            if path in self._deleted:
+                return ReadResult(error=f"File '{file_path}' not found")
+        return self.inner.read(file_path, offset, limit)
+
+    def write(self, file_path: str, content: str) -> WriteResult:
+        """Buffer a full-file write (committed straight away outside a transaction)."""
+        if self._active.get() is None:
+            return self._write_through(
+                lambda: self.write(file_path, content), WriteResult, f"writing file '{file_path}'"
+            )
+        path = _virtual(file_path)
+        try:
+            self.inner._resolve_path(path)
+        except (ValueError, OSError, RuntimeError) as e:
+            return WriteResult(error=f"Error writing file '{file_path}': {e}")
+        with self._lock:
+            self._pending[path] = content
+            self._deleted.discard(path)
+            self._buffer.deleted_dirs -= {d for d in self._buffer.deleted_dirs if _within(path, d)}
+        return WriteResult(path=file_path)
+
+    def edit(
+        self,
+        file_path: str,
+        old_string: str,
+        new_string: str,
+        replace_all: bool = False,
+    ) -> EditResult:
+        """Apply a string replacement to the buffered view of a file.
+
+        The strings are matched and written with the file's own line endings.
+        Outside a transaction the edit is committed straight away.
+        """
+        if self._active.get() is None:
+            return self._write_through(
+                lambda: self.edit(file_path, old_string, new_string, replace_all),
+                EditResult,
+                f"editing file '{file_path}'",
+            )
+        path = _virtual(file_path)
+        with self._lock:
+            try:
+                content = self._current_content(path)
+            except (ValueError, OSError, RuntimeError, UnicodeDecodeError) as e:
+                return EditResult(error=f"Error editing file '{file_path}': {e}")
+            if content is None:
+                return EditResult(error=f"Error: File '{file_path}' not found")
+            if "\r\n" in content:
+                old_string, new_string = _crlf(old_string), _crlf(new_string)
+            result = perform_string_replacement(content, old_string, new_string, replace_all)
+            if isinstance(result, str):
+                return EditResult(error=result)
+            new_content, occurrences = result
+            self._pending[path] = new_content
+        return EditResult(path=file_path, occurrences=int(occurrences))
+
+    def delete(self, file_path: str) -> DeleteResult:
+        """Buffer the deletion of a file or directory (committed straight away outside a transaction).
+
+        A directory is deleted as every file under it, buffered or on disk,
+        and removed itself at commit.
+        """
+        if self._active.get() is None:
+            return self._write_through(lambda: self.delete(file_path), DeleteResult, f"deleting '{file_path}'")
+        path = _virtual(file_path)
+        with self._lock:
+            try:
+                is_file = self._current_content(path) is not None
+                directory = None if is_file else self._directory_files(path)
+            except (ValueError, OSError, RuntimeError, UnicodeDecodeError) as e:
+                return DeleteResult(error=f"Error deleting '{file_path}': {e}")
+            if not is_file and directory is None:
+                return DeleteResult(error=f"Error: '{file_path}' not found")
+            for target in [path] if is_file else directory:
+                self._pending.pop(target, None)
+                self._deleted.add(target)
+            if not is_file:
+                self._buffer.deleted_dirs.add(path)
+        return DeleteResult(path=file_path)
+
+    def _directory_files(self, path: str) -> Optional[list[str]]:
+        """Files under directory ``path`` in the buffered view, None if it is not a directory."""
+        prefix = path.rstrip("/") + "/"
+        files = {p for p in self._pending if p.startswith(prefix)}
+        top = self.inner._resolve_path(path)
+        if not top.is_dir() and not files:
+            return None
+        if path in self._buffer.deleted_dirs and not files:
+            return None
+        for directory, _, names in os.walk(top):
+            relative = Path(directory).relative_to(top).as_posix()
+            base = prefix if relative == "." else f"{prefix}{relative}/"
+            files.update(base + name for name in names)
+        return sorted(files - self._deleted)
+
+    def ls(self, path: str) -> LsResult:
+        """List a directory, overlaying buffered files and deletions."""
+        directory = relative_search_root(path)
+        with self._lock:
+            pending = dict(self._pending)
+            deleted = set(self._deleted)
+            deleted_dirs = set(self._buffer.deleted_dirs)
+        result = self.inner.ls(path)
+        if result.entries is None and not any(
+            relative_to(p.lstrip("/"), directory) for p in pending
+        ):
+            return result
+
+        entries = [
+            e for e in result.entries or []
+            if _virtual(e["path"]) not in deleted and not any(_within(_virtual(e["path"]), d) for d in deleted_dirs)
+        ]
+        listed = {_virtual(e["path"]) for e in entries}
+        for vpath, content in pending.items():
+            scoped = relative_to(vpath.lstrip("/"), directory)
+            if not scoped or "/" in scoped or vpath in listed:
+                continue
+            entries.append({"path": vpath, "is_dir": False, "size": len(content.encode("utf-8"))})
+        entries.sort(key=lambda e: e["path"])
+        return LsResult(entries=entries)
+
+    def grep(
+        self,
+        pattern: str,
+        path: str | None = None,
+        glob: str | None = None,
+        *,
+        max_count: int | None = None,
+    ) -> GrepResult:
+        """Search the buffered view for a literal pattern."""
+        with self._lock:
+            pending = dict(self._pending)
+            shadowed = set(pending) | set(self._deleted)
+        result = self.inner.grep(pattern, path, glob)
+        if result.matches is None or not shadowed:
+            return self._cap(result, max_count)
+
+        search_root = relative_search_root(path)
+        try:
+            matcher = compile_grep_include_glob(glob) if glob else None
+        except InvalidGlobPatternError as e:
+            return GrepResult(error=str(e), matches=[])
+        matches: list[GrepMatch] = [m for m in result.matches if _virtual(m["path"]) not in shadowed]
+        for vpath, content in pending.items():
+            scoped = relative_to(vpath.lstrip("/"), search_root)
+            if scoped is None or (matcher is not None and not matcher(scoped)):
+                continue
+            for line_number, line in enumerate(content.splitlines(), 1):
+                if pattern in line:
+                    matches.append({"path": vpath, "line": line_number, "text": line})
+        matches.sort(key=lambda m: (m["path"], m["line"]))
+        return self._cap(GrepResult(error=result.error, matches=matches, truncated=result.truncated), max_count)
+
+    @staticmethod
+    def _cap(result: GrepResult, max_count: int | None) -> GrepResult:
+        if max_count is None or result.matches is None or len(result.matches) <= max_count:
+            return result
+        return GrepResult(error=result.error, matches=result.matches[:max_count], truncated=True)
+
+    def glob(self, pattern: str, path: str | None = None) -> GlobResult:
+        """Find files in the buffered view matching a glob pattern."""
+        with self._lock:
+            pending = dict(self._pending)
+            deleted = set(self._deleted)
+        result = self.inner.glob(pattern, path)
+        if result.matches is None or (not pending and not deleted):
+            return result
+
+        search_root = relative_search_root(path)
+        matcher = compile_grep_include_glob(pattern)
+        matches = [m for m in result.matches if _virtual(m["path"]) not in deleted]
+        listed = {_virtual(m["path"]) for m in matches}
+        now = datetime.now().isoformat()
+        for vpath, content in pending.items():
+            scoped = relative_to(vpath.lstrip("/"), search_root)
+            if scoped is None or vpath in listed or not matcher(scoped):
+                continue
+            matches.append({
+                "path": vpath,
+                "is_dir": False,
+                "size": len(content.encode("utf-8")),
+                "modified_at": now,
+            })
+        matches.sort(key=lambda m: m["path"])
+        return GlobResult(
+            error=result.error,
+            matches=matches,
+            truncated=result.truncated,
+            truncation_reason=result.truncation_reason,
+        )
+
+    def upload_files(self, files: list[tuple[str, bytes]]) -> list[FileUploadResponse]:
+        """Upload binary files directly; uploads are not part of the transaction."""
+        return self.inner.upload_files(files)
+
+    def download_files(self, paths: list[str]) -> list[FileDownloadResponse]:
+        """Download files, serving buffered text content where present."""
+        with self._lock:
+            pending = dict(self._pending)
+        responses = self.inner.download_files(paths)
+        for i, path in enumerate(paths):
+            vpath = _virtual(path)
+            if vpath in pending:
+                responses[i] = FileDownloadResponse(path=path, content=pending[vpath].encode("utf-8"))
+        return responses
@@ -0,0 +1 @@
+"""Performance benchmarks run through ``python -m src bench``."""
@@ -0,0 +1,68 @@
+"""Throughput of Message Batches mode against the local stub.
+
+``run`` starts a ``StubModelServer`` in this process and runs corpus cases
+on a ``Pipeline`` whose stages are ``BatchedChatAnthropic`` models sharing
+one ``MessageBatcher``. ``concurrency`` closed-loop slots keep steps in
+flight, so every batch gathers the next turn of up to ``concurrency`` runs.
+
+The report holds step throughput and latency, the model turns sent, and
+how they were grouped into batches. With a batch latency of B seconds and
+T turns per step, a step takes at least T * (B + max_wait); throughput
+scales with concurrency until batches reach ``max_batch``.
+"""
+
+import time
+from typing import Optional
+
+from src.bench.load import STUB_MODEL, _closed_loop_threads
+from src.bench.stats import summarize
+from src.bench.stub_server import StubModelServer, StubProfile
+
+
+def run(
+    steps: int = 32,
+    concurrency: int = 16,
+    max_batch: int = 100,
+    max_wait: float = 0.2,
+    profile: Optional[StubProfile] = None,
+) -> dict:
+    """Run ``steps`` corpus cases in batch mode and report throughput.
+
+    Args:
+        steps: Cases to run in total (the corpus is cycled)
+        concurrency: Cases in flight at once
+        max_batch: Requests that trigger a batch submission
+        max_wait: Seconds a request may wait for a batch to fill
+        profile: Stub latency profile (``batch_latency_ms`` sets how long a batch takes)
+    """
+    from src.bench.latency import STAGES, Pipeline, load_corpus
+    from src.llms.batching import MessageBatcher, batched_model
+
+    profile = profile or StubProfile(batch_latency_ms=500.0)
+    server = StubModelServer(profile).start()
+    poll = max(profile.batch_latency_ms / 1000 / 10, 0.01)
+    batcher = MessageBatcher(base_url=server.url, api_key="stub", max_batch=max_batch, max_wait=max_wait, poll_interval=poll)
+    pipeline = Pipeline({stage: batched_model(STUB_MODEL, batcher, base_url=server.url, api_key="stub") for stage in STAGES})
+    try:
+        start = time.perf_counter()
+        latencies, errors = _closed_loop_threads(pipeline, load_corpus(), concurrency, steps)
+        wall = time.perf_counter() - start
+        stats = batcher.stats()
+    finally:
+        batcher.close()
+        pipeline.close()
+        server.stop()
+    return {
+        "steps": len(latencies) + len(errors),
+        "errors": len(errors),
+        "error_sample": errors[0] if errors else None,
+        "concurrency": concurrency,
+        "wall_s": round(wall, 3),
+        "steps_per_min": round(len(latencies) / wall * 60, 2) if wall else 0.0,
+        "latency_ms": summarize(latencies),
+        "model_turns": stats["requests"],
+        "batches": stats["batches"],
+        "mean_batch": round(stats["requests"] / stats["batches"], 1) if stats["batches"] else 0.0,
+        "largest_batch": stats["largest_batch"],
+        "profile": {"batch_latency_ms": profile.batch_latency_ms, "max_batch": max_batch, "max_wait": max_wait},
+    }
@@ -0,0 +1,185 @@
+"""Cold-start regression benchmark based on ``python -X importtime``.
+
+Each target module is imported in a fresh interpreter with ``-X importtime``.
+The report records the cumulative import time (best of N runs), the heaviest
+direct imports and whether any forbidden module (e.g. ``deepagents`` for
+the CLI) was pulled in. ``check`` compares a report against the committed
+baseline in ``benchmarks/importtime.json``.
+"""
+
+import json
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BASELINE_PATH = REPO_ROOT / "benchmarks" / "importtime.json"
+
+# Targets measured when the baseline does not list any
+DEFAULT_TARGETS: dict[str, dict] = {
+    "src.cli": {"forbidden": ["langchain", "langchain_core", "langgraph", "deepagents", "dotenv"]},
+    "src.agent": {"forbidden": ["langchain", "langchain_core", "langgraph", "deepagents"]},
+}
+
+# Allowed slowdown over the baseline before ``check`` fails: a ratio plus an
+# absolute slack so that tiny imports do not fail on timer noise.
+DEFAULT_TOLERANCE = 0.5
+ABSOLUTE_SLACK_MS = 5.0
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """Parse ``-X importtime`` output into ``(module, self_us, cumulative_us, depth)``."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+
+def _import_once(module: str, python: str) -> tuple[list[tuple[str, int, int, int]], float]:
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or ["no output"]
+        raise RuntimeError(f"Importing {module} failed: {tail[0]}")
+    return parse_importtime(proc.stderr), wall_ms
+
+
+def measure(module: str, repeat: int = 5, forbidden: Optional[list[str]] = None, python: str = sys.executable) -> dict:
+    """Measure the cold import of ``module`` in fresh interpreters.
+
+    Args:
+        module: Dotted module name to import
+        repeat: Number of runs; the fastest one is reported
+        forbidden: Top-level packages the import must not pull in
+        python: Interpreter to run
+
+    Returns:
+        Report with ``cumulative_ms`` (own import tree), ``wall_ms`` (whole
+        process), ``heaviest`` direct imports and ``forbidden_imported``
+    """
+    best = None
+    for _ in range(max(repeat, 1)):
+        entries, wall_ms = _import_once(module, python)
+        own = next((e for e in reversed(entries) if e[0] == module), None)
+        cumulative_ms = own[2] / 1000 if own else 0.0
+        if best is None or cumulative_ms < best[1]:
+            best = (entries, cumulative_ms, wall_ms)
+    entries, cumulative_ms, wall_ms = best
+
+    loaded = {name for name, *_ in entries}
+    # Children are printed before their parent, so the target's own import
+    # tree is the run of deeper entries right before its depth-0 line.
+    end = max((i for i, e in enumerate(entries) if e[0] == module and e[3] == 0), default=0)
+    start = end
+    while start > 0 and entries[start - 1][3] > 0:
+        start -= 1
+    direct = sorted((e for e in entries[start:end] if e[3] == 1), key=lambda e: -e[2])
+    return {
+        "module": module,
+        "cumulative_ms": round(cumulative_ms, 2),
+        "wall_ms": round(wall_ms, 2),
+        "modules_loaded": len(loaded),
+        "heaviest": [{"module": name, "cumulative_ms": round(cum / 1000, 2)} for name, _, cum, _ in direct[:10]],
+        "forbidden_imported": sorted(
+            pkg for pkg in forbidden or [] if any(n == pkg or n.startswith(pkg + ".") for n in loaded)
+        ),
+    }
+
+
+def measure_help(repeat: int = 5, python: str = sys.executable) -> float:
+    """Return the best wall time (ms) of ``python -m src --help``."""
+    best = float("inf")
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        subprocess.run([python, "-m", "src", "--help"], cwd=REPO_ROOT, capture_output=True, check=True)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return round(best, 2)
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> dict:
+    """Load the committed baseline (empty if it does not exist yet)."""
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def run(
+    targets: Optional[list[str]] = None,
+    repeat: int = 5,
+    baseline_path: Path = BASELINE_PATH,
+) -> list[dict]:
+    """Measure every target, taking forbidden lists from the baseline when present."""
+    baseline = load_baseline(baseline_path)
+    configured = {**DEFAULT_TARGETS, **baseline.get("targets", {})}
+    names = targets or list(configured)
+    return [measure(name, repeat, configured.get(name, {}).get("forbidden")) for name in names]
+
+
+def _exceeds(value: float, reference: float, tolerance: float) -> Optional[float]:
+    limit = reference * (1 + tolerance) + ABSOLUTE_SLACK_MS
+    return limit if value > limit else None
+
+
+def check(
+    reports: list[dict],
+    baseline: dict,
+    tolerance: float = DEFAULT_TOLERANCE,
+    help_ms: Optional[float] = None,
+) -> list[str]:
+    """Compare reports (and optionally the ``--help`` time) against a baseline.
+
+    Returns:
+        Human-readable regression messages (empty when everything passes)
+    """
+    failures = []
+    if help_ms is not None and "cli_help_ms" in baseline:
+        limit = _exceeds(help_ms, baseline["cli_help_ms"], tolerance)
+        if limit is not None:
+            failures.append(
+                f"python -m src --help: {help_ms:.1f} ms exceeds "
+                f"baseline {baseline['cli_help_ms']:.1f} ms (limit {limit:.1f} ms)"
+            )
+    targets = baseline.get("targets", {})
+    for report in reports:
+        module = report["module"]
+        if report["forbidden_imported"]:
+            failures.append(f"{module}: imports {', '.join(report['forbidden_imported'])}")
+        reference = targets.get(module, {}).get("cumulative_ms")
+        if reference is None:
+            continue
+        limit = _exceeds(report["cumulative_ms"], reference, tolerance)
+        if limit is not None:
+            failures.append(
+                f"{module}: {report['cumulative_ms']:.1f} ms import time exceeds "
+                f"baseline {reference:.1f} ms (limit {limit:.1f} ms)"
+            )
+    return failures
+
+
+def write_baseline(reports: list[dict], help_ms: Optional[float] = None, path: Path = BASELINE_PATH) -> None:
+    """Record the reports as the new baseline, keeping configured forbidden lists."""
+    baseline = load_baseline(path)
+    if help_ms is not None:
+        baseline["cli_help_ms"] = help_ms
+    targets = baseline.setdefault("targets", {})
+    for report in reports:
+        entry = targets.setdefault(report["module"], {})
+        entry.setdefault("forbidden", DEFAULT_TARGETS.get(report["module"], {}).get("forbidden", []))
+        entry["cumulative_ms"] = report["cumulative_ms"]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
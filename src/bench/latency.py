@@ -0,0 +1,451 @@
+"""End-to-end latency regression suite over a fixed corpus of steps.
+
+Each corpus case (``benchmarks/corpus/*.json``) holds a step JSON, the TSX
+files it works on and, optionally, a recorded model script per stage. Cases
+without a script get a canonical one: the orchestrator delegates to
+``html_analyser`` (read references, write the scratch pad) and then to
+``tsx_styling_agent`` (read the scratch pad and target, write the target).
+
+Every case runs through the real orchestrator, subagents, projections,
+tools and ``/project/`` transaction with ``ScriptedChatModel`` in place of
+the providers. A run only counts when its tools reported no errors and the
+step's target ended up on disk. ``StageRecorder`` attributes wall time,
+model turns, tool calls and (locally estimated) tokens to the stage they
+ran in, and ``check`` compares p50/p95 per stage against
+``benchmarks/latency.json``.
+
+With ``mode="pipeline"`` the cases run through the deterministic pipeline
+(``src.pipeline``) instead; its orchestrator stage replays only the final
+summary turn, and it is checked against ``benchmarks/latency-pipeline.json``.
+"""
+
+import gc
+import json
+import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.bench.stats import summarize
+from src.bench.stub_model import ScriptedChatModel
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+CORPUS_DIR = REPO_ROOT / "benchmarks" / "corpus"
+BASELINE_PATH = REPO_ROOT / "benchmarks" / "latency.json"
+PIPELINE_BASELINE_PATH = REPO_ROOT / "benchmarks" / "latency-pipeline.json"
+
+ORCHESTRATOR = "orchestrator"
+STAGES = (ORCHESTRATOR, "html_analyser", "tsx_styling_agent")
+MODES = ("agent", "pipeline")
+
+# Wall-time regressions must exceed the baseline by this ratio plus the
+# absolute slack; counts may not grow at all, tokens only by TOKEN_TOLERANCE.
+DEFAULT_TOLERANCE = 0.5
+ABSOLUTE_SLACK_MS = 25.0
+TOKEN_TOLERANCE = 0.05
+
+_BENCH_PROJECT = "latency-bench"
+
+# Tool results that mean the call did not do its job
+TOOL_FAILURES = ("Error", "Scratch pad is empty")
+
+
+def _empty_stage() -> dict[str, float]:
+    return {"wall_ms": 0.0, "model_turns": 0, "tool_calls": 0, "input_tokens": 0, "output_tokens": 0}
+
+
+class StageRecorder(BaseCallbackHandler):
+    """Attribute model turns, tool calls, tokens and time to pipeline stages.
+
+    A run belongs to the stage of its parent run; a ``task`` tool call opens
+    the stage named by its ``subagent_type``, and so does a pipeline node
+    named after a subagent. Orchestrator wall time is what is left of the
+    total once the subagent stages are subtracted.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._stage_of: dict[Any, str] = {}
+        self._task_started: dict[Any, tuple[str, float]] = {}
+        self._tool_names: dict[Any, str] = {}
+        self.stages: dict[str, dict[str, float]] = {stage: _empty_stage() for stage in STAGES}
+        self.tool_errors: list[str] = []
+
+    def _stage(self, parent_run_id) -> str:
+        return self._stage_of.get(parent_run_id, ORCHESTRATOR)
+
+    def _bucket(self, stage: str) -> dict[str, float]:
+        return self.stages.setdefault(stage, _empty_stage())
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name")
+        with self._lock:
+            stage = self._stage(parent_run_id)
+            if stage == ORCHESTRATOR and name in STAGES and name != ORCHESTRATOR:
+                self._stage_of[run_id] = name
+                self._task_started[run_id] = (name, time.perf_counter())
+            else:
+                self._stage_of[run_id] = stage
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end_stage(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end_stage(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        from src.llms.tokens import estimate_messages_tokens
+
+        with self._lock:
+            stage = self._stage_of[run_id] = self._stage(parent_run_id)
+            bucket = self._bucket(stage)
+            bucket["model_turns"] += 1
+            bucket["input_tokens"] += sum(estimate_messages_tokens(batch) for batch in messages)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        from src.llms.tokens import estimate_messages_tokens
+
+        produced = [gen.message for gens in response.generations for gen in gens if hasattr(gen, "message")]
+        with self._lock:
+            self._bucket(self._stage_of.get(run_id, ORCHESTRATOR))["output_tokens"] += estimate_messages_tokens(produced)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, inputs=None, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name")
+        with self._lock:
+            self._tool_names[run_id] = name
+            stage = self._stage(parent_run_id)
+            self._bucket(stage)["tool_calls"] += 1
+            subagent = (inputs or {}).get("subagent_type") if name == "task" else None
+            if subagent:
+                self._stage_of[run_id] = subagent
+                self._task_started[run_id] = (subagent, time.perf_counter())
+            else:
+                self._stage_of[run_id] = stage
+
+    def _end_stage(self, run_id) -> None:
+        with self._lock:
+            started = self._task_started.pop(run_id, None)
+            if started:
+                subagent, start = started
+                self._bucket(subagent)["wall_ms"] += (time.perf_counter() - start) * 1000
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        content = getattr(output, "content", output)
+        failed = getattr(output, "status", None) == "error" or (
+            isinstance(content, str) and content.startswith(TOOL_FAILURES)
+        )
+        with self._lock:
+            name = self._tool_names.pop(run_id, "tool")
+            if failed:
+                self.tool_errors.append(f"{name}: {str(content)[:200]}")
+        self._end_stage(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self.tool_errors.append(f"{self._tool_names.pop(run_id, 'tool')}: {error}")
+        self._end_stage(run_id)
+
+    def finish(self, total_ms: float) -> dict[str, dict[str, float]]:
+        """Close the run and return per-stage metrics plus a ``total`` entry."""
+        subagents_ms = sum(v["wall_ms"] for k, v in self.stages.items() if k != ORCHESTRATOR)
+        self.stages[ORCHESTRATOR]["wall_ms"] = max(total_ms - subagents_ms, 0.0)
+        total = _empty_stage()
+        for metrics in self.stages.values():
+            for key, value in metrics.items():
+                total[key] += value
+        total["wall_ms"] = total_ms
+        return {**self.stages, "total": total}
+
+
+def _rel(path: str) -> str:
+    return "/" + path.lstrip("/")
+
+
+def _component_name(path: str) -> str:
+    stem = Path(path).stem
+    if stem in ("page", "index", "layout"):
+        stem = Path(path).parent.name.strip("[].()") or stem
+    return "".join(part.capitalize() for part in re.split(r"[^A-Za-z0-9]+", stem) if part) or "Component"
+
+
+def canonical_script(step: dict, files: dict[str, str]) -> dict[str, list[dict]]:
+    """Script the usual analyse-then-apply flow for a step.
+
+    Args:
+        step: Parsed step JSON (``target_component``, ``reference_files``, ``html_snippet``...)
+        files: Fixture files keyed by virtual path
+
+    Returns:
+        Script turns per stage
+    """
+    target = _rel(step["target_component"])
+    html = step.get("html_snippet", "")
+    classes = re.findall(r'class="([^"]+)"', html)
+    diff = "\n".join(
+        [f"--- {target}", f"+++ {target}", f"@@ {step.get('action', 'update layout')} @@"]
+        + [f"+ className=\"{cls}\"" for cls in classes]
+        + [f"# {detail}" for detail in step.get("details", [])]
+    )
+    jsx = html.replace("class=", "className=").replace("<!--", "{/*").replace("-->", "*/}")
+    if step.get("file") == "create" or target not in files:
+        new_content = f"export default function {_component_name(target)}() {{\n  return (\n    <>\n{jsx}\n    </>\n  );\n}}\n"
+    else:
+        new_content = files[target] + f"\n// Layout from implementation step {step.get('implementation_step', '?')}\n"
+
+    reads = [_rel(p) for p in step.get("reference_files", [])] + [target]
+    html_turns = [
+        {"tool_calls": [{"name": "read_tsx", "args": {"file_path": p}} for p in reads if p in files]},
+        {"tool_calls": [{"name": "write_scratch_pad", "args": {"diffs": {target: diff}}}]},
+        {"content": f"Saved {len(classes)} styling suggestions for {target} to the scratch pad."},
+    ]
+    tsx_turns = [{"tool_calls": [{"name": "read_scratch_pad", "args": {}}]}]
+    if target in files:
+        tsx_turns.append({"tool_calls": [{"name": "read_tsx", "args": {"file_path": target}}]})
+    tsx_turns += [
+        {"tool_calls": [{"name": "write_tsx", "args": {"file_path": target, "content": new_content}}]},
+        {"content": f"Applied the scratch pad changes to {target}."},
+    ]
+    orchestrator_turns = [
+        {"tool_calls": [{"name": "task", "args": {"subagent_type": "html_analyser", "description": json.dumps(step)}}]},
+        {"tool_calls": [{"name": "task", "args": {
+            "subagent_type": "tsx_styling_agent",
+            "description": f"Read the scratch pad and apply the proposed changes to {target}",
+        }}]},
+        {"content": f"Step {step.get('implementation_step', '?')} complete: {target} updated."},
+    ]
+    return {ORCHESTRATOR: orchestrator_turns, "html_analyser": html_turns, "tsx_styling_agent": tsx_turns}
+
+
+def load_corpus(corpus_dir: Path = CORPUS_DIR, names: Optional[list[str]] = None) -> list[dict]:
+    """Load corpus cases (sorted by name), filling in canonical scripts."""
+    cases = []
+    for path in sorted(corpus_dir.glob("*.json")):
+        case = json.loads(path.read_text(encoding="utf-8"))
+        case.setdefault("name", path.stem)
+        if names and case["name"] not in names:
+            continue
+        case["files"] = {_rel(p): content for p, content in case.get("files", {}).items()}
+        case.setdefault("script", canonical_script(case["step"], case["files"]))
+        cases.append(case)
+    return cases
+
+
+class Pipeline:
+    """The orchestrator and subagents wired to per-stage models and scratch projects.
+
+    By default every stage gets a ``ScriptedChatModel`` that replays the case
+    script; pass ``models`` (stage name to chat model) to drive the stages
+    with other models, such as clients of ``src.bench.stub_server``. With
+    ``mode="pipeline"`` the stages are wired by ``build_pipeline`` and the
+    orchestrator model only writes the summary.
+
+    Each run gets a scratch project of its own (reused once the run is
+    over, so concurrent runs never touch the same tree) whose frontend is
+    reset to the case's fixture files. The step runs through the production
+    backend and ``run_step``, and a run fails unless its tools reported no
+    errors and the step's target was written to disk.
+    """
+
+    def __init__(self, models: Optional[dict[str, Any]] = None, mode: str = "agent"):
+        from src.agent import build_orchestrator
+
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}'. Available: {', '.join(MODES)}")
+
+        self._tmp = tempfile.TemporaryDirectory(prefix="latency-bench-")
+        self._free: "queue.SimpleQueue[str]" = queue.SimpleQueue()
+        self._projects: list[str] = []
+        self._lock = threading.Lock()
+        self.mode = mode
+        self.models = models or {stage: ScriptedChatModel() for stage in STAGES}
+        subagent_models = {stage: model for stage, model in self.models.items() if stage != ORCHESTRATOR}
+        if mode == "pipeline":
+            from src.pipeline import build_pipeline
+
+            self.agent = build_pipeline(model=self.models[ORCHESTRATOR], subagent_model=subagent_models)
+        else:
+            self.agent = build_orchestrator(model=self.models[ORCHESTRATOR], subagent_model=subagent_models)
+
+    def _frontend(self, project: str) -> Path:
+        return Path(self._tmp.name) / project / "frontend"
+
+    def _acquire(self) -> str:
+        """A scratch project no other run is using (registered on first use)."""
+        from src.backends.pool import ProjectConfig, get_pool
+
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            project = f"{_BENCH_PROJECT}-{os.getpid()}-{id(self):x}-{len(self._projects)}"
+            self._projects.append(project)
+        root = Path(self._tmp.name) / project
+        (root / "frontend").mkdir(parents=True)
+        get_pool().add(ProjectConfig(name=project, frontend_root=str(root / "frontend"), agent_root=str(root / "agent")))
+        return project
+
+    def _prepare(self, case: dict) -> str:
+        """Load the case scripts and reset a free project to the case's fixture files."""
+        for stage, model in self.models.items():
+            if isinstance(model, ScriptedChatModel):
+                turns = case["script"].get(stage, [])
+                if self.mode == "pipeline" and stage == ORCHESTRATOR:
+                    # Only the final report is a model turn in the pipeline
+                    turns = turns[-1:]
+                model.load(turns)
+        project = self._acquire()
+        frontend = self._frontend(project)
+        for entry in frontend.iterdir():
+            shutil.rmtree(entry) if entry.is_dir() else entry.unlink()
+        for path, content in case["files"].items():
+            target = frontend / path.lstrip("/")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(content, encoding="utf-8")
+        return project
+
+    def _check_run(self, case: dict, project: str, recorder: "StageRecorder") -> None:
+        """Fail a run that left script turns unused, hit tool errors or did not write its target."""
+        leftover = {
+            stage: model.remaining
+            for stage, model in self.models.items()
+            if isinstance(model, ScriptedChatModel) and model.remaining
+        }
+        if leftover:
+            raise RuntimeError(f"Case {case['name']} did not replay its whole script: {leftover}")
+        if recorder.tool_errors:
+            raise RuntimeError(f"Case {case['name']} hit tool errors: {recorder.tool_errors}")
+        target = _rel(case["step"]["target_component"])
+        written = self._frontend(project) / target.lstrip("/")
+        if not written.is_file() or written.read_text(encoding="utf-8") == case["files"].get(target):
+            raise RuntimeError(f"Case {case['name']} did not write {target} to the project")
+
+    def run(self, case: dict) -> dict[str, dict[str, float]]:
+        """Run one case and return its per-stage metrics."""
+        from src.agent import run_step
+
+        project = self._prepare(case)
+        try:
+            recorder = StageRecorder()
+            start = time.perf_counter()
+            run_step(self.agent, json.dumps(case["step"]), [recorder], project)
+            metrics = recorder.finish((time.perf_counter() - start) * 1000)
+            self._check_run(case, project, recorder)
+            return metrics
+        finally:
+            self._free.put(project)
+
+    async def arun(self, case: dict) -> dict[str, dict[str, float]]:
+        """Async counterpart of ``run`` (for event-loop driven load)."""
+        from src.agent import arun_step
+
+        project = self._prepare(case)
+        try:
+            recorder = StageRecorder()
+            start = time.perf_counter()
+            await arun_step(self.agent, json.dumps(case["step"]), [recorder], project)
+            metrics = recorder.finish((time.perf_counter() - start) * 1000)
+            self._check_run(case, project, recorder)
+            return metrics
+        finally:
+            self._free.put(project)
+
+    def close(self) -> None:
+        """Unregister the scratch projects and delete their trees."""
+        from src.backends.pool import get_pool
+
+        for project in self._projects:
+            get_pool().remove(project)
+        self._tmp.cleanup()
+
+
+def aggregate(runs: list[dict[str, dict[str, float]]]) -> dict[str, dict]:
+    """Summarize repeated runs of one case: wall-time percentiles and median counts."""
+    report = {}
+    for stage in runs[0]:
+        walls = [run[stage]["wall_ms"] for run in runs]
+        middle = runs[len(runs) // 2][stage]
+        report[stage] = {
+            "wall_ms": summarize(walls),
+            "model_turns": middle["model_turns"],
+            "tool_calls": middle["tool_calls"],
+            "tokens": middle["input_tokens"] + middle["output_tokens"],
+        }
+    return report
+
+
+def _measure(pipeline: Pipeline, case: dict) -> dict[str, dict[str, float]]:
+    # A full collection landing inside a run takes longer than the run itself
+    gc.collect()
+    return pipeline.run(case)
+
+
+def run(names: Optional[list[str]] = None, repeat: int = 20, warmup: int = 2, mode: str = "agent") -> dict[str, dict]:
+    """Run the corpus and return ``{case: {stage: summary}}``."""
+    cases = load_corpus(names=names)
+    if not cases:
+        raise ValueError(f"No corpus cases found in {CORPUS_DIR}")
+    pipeline = Pipeline(mode=mode)
+    try:
+        report = {}
+        for case in cases:
+            for _ in range(warmup):
+                pipeline.run(case)
+            report[case["name"]] = aggregate([_measure(pipeline, case) for _ in range(max(repeat, 1))])
+        return report
+    finally:
+        pipeline.close()
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> dict:
+    """Load the committed baseline (empty if it does not exist yet)."""
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def check(report: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list[str]:
+    """Compare a report against a baseline.
+
+    Returns:
+        Human-readable regression messages (empty when everything passes)
+    """
+    failures = []
+    for case, stages in report.items():
+        for stage, current in stages.items():
+            reference = baseline.get("cases", {}).get(case, {}).get(stage)
+            if reference is None:
+                continue
+            where = f"{case}/{stage}"
+            for pct in ("p50", "p95"):
+                limit = reference["wall_ms"][pct] * (1 + tolerance) + ABSOLUTE_SLACK_MS
+                if current["wall_ms"][pct] > limit:
+                    failures.append(
+                        f"{where}: {pct} {current['wall_ms'][pct]:.1f} ms exceeds "
+                        f"baseline {reference['wall_ms'][pct]:.1f} ms (limit {limit:.1f} ms)"
+                    )
+            for key in ("model_turns", "tool_calls"):
+                if current[key] > reference[key]:
+                    failures.append(f"{where}: {key} grew from {reference[key]} to {current[key]}")
+            token_limit = reference["tokens"] * (1 + TOKEN_TOLERANCE)
+            if current["tokens"] > token_limit:
+                failures.append(
+                    f"{where}: tokens grew from {reference['tokens']} to {current['tokens']} "
+                    f"(limit {token_limit:.0f})"
+                )
+    return failures
+
+
+def write_baseline(report: dict, path: Path = BASELINE_PATH) -> None:
+    """Record a report as the new baseline."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"cases": report}, indent=2) + "\n", encoding="utf-8")
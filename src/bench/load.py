@@ -0,0 +1,298 @@
+"""Concurrency load generator for finding where pipeline throughput flattens.
+
+``run`` starts a ``StubModelServer`` in its own process and one or more
+worker processes. Each worker keeps one warm ``Pipeline`` whose stages are
+real ``ChatAnthropic`` clients pointed at the stub. For every concurrency
+level N of the sweep, N closed-loop slots are spread over the workers: each
+slot starts its next corpus case as soon as the previous one finishes,
+either on a thread pool (``threads``, the shape of ``src.worker.Worker``)
+or as tasks on one event loop (``async``).
+
+Per level the report holds throughput, run latency percentiles, errors, the
+stub's peak in-flight model calls and, per worker, CPU seconds, CPU
+utilisation (CPU seconds / wall seconds) and resident memory. Reading a
+sweep:
+- throughput grows with N and peak in-flight calls track N: not saturated
+- a worker's CPU utilisation nears 1.0 as throughput flattens: the GIL is
+  the limit (graph execution, state reducers and serialization); add
+  worker processes rather than slots
+- CPU stays low but peak in-flight calls fall behind N: runs wait inside
+  the client (thread pool, event loop executor or HTTP connection pool)
+- CPU stays low and in-flight calls track N while latency grows: backend
+  I/O or ``/project/`` locks
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Any, Optional
+
+from src.bench.stats import percentile, summarize
+from src.bench.stub_server import StubProfile
+
+
+DEFAULT_SWEEP = (1, 2, 4, 8, 16)
+MODES = ("threads", "async")
+
+# The stub speaks the Anthropic Messages API
+STUB_MODEL = "anthropic:claude-haiku-4-5-20251001"
+
+# Seconds to wait for a worker to build its pipeline or finish a level
+WORKER_TIMEOUT = 600
+
+
+def _cpu_seconds() -> float:
+    times = os.times()
+    return times.user + times.system
+
+
+def _rss_mb() -> Optional[float]:
+    """Current resident set size of this process (None when unavailable)."""
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process (None when unavailable)."""
+    try:
+        import resource
+        import sys
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+def _serve_stub(profile: dict, conn) -> None:
+    from src.bench.stub_server import StubModelServer
+
+    server = StubModelServer(StubProfile(**profile))
+    conn.send(server.url)
+    server.serve_forever()
+
+
+def _closed_loop_threads(pipeline, cases: list[dict], concurrency: int, runs: int) -> tuple[list[float], list[str]]:
+    latencies: list[float] = []
+    errors: list[str] = []
+    lock = threading.Lock()
+    issued = 0
+
+    def slot() -> None:
+        nonlocal issued
+        while True:
+            with lock:
+                if issued >= runs:
+                    return
+                case = cases[issued % len(cases)]
+                issued += 1
+            start = time.perf_counter()
+            try:
+                pipeline.run(case)
+            except Exception as e:
+                with lock:
+                    errors.append(f"{type(e).__name__}: {e}")
+            else:
+                with lock:
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load") as pool:
+        for future in [pool.submit(slot) for _ in range(concurrency)]:
+            future.result()
+    return latencies, errors
+
+
+async def _closed_loop_async(pipeline, cases: list[dict], concurrency: int, runs: int) -> tuple[list[float], list[str]]:
+    latencies: list[float] = []
+    errors: list[str] = []
+    issued = 0
+
+    async def slot() -> None:
+        nonlocal issued
+        while issued < runs:
+            case = cases[issued % len(cases)]
+            issued += 1
+            start = time.perf_counter()
+            try:
+                await pipeline.arun(case)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+            else:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(slot() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def _worker_main(url: str, mode: str, conn) -> None:
+    """Build a warm pipeline, then run one sweep level per command until told to stop."""
+    from src.bench.latency import STAGES, Pipeline, load_corpus
+    from src.llms import get_model
+
+    models = {
+        stage: get_model(STUB_MODEL, base_url=url, api_key="stub", max_retries=0, timeout=WORKER_TIMEOUT)
+        for stage in STAGES
+    }
+    pipeline = Pipeline(models)
+    cases = load_corpus()
+    loop = asyncio.new_event_loop() if mode == "async" else None
+    try:
+        for case in cases:
+            if loop:
+                loop.run_until_complete(pipeline.arun(case))
+            else:
+                pipeline.run(case)
+        conn.send({"pid": os.getpid(), "rss_mb": _rss_mb()})
+
+        while (command := conn.recv()) is not None:
+            concurrency, runs = command["concurrency"], command["runs"]
+            cpu, start = _cpu_seconds(), time.perf_counter()
+            if not concurrency:
+                latencies, errors = [], []
+            elif loop:
+                latencies, errors = loop.run_until_complete(_closed_loop_async(pipeline, cases, concurrency, runs))
+            else:
+                latencies, errors = _closed_loop_threads(pipeline, cases, concurrency, runs)
+            wall = time.perf_counter() - start
+            cpu = _cpu_seconds() - cpu
+            conn.send({
+                "pid": os.getpid(),
+                "concurrency": concurrency,
+                "latencies_ms": latencies,
+                "errors": errors,
+                "wall_s": wall,
+                "cpu_s": round(cpu, 3),
+                "cpu_util": round(cpu / wall, 3) if wall else 0.0,
+                "rss_mb": _round(_rss_mb()),
+                "peak_rss_mb": _round(_peak_rss_mb()),
+            })
+    finally:
+        if loop:
+            loop.close()
+        pipeline.close()
+
+
+def _stub_request(url: str, path: str, method: str = "GET") -> dict:
+    request = urllib.request.Request(url + path, data=b"" if method == "POST" else None, method=method)
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def _receive(conn) -> dict:
+    if not conn.poll(WORKER_TIMEOUT):
+        raise RuntimeError(f"Load worker did not answer within {WORKER_TIMEOUT} s")
+    try:
+        return conn.recv()
+    except EOFError as e:
+        raise RuntimeError("Load worker exited; run with fewer slots or check its traceback above") from e
+
+
+def _split(total: int, parts: int) -> list[int]:
+    return [total // parts + (i < total % parts) for i in range(parts)]
+
+
+def _level(concurrency: int, wall: float, results: list[dict], stub: dict) -> dict:
+    latencies = [ms for result in results for ms in result["latencies_ms"]]
+    errors = [error for result in results for error in result["errors"]]
+    return {
+        "concurrency": concurrency,
+        "runs": len(latencies) + len(errors),
+        "errors": len(errors),
+        "error_sample": errors[0] if errors else None,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 3) if wall else 0.0,
+        "latency_ms": {**summarize(latencies), "p99": round(percentile(latencies, 99), 2)},
+        "model_calls": stub["calls"],
+        "model_max_in_flight": stub["max_in_flight"],
+        "workers": [
+            {key: result[key] for key in ("pid", "concurrency", "cpu_s", "cpu_util", "rss_mb", "peak_rss_mb")}
+            for result in results
+        ],
+    }
+
+
+def run(
+    sweep: tuple[int, ...] = DEFAULT_SWEEP,
+    workers: int = 1,
+    runs_per_slot: int = 3,
+    mode: str = "threads",
+    profile: StubProfile = StubProfile(),
+    progress: Any = None,
+) -> dict:
+    """Sweep concurrency levels against the stub model and report each level.
+
+    Args:
+        sweep: Total concurrent runs per level, spread over the workers
+        workers: Number of worker processes
+        runs_per_slot: Runs each slot completes per level
+        mode: ``threads`` or ``async``
+        profile: Stub latency and token distributions
+        progress: Called with each level's report as soon as it is done
+
+    Returns:
+        ``{"mode", "workers", "profile", "levels": [...]}``
+
+    Raises:
+        ValueError: If the mode is unknown or the sweep is empty
+        RuntimeError: If a worker process dies
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode '{mode}' (choose from {', '.join(MODES)})")
+    if not sweep:
+        raise ValueError("The sweep needs at least one concurrency level")
+    context = multiprocessing.get_context("spawn")
+    stub_conn, child_conn = context.Pipe()
+    stub = context.Process(target=_serve_stub, args=(asdict(profile), child_conn), daemon=True)
+    stub.start()
+    processes = []
+    try:
+        url = stub_conn.recv()
+        conns = []
+        for _ in range(workers):
+            conn, child_conn = context.Pipe()
+            process = context.Process(target=_worker_main, args=(url, mode, child_conn), daemon=True)
+            process.start()
+            processes.append(process)
+            conns.append(conn)
+        for conn in conns:
+            _receive(conn)
+
+        levels = []
+        for concurrency in sweep:
+            _stub_request(url, "/stats/reset", "POST")
+            start = time.perf_counter()
+            for conn, share in zip(conns, _split(concurrency, workers)):
+                conn.send({"concurrency": share, "runs": share * runs_per_slot})
+            results = [_receive(conn) for conn in conns]
+            level = _level(concurrency, time.perf_counter() - start, results, _stub_request(url, "/stats"))
+            levels.append(level)
+            if progress:
+                progress(level)
+        for conn in conns:
+            conn.send(None)
+        return {"mode": mode, "workers": workers, "profile": asdict(profile), "levels": levels}
+    finally:
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        stub.terminate()
+
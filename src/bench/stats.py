@@ -0,0 +1,22 @@
+"""Small statistics helpers shared by the benchmarks."""
+
+import math
+from typing import Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Return the nearest-rank ``q``-th percentile (0-100) of ``values`` (0.0 if empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(values: Sequence[float]) -> dict[str, float]:
+    """Return p50, p95 and max of ``values``, rounded to 0.01."""
+    return {
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "max": round(max(values), 2) if values else 0.0,
+    }
@@ -0,0 +1,85 @@
+"""Scripted chat model for deterministic benchmark runs.
+
+``ScriptedChatModel`` replays a fixed list of assistant turns (text and tool
+calls) instead of calling a provider, so a benchmark measures the pipeline
+itself: graph execution, reducers, tools, state projection and
+serialization. Turns are plain dicts so scripts can live in JSON files:
+
+    {"content": "...", "tool_calls": [{"name": "read_tsx", "args": {...}}]}
+"""
+
+import threading
+import time
+import uuid
+from typing import Any, Iterable, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field, PrivateAttr
+
+
+def to_message(turn: dict) -> AIMessage:
+    """Build an assistant message from a script turn, with fresh tool call ids."""
+    return AIMessage(
+        content=turn.get("content", ""),
+        tool_calls=[
+            {"name": call["name"], "args": call.get("args", {}), "id": f"call_{uuid.uuid4().hex[:12]}"}
+            for call in turn.get("tool_calls", [])
+        ],
+    )
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that answers with the next turn of a script.
+
+    Attributes:
+        turns: Script turns, consumed in order; once exhausted the model
+            answers with ``fallback``
+        latency: Seconds to sleep per call, to simulate provider latency
+        fallback: Final answer returned after the script runs out
+    """
+
+    turns: list[dict] = Field(default_factory=list)
+    latency: float = 0.0
+    fallback: str = "Done."
+    _cursor: int = PrivateAttr(default=0)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        """Tools are already decided by the script."""
+        return self
+
+    def load(self, turns: Iterable[dict]) -> None:
+        """Replace the script and rewind to its first turn."""
+        with self._lock:
+            self.turns = list(turns)
+            self._cursor = 0
+
+    @property
+    def remaining(self) -> int:
+        """Number of script turns not yet replayed."""
+        with self._lock:
+            return len(self.turns) - self._cursor
+
+    def _next_turn(self) -> dict:
+        with self._lock:
+            if self._cursor < len(self.turns):
+                self._cursor += 1
+                return self.turns[self._cursor - 1]
+        return {"content": self.fallback}
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=to_message(self._next_turn()))])
@@ -0,0 +1,365 @@
+"""Local stub of the Anthropic Messages API for load tests.
+
+``StubModelServer`` answers ``POST /v1/messages`` like the provider does, so
+the real ``ChatAnthropic`` client, its HTTP connection pool and response
+parsing are part of what a load test measures. Answers come from the corpus
+scripts of ``src.bench.latency``:
+- the stage is recognised by the tools offered (``task`` for the
+  orchestrator, ``write_scratch_pad`` for html_analyser, ``write_tsx`` for
+  tsx_styling_agent)
+- the case is recognised by the step's ``target_component`` in the first
+  user message
+- the turn is the number of assistant messages already in the conversation
+
+``StubProfile`` draws each answer's output tokens and latency from
+log-normal distributions: extra output tokens are sent as a leading text
+block, and the answer is delayed by a time-to-first-token plus a per-token
+generation time. ``GET /stats`` reports calls and peak in-flight requests
+(``POST /stats/reset`` clears them).
+
+The Message Batches endpoints are served too (``POST /v1/messages/batches``,
+``GET /v1/messages/batches/<id>`` and ``.../results``): a batch answers all
+its requests from the same scripts and ends ``batch_latency_ms`` after it
+was created, for tests of ``src.llms.batching``.
+"""
+
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from src.bench.latency import ORCHESTRATOR, load_corpus
+
+
+# Stage recognised by the first of these tools found in a request
+STAGE_TOOLS = (("task", ORCHESTRATOR), ("write_tsx", "tsx_styling_agent"), ("write_scratch_pad", "html_analyser"))
+
+# Characters per padded output token (matches the local token estimate)
+_CHARS_PER_TOKEN = 4
+
+
+@dataclass(frozen=True)
+class StubProfile:
+    """Latency and token distributions of the stub model.
+
+    Attributes:
+        latency_ms: Median time to first token
+        latency_sigma: Log-normal sigma of the time to first token (0 = fixed)
+        output_tokens: Median extra output tokens per answer
+        token_sigma: Log-normal sigma of the output tokens (0 = fixed)
+        ms_per_token: Generation time per output token
+        seed: Random seed, so a sweep can be repeated exactly
+        batch_latency_ms: Time from creating a message batch to its end
+    """
+
+    latency_ms: float = 200.0
+    latency_sigma: float = 0.3
+    output_tokens: int = 100
+    token_sigma: float = 0.5
+    ms_per_token: float = 1.0
+    seed: int = 0
+    batch_latency_ms: float = 1000.0
+
+
+def _lognormal(rng: random.Random, median: float, sigma: float) -> float:
+    if median <= 0:
+        return 0.0
+    return median if sigma <= 0 else rng.lognormvariate(math.log(median), sigma)
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+
+
+class _StubState:
+    """Scripts, random source and counters shared by the request handlers."""
+
+    def __init__(self, profile: StubProfile, cases: list[dict]):
+        self.profile = profile
+        self.scripts = {case["step"]["target_component"].lstrip("/"): case["script"] for case in cases}
+        self._rng = random.Random(profile.seed)
+        self._lock = threading.Lock()
+        self.batches: dict[str, dict] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.errors = 0
+            self.in_flight = 0
+            self.max_in_flight = 0
+            self.batch_count = 0
+            self.batch_requests = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "batches": self.batch_count,
+                "batch_requests": self.batch_requests,
+                "profile": asdict(self.profile),
+            }
+
+    def enter(self) -> None:
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def leave(self, failed: bool = False) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.errors += failed
+
+    def add_batch(self, batch: dict, requests: int) -> None:
+        with self._lock:
+            self.batches[batch["id"]] = batch
+            self.batch_count += 1
+            self.batch_requests += requests
+
+    def end_batch(self, batch: dict, results: list[dict]) -> None:
+        succeeded = sum(result["result"]["type"] == "succeeded" for result in results)
+        with self._lock:
+            batch["results"] = results
+            batch["request_counts"].update(processing=0, succeeded=succeeded, errored=len(results) - succeeded)
+            batch["processing_status"] = "ended"
+            batch["ended_at"] = _timestamp(datetime.now(timezone.utc))
+
+    def sample(self) -> tuple[int, float]:
+        """Draw ``(extra output tokens, seconds to answer)`` for one call."""
+        with self._lock:
+            tokens = round(_lognormal(self._rng, self.profile.output_tokens, self.profile.token_sigma))
+            first_token_ms = _lognormal(self._rng, self.profile.latency_ms, self.profile.latency_sigma)
+        return tokens, (first_token_ms + tokens * self.profile.ms_per_token) / 1000
+
+    def script_turn(self, request: dict) -> dict:
+        """Pick the script turn that answers a Messages API request.
+
+        Raises:
+            LookupError: If the stage or the case cannot be recognised
+        """
+        tools = {tool.get("name") for tool in request.get("tools", [])}
+        stage = next((stage for name, stage in STAGE_TOOLS if name in tools), None)
+        if stage is None:
+            raise LookupError(f"No known stage offers tools {sorted(tools)}")
+        messages = request.get("messages", [])
+        first = _text(messages[0]["content"]) if messages else ""
+        try:
+            target = json.loads(first)["target_component"].lstrip("/")
+        except (ValueError, TypeError, KeyError):
+            target = max((t for t in self.scripts if t in first), key=len, default=None)
+        if target not in self.scripts:
+            raise LookupError(f"No corpus case targets a component named in: {first[:120]!r}")
+        turns = self.scripts[target].get(stage, [])
+        turn = sum(message.get("role") == "assistant" for message in messages)
+        return turns[turn] if turn < len(turns) else {"content": "Done."}
+
+
+def _response(request: dict, turn: dict, padding_tokens: int, input_tokens: int) -> dict:
+    content = []
+    text = turn.get("content", "")
+    if padding_tokens:
+        filler = ("lorem " * padding_tokens * _CHARS_PER_TOKEN)[: padding_tokens * _CHARS_PER_TOKEN]
+        text = f"{filler.strip()}\n{text}" if text else filler.strip()
+    if text:
+        content.append({"type": "text", "text": text})
+    for call in turn.get("tool_calls", []):
+        content.append({
+            "type": "tool_use",
+            "id": f"toolu_{uuid.uuid4().hex[:24]}",
+            "name": call["name"],
+            "input": call.get("args", {}),
+        })
+    output_tokens = sum(len(json.dumps(block)) for block in content) // _CHARS_PER_TOKEN
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": request.get("model", "stub"),
+        "content": content,
+        "stop_reason": "tool_use" if turn.get("tool_calls") else "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+    }
+
+
+def _error(message: str) -> dict:
+    return {"type": "error", "error": {"type": "invalid_request_error", "message": message}}
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.isoformat().replace("+00:00", "Z")
+
+
+def _answer_batch(state: _StubState, batch: dict, requests: list[dict]) -> None:
+    """Answer every request of a batch, then mark the batch ended."""
+    time.sleep(state.profile.batch_latency_ms / 1000)
+    results = []
+    for request in requests:
+        params = request.get("params", {})
+        try:
+            turn = state.script_turn(params)
+        except LookupError as e:
+            results.append({"custom_id": request.get("custom_id"), "result": {"type": "errored", "error": _error(str(e))}})
+            continue
+        padding, _ = state.sample()
+        message = _response(params, turn, padding, len(json.dumps(params)) // _CHARS_PER_TOKEN)
+        results.append({"custom_id": request.get("custom_id"), "result": {"type": "succeeded", "message": message}})
+    state.end_batch(batch, results)
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY every
+    # keep-alive call would wait out the client's delayed ACK
+    disable_nagle_algorithm = True
+    state: _StubState
+
+    def _reply(self, status: HTTPStatus, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _batch_view(self, batch: dict) -> dict:
+        view = {key: value for key, value in batch.items() if key != "results"}
+        if batch["processing_status"] == "ended":
+            host, port = self.server.server_address[:2]
+            view["results_url"] = f"http://{host}:{port}/v1/messages/batches/{batch['id']}/results"
+        return view
+
+    def _create_batch(self, body: bytes) -> None:
+        try:
+            requests = json.loads(body)["requests"]
+        except (ValueError, KeyError, TypeError):
+            self._reply(HTTPStatus.BAD_REQUEST, _error('expected {"requests": [...]}'))
+            return
+        now = datetime.now(timezone.utc)
+        batch = {
+            "id": f"msgbatch_{uuid.uuid4().hex[:24]}",
+            "type": "message_batch",
+            "processing_status": "in_progress",
+            "request_counts": {"processing": len(requests), "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0},
+            "created_at": _timestamp(now),
+            "expires_at": _timestamp(now + timedelta(days=1)),
+            "ended_at": None,
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": None,
+        }
+        self.state.add_batch(batch, len(requests))
+        threading.Thread(target=_answer_batch, args=(self.state, batch, requests), daemon=True).start()
+        self._reply(HTTPStatus.OK, self._batch_view(batch))
+
+    def _get_batch(self, path: str) -> None:
+        batch_id, _, rest = path[len("/v1/messages/batches/"):].partition("/")
+        batch = self.state.batches.get(batch_id)
+        if batch is None or rest not in ("", "results"):
+            self._reply(HTTPStatus.NOT_FOUND, _error(f"Unknown batch {batch_id}"))
+        elif not rest:
+            self._reply(HTTPStatus.OK, self._batch_view(batch))
+        elif batch["processing_status"] != "ended":
+            self._reply(HTTPStatus.BAD_REQUEST, _error(f"Batch {batch_id} has not ended"))
+        else:
+            data = "".join(json.dumps(result) + "\n" for result in batch["results"]).encode("utf-8")
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "application/x-jsonl")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/stats":
+            self._reply(HTTPStatus.OK, self.state.stats())
+        elif path.startswith("/v1/messages/batches/"):
+            self._get_batch(path)
+        else:
+            self._reply(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        body = self._body()
+        if self.path == "/stats/reset":
+            self.state.reset()
+            self._reply(HTTPStatus.OK, self.state.stats())
+            return
+        if self.path.split("?")[0] == "/v1/messages/batches":
+            self._create_batch(body)
+            return
+        if self.path.split("?")[0] != "/v1/messages":
+            self._reply(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path}"})
+            return
+        self.state.enter()
+        try:
+            request = json.loads(body)
+            turn = self.state.script_turn(request)
+        except (ValueError, LookupError) as e:
+            self.state.leave(failed=True)
+            self._reply(HTTPStatus.BAD_REQUEST, _error(str(e)))
+            return
+        padding, seconds = self.state.sample()
+        time.sleep(seconds)
+        self.state.leave()
+        self._reply(HTTPStatus.OK, _response(request, turn, padding, len(body) // _CHARS_PER_TOKEN))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Large enough that a wide sweep is not throttled by the accept backlog
+    request_queue_size = 1024
+
+
+class StubModelServer:
+    """Threaded stub Messages API server on a local port.
+
+    Attributes:
+        url: Base URL to pass to the client (``http://host:port``)
+    """
+
+    def __init__(
+        self,
+        profile: StubProfile = StubProfile(),
+        host: str = "127.0.0.1",
+        port: int = 0,
+        cases: Optional[list[dict]] = None,
+    ):
+        """Bind the server (port 0 picks a free port); call ``serve_forever`` or ``start``."""
+        self.state = _StubState(profile, load_corpus() if cases is None else cases)
+        handler = type("StubHandler", (_StubHandler,), {"state": self.state})
+        self._server = _Server((host, port), handler)
+        self._thread: Optional[threading.Thread] = None
+        host, port = self._server.server_address[:2]
+        self.url = f"http://{host}:{port}"
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def start(self) -> "StubModelServer":
+        """Serve from a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="stub-model-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,247 @@
+"""Callback handlers for tracing agent runs.
+
+``LoggingCallback`` reports tool calls, chains and model turns through the
+``src.trace`` logger and is cheap enough to leave on in production:
+- Nothing is rendered unless the event passes the level filter and its run
+  is sampled; sampling is decided once per top-level run, so a sampled run
+  is traced completely, and warnings (errors) are always logged
+- Payloads are rendered with ``preview``, which walks at most a few levels
+  and items of a value and truncates strings before rendering, instead of
+  stringifying the whole graph state
+- ``start_background_logging`` routes the logger through a bounded queue to
+  a listener thread, so formatting and I/O happen off the agent's threads
+  and records are dropped (and counted) rather than blocking when the
+  queue is full
+"""
+
+import atexit
+import logging
+import queue
+import reprlib
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Iterable, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+
+
+TRACE_LOGGER = "src.trace"
+DEFAULT_MAX_CHARS = 200
+DEFAULT_MAX_QUEUE = 10_000
+
+
+class _BoundedRepr(reprlib.Repr):
+    """``reprlib`` limits plus compact forms for messages and commands."""
+
+    def __init__(self, max_chars: int):
+        super().__init__()
+        self.maxlevel = 3
+        self.maxdict = 6
+        self.maxlist = self.maxtuple = self.maxset = 6
+        self.maxstring = self.maxother = max_chars
+
+    def repr1(self, x: Any, level: int) -> str:
+        if isinstance(x, BaseMessage):
+            calls = [call["name"] for call in getattr(x, "tool_calls", None) or []]
+            suffix = f", tool_calls={calls}" if calls else ""
+            return f"{x.type}({self.repr1(x.content, level - 1)}{suffix})"
+        update = getattr(x, "update", None)
+        if type(x).__name__ == "Command" and update is not None:
+            return f"Command(update={self.repr1(update, level - 1)})"
+        return super().repr1(x, level)
+
+
+def preview(value: Any, max_chars: int = DEFAULT_MAX_CHARS) -> str:
+    """Render a bounded one-line preview of ``value``.
+
+    Only a few levels, items and characters of ``value`` are visited, so the
+    cost does not grow with the size of the state being logged.
+    """
+    text = _BoundedRepr(max_chars).repr(value).replace("\n", "\\n")
+    return text if len(text) <= max_chars else text[: max_chars - 3] + "..."
+
+
+def _sample_key(run_id: Any) -> int:
+    # The low bits of both uuid4 and uuid7 ids are random
+    return run_id.int & 0xFFFFFFFF if isinstance(run_id, UUID) else hash(run_id) & 0xFFFFFFFF
+
+
+class LoggingCallback(BaseCallbackHandler):
+    """Log agent events with level filtering and per-run sampling.
+
+    Tool calls are logged at INFO; chains and model turns at DEBUG; errors at
+    WARNING (never sampled out).
+
+    Attributes:
+        logger: Destination logger (default: ``src.trace``)
+        level: Minimum level of events to log
+        sample_rate: Fraction of top-level runs to trace (0.0-1.0)
+        max_chars: Maximum length of each rendered payload
+    """
+
+    raise_error = False
+
+    def __init__(
+        self,
+        logger: Optional[logging.Logger] = None,
+        level: int = logging.DEBUG,
+        sample_rate: float = 1.0,
+        max_chars: int = DEFAULT_MAX_CHARS,
+    ):
+        super().__init__()
+        self.logger = logger or logging.getLogger(TRACE_LOGGER)
+        self.level = level
+        self.sample_rate = sample_rate
+        self.max_chars = max_chars
+        self._roots: dict[Any, Any] = {}
+
+    def _track(self, run_id: Any, parent_run_id: Any) -> None:
+        self._roots[run_id] = self._roots.get(parent_run_id, parent_run_id) if parent_run_id else run_id
+
+    def _sampled(self, run_id: Any) -> bool:
+        if self.sample_rate >= 1:
+            return True
+        if self.sample_rate <= 0:
+            return False
+        return _sample_key(self._roots.get(run_id, run_id)) < self.sample_rate * 0x100000000
+
+    def _log(self, level: int, run_id: Any, message: str, *payloads: Any) -> None:
+        if level < self.level or not self.logger.isEnabledFor(level):
+            return
+        if level < logging.WARNING and not self._sampled(run_id):
+            return
+        self.logger.log(level, message, *(preview(p, self.max_chars) for p in payloads))
+
+    def _done(self, run_id: Any) -> None:
+        self._roots.pop(run_id, None)
+
+    def on_chain_start(self, serialized, inputs, *, run_id=None, parent_run_id=None, **kwargs):
+        self._track(run_id, parent_run_id)
+        name = kwargs.get("name") or (serialized or {}).get("name") or "chain"
+        self._log(logging.DEBUG, run_id, "chain start %s", name)
+
+    def on_chain_end(self, outputs, *, run_id=None, **kwargs):
+        self._log(logging.DEBUG, run_id, "chain end %s", outputs)
+        self._done(run_id)
+
+    def on_chain_error(self, error, *, run_id=None, **kwargs):
+        self._log(logging.WARNING, run_id, "chain error %s", error)
+        self._done(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id=None, parent_run_id=None, **kwargs):
+        self._track(run_id, parent_run_id)
+        name = (kwargs.get("metadata") or {}).get("ls_model_name") or (serialized or {}).get("name") or "model"
+        self._log(logging.DEBUG, run_id, "model start %s (%s messages)", name, sum(len(batch) for batch in messages))
+
+    def on_llm_end(self, response, *, run_id=None, **kwargs):
+        produced = [gen.message for gens in response.generations for gen in gens if hasattr(gen, "message")]
+        self._log(logging.DEBUG, run_id, "model end %s", produced)
+        self._done(run_id)
+
+    def on_llm_error(self, error, *, run_id=None, **kwargs):
+        self._log(logging.WARNING, run_id, "model error %s", error)
+        self._done(run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id=None, parent_run_id=None, inputs=None, **kwargs):
+        self._track(run_id, parent_run_id)
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._log(logging.INFO, run_id, "tool %s input %s", name, inputs if inputs is not None else input_str)
+
+    def on_tool_end(self, output, *, run_id=None, **kwargs):
+        self._log(logging.INFO, run_id, "tool output %s", output)
+        self._done(run_id)
+
+    def on_tool_error(self, error, *, run_id=None, **kwargs):
+        self._log(logging.WARNING, run_id, "tool error %s", error)
+        self._done(run_id)
+
+    def on_agent_action(self, action, *, run_id=None, **kwargs):
+        self._log(logging.INFO, run_id, "agent action %s %s", action.tool, action.tool_input)
+
+    def on_text(self, text, *, run_id=None, **kwargs):
+        if isinstance(text, str) and text.strip():
+            self._log(logging.DEBUG, run_id, "text %s", text)
+
+
+# Former print-based debug handler; kept so existing scripts keep working
+AgentDebugCallback = LoggingCallback
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queue records unformatted and drop them when the queue is full."""
+
+    def __init__(self, records: queue.Queue):
+        super().__init__(records)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener runs in this process, so the record need not be
+        # flattened to a string here; formatting happens on its thread.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[_DeferredQueueHandler] = None
+
+
+def start_background_logging(
+    handlers: Optional[Iterable[logging.Handler]] = None,
+    level: int = logging.DEBUG,
+    max_queue: int = DEFAULT_MAX_QUEUE,
+    logger_name: str = TRACE_LOGGER,
+) -> QueueListener:
+    """Route the trace logger through a queue to a background listener thread.
+
+    Calling it again returns the running listener.
+
+    Args:
+        handlers: Handlers the listener writes to (default: stderr)
+        level: Level of the trace logger
+        max_queue: Records held before new ones are dropped
+        logger_name: Logger to route
+
+    Returns:
+        The started listener (stopped automatically at exit)
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return _listener
+    if handlers is None:
+        stream = logging.StreamHandler(sys.stderr)
+        stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(threadName)s %(message)s"))
+        handlers = [stream]
+    _queue_handler = _DeferredQueueHandler(queue.Queue(max_queue))
+    logger = logging.getLogger(logger_name)
+    logger.addHandler(_queue_handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    _listener = QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_background_logging, logger_name)
+    return _listener
+
+
+def stop_background_logging(logger_name: str = TRACE_LOGGER) -> int:
+    """Flush and stop the listener started by ``start_background_logging``.
+
+    Returns:
+        Number of records dropped because the queue was full
+    """
+    global _listener, _queue_handler
+    if _listener is None:
+        return 0
+    _listener.stop()
+    logging.getLogger(logger_name).removeHandler(_queue_handler)
+    dropped = _queue_handler.dropped
+    if dropped:
+        sys.stderr.write(f"trace logging dropped {dropped} records (queue full)\n")
+    _listener = _queue_handler = None
+    return dropped
@@ -0,0 +1,526 @@
+"""Command-line entry point: ``python -m src <command>``.
+
+Commands:
+- ``run``: run the orchestrator on one step JSON (file or stdin);
+  ``--mode pipeline`` runs the deterministic pipeline instead (see
+  ``src.pipeline``; ``--no-summary`` also skips its one model call)
+- ``batch``: run every step of a JSONL file with one warm orchestrator
+  (``--batch-api`` sends model turns through the Message Batches API)
+- ``serve``: long-lived worker over local HTTP or stdin/stdout JSONL
+- ``docs``: search (and build or refresh) the offline index of notes and docs
+- ``similar``: rank a project's components by similarity to a step's snippet
+- ``bench``: performance benchmarks (``bench importtime``, ``bench latency``,
+  ``bench load``, ``bench batch``; ``bench latency --mode pipeline`` runs
+  the corpus through the deterministic pipeline for comparison)
+
+Only the standard library is imported at module level. dotenv, LangChain,
+deepagents and the subagent modules are imported inside the command that
+needs them, so ``--help`` and argument errors return in milliseconds and a
+run only loads the subagents it uses.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+
+SUBAGENT_NAMES = ("html_analyser", "tsx_styling_agent")
+
+
+def _subagent_list(value: str) -> list[str]:
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SUBAGENT_NAMES]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown subagent(s): {', '.join(unknown)} (choose from {', '.join(SUBAGENT_NAMES)})"
+        )
+    return names
+
+
+def _read_step(source: str) -> str:
+    """Read a step JSON from a file path or ``-`` (stdin) and validate it."""
+    text = sys.stdin.read() if source == "-" else Path(source).read_text(encoding="utf-8")
+    json.loads(text)
+    return text
+
+
+def _final_text(result: dict) -> str:
+    messages = result.get("messages") or []
+    return messages[-1].content if messages else ""
+
+
+def _build(args, batcher=None):
+    import os
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    if args.config:
+        os.environ["LITIUM_PROJECT_CONFIGS"] = os.pathsep.join(args.config)
+    if args.profile:
+        os.environ["LITIUM_PROFILE"] = args.profile
+    if args.step_cache:
+        os.environ["LITIUM_STEP_CACHE"] = args.step_cache
+
+    import warnings
+
+    warnings.filterwarnings("ignore", message="LangSmith now uses UUID v7", category=UserWarning)
+
+    from src.agent import SUBAGENTS, build_orchestrator
+
+    if args.mode == "pipeline":
+        from src.pipeline import build_pipeline
+
+        if batcher is None:
+            return build_pipeline(model=args.model, summarize=not args.no_summary)
+        from src.llms.batching import batched_model
+
+        return build_pipeline(
+            model=batched_model(args.model, batcher),
+            subagent_model={name: batched_model(spec.model, batcher) for name, spec in SUBAGENTS.items()},
+            summarize=not args.no_summary,
+        )
+    if batcher is None:
+        return build_orchestrator(model=args.model, subagents=args.subagents)
+    from src.llms.batching import batched_model
+
+    return build_orchestrator(
+        model=batched_model(args.model, batcher),
+        subagents=args.subagents,
+        subagent_model={name: batched_model(SUBAGENTS[name].model, batcher) for name in args.subagents},
+    )
+
+
+def _callbacks(args) -> Optional[list]:
+    if not args.verbose:
+        return None
+    import logging
+
+    from src.callbacks import LoggingCallback, start_background_logging
+
+    level = logging.INFO if args.verbose == 1 else logging.DEBUG
+    start_background_logging(level=level)
+    return [LoggingCallback(level=level, sample_rate=args.trace_sample)]
+
+
+def cmd_run(args) -> int:
+    try:
+        step = _read_step(args.step)
+    except (OSError, ValueError) as e:
+        print(f"error: cannot read step {args.step}: {e}", file=sys.stderr)
+        return 2
+
+    agent = _build(args)
+    from src.agent import run_step
+
+    result = run_step(agent, step, callbacks=_callbacks(args), project=args.project)
+    print(_final_text(result))
+    return 0
+
+
+def cmd_batch(args) -> int:
+    try:
+        lines = Path(args.steps).read_text(encoding="utf-8").splitlines()
+    except OSError as e:
+        print(f"error: cannot read {args.steps}: {e}", file=sys.stderr)
+        return 2
+    steps = []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            json.loads(line)
+        except ValueError as e:
+            print(f"error: {args.steps}:{number}: invalid JSON: {e}", file=sys.stderr)
+            return 2
+        steps.append(line)
+
+    batcher = None
+    if args.batch_api:
+        from src.llms.batching import MessageBatcher
+
+        batcher = MessageBatcher(max_batch=args.max_batch, max_wait=args.max_wait, poll_interval=args.poll_interval)
+    agent = _build(args, batcher)
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    from src.agent import run_step
+
+    # One handler for the whole batch: it keys its state by run id
+    callbacks = _callbacks(args)
+
+    def run_one(index: int, step: str) -> dict:
+        start = time.perf_counter()
+        record = {"index": index}
+        try:
+            record["response"] = _final_text(run_step(agent, step, callbacks=callbacks, project=args.project))
+        except Exception as e:
+            if not args.keep_going:
+                raise
+            record["error"] = f"{type(e).__name__}: {e}"
+        record["seconds"] = round(time.perf_counter() - start, 3)
+        return record
+
+    # Records are written as steps finish; "index" gives the input order
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    failed = 0
+    pool = ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="batch")
+    try:
+        for future in as_completed([pool.submit(run_one, index, step) for index, step in enumerate(steps)]):
+            record = future.result()
+            failed += "error" in record
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    finally:
+        pool.shutdown(cancel_futures=True)
+        if batcher is not None:
+            batcher.close()
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failed else 0
+
+
+def cmd_serve(args) -> int:
+    agent = _build(args)
+    from src.worker import Worker, serve_http, serve_stdio
+
+    worker = Worker(
+        agent,
+        concurrency=args.concurrency,
+        max_queue=args.max_queue,
+        callbacks=_callbacks(args),
+        project=args.project,
+    )
+    try:
+        if args.stdio:
+            return 1 if serve_stdio(worker) else 0
+        host, _, port = args.http.rpartition(":")
+        server = serve_http(worker, host or "127.0.0.1", int(port))
+        print(f"worker listening on http://{server.server_address[0]}:{server.server_address[1]}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return 0
+    finally:
+        worker.shutdown()
+
+
+def cmd_docs(args) -> int:
+    from src.retrieval import get_doc_index
+
+    index = get_doc_index(args.project)
+    start = time.perf_counter()
+    index.refresh()
+    refreshed = time.perf_counter()
+    hits = index.search(args.query, args.k) if args.query else []
+    print(
+        f"{len(index)} passages from {', '.join(str(root) for root in index.roots) or 'no folders'}"
+        f" (refresh {(refreshed - start) * 1000:.1f} ms, query {(time.perf_counter() - refreshed) * 1000:.1f} ms)",
+        file=sys.stderr,
+    )
+    for hit in hits:
+        print(f"{hit.path}:{hit.line} [{hit.heading}] score={hit.score}\n{hit.snippet}\n")
+    return 0
+
+
+def cmd_similar(args) -> int:
+    from src.retrieval import get_component_index
+
+    step = json.loads(_read_step(args.step))
+    index = get_component_index(args.project)
+    start = time.perf_counter()
+    hits = index.similar(step.get("html_snippet", ""), args.k, exclude=[step.get("target_component") or ""])
+    print(f"{len(index)} components under {index.root} ({(time.perf_counter() - start) * 1000:.1f} ms)", file=sys.stderr)
+    for hit in hits:
+        print(f"{hit.score:.3f} {hit.path}  ({', '.join(hit.shared)})")
+    return 0
+
+
+def cmd_bench_importtime(args) -> int:
+    from src.bench import importtime
+
+    baseline_path = Path(args.baseline) if args.baseline else importtime.BASELINE_PATH
+    tolerance = importtime.DEFAULT_TOLERANCE if args.tolerance is None else args.tolerance
+    reports = importtime.run(args.modules or None, args.repeat, baseline_path)
+    help_ms = importtime.measure_help(args.repeat)
+    for report in reports:
+        heaviest = ", ".join(f"{h['module']} {h['cumulative_ms']:.1f}" for h in report["heaviest"][:3])
+        print(
+            f"{report['module']:<12} {report['cumulative_ms']:8.1f} ms import"
+            f" {report['wall_ms']:8.1f} ms process  {report['modules_loaded']} modules  [{heaviest}]"
+        )
+    print(f"{'--help':<12} {help_ms:8.1f} ms process")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"cli_help_ms": help_ms, "reports": reports}, indent=2), encoding="utf-8")
+    if args.update_baseline:
+        importtime.write_baseline(reports, help_ms, baseline_path)
+        print(f"baseline written to {baseline_path}")
+        return 0
+
+    failures = importtime.check(reports, importtime.load_baseline(baseline_path), tolerance, help_ms)
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def cmd_bench_latency(args) -> int:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    from src.bench import latency
+
+    default_baseline = latency.PIPELINE_BASELINE_PATH if args.mode == "pipeline" else latency.BASELINE_PATH
+    baseline_path = Path(args.baseline) if args.baseline else default_baseline
+    tolerance = latency.DEFAULT_TOLERANCE if args.tolerance is None else args.tolerance
+    report = latency.run(args.cases or None, args.repeat, args.warmup, args.mode)
+    print(f"{'case/stage':<40} {'p50 ms':>8} {'p95 ms':>8} {'turns':>6} {'tools':>6} {'tokens':>8}")
+    for case, stages in report.items():
+        for stage, metrics in stages.items():
+            print(
+                f"{case + '/' + stage:<40} {metrics['wall_ms']['p50']:8.1f} {metrics['wall_ms']['p95']:8.1f}"
+                f" {metrics['model_turns']:6d} {metrics['tool_calls']:6d} {metrics['tokens']:8d}"
+            )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.update_baseline:
+        latency.write_baseline(report, baseline_path)
+        print(f"baseline written to {baseline_path}")
+        return 0
+
+    failures = latency.check(report, latency.load_baseline(baseline_path), tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def _sweep(value: str) -> tuple[int, ...]:
+    try:
+        levels = tuple(int(level) for level in value.split(",") if level.strip())
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated integers, got '{value}'") from None
+    if not levels or min(levels) < 1:
+        raise argparse.ArgumentTypeError("concurrency levels must be positive")
+    return levels
+
+
+def cmd_bench_load(args) -> int:
+    from src.bench import load
+    from src.bench.stub_server import StubProfile
+
+    profile = StubProfile(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        output_tokens=args.output_tokens,
+        token_sigma=args.token_sigma,
+        ms_per_token=args.ms_per_token,
+        seed=args.seed,
+    )
+    print(
+        f"{'N':>4} {'runs':>5} {'err':>4} {'rps':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        f" {'in-flight':>9}  workers (cpu util, rss MB)"
+    )
+
+    def show(level: dict) -> None:
+        workers = ", ".join(
+            f"{w['cpu_util']:.2f}/{w['rss_mb'] if w['rss_mb'] is not None else '?'}" for w in level["workers"]
+        )
+        latency = level["latency_ms"]
+        print(
+            f"{level['concurrency']:>4} {level['runs']:>5} {level['errors']:>4} {level['throughput_rps']:>7.2f}"
+            f" {latency['p50']:>8.1f} {latency['p95']:>8.1f} {latency['p99']:>8.1f}"
+            f" {level['model_max_in_flight']:>9}  {workers}",
+            flush=True,
+        )
+        if level["error_sample"]:
+            print(f"     first error: {level['error_sample']}", file=sys.stderr)
+
+    report = load.run(args.sweep, args.workers, args.runs_per_slot, args.mode, profile, progress=show)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 1 if any(level["errors"] for level in report["levels"]) else 0
+
+
+def cmd_bench_batch(args) -> int:
+    from src.bench import batch
+    from src.bench.stub_server import StubProfile
+
+    report = batch.run(
+        steps=args.steps,
+        concurrency=args.concurrency,
+        max_batch=args.max_batch,
+        max_wait=args.max_wait,
+        profile=StubProfile(batch_latency_ms=args.batch_latency_ms),
+    )
+    latency = report["latency_ms"]
+    print(
+        f"{report['steps']} steps ({report['errors']} failed) in {report['wall_s']:.1f} s:"
+        f" {report['steps_per_min']:.1f} steps/min, p50 {latency['p50']:.0f} ms, p95 {latency['p95']:.0f} ms"
+    )
+    print(
+        f"{report['model_turns']} model turns in {report['batches']} batches"
+        f" (mean {report['mean_batch']}, largest {report['largest_batch']})"
+    )
+    if report["error_sample"]:
+        print(f"first error: {report['error_sample']}", file=sys.stderr)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 1 if report["errors"] else 0
+
+
+def _add_agent_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--model", default="reliable", help="orchestrator model name or alias (default: reliable)")
+    parser.add_argument(
+        "--subagents",
+        type=_subagent_list,
+        default=list(SUBAGENT_NAMES),
+        help=f"comma-separated subagents to load (default: {','.join(SUBAGENT_NAMES)})",
+    )
+    parser.add_argument(
+        "--config",
+        action="append",
+        metavar="PATH",
+        help="workingproject.config of a project to serve (repeatable; default: ./workingproject.config)",
+    )
+    parser.add_argument("--project", help="project_name to run against (needed when several configs are loaded)")
+    parser.add_argument(
+        "--mode",
+        choices=("agent", "pipeline"),
+        default="agent",
+        help="agent: the orchestrator decides each delegation; pipeline: fixed stages, one summary model call"
+        " (uses both subagents; default: agent)",
+    )
+    parser.add_argument(
+        "--no-summary", action="store_true", help="pipeline mode: report from the stage results without a model call"
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="count", default=0, help="trace tool calls to stderr (-vv: also chains and model turns)"
+    )
+    parser.add_argument(
+        "--trace-sample", type=float, default=1.0, metavar="RATE", help="fraction of steps to trace (default: 1.0)"
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="profile graph nodes and tools; write flamegraph stacks and allocation summaries per step to DIR",
+    )
+    parser.add_argument(
+        "--step-cache",
+        metavar="DIR",
+        help="replay steps whose step JSON, models, prompts and files are unchanged from results cached in DIR",
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser for all commands."""
+    parser = argparse.ArgumentParser(prog="python -m src", description="Litium deep agents command-line interface")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the orchestrator on one step JSON")
+    run.add_argument("step", help="step JSON file, or - to read stdin")
+    _add_agent_options(run)
+    run.set_defaults(func=cmd_run)
+
+    batch = commands.add_parser("batch", help="run every step of a JSONL file")
+    batch.add_argument("steps", help="JSONL file with one step JSON per line")
+    batch.add_argument("-o", "--output", help="write results as JSONL here (default: stdout)")
+    batch.add_argument("--keep-going", action="store_true", help="record failed steps and continue")
+    batch.add_argument("--concurrency", type=int, default=1, help="steps running at once (default: 1)")
+    batch.add_argument(
+        "--batch-api",
+        action="store_true",
+        help="send model turns through the Anthropic Message Batches API (use with a high --concurrency)",
+    )
+    batch.add_argument("--max-batch", type=int, default=100, help="requests per message batch (default: 100)")
+    batch.add_argument("--max-wait", type=float, default=2.0, help="seconds a turn waits for its batch to fill (default: 2)")
+    batch.add_argument("--poll-interval", type=float, default=10.0, help="seconds before polling a batch (default: 10)")
+    _add_agent_options(batch)
+    batch.set_defaults(func=cmd_batch)
+
+    serve = commands.add_parser("serve", help="keep the orchestrator warm and serve steps")
+    transport = serve.add_mutually_exclusive_group()
+    transport.add_argument("--http", default="127.0.0.1:8765", metavar="HOST:PORT", help="listen address (default: 127.0.0.1:8765)")
+    transport.add_argument("--stdio", action="store_true", help="read JSONL steps on stdin, write results on stdout")
+    serve.add_argument("--concurrency", type=int, default=4, help="steps running at once (default: 4)")
+    serve.add_argument("--max-queue", type=int, default=16, help="steps allowed to wait for a slot (default: 16)")
+    _add_agent_options(serve)
+    serve.set_defaults(func=cmd_serve)
+
+    docs = commands.add_parser("docs", help="search the offline index of notes and docs")
+    docs.add_argument("query", nargs="?", help="keywords to search for (default: only build or refresh the index)")
+    docs.add_argument("-k", type=int, default=5, help="results to show (default: 5)")
+    docs.add_argument("--project", help="include the docs folders of this project")
+    docs.set_defaults(func=cmd_docs)
+
+    similar = commands.add_parser("similar", help="rank the project's components by similarity to a step's html_snippet")
+    similar.add_argument("step", help="step JSON file, or - to read stdin")
+    similar.add_argument("-k", type=int, default=5, help="components to show (default: 5)")
+    similar.add_argument("--project", help="project to search (default: the only configured one)")
+    similar.set_defaults(func=cmd_similar)
+
+    bench = commands.add_parser("bench", help="performance benchmarks")
+    benches = bench.add_subparsers(dest="bench", required=True)
+
+    importtime = benches.add_parser("importtime", help="cold-start import time regression check")
+    importtime.add_argument("modules", nargs="*", help="modules to measure (default: baseline targets)")
+    importtime.add_argument("--repeat", type=int, default=5, help="runs per module; the fastest counts")
+    importtime.add_argument("--baseline", help="baseline file (default: benchmarks/importtime.json)")
+    importtime.add_argument("--tolerance", type=float, help="allowed slowdown ratio over baseline (default: 0.5)")
+    importtime.add_argument("--update-baseline", action="store_true", help="record results as the new baseline")
+    importtime.add_argument("--json", help="also write the full report to this file")
+    importtime.set_defaults(func=cmd_bench_importtime)
+
+    latency = benches.add_parser("latency", help="per-stage latency regression check over the step corpus")
+    latency.add_argument("cases", nargs="*", help="corpus cases to run (default: all of benchmarks/corpus)")
+    latency.add_argument("--repeat", type=int, default=20, help="measured runs per case (default: 20)")
+    latency.add_argument("--warmup", type=int, default=2, help="unmeasured runs per case (default: 2)")
+    latency.add_argument(
+        "--mode",
+        choices=("agent", "pipeline"),
+        default="agent",
+        help="run the cases through the orchestrator or the deterministic pipeline (default: agent)",
+    )
+    latency.add_argument(
+        "--baseline", help="baseline file (default: benchmarks/latency.json, or latency-pipeline.json with --mode pipeline)"
+    )
+    latency.add_argument("--tolerance", type=float, help="allowed wall-time slowdown ratio (default: 0.5)")
+    latency.add_argument("--update-baseline", action="store_true", help="record results as the new baseline")
+    latency.add_argument("--json", help="also write the full report to this file")
+    latency.set_defaults(func=cmd_bench_latency)
+
+    load = benches.add_parser("load", help="concurrency sweep against a local stub model server")
+    load.add_argument("--sweep", type=_sweep, default=(1, 2, 4, 8, 16), help="concurrent runs per level (default: 1,2,4,8,16)")
+    load.add_argument("--workers", type=int, default=1, help="worker processes sharing each level (default: 1)")
+    load.add_argument("--runs-per-slot", type=int, default=3, help="runs each concurrent slot completes per level (default: 3)")
+    load.add_argument("--mode", choices=("threads", "async"), default="threads", help="drive runs from threads or an event loop")
+    load.add_argument("--latency-ms", type=float, default=200.0, help="median stub time to first token (default: 200)")
+    load.add_argument("--latency-sigma", type=float, default=0.3, help="log-normal sigma of the time to first token (default: 0.3)")
+    load.add_argument("--output-tokens", type=int, default=100, help="median extra output tokens per answer (default: 100)")
+    load.add_argument("--token-sigma", type=float, default=0.5, help="log-normal sigma of the output tokens (default: 0.5)")
+    load.add_argument("--ms-per-token", type=float, default=1.0, help="stub generation time per output token (default: 1)")
+    load.add_argument("--seed", type=int, default=0, help="random seed of the stub distributions")
+    load.add_argument("--json", help="also write the full report to this file")
+    load.set_defaults(func=cmd_bench_load)
+
+    batches = benches.add_parser("batch", help="Message Batches mode throughput against a local stub")
+    batches.add_argument("--steps", type=int, default=32, help="steps to run (default: 32)")
+    batches.add_argument("--concurrency", type=int, default=16, help="steps in flight at once (default: 16)")
+    batches.add_argument("--max-batch", type=int, default=100, help="requests per message batch (default: 100)")
+    batches.add_argument("--max-wait", type=float, default=0.2, help="seconds a turn waits for its batch to fill (default: 0.2)")
+    batches.add_argument("--batch-latency-ms", type=float, default=500.0, help="time the stub takes per batch (default: 500)")
+    batches.add_argument("--json", help="also write the full report to this file")
+    batches.set_defaults(func=cmd_bench_batch)
+
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Parse arguments and dispatch to the selected command."""
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,614 @@
+"""Map a snippet's arbitrary Tailwind values to the project's design tokens.
+
+Figma exports are full of arbitrary values (``text-[#1A2332]``,
+``bg-[#F8F6F2]``, ``mr-[490px]``), and the analyser spends turns finding
+out whether a token such as ``text-brand-black`` already exists. This
+module answers that up front:
+- ``TokenTable`` holds the project's tokens, extracted from the ``theme``
+  (and ``theme.extend``) ``colors``, ``spacing`` and ``fontSize`` of its
+  Tailwind config and from the CSS custom properties of its stylesheets
+  (Tailwind v4 ``--color-*``, ``--spacing-*`` and ``--text-*`` become
+  named tokens, other color variables ``[var(--name)]`` classes), plus
+  Tailwind's default spacing and font-size scales when the project uses
+  Tailwind
+- ``TokenTable.match`` maps every arbitrary value of a snippet in one
+  batch: colors by CIEDE2000 distance in CIELAB, computed for all
+  value/token pairs at once with NumPy when it is installed (one value at
+  a time otherwise), lengths by snapping to the nearest scale entries
+- ``design_token_note`` renders the matches as a short note that the
+  html_analyser's state projection adds to its input
+
+Tables are cached per frontend root and rebuilt when a source file changes.
+"""
+
+import colorsys
+import functools
+import math
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+
+TAILWIND_CONFIGS = ("tailwind.config.ts", "tailwind.config.js", "tailwind.config.mjs", "tailwind.config.cjs")
+
+# Stylesheets scanned for custom properties
+CSS_SUFFIXES = frozenset({".css", ".scss"})
+EXCLUDED_DIRS = frozenset({"node_modules", ".git", ".next", ".turbo", "public"})
+
+# Colors farther than this (CIEDE2000) are not offered; below ~2.3 the
+# difference is not visible
+MAX_COLOR_DISTANCE = 10.0
+
+# Lengths are snapped to entries within this many px, or this fraction of the value
+LENGTH_TOLERANCE_PX = 2.0
+LENGTH_TOLERANCE_RATIO = 0.05
+
+CANDIDATES = 3
+MAX_NOTE_VALUES = 40
+REFRESH_INTERVAL = 5.0
+
+ROOT_FONT_PX = 16.0
+
+# Tailwind's default spacing scale (rem / 4) and font sizes
+DEFAULT_SPACING = {"px": "1px", **{
+    (str(step).rstrip("0").rstrip(".") if isinstance(step, float) else str(step)): f"{step / 4}rem"
+    for step in (0, 0.5, 1, 1.5, 2, 2.5, 3, 3.5, 4, 5, 6, 7, 8, 9, 10, 11, 12, 14, 16, 20, 24, 28, 32,
+                 36, 40, 44, 48, 52, 56, 60, 64, 72, 80, 96)
+}}
+DEFAULT_FONT_SIZES = {
+    "xs": "0.75rem", "sm": "0.875rem", "base": "1rem", "lg": "1.125rem", "xl": "1.25rem",
+    "2xl": "1.5rem", "3xl": "1.875rem", "4xl": "2.25rem", "5xl": "3rem", "6xl": "3.75rem",
+    "7xl": "4.5rem", "8xl": "6rem", "9xl": "8rem",
+}
+
+COLOR_PREFIXES = frozenset({
+    "text", "bg", "border", "border-t", "border-r", "border-b", "border-l", "border-x", "border-y",
+    "from", "via", "to", "fill", "stroke", "ring", "outline", "decoration", "divide", "placeholder",
+    "caret", "accent", "shadow",
+})
+SPACING_PREFIXES = frozenset({
+    "m", "mx", "my", "mt", "mr", "mb", "ml", "ms", "me", "p", "px", "py", "pt", "pr", "pb", "pl", "ps", "pe",
+    "gap", "gap-x", "gap-y", "space-x", "space-y", "w", "h", "size", "min-w", "min-h", "max-w", "max-h",
+    "top", "right", "bottom", "left", "inset", "inset-x", "inset-y", "translate-x", "translate-y", "basis",
+    "scroll-m", "scroll-p",
+})
+FONT_SIZE_PREFIXES = frozenset({"text"})
+
+_ARBITRARY = re.compile(r"(?<![\w\[-])((?:[\w-]+:)*)(-?)([a-z][a-z-]*?)-\[([^\]\s\"'<>]+)\]")
+_LENGTH = re.compile(r"^(-?\d*\.?\d+)(px|rem|em)?$")
+_CSS_VAR = re.compile(r"(?<![\w-])--([\w-]+)\s*:\s*([^;{}]+);")
+_HEX = re.compile(r"^#([0-9a-fA-F]{3,4}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})$")
+_FUNCTION = re.compile(r"^(rgba?|hsla?)\((.*)\)$", re.IGNORECASE)
+_VAR_REF = re.compile(r"var\(\s*--([\w-]+)\s*(?:,[^)]*)?\)")
+_JS_KEY = re.compile(r"\s*(?:([A-Za-z_$][\w$-]*)|\"([^\"]*)\"|'([^']*)'|(\d[\w.]*)|(\}))\s*")
+_JS_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+_SPACE = re.compile(r"\s*")
+
+
+@functools.lru_cache(maxsize=1)
+def _numpy():
+    """NumPy if installed (optional; imported on first match, it takes ~100 ms)."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+# ----------------------------------------------------------------------
+# Value parsing
+# ----------------------------------------------------------------------
+
+def _channels(text: str) -> list[str]:
+    return [part for part in re.split(r"[\s,/]+", text.strip()) if part]
+
+
+def parse_color(value: str, variables: Optional[dict[str, str]] = None) -> Optional[tuple[float, float, float]]:
+    """Parse a CSS color into sRGB channels in 0-1 (alpha is ignored).
+
+    Accepts hex, ``rgb()``/``rgba()``, ``hsl()``/``hsla()``, bare channel
+    triplets as used by shadcn-style variables (``26 35 50``,
+    ``210 40% 98%``) and ``var(--x)`` references resolved from ``variables``.
+    """
+    value = value.strip().replace("_", " ")
+    if variables:
+        for _ in range(4):
+            resolved = _VAR_REF.sub(lambda m: variables.get(m.group(1), m.group(0)), value)
+            if resolved == value:
+                break
+            value = resolved
+    match = _HEX.match(value)
+    if match:
+        digits = match.group(1)
+        if len(digits) <= 4:
+            digits = "".join(c * 2 for c in digits)
+        return tuple(int(digits[i:i + 2], 16) / 255 for i in (0, 2, 4))
+    function = _FUNCTION.match(value)
+    kind, body = (function.group(1).lower()[:3], function.group(2)) if function else (None, value)
+    parts = _channels(body)[:3]
+    if len(parts) != 3:
+        return None
+    try:
+        if kind == "hsl" or (kind is None and parts[1].endswith("%") and parts[2].endswith("%")):
+            hue = float(parts[0].removesuffix("deg")) / 360 % 1
+            saturation, lightness = (float(p.rstrip("%")) / 100 for p in parts[1:])
+            return colorsys.hls_to_rgb(hue, lightness, saturation)
+        if kind == "rgb" or (kind is None and all(re.fullmatch(r"\d{1,3}", p) for p in parts)):
+            return tuple(
+                float(p.rstrip("%")) / 100 if p.endswith("%") else float(p) / 255 for p in parts
+            )
+    except ValueError:
+        return None
+    return None
+
+
+def parse_length(value: str, variables: Optional[dict[str, str]] = None) -> Optional[float]:
+    """Parse a CSS length in px, rem or em (unitless 0 too) into px."""
+    value = value.strip()
+    if variables:
+        value = _VAR_REF.sub(lambda m: variables.get(m.group(1), m.group(0)), value).strip()
+    match = _LENGTH.match(value)
+    if not match or (match.group(2) is None and float(match.group(1)) != 0):
+        return None
+    number = float(match.group(1))
+    return number if match.group(2) in (None, "px") else number * ROOT_FONT_PX
+
+
+# ----------------------------------------------------------------------
+# Perceptual color distance
+# ----------------------------------------------------------------------
+
+class _ScalarOps:
+    """The math used below, for plain floats (NumPy provides the same names for arrays)."""
+
+    sqrt = staticmethod(math.sqrt)
+    sin = staticmethod(math.sin)
+    cos = staticmethod(math.cos)
+    exp = staticmethod(math.exp)
+    abs = staticmethod(abs)
+    arctan2 = staticmethod(math.atan2)
+    degrees = staticmethod(math.degrees)
+    radians = staticmethod(math.radians)
+    cbrt = staticmethod(lambda x: math.copysign(abs(x) ** (1 / 3), x))
+
+    @staticmethod
+    def where(condition, a, b):
+        return a if condition else b
+
+
+def _to_lab(r, g, b, m=_ScalarOps):
+    """sRGB channels (0-1) to CIELAB (D65)."""
+    def linear(c):
+        return m.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+
+    r, g, b = linear(r), linear(g), linear(b)
+    x = (0.4124 * r + 0.3576 * g + 0.1805 * b) / 0.95047
+    y = 0.2126 * r + 0.7152 * g + 0.0722 * b
+    z = (0.0193 * r + 0.1192 * g + 0.9505 * b) / 1.08883
+
+    def f(t):
+        return m.where(t > 216 / 24389, m.cbrt(t), (24389 / 27 * t + 16) / 116)
+
+    fx, fy, fz = f(x), f(y), f(z)
+    return 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+
+
+def _ciede2000(lab1, lab2, m=_ScalarOps):
+    """CIEDE2000 color difference; works on floats or broadcastable arrays."""
+    L1, a1, b1 = lab1
+    L2, a2, b2 = lab2
+    c_bar = (m.sqrt(a1 ** 2 + b1 ** 2) + m.sqrt(a2 ** 2 + b2 ** 2)) / 2
+    g = 0.5 * (1 - m.sqrt(c_bar ** 7 / (c_bar ** 7 + 25.0 ** 7)))
+    a1p, a2p = (1 + g) * a1, (1 + g) * a2
+    c1p, c2p = m.sqrt(a1p ** 2 + b1 ** 2), m.sqrt(a2p ** 2 + b2 ** 2)
+    h1p = m.degrees(m.arctan2(b1, a1p)) % 360
+    h2p = m.degrees(m.arctan2(b2, a2p)) % 360
+    chroma = c1p * c2p
+
+    dh = h2p - h1p
+    dh = m.where(dh > 180, dh - 360, m.where(dh < -180, dh + 360, dh))
+    dh = m.where(chroma == 0, 0.0, dh)
+    d_l, d_c = L2 - L1, c2p - c1p
+    d_h = 2 * m.sqrt(chroma) * m.sin(m.radians(dh) / 2)
+
+    l_bar, c_bar_p, h_sum = (L1 + L2) / 2, (c1p + c2p) / 2, h1p + h2p
+    h_bar = m.where(
+        chroma == 0, h_sum,
+        m.where(m.abs(h1p - h2p) <= 180, h_sum / 2, m.where(h_sum < 360, (h_sum + 360) / 2, (h_sum - 360) / 2)),
+    )
+    t = (1 - 0.17 * m.cos(m.radians(h_bar - 30)) + 0.24 * m.cos(m.radians(2 * h_bar))
+         + 0.32 * m.cos(m.radians(3 * h_bar + 6)) - 0.20 * m.cos(m.radians(4 * h_bar - 63)))
+    d_theta = 30 * m.exp(-(((h_bar - 275) / 25) ** 2))
+    r_c = 2 * m.sqrt(c_bar_p ** 7 / (c_bar_p ** 7 + 25.0 ** 7))
+    s_l = 1 + 0.015 * (l_bar - 50) ** 2 / m.sqrt(20 + (l_bar - 50) ** 2)
+    s_c = 1 + 0.045 * c_bar_p
+    s_h = 1 + 0.015 * c_bar_p * t
+    r_t = -m.sin(m.radians(2 * d_theta)) * r_c
+    return m.sqrt((d_l / s_l) ** 2 + (d_c / s_c) ** 2 + (d_h / s_h) ** 2 + r_t * (d_c / s_c) * (d_h / s_h))
+
+
+def color_distances(queries: list[tuple], tokens: list[tuple]) -> list[list[float]]:
+    """CIEDE2000 distance of every query color to every token color (sRGB 0-1)."""
+    if not queries or not tokens:
+        return [[] for _ in queries]
+    numpy = _numpy()
+    if numpy is not None:
+        q = numpy.asarray(queries, dtype=float).T[:, :, None]
+        t = numpy.asarray(tokens, dtype=float).T[:, None, :]
+        return _ciede2000(_to_lab(*q, m=numpy), _to_lab(*t, m=numpy), m=numpy).tolist()
+    token_labs = [_to_lab(*rgb) for rgb in tokens]
+    return [[_ciede2000(_to_lab(*rgb), lab) for lab in token_labs] for rgb in queries]
+
+
+# ----------------------------------------------------------------------
+# Token extraction
+# ----------------------------------------------------------------------
+
+def _strip_js_comments(source: str) -> str:
+    source = re.sub(r"/\*.*?\*/", " ", source, flags=re.DOTALL)
+    return re.sub(r"(?m)(^|[\s,{(])//.*$", r"\1", source)
+
+
+def _parse_js_object(source: str, pos: int) -> tuple[dict, int]:
+    """Parse the object literal starting at ``source[pos] == "{"``.
+
+    Keeps string, number and nested object values and the first element of
+    arrays (``fontSize: ['14px', {...}]``); other expressions are skipped.
+    """
+    result: dict[str, Any] = {}
+    pos += 1
+    length = len(source)
+    while pos < length:
+        match = _JS_KEY.match(source, pos)
+        if not match:
+            pos = _skip_value(source, pos)
+            if pos < length and source[pos] == ",":
+                pos += 1
+            elif pos < length and source[pos] == "}":
+                return result, pos + 1
+            continue
+        if match.group(5):
+            return result, match.end()
+        key = next(g for g in match.groups()[:4] if g is not None)
+        pos = match.end()
+        if pos >= length or source[pos] != ":":
+            pos = _skip_value(source, pos)
+        else:
+            pos += 1
+            value, pos = _parse_js_value(source, pos)
+            if value is not None:
+                result[key] = value
+        while pos < length and source[pos] in " \t\r\n":
+            pos += 1
+        if pos < length and source[pos] == ",":
+            pos += 1
+    return result, pos
+
+
+def _parse_js_value(source: str, pos: int) -> tuple[Any, int]:
+    pos = _SPACE.match(source, pos).end()
+    if pos >= len(source):
+        return None, pos
+    char = source[pos]
+    if char == "{":
+        return _parse_js_object(source, pos)
+    if char in "\"'`":
+        end = source.find(char, pos + 1)
+        end = len(source) if end < 0 else end
+        return source[pos + 1:end], end + 1
+    if char == "[":
+        first, _ = _parse_js_value(source, pos + 1)
+        return (first if isinstance(first, str) else None), _skip_value(source, pos)
+    number = _JS_NUMBER.match(source, pos)
+    if number:
+        return number.group(), _skip_value(source, pos)
+    return None, _skip_value(source, pos)
+
+
+def _skip_value(source: str, pos: int) -> int:
+    """Return the position of the ``,`` or ``}`` that ends the value at ``pos``."""
+    depth = 0
+    quote = None
+    while pos < len(source):
+        char = source[pos]
+        if quote:
+            if char == "\\":
+                pos += 1
+            elif char == quote:
+                quote = None
+        elif char in "\"'`":
+            quote = char
+        elif char in "{[(":
+            depth += 1
+        elif char in "}])":
+            if depth == 0:
+                return pos
+            depth -= 1
+        elif char == "," and depth == 0:
+            return pos
+        pos += 1
+    return pos
+
+
+def _flatten(tree: dict, prefix: str = "") -> dict[str, str]:
+    flat = {}
+    for key, value in tree.items():
+        name = prefix if key == "DEFAULT" else f"{prefix}-{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, str) and name:
+            flat[name] = value
+    return flat
+
+
+def tailwind_theme(source: str) -> dict[str, dict[str, str]]:
+    """Extract ``colors``, ``spacing`` and ``fontSize`` from a Tailwind config's source.
+
+    Returns:
+        ``{"colors": {name: value}, "spacing": ..., "fontSize": ...}`` with
+        nested keys flattened (``brand.black`` -> ``brand-black``);
+        ``theme.extend`` entries override ``theme`` ones
+    """
+    source = _strip_js_comments(source)
+    theme: dict[str, dict[str, str]] = {"colors": {}, "spacing": {}, "fontSize": {}}
+    match = re.search(r"\btheme\s*:\s*\{", source)
+    if not match:
+        return theme
+    parsed, _ = _parse_js_object(source, match.end() - 1)
+    for section in (parsed, parsed.get("extend") if isinstance(parsed.get("extend"), dict) else {}):
+        for key in theme:
+            if isinstance(section.get(key), dict):
+                theme[key].update(_flatten(section[key]))
+    return theme
+
+
+def css_variables(source: str) -> dict[str, str]:
+    """Custom properties declared in a stylesheet (the last declaration wins)."""
+    return {name: value.strip() for name, value in _CSS_VAR.findall(re.sub(r"/\*.*?\*/", " ", source, flags=re.DOTALL))}
+
+
+@dataclass(frozen=True)
+class DesignToken:
+    """One project token.
+
+    Attributes:
+        kind: ``color``, ``spacing`` or ``font-size``
+        name: What follows the utility prefix in a class (``brand-black``,
+            ``4``, ``[var(--primary)]``)
+        value: The token's CSS value
+        source: File it came from (``tailwind`` for the default scales)
+    """
+
+    kind: str
+    name: str
+    value: str
+    source: str
+
+
+@dataclass(frozen=True)
+class ArbitraryValue:
+    """An arbitrary-value class of a snippet (``hover:text-[#1A2332]``)."""
+
+    cls: str
+    variants: str
+    negative: str
+    prefix: str
+    value: str
+    kind: str
+
+
+@dataclass(frozen=True)
+class TokenMatch:
+    """Candidate tokens for one arbitrary value, nearest first.
+
+    Attributes:
+        value: The arbitrary value
+        candidates: ``(class, distance, token)``; the distance is CIEDE2000
+            for colors and the signed px difference for lengths
+    """
+
+    value: ArbitraryValue
+    candidates: tuple[tuple[str, float, DesignToken], ...]
+
+
+def arbitrary_values(text: str) -> list[ArbitraryValue]:
+    """The distinct color and length arbitrary values of a snippet, in order."""
+    found: dict[str, ArbitraryValue] = {}
+    for match in _ARBITRARY.finditer(text):
+        variants, negative, prefix, value = match.groups()
+        cls = match.group(0)
+        if cls in found:
+            continue
+        if prefix in COLOR_PREFIXES and parse_color(value) is not None:
+            kind = "color"
+        elif prefix in FONT_SIZE_PREFIXES and parse_length(value) is not None:
+            kind = "font-size"
+        elif prefix in SPACING_PREFIXES and parse_length(value) is not None:
+            kind = "spacing"
+        else:
+            continue
+        found[cls] = ArbitraryValue(cls, variants, negative, prefix, value, kind)
+    return list(found.values())
+
+
+class TokenTable:
+    """A project's design tokens with their values precomputed for matching."""
+
+    def __init__(self, tokens: Iterable[DesignToken], variables: Optional[dict[str, str]] = None):
+        self.variables = dict(variables or {})
+        self.tokens: dict[str, list[DesignToken]] = {"color": [], "spacing": [], "font-size": []}
+        self._values: dict[str, list] = {"color": [], "spacing": [], "font-size": []}
+        for token in tokens:
+            parsed = (parse_color if token.kind == "color" else parse_length)(token.value, self.variables)
+            if parsed is not None:
+                self.tokens[token.kind].append(token)
+                self._values[token.kind].append(parsed)
+
+    def __len__(self) -> int:
+        return sum(len(tokens) for tokens in self.tokens.values())
+
+    @classmethod
+    def from_project(cls, root: str | Path) -> "TokenTable":
+        """Extract the tokens of a frontend root (see the module docstring)."""
+        root = Path(root)
+        tokens: list[DesignToken] = []
+        variables: dict[str, str] = {}
+        config = next((root / name for name in TAILWIND_CONFIGS if (root / name).is_file()), None)
+        stylesheets = _stylesheets(root)
+        for path in stylesheets:
+            try:
+                declared = css_variables(path.read_text(encoding="utf-8", errors="replace"))
+            except OSError:
+                continue
+            variables.update(declared)
+            source = path.relative_to(root).as_posix()
+            for name, value in declared.items():
+                for prefix, kind in (("color-", "color"), ("spacing-", "spacing"), ("text-", "font-size")):
+                    if name.startswith(prefix):
+                        tokens.append(DesignToken(kind, name[len(prefix):], value, source))
+                        break
+                else:
+                    if parse_color(value) is not None:
+                        tokens.append(DesignToken("color", f"[var(--{name})]", value, source))
+        uses_tailwind = config is not None or any("tailwind" in _head(path) for path in stylesheets)
+        if uses_tailwind:
+            tokens += [DesignToken("spacing", name, value, "tailwind") for name, value in DEFAULT_SPACING.items()]
+            tokens += [DesignToken("font-size", name, value, "tailwind") for name, value in DEFAULT_FONT_SIZES.items()]
+            tokens += [DesignToken("color", name, value, "tailwind") for name, value in (("black", "#000"), ("white", "#fff"))]
+        if config is not None:
+            try:
+                theme = tailwind_theme(config.read_text(encoding="utf-8", errors="replace"))
+            except OSError:
+                theme = {}
+            for key, kind in (("colors", "color"), ("spacing", "spacing"), ("fontSize", "font-size")):
+                tokens += [DesignToken(kind, name, value, config.name) for name, value in theme.get(key, {}).items()]
+        # Later definitions of a name (project over defaults) win
+        unique = {(token.kind, token.name): token for token in tokens}
+        return cls(unique.values(), variables)
+
+    def match(self, values: list[ArbitraryValue], candidates: int = CANDIDATES) -> list[TokenMatch]:
+        """Map arbitrary values to their nearest tokens in one batch per kind."""
+        matches: dict[str, TokenMatch] = {}
+        colors = [v for v in values if v.kind == "color"]
+        distances = color_distances([parse_color(v.value, self.variables) for v in colors], self._values["color"])
+        for value, row in zip(colors, distances):
+            nearest = sorted(range(len(row)), key=row.__getitem__)[:candidates]
+            matches[value.cls] = self._match(value, [(i, row[i]) for i in nearest if row[i] <= MAX_COLOR_DISTANCE])
+        for kind in ("spacing", "font-size"):
+            lengths = [v for v in values if v.kind == kind]
+            scale = self._values[kind]
+            numpy = _numpy() if lengths and scale else None
+            if numpy is not None:
+                diff = numpy.asarray(scale)[None, :] - numpy.asarray([parse_length(v.value) for v in lengths])[:, None]
+                rows = diff.tolist()
+            else:
+                rows = [[px - parse_length(v.value) for px in scale] for v in lengths]
+            for value, row in zip(lengths, rows):
+                limit = max(LENGTH_TOLERANCE_PX, abs(parse_length(value.value)) * LENGTH_TOLERANCE_RATIO)
+                nearest = sorted(range(len(row)), key=lambda i: abs(row[i]))[:candidates]
+                matches[value.cls] = self._match(value, [(i, row[i]) for i in nearest if abs(row[i]) <= limit])
+        return [matches[value.cls] for value in values if value.cls in matches]
+
+    def _match(self, value: ArbitraryValue, nearest: list[tuple[int, float]]) -> TokenMatch:
+        tokens = self.tokens[value.kind]
+        return TokenMatch(value, tuple(
+            (f"{value.variants}{value.negative}{value.prefix}-{tokens[i].name}", round(distance, 2), tokens[i])
+            for i, distance in nearest
+        ))
+
+
+def _head(path: Path) -> str:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return f.read(2048)
+    except OSError:
+        return ""
+
+
+def _stylesheets(root: Path) -> list[Path]:
+    found = []
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if d not in EXCLUDED_DIRS and not d.startswith("."))
+        found += [Path(directory) / name for name in sorted(files) if os.path.splitext(name)[1] in CSS_SUFFIXES]
+    return found
+
+
+# ----------------------------------------------------------------------
+# Shared tables and the analyser note
+# ----------------------------------------------------------------------
+
+_tables: dict[str, tuple[float, tuple, TokenTable]] = {}
+_tables_lock = threading.Lock()
+
+
+def _sources_stamp(root: Path) -> tuple:
+    paths = [root / name for name in TAILWIND_CONFIGS] + _stylesheets(root)
+    return tuple((str(path), path.stat().st_mtime_ns) for path in paths if path.is_file())
+
+
+def get_token_table(project: Optional[str] = None) -> TokenTable:
+    """Return the (cached) token table of a project's frontend root.
+
+    Raises:
+        LookupError: If no project is selected (see ``BackendPool.resolve``)
+    """
+    from src.backends.pool import get_pool
+
+    root = Path(get_pool().config(project).frontend_root)
+    key = str(root)
+    with _tables_lock:
+        cached = _tables.get(key)
+        if cached is not None and time.monotonic() - cached[0] < REFRESH_INTERVAL:
+            return cached[2]
+        stamp = _sources_stamp(root)
+        if cached is not None and cached[1] == stamp:
+            _tables[key] = (time.monotonic(), stamp, cached[2])
+            return cached[2]
+        table = TokenTable.from_project(root)
+        _tables[key] = (time.monotonic(), stamp, table)
+        return table
+
+
+def _describe(distance: float, token: DesignToken, kind: str) -> str:
+    if kind == "color":
+        return f"{token.value}, dE {distance:g}"
+    px = parse_length(token.value)
+    return f"{px:g}px, {distance:+g}px"
+
+
+def design_token_note(text: str, table: Optional[TokenTable] = None) -> Optional[str]:
+    """Describe the tokens matching the arbitrary values in ``text``.
+
+    Args:
+        text: Task text containing the HTML snippet
+        table: Token table (default: the current project's)
+
+    Returns:
+        The note, or None when the snippet has no arbitrary values or the
+        project has no tokens
+    """
+    values = arbitrary_values(text)[:MAX_NOTE_VALUES]
+    if not values:
+        return None
+    if table is None:
+        try:
+            table = get_token_table()
+        except (LookupError, OSError, ValueError):
+            return None
+    if not len(table):
+        return None
+    lines = []
+    for match in table.match(values):
+        if match.candidates:
+            options = "; ".join(f"{cls} ({_describe(d, token, match.value.kind)})" for cls, d, token in match.candidates)
+        else:
+            options = "no project token close enough"
+        lines.append(f"- {match.value.cls} -> {options}")
+    return (
+        "Project design tokens for the snippet's arbitrary values (nearest first; "
+        "dE is the perceptual color difference, below 2 is not visible):\n" + "\n".join(lines)
+    )
@@ -0,0 +1,141 @@
+"""Pass-by-reference handles for large step fields.
+
+Delegating a step through the ``task`` tool makes the orchestrator re-type
+its whole input as tool-call arguments, and output tokens are the slowest
+kind. ``store_step_fields`` moves the bulky fields of a step out of the
+message onto the project's ``/agent/`` route instead:
+- Each field in ``HANDLE_FIELDS`` whose value is at least
+  ``LITIUM_HANDLE_CHARS`` characters (JSON) is stored once, content
+  addressed, at ``/agent/inputs/<digest>/<field>.<ext>``, and the step
+  carries the handle ``@ref:<path>`` in its place
+- The orchestrator passes handles along as they are; ``resolve_handles``
+  puts the content back into the subagent's task (the state projection
+  does it before anything else looks at the task), so subagents see the
+  full step while the orchestrator only ever types the short reference
+
+A step whose content did not change gets the same handles on every run, so
+the step cache keys stay stable. The handle is also a readable path, should
+an agent want to open the stored field with ``read_file``.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from typing import Optional
+
+
+logger = logging.getLogger(__name__)
+
+HANDLE_ENV = "LITIUM_HANDLE_CHARS"
+DEFAULT_HANDLE_CHARS = 256
+
+# Step fields worth passing by reference (paths stay inline: they select files)
+HANDLE_FIELDS = ("html_snippet", "details")
+
+HANDLE_PREFIX = "@ref:"
+HANDLE_ROOT = "/agent/inputs/"
+
+_AGENT_ROUTE = "/agent"
+_HANDLE = re.compile(r"(\"?)@ref:(/agent/inputs/[0-9a-f]{12}/[\w-]+\.(?:html|txt|json))(\"?)")
+_EXTENSIONS = {"html_snippet": "html"}
+
+
+def handle_chars() -> int:
+    """Minimum field size passed by reference (``LITIUM_HANDLE_CHARS``, 0 disables)."""
+    return int(os.environ.get(HANDLE_ENV, DEFAULT_HANDLE_CHARS))
+
+
+def _agent_backend(project: Optional[str]):
+    from src.backends.pool import get_pool
+
+    return get_pool().get(project).agent
+
+
+def store_step_fields(step: str, project: Optional[str] = None, min_chars: Optional[int] = None) -> str:
+    """Replace a step's large fields by handles to files on the ``/agent/`` route.
+
+    Args:
+        step: Step JSON text
+        project: Project whose ``/agent/`` route stores the fields (default:
+            the current or only project)
+        min_chars: Minimum field size (default: ``handle_chars()``)
+
+    Returns:
+        The step text, unchanged when it is not JSON, nothing is large
+        enough or no project can be determined
+
+    Raises:
+        ValueError: If the project's agent workspace cannot exist on this
+            platform (see ``BackendPool.get``)
+    """
+    min_chars = handle_chars() if min_chars is None else min_chars
+    if min_chars <= 0:
+        return step
+    try:
+        parsed = json.loads(step)
+    except ValueError:
+        return step
+    if not isinstance(parsed, dict):
+        return step
+    uploads = []
+    for name in HANDLE_FIELDS:
+        value = parsed.get(name)
+        if value is None or (isinstance(value, str) and value.startswith(HANDLE_PREFIX)):
+            continue
+        if isinstance(value, str):
+            content, extension = value, _EXTENSIONS.get(name, "txt")
+        else:
+            content, extension = json.dumps(value, ensure_ascii=False), "json"
+        if len(content) < min_chars:
+            continue
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:12]
+        path = f"{HANDLE_ROOT}{digest}/{name}.{extension}"
+        uploads.append((path[len(_AGENT_ROUTE):], content.encode("utf-8")))
+        parsed[name] = HANDLE_PREFIX + path
+    if not uploads:
+        return step
+    try:
+        responses = _agent_backend(project).upload_files(uploads)
+    except LookupError:
+        return step
+    failed = [response.path for response in responses if response.error]
+    if failed:
+        logger.warning("could not store step fields %s; passing them inline", ", ".join(failed))
+        return step
+    return json.dumps(parsed, ensure_ascii=False)
+
+
+def resolve_handles(text: str, project: Optional[str] = None) -> str:
+    """Put the content of every handle back into ``text``.
+
+    A quoted handle (a JSON field value) becomes the JSON value it stands
+    for; a bare handle becomes the raw content. Handles that cannot be read
+    are left as they are.
+    """
+    if HANDLE_PREFIX not in text:
+        return text
+    paths = sorted({match.group(2) for match in _HANDLE.finditer(text)})
+    if not paths:
+        return text
+    try:
+        responses = _agent_backend(project).download_files([path[len(_AGENT_ROUTE):] for path in paths])
+    except LookupError:
+        return text
+    contents = {
+        path: response.content.decode("utf-8")
+        for path, response in zip(paths, responses)
+        if response.content is not None and not response.error
+    }
+
+    def replace(match: re.Match) -> str:
+        path = match.group(2)
+        if path not in contents:
+            return match.group(0)
+        content = contents[path]
+        if match.group(1) and match.group(3):
+            return content if path.endswith(".json") else json.dumps(content, ensure_ascii=False)
+        return match.group(1) + content + match.group(3)
+
+    return _HANDLE.sub(replace, text)
@@ -0,0 +1,11 @@
+"""Client for the Litium admin web API of a project."""
+
+from src.litium.client import LitiumClient, LitiumError, LitiumSettings, TTLCache, get_client
+
+__all__ = [
+    "LitiumClient",
+    "LitiumError",
+    "LitiumSettings",
+    "TTLCache",
+    "get_client",
+]
@@ -0,0 +1,310 @@
+"""Pooled, caching client for the Litium admin web API.
+
+Each project's ``workingproject.config`` carries a ``litium_api`` section
+(``LITIUM_API_BASE_URL``, ``LITIUM_API_TOKEN`` and optional tuning keys) and
+a ``productVariantImages`` map of friendly names to media file ids.
+``LitiumClient`` turns that into:
+- One ``httpx.Client`` per project with keep-alive connections, shared by
+  every step and tool call (``get_client``)
+- A TTL cache of records keyed by ``(kind, id)``; unknown ids are cached too,
+  for a shorter time
+- Batched lookups: ``lookup`` takes ids of several kinds at once, answers
+  what it can from the cache and fetches the rest in one round, either as a
+  single ``POST <resource>/batch`` per kind (``LITIUM_API_BATCH``) or as
+  parallel GETs over the pooled connections
+"""
+
+import base64
+import binascii
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+
+import httpx
+
+
+# Resource path (relative to the API base URL) of each lookup kind
+RESOURCES = {
+    "product": "products/baseProducts",
+    "variant": "products/variants",
+    "image": "media/files",
+}
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_MAX_CONNECTIONS = 8
+DEFAULT_CACHE_TTL = 300.0
+DEFAULT_NEGATIVE_TTL = 30.0
+DEFAULT_CACHE_SIZE = 4096
+
+
+class LitiumError(RuntimeError):
+    """Raised when the Litium API cannot be reached or answers with an error."""
+
+
+def _flag(value: Any, default: bool) -> bool:
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+@dataclass(frozen=True)
+class LitiumSettings:
+    """Connection and caching settings for one project's Litium API.
+
+    Attributes:
+        base_url: Admin API root, e.g. ``https://host/Litium/api/admin``
+        token: ``LITIUM_API_TOKEN``
+        auth_scheme: ``Basic`` or ``Bearer``; by default ``Basic`` when the
+            token is base64 of ``user:password``, ``Bearer`` otherwise
+        verify: Verify TLS certificates (off for local development certs)
+        timeout: Seconds per request
+        max_connections: Size of the connection pool and of the lookup fan-out
+        cache_ttl: Seconds a fetched record stays cached
+        negative_ttl: Seconds an unknown id stays cached
+        batch: Fetch several ids of one kind with ``POST <resource>/batch``
+        aliases: Friendly names of ids (``productVariantImages``)
+        resources: Resource path of each lookup kind
+    """
+
+    base_url: str
+    token: str = ""
+    auth_scheme: Optional[str] = None
+    verify: bool = True
+    timeout: float = DEFAULT_TIMEOUT
+    max_connections: int = DEFAULT_MAX_CONNECTIONS
+    cache_ttl: float = DEFAULT_CACHE_TTL
+    negative_ttl: float = DEFAULT_NEGATIVE_TTL
+    batch: bool = False
+    aliases: dict[str, str] = field(default_factory=dict, compare=False)
+    resources: dict[str, str] = field(default_factory=lambda: dict(RESOURCES), compare=False)
+
+    @classmethod
+    def from_config(cls, settings: dict) -> "LitiumSettings":
+        """Build settings from a parsed ``workingproject.config``.
+
+        Raises:
+            LookupError: If the config has no ``litium_api`` base URL
+        """
+        api = settings.get("litium_api") or {}
+        base_url = api.get("LITIUM_API_BASE_URL")
+        if not base_url:
+            raise LookupError("The project config has no litium_api.LITIUM_API_BASE_URL")
+        return cls(
+            base_url=base_url.rstrip("/"),
+            token=api.get("LITIUM_API_TOKEN", ""),
+            auth_scheme=api.get("LITIUM_API_AUTH_SCHEME"),
+            verify=_flag(api.get("LITIUM_API_VERIFY_SSL"), True),
+            timeout=float(api.get("LITIUM_API_TIMEOUT", DEFAULT_TIMEOUT)),
+            max_connections=int(api.get("LITIUM_API_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+            cache_ttl=float(api.get("LITIUM_API_CACHE_TTL", DEFAULT_CACHE_TTL)),
+            negative_ttl=float(api.get("LITIUM_API_NEGATIVE_TTL", DEFAULT_NEGATIVE_TTL)),
+            batch=_flag(api.get("LITIUM_API_BATCH"), False),
+            aliases=dict(settings.get("productVariantImages") or {}),
+            resources={**RESOURCES, **(api.get("LITIUM_API_RESOURCES") or {})},
+        )
+
+    def headers(self) -> dict[str, str]:
+        """Request headers, including authorization when a token is set."""
+        headers = {"Accept": "application/json"}
+        if self.token:
+            scheme = self.auth_scheme or ("Basic" if _is_basic_credential(self.token) else "Bearer")
+            headers["Authorization"] = f"{scheme} {self.token}"
+        return headers
+
+
+def _is_basic_credential(token: str) -> bool:
+    try:
+        decoded = base64.b64decode(token, validate=True).decode("utf-8")
+    except (binascii.Error, UnicodeDecodeError):
+        return False
+    return ":" in decoded
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a per-entry TTL."""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> tuple[bool, Any]:
+        """Return ``(found, value)``; expired entries count as not found."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def put(self, key: Any, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LitiumClient:
+    """Batched, cached lookups of products, variants and images."""
+
+    def __init__(self, settings: LitiumSettings, transport: Optional[httpx.BaseTransport] = None):
+        """Open the connection pool.
+
+        Args:
+            settings: API location, credentials and tuning
+            transport: Custom httpx transport (e.g. ``httpx.MockTransport``)
+        """
+        self.settings = settings
+        self.cache = TTLCache()
+        self._http = httpx.Client(
+            base_url=settings.base_url + "/",
+            headers=settings.headers(),
+            verify=settings.verify,
+            timeout=settings.timeout,
+            limits=httpx.Limits(
+                max_connections=settings.max_connections,
+                max_keepalive_connections=settings.max_connections,
+            ),
+            transport=transport,
+        )
+        self._fanout = ThreadPoolExecutor(max_workers=settings.max_connections, thread_name_prefix="litium")
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hits = 0
+
+    def resolve(self, ident: str) -> str:
+        """Map a ``productVariantImages`` name to its id (other ids pass through)."""
+        return self.settings.aliases.get(ident, ident)
+
+    def _path(self, kind: str) -> str:
+        if kind not in self.settings.resources:
+            raise ValueError(f"Unknown Litium lookup kind '{kind}' (choose from {', '.join(self.settings.resources)})")
+        return self.settings.resources[kind]
+
+    def _request(self, method: str, path: str, **kwargs) -> Optional[Any]:
+        with self._lock:
+            self.requests += 1
+        try:
+            response = self._http.request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            raise LitiumError(f"{method} {path} failed: {e}") from e
+        if response.status_code == 404:
+            return None
+        if response.is_error:
+            raise LitiumError(f"{method} {path} answered {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+    def _fetch_one(self, kind: str, ident: str) -> Optional[dict]:
+        return self._request("GET", f"{self._path(kind)}/{ident}")
+
+    def _fetch_batch(self, kind: str, ids: list[str]) -> dict[str, Optional[dict]]:
+        body = self._request("POST", f"{self._path(kind)}/batch", json={"systemIds": ids}) or {}
+        found = {item.get("systemId"): item for item in body.get("items", [])}
+        return {ident: found.get(ident) for ident in ids}
+
+    def _store(self, kind: str, records: dict[str, Optional[dict]]) -> None:
+        for ident, record in records.items():
+            ttl = self.settings.cache_ttl if record is not None else self.settings.negative_ttl
+            self.cache.put((kind, ident), record, ttl)
+
+    def lookup(self, requests: dict[str, Iterable[str]]) -> dict[str, dict[str, Optional[dict]]]:
+        """Fetch records of several kinds in one round.
+
+        Args:
+            requests: Ids (or ``productVariantImages`` names) per kind, e.g.
+                ``{"variant": [...], "image": ["glove1"]}``
+
+        Returns:
+            ``{kind: {id or name as given: record or None}}``
+
+        Raises:
+            ValueError: If a kind is unknown
+            LitiumError: If the API fails
+        """
+        wanted = {kind: list(dict.fromkeys(ids)) for kind, ids in requests.items() if ids}
+        results: dict[str, dict[str, Optional[dict]]] = {kind: {} for kind in wanted}
+        missing: dict[str, list[str]] = {}
+        for kind, names in wanted.items():
+            self._path(kind)
+            for name in names:
+                found, record = self.cache.get((kind, self.resolve(name)))
+                if found:
+                    with self._lock:
+                        self.hits += 1
+                    results[kind][name] = record
+                else:
+                    missing.setdefault(kind, []).append(self.resolve(name))
+
+        if self.settings.batch:
+            futures = {
+                kind: self._fanout.submit(self._fetch_batch, kind, list(dict.fromkeys(ids)))
+                for kind, ids in missing.items()
+            }
+            fetched = {kind: future.result() for kind, future in futures.items()}
+        else:
+            futures = {
+                (kind, ident): self._fanout.submit(self._fetch_one, kind, ident)
+                for kind, ids in missing.items()
+                for ident in dict.fromkeys(ids)
+            }
+            fetched = {}
+            for (kind, ident), future in futures.items():
+                fetched.setdefault(kind, {})[ident] = future.result()
+
+        for kind, records in fetched.items():
+            self._store(kind, records)
+            for name in wanted[kind]:
+                ident = self.resolve(name)
+                if ident in records:
+                    results[kind][name] = records[ident]
+        return results
+
+    def get(self, kind: str, ident: str) -> Optional[dict]:
+        """Fetch (or read from the cache) a single record."""
+        return self.lookup({kind: [ident]})[kind][ident]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"requests": self.requests, "cache_hits": self.hits, "cached": len(self.cache)}
+
+    def close(self) -> None:
+        self._fanout.shutdown(wait=False)
+        self._http.close()
+
+
+_clients: dict[str, LitiumClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(project: Optional[str] = None) -> LitiumClient:
+    """Return the shared client of a project (see ``BackendPool.resolve``).
+
+    Raises:
+        LookupError: If no project is selected or it has no ``litium_api``
+    """
+    from src.backends.pool import get_pool
+
+    pool = get_pool()
+    name = pool.resolve(project)
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            client = _clients[name] = LitiumClient(LitiumSettings.from_config(pool.config(name).settings))
+        return client
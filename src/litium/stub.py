@@ -0,0 +1,149 @@
+"""Local stand-in for the Litium admin web API.
+
+``StubLitiumServer`` serves in-memory records so the client and the agent
+tools can be exercised without a Litium installation:
+- ``GET <base>/<resource>/<id>``: the record, or 404
+- ``POST <base>/<resource>/batch`` with ``{"systemIds": [...]}``:
+  ``{"items": [...]}`` with the records that exist
+
+Every request waits ``latency_ms`` and is counted in ``requests``, so tests
+can assert how many round trips a lookup cost.
+"""
+
+import json
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from src.litium.client import RESOURCES
+
+
+DEFAULT_BASE_PATH = "/Litium/api/admin"
+
+
+class _LitiumHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    stub: "StubLitiumServer"
+
+    def _reply(self, status: HTTPStatus, body: Optional[dict] = None) -> None:
+        data = json.dumps(body if body is not None else {"error": status.phrase}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self) -> tuple[Optional[str], str]:
+        """Split the path into ``(kind, rest)`` (kind is None when unknown)."""
+        path = self.path.split("?")[0]
+        if not path.startswith(self.stub.base_path + "/"):
+            return None, ""
+        path = path[len(self.stub.base_path) + 1:]
+        for kind, resource in RESOURCES.items():
+            if path.startswith(resource + "/"):
+                return kind, path[len(resource) + 1:]
+        return None, ""
+
+    def _admit(self) -> bool:
+        self.stub.count()
+        if self.stub.latency_ms:
+            time.sleep(self.stub.latency_ms / 1000)
+        if self.stub.token and self.headers.get("Authorization", "").split(" ")[-1] != self.stub.token:
+            self._reply(HTTPStatus.UNAUTHORIZED)
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._admit():
+            return
+        kind, ident = self._route()
+        record = self.stub.records.get(kind, {}).get(ident) if kind else None
+        if record is None:
+            self._reply(HTTPStatus.NOT_FOUND)
+        else:
+            self._reply(HTTPStatus.OK, record)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not self._admit():
+            return
+        kind, rest = self._route()
+        if kind is None or rest != "batch" or not self.stub.batch:
+            self._reply(HTTPStatus.NOT_FOUND)
+            return
+        try:
+            ids = json.loads(body)["systemIds"]
+        except (ValueError, KeyError, TypeError):
+            self._reply(HTTPStatus.BAD_REQUEST, {"error": "expected {\"systemIds\": [...]}"})
+            return
+        records = self.stub.records.get(kind, {})
+        self._reply(HTTPStatus.OK, {"items": [records[ident] for ident in ids if ident in records]})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubLitiumServer:
+    """In-memory Litium admin API on a local port.
+
+    Attributes:
+        records: Records per kind and id (each record should carry ``systemId``)
+        url: API base URL to put in ``LITIUM_API_BASE_URL``
+        requests: Number of requests served
+    """
+
+    def __init__(
+        self,
+        records: dict[str, dict[str, dict]],
+        latency_ms: float = 0.0,
+        token: Optional[str] = None,
+        batch: bool = True,
+        base_path: str = DEFAULT_BASE_PATH,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """Bind the server (port 0 picks a free port); call ``start`` to serve.
+
+        Args:
+            records: Records per kind (``product``, ``variant``, ``image``) and id
+            latency_ms: Delay added to every request
+            token: Required ``Authorization`` credential (None accepts anything)
+            batch: Serve the ``<resource>/batch`` endpoints
+            base_path: Path prefix of the API
+            host: Interface to bind
+            port: Port to bind
+        """
+        self.records = records
+        self.latency_ms = latency_ms
+        self.token = token
+        self.batch = batch
+        self.base_path = base_path.rstrip("/")
+        self.requests = 0
+        self._lock = threading.Lock()
+        handler = type("LitiumHandler", (_LitiumHandler,), {"stub": self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        host, port = self._server.server_address[:2]
+        self.url = f"http://{host}:{port}{self.base_path}"
+
+    def count(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def start(self) -> "StubLitiumServer":
+        """Serve from a background thread."""
+        threading.Thread(target=self._server.serve_forever, name="litium-stub", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubLitiumServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
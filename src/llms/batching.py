@@ -0,0 +1,256 @@
+"""Message Batches mode for bulk, non-interactive step runs.
+
+When latency per step does not matter (regenerating a whole storefront
+overnight), model turns can go through the Anthropic Message Batches API,
+which is billed at a discount and does not count against interactive rate
+limits:
+- ``MessageBatcher`` collects the requests of many concurrent pipeline runs
+  and submits them together, as soon as ``max_batch`` requests are waiting
+  or the oldest has waited ``max_wait`` seconds; it polls each batch until
+  it ends and resolves every request's future with its own result
+- ``BatchedChatAnthropic`` is a ``ChatAnthropic`` whose turns are sent to a
+  ``MessageBatcher`` instead of the Messages endpoint; the graph thread (or
+  task) that made the call simply waits for its result
+- ``batched_model`` builds one from a model name of ``src.llms``
+
+A batch only ends when its last request is answered, so throughput comes
+from running many steps at once (``python -m src batch --batch-api
+--concurrency N``). ``src.bench.stub_server`` serves the batch endpoints
+locally for tests (``python -m src bench batch``).
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Optional, Sequence
+
+from langchain_anthropic import ChatAnthropic
+from pydantic import Field
+
+from src.llms.factory import MODEL_REGISTRY
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH = 100
+DEFAULT_MAX_WAIT = 2.0
+DEFAULT_POLL_INTERVAL = 10.0
+MAX_POLL_INTERVAL = 60.0
+
+
+class BatchRequestError(RuntimeError):
+    """A request of a message batch did not succeed.
+
+    Attributes:
+        result_type: ``errored``, ``canceled``, ``expired`` or ``missing``
+    """
+
+    def __init__(self, message: str, result_type: str):
+        super().__init__(message)
+        self.result_type = result_type
+
+
+class MessageBatcher:
+    """Gather Messages API requests into Message Batches and route results back.
+
+    Requests sharing a set of beta flags go in the same batch. Each
+    submitted batch is polled from its own thread, so new batches keep
+    forming while earlier ones are processed.
+
+    Attributes:
+        max_batch: Requests that trigger a submission
+        max_wait: Seconds the oldest waiting request may wait for company
+        poll_interval: Seconds before the first poll of a batch (the
+            interval grows by half on every poll, up to ``MAX_POLL_INTERVAL``)
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        **client_kwargs: Any,
+    ):
+        """Start the dispatcher thread.
+
+        Args:
+            client: ``anthropic.Anthropic`` client (default: one built from
+                ``client_kwargs`` and the ``ANTHROPIC_*`` environment)
+            max_batch: Requests that trigger a submission
+            max_wait: Seconds the oldest waiting request may wait
+            poll_interval: Seconds before the first poll of a batch
+            **client_kwargs: ``base_url``, ``api_key``, ``timeout``, ... of the default client
+        """
+        if client is None:
+            import anthropic
+
+            client = anthropic.Anthropic(**client_kwargs)
+        self.client = client
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self._pending: dict[tuple[str, ...], list[tuple[str, dict, Future]]] = {}
+        self._oldest: dict[tuple[str, ...], float] = {}
+        self._changed = threading.Condition()
+        self._closed = False
+        self._batches = 0
+        self._requests = 0
+        self._in_flight = 0
+        self._largest = 0
+        self._dispatcher = threading.Thread(target=self._dispatch, name="message-batcher", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, params: dict, betas: Sequence[str] = ()) -> Future:
+        """Queue one Messages API request.
+
+        Args:
+            params: Request body of ``POST /v1/messages`` (without ``stream``)
+            betas: Beta flags the request needs
+
+        Returns:
+            Future resolved with the ``Message`` (or a ``BatchRequestError``)
+        """
+        future: Future = Future()
+        key = tuple(sorted(betas))
+        with self._changed:
+            if self._closed:
+                raise RuntimeError("MessageBatcher is closed")
+            group = self._pending.setdefault(key, [])
+            if not group:
+                self._oldest[key] = time.monotonic()
+            group.append((f"req_{uuid.uuid4().hex}", params, future))
+            if len(group) == 1 or len(group) >= self.max_batch:
+                self._changed.notify()
+        return future
+
+    def stats(self) -> dict:
+        """Batches and requests submitted, batches in flight and requests waiting."""
+        with self._changed:
+            return {
+                "batches": self._batches,
+                "requests": self._requests,
+                "in_flight_batches": self._in_flight,
+                "waiting": sum(len(group) for group in self._pending.values()),
+                "largest_batch": self._largest,
+            }
+
+    def close(self) -> None:
+        """Submit what is waiting and stop accepting requests."""
+        with self._changed:
+            self._closed = True
+            self._changed.notify()
+        self._dispatcher.join()
+
+    def _due(self, now: float) -> tuple[Optional[tuple[str, ...]], Optional[float]]:
+        """The group to submit now, or the seconds until one is due."""
+        wait = None
+        for key, group in self._pending.items():
+            if not group:
+                continue
+            left = self._oldest[key] + self.max_wait - now
+            if len(group) >= self.max_batch or left <= 0 or self._closed:
+                return key, None
+            wait = left if wait is None else min(wait, left)
+        return None, wait
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._changed:
+                key, wait = self._due(time.monotonic())
+                while key is None:
+                    if self._closed and wait is None:
+                        return
+                    self._changed.wait(wait)
+                    key, wait = self._due(time.monotonic())
+                group = self._pending[key]
+                items, self._pending[key] = group[: self.max_batch], group[self.max_batch:]
+                if self._pending[key]:
+                    self._oldest[key] = time.monotonic()
+                self._batches += 1
+                self._requests += len(items)
+                self._in_flight += 1
+                self._largest = max(self._largest, len(items))
+            threading.Thread(target=self._run_batch, args=(key, items), name="message-batch", daemon=True).start()
+
+    def _run_batch(self, betas: tuple[str, ...], items: list[tuple[str, dict, Future]]) -> None:
+        futures = {custom_id: future for custom_id, _, future in items}
+        try:
+            batches = self.client.beta.messages.batches if betas else self.client.messages.batches
+            extra = {"betas": list(betas)} if betas else {}
+            requests = [{"custom_id": custom_id, "params": params} for custom_id, params, _ in items]
+            batch = batches.create(requests=requests, **extra)
+            logger.info("submitted message batch %s with %d requests", batch.id, len(items))
+            interval = self.poll_interval
+            while batch.processing_status != "ended":
+                time.sleep(interval)
+                interval = min(interval * 1.5, MAX_POLL_INTERVAL)
+                batch = batches.retrieve(batch.id, **extra)
+            for entry in batches.results(batch.id, **extra):
+                future = futures.pop(entry.custom_id, None)
+                if future is None:
+                    continue
+                result = entry.result
+                if result.type == "succeeded":
+                    future.set_result(result.message)
+                else:
+                    detail = getattr(getattr(result, "error", None), "error", None)
+                    message = getattr(detail, "message", None) or result.type
+                    future.set_exception(BatchRequestError(f"Batch request {result.type}: {message}", result.type))
+            for future in futures.values():
+                future.set_exception(BatchRequestError(f"Request missing from the results of {batch.id}", "missing"))
+        except Exception as e:
+            logger.warning("message batch of %d requests failed: %s", len(items), e)
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            with self._changed:
+                self._in_flight -= 1
+
+
+class BatchedChatAnthropic(ChatAnthropic):
+    """``ChatAnthropic`` whose turns are answered through a ``MessageBatcher``.
+
+    Streaming is disabled: a batched turn arrives whole.
+    """
+
+    batcher: Any = Field(default=None, exclude=True)
+    disable_streaming: bool = True
+
+    def _batch_request(self, messages, stop, kwargs) -> tuple[dict, list[str]]:
+        if self.batcher is None:
+            raise ValueError("BatchedChatAnthropic needs a batcher")
+        payload = self._get_request_payload(messages, stop=stop, **kwargs)
+        payload.pop("stream", None)
+        return payload, payload.pop("betas", None) or []
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        payload, betas = self._batch_request(messages, stop, kwargs)
+        return self._format_output(self.batcher.submit(payload, betas).result(), **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        payload, betas = self._batch_request(messages, stop, kwargs)
+        message = await asyncio.wrap_future(self.batcher.submit(payload, betas))
+        return self._format_output(message, **kwargs)
+
+
+def batched_model(name: str, batcher: MessageBatcher, **kwargs: Any) -> BatchedChatAnthropic:
+    """Build a batched chat model from a model name or alias.
+
+    Args:
+        name: Name from ``MODEL_REGISTRY`` or ``anthropic:<model>``
+        batcher: Batcher the model's turns go through
+        **kwargs: Further ``ChatAnthropic`` parameters
+
+    Raises:
+        ValueError: If the model is not an Anthropic model
+    """
+    provider, _, model = MODEL_REGISTRY.get(name, name).partition(":")
+    if provider != "anthropic" or not model:
+        raise ValueError(f"Message Batches mode needs an Anthropic model, got '{name}'")
+    kwargs.setdefault("temperature", 0.0)
+    return BatchedChatAnthropic(model=model, batcher=batcher, **kwargs)
@@ -0,0 +1,162 @@
+"""Local token estimation and budget-aware context packing.
+
+Provides a fast, dependency-free token estimator so tools can size what they
+return before the provider bills it:
+- Text is split into word, number, punctuation and whitespace pieces and
+  each piece is costed with per-provider weights
+- Weights and context windows are calibrated per provider; the provider of a
+  friendly name is looked up through ``MODEL_REGISTRY``
+- Estimates are cached by content hash, so re-reading the same file or
+  snippet costs one hash instead of a re-tokenization
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+
+from src.llms.factory import MODEL_REGISTRY
+
+
+# Per-provider calibration. Word pieces cost ceil(len / chars_per_token),
+# punctuation and whitespace runs cost a fraction of a token each since
+# BPE vocabularies merge common runs (`="`, `/>`, indentation).
+TOKEN_PROFILES: dict[str, dict[str, float]] = {
+    "openai": {"chars_per_token": 4.2, "punct": 0.55, "space": 0.3, "scale": 1.0, "context_window": 128_000},
+    "anthropic": {"chars_per_token": 3.6, "punct": 0.65, "space": 0.35, "scale": 1.05, "context_window": 200_000},
+    "default": {"chars_per_token": 3.8, "punct": 0.6, "space": 0.35, "scale": 1.1, "context_window": 128_000},
+}
+
+# Model whose calibration tools use when the caller does not say
+DEFAULT_TOKEN_MODEL = os.environ.get("LITIUM_TOKEN_MODEL", "reliable")
+
+# Upper bound on what a single tool result should add to the context
+PER_TURN_TOKEN_BUDGET = int(os.environ.get("LITIUM_TURN_TOKEN_BUDGET", "12000"))
+
+# Fraction of the remaining context window a single tool result may use
+CONTEXT_SHARE = 0.5
+
+_PIECE = re.compile(r"[A-Za-z]+|\d+|\s+|[^\sA-Za-z\d]")
+_CACHE_SIZE = 4096
+_cache: "OrderedDict[tuple[bytes, str], int]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def provider_for(model: str = DEFAULT_TOKEN_MODEL) -> str:
+    """Return the calibration profile name for a model name or alias."""
+    provider = MODEL_REGISTRY.get(model, model).split(":")[0]
+    return provider if provider in TOKEN_PROFILES else "default"
+
+
+def context_window(model: str = DEFAULT_TOKEN_MODEL) -> int:
+    """Return the context window size (tokens) for a model name or alias."""
+    return int(TOKEN_PROFILES[provider_for(model)]["context_window"])
+
+
+def _estimate_uncached(text: str, profile: dict[str, float]) -> int:
+    chars_per_token = profile["chars_per_token"]
+    total = 0.0
+    for piece in _PIECE.findall(text):
+        first = piece[0]
+        if first.isalpha() or first.isdigit():
+            total += -(-len(piece) // chars_per_token)
+        elif first.isspace():
+            total += profile["space"]
+        else:
+            total += profile["punct"]
+    return int(total * profile["scale"]) + 1
+
+
+def estimate_tokens(text: str, model: str = DEFAULT_TOKEN_MODEL) -> int:
+    """Estimate how many tokens ``text`` costs for ``model``.
+
+    Args:
+        text: Text to estimate
+        model: Model name, alias or provider:model string
+
+    Returns:
+        Estimated token count (0 for empty text)
+    """
+    if not text:
+        return 0
+    provider = provider_for(model)
+    key = (hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest(), provider)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+    estimate = _estimate_uncached(text, TOKEN_PROFILES[provider])
+    with _cache_lock:
+        _cache[key] = estimate
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return estimate
+
+
+def _message_text(message: Any) -> str:
+    content = getattr(message, "content", None)
+    if content is None and isinstance(message, dict):
+        content = message.get("content", "")
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    text = content or ""
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        text += str([call.get("args") for call in tool_calls])
+    return text
+
+
+def estimate_messages_tokens(messages: Iterable[Any], model: str = DEFAULT_TOKEN_MODEL) -> int:
+    """Estimate the tokens of a message history, including per-message overhead."""
+    return sum(estimate_tokens(_message_text(m), model) + 4 for m in messages)
+
+
+def turn_budget(messages: Optional[Iterable[Any]] = None, model: str = DEFAULT_TOKEN_MODEL) -> int:
+    """Return how many tokens one tool result may add this turn.
+
+    The budget is ``PER_TURN_TOKEN_BUDGET``, shrunk to a share of whatever is
+    left of the context window once the current history is accounted for.
+    """
+    used = estimate_messages_tokens(messages, model) if messages else 0
+    remaining = max(context_window(model) - used, 0)
+    return max(min(PER_TURN_TOKEN_BUDGET, int(remaining * CONTEXT_SHARE)), 0)
+
+
+def fit_lines(lines: list[str], budget: int, model: str = DEFAULT_TOKEN_MODEL) -> int:
+    """Return how many leading ``lines`` fit in ``budget`` tokens (at least one)."""
+    used = 0
+    for count, line in enumerate(lines):
+        used += estimate_tokens(line, model) + 1
+        if used > budget:
+            return max(count, 1)
+    return len(lines)
+
+
+def pack_to_budget(
+    items: Iterable[tuple[str, str]],
+    budget: int,
+    model: str = DEFAULT_TOKEN_MODEL,
+) -> tuple[list[tuple[str, str]], list[str]]:
+    """Greedily pack ``(key, text)`` items, in order, under a token budget.
+
+    Args:
+        items: Candidate items in priority order
+        budget: Token budget for all packed items
+        model: Model whose calibration to use
+
+    Returns:
+        Tuple of (packed items, keys of items that did not fit)
+    """
+    packed, dropped = [], []
+    used = 0
+    for key, text in items:
+        cost = estimate_tokens(text, model)
+        if used + cost <= budget:
+            packed.append((key, text))
+            used += cost
+        else:
+            dropped.append(key)
+    return packed, dropped
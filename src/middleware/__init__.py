@@ -0,0 +1,11 @@
+"""Agent middleware shared by the orchestrator and subagents."""
+
+from src.middleware.step_files import StepFilesMiddleware
+from src.middleware.tool_memo import IDEMPOTENT_TOOLS, MemoPolicy, ToolMemoMiddleware
+
+__all__ = [
+    "IDEMPOTENT_TOOLS",
+    "MemoPolicy",
+    "StepFilesMiddleware",
+    "ToolMemoMiddleware",
+]
@@ -0,0 +1,166 @@
+"""Bring a step's project files into state and commit the ones it changes.
+
+The TSX tools (``read_tsx``, ``write_tsx``) and the scratch pad work on agent
+state, while the components a step styles live on the ``/project/`` route.
+``StepFilesMiddleware`` bridges the two for an orchestrator run:
+- Before the run, the step's ``target_component`` and ``reference_files``
+  are read through the ``/project/`` backend (inside ``run_step``, that is
+  the step's transaction) into ``files``, unless state already holds them
+- After the run, every source file whose state content changed during the
+  run is written back through the same backend, so it is committed (or
+  discarded) with the step's other ``/project/`` writes
+
+Files are keyed in state by their ``/project/``-relative path (``/x.tsx``,
+see ``src.step_cache.project_path``). The middleware also declares the
+``diffs`` channel, so the scratch pad one subagent writes reaches the next.
+The pipeline (``src.pipeline``) uses the same helpers in its own nodes.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Annotated, Any, NotRequired, Optional
+
+from deepagents.backends.utils import create_file_data
+from langchain.agents.middleware import AgentMiddleware
+from langchain.agents.middleware.types import AgentState, PrivateStateAttr
+from langchain_core.messages import BaseMessage
+
+from src.state import file_reducer, file_text
+
+
+logger = logging.getLogger(__name__)
+
+# State files with these suffixes are project sources written back after a run
+SOURCE_SUFFIXES = (".tsx", ".ts", ".jsx", ".js", ".css")
+
+
+class StepFilesState(AgentState):
+    """Channels the middleware adds to the orchestrator state.
+
+    Attributes:
+        diffs: The scratch pad (file path -> proposed change)
+        step_file_versions: Content digest of every state file when the run
+            started (private: subagents never see it)
+    """
+
+    diffs: Annotated[NotRequired[dict[str, str]], file_reducer]
+    step_file_versions: Annotated[NotRequired[dict[str, str]], PrivateStateAttr]
+
+
+def _digest(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def parse_step(messages: list) -> Optional[dict]:
+    """The step a run was started with (its first message), or None if it is not a step JSON."""
+    if not messages:
+        return None
+    first = messages[0]
+    content = first.content if isinstance(first, BaseMessage) else first.get("content", "")
+    try:
+        step = json.loads(content) if isinstance(content, str) else None
+    except ValueError:
+        return None
+    return step if isinstance(step, dict) else None
+
+
+def project_backend() -> Optional[Any]:
+    """The ``/project/`` backend of the current project, None when no project is configured."""
+    from src.backends.factory import ProjectRoute
+
+    try:
+        return ProjectRoute("project").target
+    except LookupError:
+        return None
+
+
+def load_step_files(step: dict, files: Optional[dict], backend: Any) -> dict:
+    """Read the step's target and reference files that state does not hold yet.
+
+    Args:
+        step: Parsed step
+        files: Current state files
+        backend: ``/project/`` backend (or transaction) to read from
+
+    Returns:
+        New state entries (``FileData``), by ``/project/``-relative path
+    """
+    from src.step_cache import step_paths
+
+    files = files or {}
+    loaded = {}
+    for path in step_paths(step):
+        if path in files:
+            continue
+        content = backend.content(path)
+        if content is not None:
+            loaded[path] = create_file_data(content)
+    return loaded
+
+
+def file_versions(files: Optional[dict]) -> dict[str, str]:
+    """Digest of every state file's content, to detect changes later."""
+    versions = {}
+    for path, value in (files or {}).items():
+        if value is not None:
+            versions[path] = _digest(file_text(value))
+    return versions
+
+
+def changed_sources(files: Optional[dict], versions: dict[str, str]) -> dict[str, str]:
+    """Content of the source files in ``files`` that differ from ``versions``."""
+    changed = {}
+    for path, value in (files or {}).items():
+        if value is None or not path.endswith(SOURCE_SUFFIXES):
+            continue
+        content = file_text(value)
+        if versions.get(path) != _digest(content):
+            changed[path] = content
+    return changed
+
+
+def commit_sources(changed: dict[str, str], backend: Any) -> None:
+    """Write changed source files through the ``/project/`` backend.
+
+    Raises:
+        RuntimeError: If the backend rejects a write
+    """
+    for path, content in changed.items():
+        result = backend.write(path, content)
+        if result.error:
+            raise RuntimeError(f"Could not write {path} to /project/: {result.error}")
+        logger.info("wrote %s to /project/", path)
+
+
+def write_back(changed: dict[str, str]) -> None:
+    """Commit changed sources to the current project (a warning when there is none)."""
+    if not changed:
+        return
+    backend = project_backend()
+    if backend is None:
+        logger.warning("no project configured; %s not written to /project/", ", ".join(changed))
+        return
+    commit_sources(changed, backend)
+
+
+class StepFilesMiddleware(AgentMiddleware):
+    """Load a step's files into state before the run and write changed sources back after it."""
+
+    state_schema = StepFilesState
+
+    def before_agent(self, state: dict, runtime: Any) -> Optional[dict]:
+        step = parse_step(state.get("messages") or [])
+        backend = project_backend()
+        loaded = load_step_files(step, state.get("files"), backend) if step and backend else {}
+        update: dict[str, Any] = {"step_file_versions": file_versions({**(state.get("files") or {}), **loaded})}
+        if loaded:
+            update["files"] = loaded
+        return update
+
+    def after_agent(self, state: dict, runtime: Any) -> Optional[dict]:
+        changed = changed_sources(state.get("files"), state.get("step_file_versions") or {})
+        if not changed:
+            return None
+        write_back(changed)
+        return {"step_file_versions": file_versions(state.get("files"))}
@@ -0,0 +1,191 @@
+"""In-run memoization of idempotent tool calls.
+
+Agents often repeat a read whose result is still in their context, such as
+re-reading a reference file or the scratch pad. Each repeat costs a turn
+and bills the same content again. ``ToolMemoMiddleware`` wraps tool calls
+and, for the tools listed in ``IDEMPOTENT_TOOLS``:
+- tags every result with a key (tool name and arguments) and a version
+  (a fingerprint of the state the tool reads, plus the number of state
+  changing tool calls so far for backend reads), kept in the
+  ``ToolMessage``'s ``response_metadata`` so it is never sent to the model
+- answers a repeat whose key and version match a full result still in the
+  run's messages with a short "unchanged since last read" stub pointing at
+  that earlier result, without running the tool
+- flags a loop once the same unchanged call has been repeated
+  ``loop_threshold`` times: a warning is logged and the stub tells the
+  model to stop re-reading
+
+The memo lives in the run's own messages, so it is per run (each subagent
+run has its own), and a result dropped from the history by summarization is
+simply read again.
+"""
+
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain.agents.middleware.types import ToolCallRequest
+from langchain_core.messages import ToolMessage
+from langgraph.types import Command
+
+from src.step_cache import project_path
+
+
+logger = logging.getLogger(__name__)
+
+METADATA_KEY = "tool_memo"
+
+
+@dataclass(frozen=True)
+class MemoPolicy:
+    """What the result of an idempotent tool depends on.
+
+    Attributes:
+        state_keys: State keys the tool reads
+        path_arg: Argument naming a single entry of those keys (only that
+            entry is fingerprinted when it is given)
+        backend: The tool reads the filesystem backend, so any state changing
+            tool call since the last read invalidates it
+    """
+
+    state_keys: tuple[str, ...] = ()
+    path_arg: Optional[str] = None
+    backend: bool = False
+
+
+IDEMPOTENT_TOOLS: dict[str, MemoPolicy] = {
+    "read_tsx": MemoPolicy(state_keys=("files",), path_arg="file_path"),
+    "read_scratch_pad": MemoPolicy(state_keys=("diffs",), path_arg="file_path"),
+    "read_todos": MemoPolicy(state_keys=("todos",)),
+    "litium_lookup": MemoPolicy(),
+    "search_docs": MemoPolicy(),
+    "read_file": MemoPolicy(backend=True),
+    "ls": MemoPolicy(backend=True),
+    "glob": MemoPolicy(backend=True),
+    "grep": MemoPolicy(backend=True),
+}
+
+DEFAULT_LOOP_THRESHOLD = 3
+
+
+def _digest(value: Any) -> str:
+    text = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _memo(message: Any) -> Optional[dict]:
+    if isinstance(message, ToolMessage):
+        return (message.response_metadata or {}).get(METADATA_KEY)
+    return None
+
+
+class ToolMemoMiddleware(AgentMiddleware):
+    """Answer repeated idempotent tool calls from the run's history.
+
+    Attributes:
+        policies: Memoized tool names and what their results depend on
+        loop_threshold: Unchanged repeats of one call before it is flagged
+            as a loop
+    """
+
+    def __init__(
+        self,
+        policies: Optional[dict[str, MemoPolicy]] = None,
+        loop_threshold: int = DEFAULT_LOOP_THRESHOLD,
+    ):
+        super().__init__()
+        self.policies = IDEMPOTENT_TOOLS if policies is None else policies
+        self.loop_threshold = loop_threshold
+
+    def _version(self, policy: MemoPolicy, args: dict, state: dict, messages: list) -> str:
+        parts = []
+        for key in policy.state_keys:
+            value = state.get(key) or {}
+            path = args.get(policy.path_arg) if policy.path_arg else None
+            if isinstance(path, str) and isinstance(value, dict):
+                # Tools may key the entry by the path as given or normalized (``project_path``)
+                parts.append([value.get(key) for key in sorted({path, project_path(path)})])
+            else:
+                parts.append(value)
+        if policy.backend:
+            parts.append(sum(
+                isinstance(m, ToolMessage) and m.name not in self.policies and m.status != "error"
+                for m in messages
+            ))
+        return _digest(parts)
+
+    def _prepare(self, request: ToolCallRequest) -> tuple[Optional[dict], Optional[ToolMessage]]:
+        """Return the memo tag for this call and, for a repeat, the stub answering it."""
+        call = request.tool_call
+        policy = self.policies.get(call["name"])
+        if policy is None:
+            return None, None
+        state = request.state if isinstance(request.state, dict) else {}
+        messages = state.get("messages") or []
+        args = call.get("args") or {}
+        tag = {
+            "key": _digest([call["name"], args]),
+            "version": self._version(policy, args, state, messages),
+        }
+
+        repeats = 0
+        original = None
+        for message in reversed(messages):
+            memo = _memo(message)
+            if not memo or memo["key"] != tag["key"]:
+                continue
+            if memo["version"] != tag["version"]:
+                break
+            if not memo.get("stub"):
+                original = message
+                break
+            repeats += 1
+        if original is None:
+            return tag, None
+
+        repeats += 1
+        loop = repeats >= self.loop_threshold
+        content = (
+            f"[unchanged since last read] {call['name']} returns the same result as tool call "
+            f"{original.tool_call_id} above; nothing it depends on has changed since. Use that result."
+        )
+        if loop:
+            logger.warning(
+                "Tool loop: %s(%s) repeated %d times with nothing changed", call["name"], json.dumps(args), repeats
+            )
+            content += (
+                f" You have repeated this call {repeats} times without any change in between;"
+                " stop re-reading and continue with the task."
+            )
+        stub = ToolMessage(
+            content,
+            tool_call_id=call["id"],
+            name=call["name"],
+            response_metadata={METADATA_KEY: {**tag, "stub": True, "repeat": repeats, "loop": loop}},
+        )
+        return tag, stub
+
+    @staticmethod
+    def _tag(result: ToolMessage | Command, tag: Optional[dict]) -> ToolMessage | Command:
+        if tag and isinstance(result, ToolMessage) and result.status != "error":
+            result.response_metadata = {**(result.response_metadata or {}), METADATA_KEY: tag}
+        return result
+
+    def wrap_tool_call(
+        self,
+        request: ToolCallRequest,
+        handler: Callable[[ToolCallRequest], ToolMessage | Command],
+    ) -> ToolMessage | Command:
+        tag, stub = self._prepare(request)
+        return stub or self._tag(handler(request), tag)
+
+    async def awrap_tool_call(
+        self,
+        request: ToolCallRequest,
+        handler: Callable[[ToolCallRequest], Awaitable[ToolMessage | Command]],
+    ) -> ToolMessage | Command:
+        tag, stub = self._prepare(request)
+        return stub or self._tag(await handler(request), tag)
@@ -0,0 +1,221 @@
+"""Deterministic step pipeline: the orchestrator's workflow as a fixed graph.
+
+The orchestrator prompt describes one fixed workflow, yet the deep agent
+spends a full model turn on every transition of it. ``build_pipeline``
+compiles the same workflow as a LangGraph graph whose edges are code:
+1. ``validate`` parses the step and checks its required fields (an invalid
+   step ends the run with the problems as the final message), then loads
+   the step's target and reference files from ``/project/`` into state
+2. ``html_analyser`` runs the analyser on the step
+3. The scratch pad is read: with no proposed changes the styling stage is
+   skipped
+4. ``tsx_styling_agent`` applies the scratch pad to the target; the source
+   files it changes are written to ``/project/`` (inside ``run_step``, the
+   step's transaction, so they are committed with the step)
+5. ``summary`` asks the model for the final report, or, with
+   ``summarize=False``, writes it from the stage reports without a model
+
+The subagents are the same projected graphs the orchestrator delegates to
+(``build_subagent``), so the pipeline is a drop-in for ``run_step`` and the
+latency bench (``bench latency --mode pipeline``) can compare the two.
+Unlike the orchestrator, the pipeline threads the scratch pad and state
+files from one stage to the next itself, with the helpers of
+``src.middleware.step_files``.
+"""
+
+import json
+from typing import Any, NotRequired, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
+
+from src.agent import SUBAGENTS, build_subagent
+from src.middleware.step_files import changed_sources, file_versions, load_step_files, project_backend, write_back
+from src.state import DeepAgentState
+
+
+VALIDATE = "validate"
+SUMMARY = "summary"
+ANALYSER = "html_analyser"
+STYLER = "tsx_styling_agent"
+
+REQUIRED_FIELDS = ("html_snippet", "target_component")
+
+
+class PipelineState(DeepAgentState):
+    """``DeepAgentState`` plus what the pipeline carries between stages.
+
+    Attributes:
+        step: The parsed step
+        problems: Why the step was rejected (validation only)
+        reports: Final message of each subagent stage, by stage name
+    """
+
+    step: NotRequired[dict]
+    problems: NotRequired[list[str]]
+    reports: NotRequired[dict[str, str]]
+
+
+def validate_step(text: str) -> tuple[Optional[dict], list[str]]:
+    """Parse a step JSON and list what is wrong with it.
+
+    Returns:
+        ``(step, problems)``; ``step`` is None when the text is not a JSON object
+    """
+    try:
+        step = json.loads(text)
+    except ValueError as e:
+        return None, [f"step is not valid JSON: {e}"]
+    if not isinstance(step, dict):
+        return None, ["step must be a JSON object"]
+    problems = [
+        f"missing {name}" for name in REQUIRED_FIELDS if not isinstance(step.get(name), str) or not step[name].strip()
+    ]
+    references = step.get("reference_files", [])
+    if not isinstance(references, list) or not all(isinstance(path, str) for path in references):
+        problems.append("reference_files must be a list of paths")
+    return step, problems
+
+
+def _message_text(message: Any) -> str:
+    content = message.content if isinstance(message, BaseMessage) else message.get("content", "")
+    return content if isinstance(content, str) else str(content)
+
+
+def _validate(state: dict) -> dict:
+    messages = state.get("messages") or []
+    step, problems = validate_step(_message_text(messages[0]) if messages else "")
+    if problems:
+        return {"problems": problems, "messages": [AIMessage(content="Step rejected: " + "; ".join(problems))]}
+    backend = project_backend()
+    files = load_step_files(step, state.get("files"), backend) if backend else {}
+    return {"step": step, "files": files} if files else {"step": step}
+
+
+def _analyser_task(state: dict) -> str:
+    return _message_text(state["messages"][0])
+
+
+def _styler_task(state: dict) -> str:
+    target = state["step"]["target_component"]
+    paths = ", ".join(sorted(state.get("diffs") or {}))
+    return f"Read the scratch pad and apply the proposed changes to {target}. Files with proposed changes: {paths}"
+
+
+def _stage(name: str, runnable: Any, task, commit: bool = False) -> RunnableLambda:
+    """A pipeline node that runs one projected subagent on the pipeline state.
+
+    With ``commit``, the source files the stage changes are written to ``/project/``.
+    """
+
+    def inputs(state: dict) -> dict:
+        return {
+            "messages": [HumanMessage(content=task(state))],
+            "files": state.get("files") or {},
+            "diffs": state.get("diffs") or {},
+        }
+
+    def update(state: dict, result: dict) -> dict:
+        messages = result.get("messages") or []
+        text = _message_text(messages[-1]) if messages else ""
+        out: dict[str, Any] = {
+            "messages": [AIMessage(content=text, name=name)],
+            "reports": {**(state.get("reports") or {}), name: text},
+        }
+        for key in ("diffs", "files"):
+            if result.get(key):
+                out[key] = result[key]
+        if commit:
+            write_back(changed_sources(result.get("files"), file_versions(state.get("files"))))
+        return out
+
+    def invoke(state: dict, config=None) -> dict:
+        return update(state, runnable.invoke(inputs(state), config))
+
+    async def ainvoke(state: dict, config=None) -> dict:
+        return update(state, await runnable.ainvoke(inputs(state), config))
+
+    return RunnableLambda(invoke, afunc=ainvoke, name=name)
+
+
+def _after_validate(state: dict) -> str:
+    from langgraph.graph import END
+
+    return END if state.get("problems") else ANALYSER
+
+
+def _read_pad(state: dict) -> str:
+    """Route on the scratch pad: nothing proposed means nothing to apply."""
+    return STYLER if state.get("diffs") else SUMMARY
+
+
+def _report(state: dict) -> str:
+    """Plain-text account of the step for the summary (or as the summary)."""
+    step = state.get("step") or {}
+    diffs = state.get("diffs") or {}
+    lines = [
+        f"Step {step.get('implementation_step', '?')}: {step.get('action', 'update')} ({step.get('target_component')})",
+        ("Files with proposed changes: " + ", ".join(sorted(diffs))) if diffs
+        else "The html_analyser proposed no changes; nothing was applied.",
+    ]
+    for name, text in (state.get("reports") or {}).items():
+        lines.append(f"\n{name} report:\n{text}")
+    return "\n".join(lines)
+
+
+def build_pipeline(model: Any = None, subagent_model: Any = None, summarize: bool = True):
+    """Build the deterministic pipeline graph.
+
+    Args:
+        model: Chat model or model name for the summary turn (default:
+            "reliable"; unused with ``summarize=False``)
+        subagent_model: Chat model shared by both subagents, or a mapping of
+            subagent name to model (default: each subagent's own default)
+        summarize: Write the final report with a model call
+
+    Returns:
+        Compiled graph accepting the same input as the orchestrator
+    """
+    from langgraph.graph import END, START, StateGraph
+
+    from src.llms import get_model
+    from src.prompts.orchestrator import get_summary_prompt
+    from src.step_cache import register_agent
+
+    if summarize and (model is None or isinstance(model, str)):
+        model = get_model(model or "reliable")
+    models = {
+        name: (subagent_model.get(name) if isinstance(subagent_model, dict) else subagent_model)
+        for name in (ANALYSER, STYLER)
+    }
+
+    def summary(state: dict, config=None) -> dict:
+        if not summarize:
+            return {"messages": [AIMessage(content=_report(state))]}
+        messages = [SystemMessage(content=get_summary_prompt()), HumanMessage(content=_report(state))]
+        return {"messages": [model.invoke(messages, config)]}
+
+    async def asummary(state: dict, config=None) -> dict:
+        if not summarize:
+            return {"messages": [AIMessage(content=_report(state))]}
+        messages = [SystemMessage(content=get_summary_prompt()), HumanMessage(content=_report(state))]
+        return {"messages": [await model.ainvoke(messages, config)]}
+
+    graph = StateGraph(PipelineState)
+    graph.add_node(VALIDATE, _validate)
+    graph.add_node(ANALYSER, _stage(ANALYSER, build_subagent(ANALYSER, models[ANALYSER])["runnable"], _analyser_task))
+    graph.add_node(
+        STYLER, _stage(STYLER, build_subagent(STYLER, models[STYLER])["runnable"], _styler_task, commit=True)
+    )
+    graph.add_node(SUMMARY, RunnableLambda(summary, afunc=asummary, name=SUMMARY))
+    graph.add_edge(START, VALIDATE)
+    graph.add_conditional_edges(VALIDATE, _after_validate, [ANALYSER, END])
+    graph.add_conditional_edges(ANALYSER, _read_pad, [STYLER, SUMMARY])
+    graph.add_edge(STYLER, SUMMARY)
+    graph.add_edge(SUMMARY, END)
+    pipeline = graph.compile(name="pipeline")
+    register_agent(pipeline, {
+        "pipeline": model if summarize else "none",
+        **{name: m or SUBAGENTS[name].model for name, m in models.items()},
+    })
+    return pipeline
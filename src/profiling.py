@@ -0,0 +1,338 @@
+"""Opt-in CPU and memory profiling of graph nodes and tools.
+
+Set ``LITIUM_PROFILE=<dir>`` (or pass ``--profile DIR`` to the CLI) and every
+step run through ``src.agent.run_step`` is profiled by a ``StepProfiler``
+callback:
+- Each graph node run (``model``, ``tools``, middleware hooks) and each
+  tool call gets its own cProfile, keyed by a label such as
+  ``orchestrator/model``, ``html_analyser/tools`` or
+  ``html_analyser/tool:read_tsx``; subagent stages are named after the
+  ``task`` call that started them
+- A nested run pauses the profile of the run around it on the same thread,
+  so CPU time is attributed exclusively; profiles use per-thread CPU time,
+  so a node waiting on another thread is not charged for the wait
+- A sampler thread records the stack of every thread running a labelled
+  run, weighted by the CPU time the thread used since the previous sample,
+  for flamegraphs (cProfile keeps only caller/callee pairs)
+- tracemalloc records the memory each run leaves allocated (net, exclusive)
+  and the step's top allocation sites
+
+Each step writes a directory under the profile dir with:
+- ``profile.collapsed``: sampled stacks (``label;frame;frame microseconds``)
+  for flamegraph.pl, speedscope or inferno
+- ``profile.prof``: merged pstats for snakeviz or ``python -m pstats``
+- ``summary.json``: calls, wall and CPU time, samples and net allocations
+  per label, plus the top allocation sites
+
+Profiling is meant for synchronous runs; under ``ainvoke`` interleaved
+coroutines share a thread and blur the attribution.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import FrameType
+from typing import Any, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+PROFILE_ENV = "LITIUM_PROFILE"
+ORCHESTRATOR = "orchestrator"
+
+SAMPLE_INTERVAL = 0.001
+TOP_ALLOCATIONS = 25
+
+# Frames of the callback machinery between a run and the profiler's hooks
+_CALLBACK_FILES = (f"{os.sep}langchain_core{os.sep}callbacks{os.sep}", __file__)
+
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_step_counter = 0
+
+
+def profile_dir() -> Optional[Path]:
+    """Directory named by ``LITIUM_PROFILE`` (None when profiling is off)."""
+    value = os.environ.get(PROFILE_ENV)
+    return Path(value) if value else None
+
+
+def _start_tracing() -> None:
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+        _tracing_users += 1
+
+
+def _stop_tracing() -> None:
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    parts = Path(code.co_filename).parts
+    return f"{'/'.join(parts[-2:])}:{code.co_name}:{code.co_firstlineno}"
+
+
+def _thread_cpu(ident: int) -> Optional[float]:
+    """CPU seconds used by a thread (None where the platform cannot tell)."""
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(ident))
+    except (AttributeError, OSError):
+        return None
+
+
+def _run_depth(frame: Optional[FrameType]) -> int:
+    """Stack depth of the run starting below the callback machinery at ``frame``."""
+    while frame is not None and any(marker in frame.f_code.co_filename for marker in _CALLBACK_FILES):
+        frame = frame.f_back
+    depth = 0
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+
+@dataclass
+class _Frame:
+    run_id: Any
+    label: str
+    profile: cProfile.Profile
+    started: float
+    memory: int
+    depth: int
+    child_memory: int = 0
+
+
+@dataclass
+class _LabelStats:
+    calls: int = 0
+    wall_ms: float = 0.0
+    net_bytes: int = 0
+    samples: int = 0
+    profiles: list = field(default_factory=list)
+
+
+class StepProfiler(BaseCallbackHandler):
+    """Profile the graph nodes and tool calls of one step.
+
+    Use it as a callback handler for one ``invoke`` and call ``write`` when
+    the step is done (``run_step`` does both when ``LITIUM_PROFILE`` is set).
+    """
+
+    run_inline = True
+    raise_error = False
+
+    def __init__(self, memory: bool = True, interval: float = SAMPLE_INTERVAL):
+        """Start tracing allocations and sampling stacks.
+
+        Args:
+            memory: Trace allocations with tracemalloc
+            interval: Seconds between stack samples (0 disables sampling)
+        """
+        super().__init__()
+        self.memory = memory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._active: dict[int, list[_Frame]] = {}
+        self._profiles: dict[tuple[str, int], cProfile.Profile] = {}
+        self._labels: dict[str, _LabelStats] = defaultdict(_LabelStats)
+        self._agents: dict[str, str] = {}
+        self._stacks: Counter = Counter()
+        self._cpu: dict[int, Optional[float]] = {}
+        self._started = time.perf_counter()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        if memory:
+            _start_tracing()
+        if interval > 0:
+            self._sampler = threading.Thread(target=self._sample, args=(interval,), name="step-profiler", daemon=True)
+            self._sampler.start()
+
+    def _sample(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            with self._lock:
+                active = {ident: stack[-1] for ident, stack in self._active.items() if stack}
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for ident, run in active.items():
+                used = _thread_cpu(ident)
+                weight = used - self._cpu.get(ident, used) if used is not None else interval
+                self._cpu[ident] = used
+                if weight <= 0:
+                    continue
+                names = []
+                frame = frames.get(ident)
+                while frame is not None:
+                    names.append(_frame_name(frame))
+                    frame = frame.f_back
+                names.reverse()
+                self._stacks[";".join([run.label, *names[run.depth - 1:]])] += weight
+                self._labels[run.label].samples += 1
+
+    def _stack(self) -> list[_Frame]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+            with self._lock:
+                self._active[threading.get_ident()] = stack
+        return stack
+
+    def _agent(self, namespace: str) -> str:
+        """Name the (sub)agent that runs in a checkpoint namespace."""
+        parts = [part for part in namespace.split("|") if part]
+        for depth in range(len(parts) - 1, 0, -1):
+            agent = self._agents.get("|".join(parts[:depth]))
+            if agent:
+                return agent
+        return ORCHESTRATOR if len(parts) <= 1 else "/".join(p.split(":")[0] for p in parts[:-1])
+
+    def _profile(self, label: str) -> cProfile.Profile:
+        key = (label, threading.get_ident())
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is None:
+                profile = self._profiles[key] = cProfile.Profile(time.thread_time)
+                self._labels[label].profiles.append(profile)
+            return profile
+
+    def _push(self, run_id: Any, label: str) -> None:
+        stack = self._stack()
+        if stack:
+            stack[-1].profile.disable()
+        else:
+            # Pooled threads run other work between runs; sample from here
+            self._cpu[threading.get_ident()] = _thread_cpu(threading.get_ident())
+        memory = tracemalloc.get_traced_memory()[0] if self.memory else 0
+        frame = _Frame(run_id, label, self._profile(label), time.perf_counter(), memory, _run_depth(sys._getframe()))
+        with self._lock:
+            stack.append(frame)
+        frame.profile.enable()
+
+    def _pop(self, run_id: Any) -> None:
+        stack = self._stack()
+        if not stack or stack[-1].run_id != run_id:
+            return
+        with self._lock:
+            frame = stack.pop()
+        frame.profile.disable()
+        net = tracemalloc.get_traced_memory()[0] - frame.memory if self.memory else 0
+        with self._lock:
+            stats = self._labels[frame.label]
+            stats.calls += 1
+            stats.wall_ms += (time.perf_counter() - frame.started) * 1000
+            stats.net_bytes += net - frame.child_memory
+        if stack:
+            stack[-1].child_memory += net
+            stack[-1].profile.enable()
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        if node and node == kwargs.get("name"):
+            self._push(run_id, f"{self._agent(metadata.get('langgraph_checkpoint_ns', ''))}/{node}")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._pop(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._pop(run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, metadata=None, inputs=None, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        namespace = (metadata or {}).get("langgraph_checkpoint_ns", "")
+        if name == "task" and (inputs or {}).get("subagent_type"):
+            with self._lock:
+                self._agents[namespace] = inputs["subagent_type"]
+        self._push(run_id, f"{self._agent(namespace)}/tool:{name}")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._pop(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._pop(run_id)
+
+    def summary(self, snapshot: Optional[tracemalloc.Snapshot] = None) -> dict:
+        """Per-label calls, wall and CPU time, samples and net allocations."""
+        labels = {}
+        for label, stats in sorted(self._labels.items()):
+            cpu = sum(pstats.Stats(p).total_tt for p in stats.profiles if _has_stats(p))
+            labels[label] = {
+                "calls": stats.calls,
+                "wall_ms": round(stats.wall_ms, 2),
+                "cpu_ms": round(cpu * 1000, 2),
+                "samples": stats.samples,
+                "net_kb": round(stats.net_bytes / 1024, 1),
+            }
+        report = {"total_ms": round((time.perf_counter() - self._started) * 1000, 2), "labels": labels}
+        if snapshot is not None:
+            report["top_allocations"] = [
+                {"site": str(stat.traceback), "kb": round(stat.size / 1024, 1), "count": stat.count}
+                for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+            ]
+        return report
+
+    def close(self) -> None:
+        """Stop sampling and allocation tracing (``write`` calls it)."""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        if self.memory:
+            _stop_tracing()
+            self.memory = False
+
+    def write(self, directory: Optional[Path] = None) -> Path:
+        """Write the collapsed stacks, merged pstats and summary of the step.
+
+        Args:
+            directory: Parent directory (default: ``LITIUM_PROFILE``)
+
+        Returns:
+            The step's output directory
+        """
+        global _step_counter
+        snapshot = tracemalloc.take_snapshot() if self.memory and tracemalloc.is_tracing() else None
+        self.close()
+        with _tracing_lock:
+            _step_counter += 1
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{_step_counter}"
+        out = Path(directory or profile_dir() or ".") / name
+        out.mkdir(parents=True, exist_ok=True)
+
+        with open(out / "profile.collapsed", "w", encoding="utf-8") as f:
+            for stack, seconds in sorted(self._stacks.items()):
+                if round(seconds * 1e6):
+                    f.write(f"{stack} {round(seconds * 1e6)}\n")
+        merged: Optional[pstats.Stats] = None
+        for stats in self._labels.values():
+            for profile in stats.profiles:
+                if not _has_stats(profile):
+                    continue
+                if merged is None:
+                    merged = pstats.Stats(profile)
+                else:
+                    merged.add(profile)
+        if merged is not None:
+            merged.dump_stats(out / "profile.prof")
+        (out / "summary.json").write_text(json.dumps(self.summary(snapshot), indent=2), encoding="utf-8")
+        return out
+
+
+def _has_stats(profile: cProfile.Profile) -> bool:
+    profile.create_stats()
+    return bool(profile.stats)
@@ -41,6 +41,14 @@ Your primary responsibility is to:
    - Identify common prop structures and naming conventions
    - Look for color constants, typography classes, or design system usage
 
+3. **Look up product data** (when the step needs real products, variants or images)
+   using the `litium_lookup` tool:
+   - Pass every product, variant and image id you need in one call
+   - Image names from the project's productVariantImages (e.g. "glove1") are accepted
+
+4. **Check team conventions** (when unsure how a token or pattern is handled)
+   with `search_docs`, using a few specific keywords
+
 ### Phase 3: Gap Analysis & Comparison
 1. **Compare HTML vs TSX**:
    - Identify styling differences
@@ -36,6 +36,8 @@ You will receive JSON input with the following structure:
 }
 ```
 
+Large fields (such as `html_snippet`) may arrive as `@ref:/agent/inputs/...` handles. Pass handles on exactly as written: subagents receive the full content, so never expand or retype them.
+
 ## Core Workflow:
 
 ### Step 1: Request Reception & Validation
@@ -137,6 +139,24 @@ After html_analyser completes, present findings as:
 """
 
 
+def get_summary_prompt() -> str:
+    """Get the system prompt for the summary turn of the deterministic pipeline.
+
+    Returns:
+        str: System prompt for the pipeline's final report
+    """
+    return """You report the outcome of one HTML-to-React styling step for a Litium Next.js project.
+
+The step was already carried out: the html_analyser proposed changes in the scratch pad and the tsx_styling_agent applied them. You receive the step, the files with proposed changes and both agents' final reports.
+
+Write a short summary for the user:
+- Which files were modified
+- Changes that could not be applied, with the reasons given
+- Anything the user should check or do next
+
+Do not invent changes that the reports do not mention."""
+
+
 def get_orchestrator_template() -> dict:
     """Get the message template structure for orchestrator agent.
 
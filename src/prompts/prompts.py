@@ -15,15 +15,16 @@ WRITE_TODOS_DESCRIPTION = """Create and manage structured task lists for trackin
 - Maintain one list containing multiple todo objects (content, status, id)
 - Use clear, actionable content descriptions
 - Status must be: pending, in_progress, or completed
+- Ids are assigned automatically (1, 2, 3, ...) when omitted
 
 ## Best Practices  
 - Only one in_progress task at a time
 - Mark completed immediately when task is fully done
-- Always send the full updated list when making changes
+- Write the full list once when planning; do not resend it for status changes
 - Prune irrelevant items to keep list focused
 
 ## Progress Updates
-- Call TodoWrite again to change task status or edit content
+- Use update_todos to change status, add or remove tasks by id
 - Reflect real-time progress; don't batch completions  
 - If blocked, keep in_progress and add new task describing blocker
 
@@ -33,11 +34,30 @@ WRITE_TODOS_DESCRIPTION = """Create and manage structured task lists for trackin
 ## Returns
 Updates agent state with new todo list."""
 
+UPDATE_TODOS_DESCRIPTION = """Apply small, id-addressed changes to the existing todo list.
+
+Prefer this over write_todos once a plan exists: only the change is sent, not the whole list.
+
+## Operations
+- {"op": "set_status", "id": "2", "status": "completed"}: change the status of a task
+- {"op": "add", "content": "...", "status": "pending"}: append a task (give an "id" to refer to it in the same call; otherwise one is assigned, see read_todos)
+- {"op": "remove", "id": "3"}: drop a task that is no longer relevant
+
+## Tips
+- Batch related changes in one call, e.g. complete task 2 and start task 3 together
+- Use read_todos to see the current ids
+
+## Parameters
+- operations: List of operations applied in order
+
+## Returns
+A one-line acknowledgement; unknown ids, and adds with an id already in use, are rejected without changing the list."""
+
 TODO_USAGE_INSTRUCTIONS = """Based upon the user's request:
 1. Use the write_todos tool to create TODO at the start of a user request, per the tool description.
 2. After you accomplish a TODO, use the read_todos to read the TODOs in order to remind yourself of the plan. 
 3. Reflect on what you've done and the TODO.
-4. Mark you task as completed, and proceed to the next TODO.
+4. Mark you task as completed with update_todos, and proceed to the next TODO.
 5. Continue this process until you have completed all TODOs.
 
 IMPORTANT: Always create a research plan of TODOs and conduct research following the above guidelines for ANY user request.
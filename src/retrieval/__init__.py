@@ -0,0 +1,25 @@
+"""Offline retrieval over notes, docs and project sources."""
+
+from src.retrieval.bm25 import DocHit, DocIndex, doc_folders, get_doc_index, tokenize
+from src.retrieval.components import (
+    ComponentHit,
+    ComponentIndex,
+    get_component_index,
+    html_features,
+    jsx_features,
+    suggest_references,
+)
+
+__all__ = [
+    "ComponentHit",
+    "ComponentIndex",
+    "DocHit",
+    "DocIndex",
+    "doc_folders",
+    "get_component_index",
+    "get_doc_index",
+    "html_features",
+    "jsx_features",
+    "suggest_references",
+    "tokenize",
+]
@@ -0,0 +1,404 @@
+"""BM25 index over folders of notes and docs, for offline retrieval.
+
+Agents consult internal notes (``MYResearch``) and project conventions
+through ``search_docs`` instead of a web search. ``DocIndex`` keeps:
+- Every doc split into passages at headings (and at blank lines once a
+  passage grows past ``CHUNK_LINES``), each with its term frequencies
+- An in-memory inverted index ``term -> {passage id: tf}`` scored with
+  Okapi BM25, so a query touches only the postings of its own terms
+- The passages and their terms persisted as one JSON file, so the index is
+  built once and later processes only load it
+
+``refresh`` compares file mtimes and sizes with the persisted ones and
+re-indexes only changed and new docs (and drops removed ones); ``search``
+calls it at most every ``refresh_interval`` seconds. Each hit carries the
+lines of its passage that match the query best, as a snippet.
+"""
+
+import hashlib
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import textwrap
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Files indexed in the configured folders
+DOC_SUFFIXES = frozenset({".md", ".mdx", ".txt", ".rst"})
+
+DEFAULT_EXCLUDED_DIRS = frozenset({"node_modules", ".git", ".next", ".turbo", "__pycache__"})
+
+# Docs larger than this are skipped
+DEFAULT_MAX_FILE_SIZE = 2 * 1024 * 1024
+
+# A passage is cut at the next blank line once it has this many lines,
+# and unconditionally at twice as many
+CHUNK_LINES = 20
+
+SNIPPET_LINES = 3
+SNIPPET_CHARS = 400
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Bump when tokenization or the persisted layout changes
+FORMAT_VERSION = 1
+
+_WORD = re.compile(r"[A-Za-z][a-z]+|[A-Z]+(?![a-z])|[0-9]+|[a-z]+")
+_TOKEN = re.compile(r"[A-Za-z0-9]+")
+_HEADING = re.compile(r"^\s*(#{1,6}\s|={3,}|-{3,}\s*$)")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have how if in into is it its of on or "
+    "so that the their then there these this to was we were what when where which will with you your".split()
+)
+
+
+def default_index_dir(roots: Iterable[Path], kind: str = "bm25") -> Path:
+    """Return the cache directory used for the ``kind`` index of ``roots``.
+
+    Honours ``LITIUM_INDEX_DIR`` like the trigram index; otherwise uses a
+    folder under ``~/.cache/litiumdeepagents/<kind>`` per set of roots.
+    """
+    base = os.environ.get("LITIUM_INDEX_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "litiumdeepagents"
+    )
+    digest = hashlib.sha1("\n".join(sorted(str(root) for root in roots)).encode("utf-8")).hexdigest()[:16]
+    return Path(base) / kind / digest
+
+
+def root_labels(roots: list[Path]) -> list[str]:
+    """Return the label each root's docs are listed under.
+
+    A root is labelled with its folder name, extended with as many parent
+    folders as it takes to tell it apart from the other roots, so
+    ``/a/docs`` and ``/b/docs`` become ``a/docs`` and ``b/docs``.
+    """
+    labels = []
+    for root in roots:
+        parts = root.parts
+        depth = 1
+        while depth < len(parts) and sum(other.parts[-depth:] == parts[-depth:] for other in roots) > 1:
+            depth += 1
+        labels.append("/".join(parts[-depth:]).lstrip("/"))
+    return labels
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase terms.
+
+    Identifiers are also split into their parts, so ``ProductCard`` yields
+    ``productcard``, ``product`` and ``card``, and ``text-brand-black`` yields
+    ``text``, ``brand`` and ``black``. Stopwords are dropped.
+    """
+    terms = []
+    for match in _TOKEN.finditer(text):
+        token = match.group()
+        parts = _WORD.findall(token)
+        if len(parts) > 1:
+            terms.extend(part.lower() for part in parts)
+        terms.append(token.lower())
+    return [term for term in terms if term not in STOPWORDS]
+
+
+def split_passages(text: str) -> list[tuple[int, str]]:
+    """Split a doc into ``(first line number, text)`` passages."""
+    passages: list[tuple[int, str]] = []
+    lines: list[str] = []
+    start = 1
+
+    def flush() -> None:
+        if any(line.strip() for line in lines):
+            passages.append((start, "\n".join(lines).strip("\n")))
+
+    for number, line in enumerate(text.splitlines(), 1):
+        long = len(lines) >= CHUNK_LINES
+        if lines and (_HEADING.match(line) or (long and not line.strip()) or len(lines) >= 2 * CHUNK_LINES):
+            flush()
+            lines, start = [], number
+        if not lines and not line.strip():
+            start = number + 1
+            continue
+        lines.append(line)
+    flush()
+    return passages
+
+
+@dataclass(frozen=True)
+class DocHit:
+    """One passage matching a query.
+
+    Attributes:
+        path: Doc path, ``<folder label>/<path in folder>`` (see ``root_labels``)
+        line: First line of the snippet in the doc (1-based)
+        score: BM25 score
+        heading: First line of the passage (its heading, for most passages)
+        snippet: The passage lines that match the query best
+    """
+
+    path: str
+    line: int
+    score: float
+    heading: str
+    snippet: str
+
+
+@dataclass
+class _Passage:
+    doc: str
+    line: int
+    text: str
+    terms: dict[str, int]
+    length: int
+
+
+class DocIndex:
+    """Incrementally maintained BM25 index over one or more doc folders.
+
+    Safe to query from many threads; a refresh re-indexes changed docs
+    under a lock and updates the postings in place.
+    """
+
+    def __init__(
+        self,
+        roots: Iterable[str | Path],
+        index_dir: str | Path | None = None,
+        refresh_interval: float = 5.0,
+        max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+    ):
+        """Initialize the index and load any previously persisted state.
+
+        Args:
+            roots: Folders to index (missing folders are ignored)
+            index_dir: Where the index is stored (default: ``default_index_dir(roots)``)
+            refresh_interval: Seconds after which a query re-checks the folders
+            max_file_size: Docs above this size are skipped
+        """
+        self.roots = list(dict.fromkeys(Path(root).resolve() for root in roots))
+        self.labels = root_labels(self.roots)
+        self.index_dir = Path(index_dir) if index_dir else default_index_dir(self.roots)
+        self.refresh_interval = refresh_interval
+        self.max_file_size = max_file_size
+        self.last_refresh = 0.0
+
+        self._lock = threading.RLock()
+        self._files: dict[str, tuple[int, int]] = {}
+        self._doc_passages: dict[str, list[int]] = {}
+        self._passages: dict[int, _Passage] = {}
+        self._postings: dict[str, dict[int, int]] = {}
+        self._total_length = 0
+        self._next_id = 0
+        self._load()
+
+    @property
+    def path(self) -> Path:
+        return self.index_dir / "index.json"
+
+    def __len__(self) -> int:
+        return len(self._passages)
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, k: int = 5) -> list[DocHit]:
+        """Return the ``k`` passages that best match ``query``."""
+        if time.time() - self.last_refresh > self.refresh_interval:
+            self.refresh()
+        terms = set(tokenize(query))
+        with self._lock:
+            count = len(self._passages)
+            if not count or not terms:
+                return []
+            average = self._total_length / count
+            scores: dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for pid, tf in postings.items():
+                    norm = K1 * (1 - B + B * self._passages[pid].length / average)
+                    scores[pid] = scores.get(pid, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+            best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [self._hit(self._passages[pid], score, terms) for pid, score in best]
+
+    @staticmethod
+    def _hit(passage: _Passage, score: float, terms: set[str]) -> DocHit:
+        lines = passage.text.splitlines()
+        weights = [len(terms.intersection(tokenize(line))) for line in lines]
+        width = min(SNIPPET_LINES, len(lines))
+        start = max(range(len(lines) - width + 1), key=lambda i: (sum(weights[i:i + width]), -i))
+        snippet = textwrap.dedent("\n".join(line.rstrip() for line in lines[start:start + width])).strip("\n")
+        if len(snippet) > SNIPPET_CHARS:
+            snippet = snippet[: SNIPPET_CHARS - 3] + "..."
+        return DocHit(passage.doc, passage.line + start, round(score, 3), lines[0].strip(), snippet)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def refresh(self) -> bool:
+        """Bring the index up to date with the folders on disk.
+
+        Returns:
+            True if any doc was (re-)indexed or dropped
+        """
+        with self._lock:
+            started = time.monotonic()
+            current = self._scan()
+            changed = sorted(doc for doc, stat in current.items() if self._files.get(doc) != stat[:2])
+            removed = [doc for doc in self._files if doc not in current]
+            for doc in removed:
+                self._drop(doc)
+                del self._files[doc]
+            for doc in changed:
+                self._drop(doc)
+                try:
+                    text = Path(current[doc][2]).read_text(encoding="utf-8", errors="replace")
+                except OSError:
+                    continue
+                self._files[doc] = current[doc][:2]
+                self._add(doc, split_passages(text))
+            self.last_refresh = time.time()
+            if not changed and not removed:
+                return False
+            self._save()
+            logger.info(
+                "Doc index: %d doc(s) re-indexed, %d dropped in %.3fs (%d passages)",
+                len(changed), len(removed), time.monotonic() - started, len(self._passages),
+            )
+            return True
+
+    def _scan(self) -> dict[str, tuple[int, int, str]]:
+        """Walk the roots and return ``doc -> (mtime_ns, size, full path)``."""
+        found: dict[str, tuple[int, int, str]] = {}
+        for root, label in zip(self.roots, self.labels):
+            for directory, dirs, files in os.walk(root):
+                dirs[:] = [d for d in dirs if d not in DEFAULT_EXCLUDED_DIRS]
+                for name in files:
+                    if os.path.splitext(name)[1].lower() not in DOC_SUFFIXES:
+                        continue
+                    full = os.path.join(directory, name)
+                    try:
+                        st = os.stat(full)
+                    except OSError:
+                        continue
+                    if st.st_size <= self.max_file_size:
+                        doc = f"{label}/{Path(full).relative_to(root).as_posix()}"
+                        found[doc] = (st.st_mtime_ns, st.st_size, full)
+        return found
+
+    def _add(self, doc: str, passages: list[tuple[int, str]], terms: Optional[list[dict]] = None) -> None:
+        ids = []
+        for position, (line, text) in enumerate(passages):
+            counts = terms[position] if terms is not None else dict(Counter(tokenize(text)))
+            pid = self._next_id
+            self._next_id += 1
+            passage = _Passage(doc, line, text, counts, sum(counts.values()))
+            self._passages[pid] = passage
+            self._total_length += passage.length
+            for term, tf in counts.items():
+                self._postings.setdefault(term, {})[pid] = tf
+            ids.append(pid)
+        self._doc_passages[doc] = ids
+
+    def _drop(self, doc: str) -> None:
+        for pid in self._doc_passages.pop(doc, []):
+            passage = self._passages.pop(pid)
+            self._total_length -= passage.length
+            for term in passage.terms:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(pid, None)
+                    if not postings:
+                        del self._postings[term]
+
+    def _save(self) -> None:
+        data = {
+            "version": FORMAT_VERSION,
+            "roots": [str(root) for root in self.roots],
+            "docs": {
+                doc: {
+                    "stat": list(self._files[doc]),
+                    "passages": [
+                        [self._passages[pid].line, self._passages[pid].text, self._passages[pid].terms]
+                        for pid in self._doc_passages.get(doc, [])
+                    ],
+                }
+                for doc in sorted(self._files)
+            },
+        }
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("version") != FORMAT_VERSION:
+            return
+        for doc, entry in data.get("docs", {}).items():
+            self._files[doc] = tuple(entry["stat"])
+            passages = entry["passages"]
+            self._add(doc, [(line, text) for line, text, _ in passages], [terms for _, _, terms in passages])
+
+
+# Folders indexed for every project, relative to the repository root
+DEFAULT_DOC_DIRS = ("MYResearch",)
+
+# Extra folders (os.pathsep-separated), added to the defaults
+DOCS_ENV = "LITIUM_DOC_DIRS"
+
+_REPO_ROOT = Path(__file__).resolve().parents[2]
+
+_indexes: dict[tuple[str, ...], DocIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def doc_folders(project: Optional[str] = None) -> list[Path]:
+    """Folders indexed for a project.
+
+    These are ``DEFAULT_DOC_DIRS``, the ``LITIUM_DOC_DIRS`` folders and the
+    ``docs`` list of the project's config (relative entries are resolved
+    against its frontend root).
+    """
+    folders = [_REPO_ROOT / name for name in DEFAULT_DOC_DIRS]
+    folders += [Path(path) for path in os.environ.get(DOCS_ENV, "").split(os.pathsep) if path]
+    try:
+        from src.backends.pool import get_pool
+
+        config = get_pool().config(project)
+    except (LookupError, OSError, ValueError):
+        config = None
+    if config is not None:
+        docs = config.settings.get("docs") or []
+        for path in [docs] if isinstance(docs, str) else docs:
+            path = Path(path.replace("\\", "/"))
+            folders.append(path if path.is_absolute() else Path(config.frontend_root) / path)
+    return [folder for folder in dict.fromkeys(folders) if folder.is_dir()]
+
+
+def get_doc_index(project: Optional[str] = None) -> DocIndex:
+    """Return the shared index over ``doc_folders(project)``."""
+    folders = doc_folders(project)
+    key = tuple(sorted(str(folder.resolve()) for folder in folders))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = DocIndex(folders)
+        return index
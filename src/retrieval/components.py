@@ -0,0 +1,434 @@
+"""Ranked "similar component" retrieval over a project's TSX files.
+
+Steps name their ``reference_files`` by hand, and an analyser without good
+references explores the tree for patterns. ``ComponentIndex`` ranks the
+project's components by similarity to an HTML snippet using three groups
+of lexical features, extracted the same way from JSX and from HTML:
+- Structure: element names (``Image`` and ``Link`` count as ``img`` and
+  ``a``) and parent>child element pairs
+- Styling: className tokens (``text-[#1a2332]``) and their utility
+  prefixes (``text``, ``mr``), so arbitrary values still match by kind
+- Vocabulary: identifier parts (``ProductPrice`` -> ``product``,
+  ``price``) in TSX and words of the text and ``alt`` attributes in HTML
+
+Features are weighted by log tf x idf and components ranked by cosine
+similarity, computed over the postings of the query's own features. Like
+``DocIndex``, the index is persisted and refreshed from file mtimes, so
+only changed components are re-extracted.
+
+``suggest_references`` fills in the ``reference_files`` of a step that has
+none (``run_step`` calls it; ``LITIUM_AUTO_REFERENCES`` sets how many).
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Iterable, Optional
+
+from src.retrieval.bm25 import DEFAULT_EXCLUDED_DIRS, STOPWORDS, default_index_dir
+
+logger = logging.getLogger(__name__)
+
+COMPONENT_SUFFIXES = frozenset({".tsx", ".jsx"})
+
+DEFAULT_MAX_FILE_SIZE = 512 * 1024
+
+# Relative weight of each feature group in the similarity
+GROUP_WEIGHTS = {"tag": 1.0, "edge": 1.0, "cls": 1.0, "pfx": 0.5, "word": 0.5}
+
+# Number of references suggested for a step without any (0 disables)
+AUTO_REFERENCES_ENV = "LITIUM_AUTO_REFERENCES"
+DEFAULT_AUTO_REFERENCES = 3
+
+FORMAT_VERSION = 1
+
+# JSX components that render a plain element
+TAG_ALIASES = {"image": "img", "link": "a", "fragment": "", "react.fragment": ""}
+
+_JSX_TAG = re.compile(r"(?<![\w.$)\]])<(/?)([A-Za-z][\w.]*)|(/>)")
+_CLASS_ATTR = re.compile(r"\bclass(?:Name)?\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\})")
+_STRING = re.compile(r"\"([^\"]*)\"|'([^']*)'|`([^`]*)`")
+_IDENTIFIER = re.compile(r"[A-Za-z_$][\w$]*")
+_SUBWORD = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])")
+
+# TypeScript/React words that say nothing about what a component is
+_CODE_WORDS = frozenset(
+    "import export default from const let var function return props type interface extends "
+    "string number boolean null undefined true false new class classname use client react "
+    "async await void key map children div span".split()
+)
+
+
+def _tag(name: str) -> str:
+    name = name.lower()
+    return TAG_ALIASES.get(name, name)
+
+
+def _class_features(value: str, features: Counter) -> None:
+    for token in value.split():
+        token = token.lower()
+        if not re.match(r"^[a-z0-9:\[\]#%./_-]+$", token) or "${" in token:
+            continue
+        features[f"cls:{token}"] += 1
+        utility = token.rsplit(":", 1)[-1].lstrip("-")
+        prefix = utility.split("-", 1)[0] if "-" in utility else utility
+        features[f"pfx:{prefix}"] += 1
+
+
+def _word_features(words: Iterable[str], features: Counter) -> None:
+    for word in words:
+        for part in _SUBWORD.findall(word) or [word]:
+            part = part.lower()
+            if len(part) > 2 and part not in STOPWORDS and part not in _CODE_WORDS:
+                features[f"word:{part}"] += 1
+
+
+def jsx_features(source: str, name: str = "") -> Counter:
+    """Extract the similarity features of a TSX/JSX component.
+
+    Args:
+        source: Component source
+        name: File name; its stem counts as vocabulary
+    """
+    features: Counter = Counter()
+    stack: list[str] = []
+    for match in _JSX_TAG.finditer(source):
+        closing, tag, self_closing = match.groups()
+        if self_closing:
+            if stack:
+                stack.pop()
+            continue
+        tag = _tag(tag)
+        if closing:
+            if tag in stack:
+                del stack[len(stack) - 1 - stack[::-1].index(tag):]
+            continue
+        if tag:
+            features[f"tag:{tag}"] += 1
+            parent = next((t for t in reversed(stack) if t), None)
+            if parent:
+                features[f"edge:{parent}>{tag}"] += 1
+        # A self-closing tag is popped by its "/>", an open one by its closing tag
+        stack.append(tag)
+
+    for match in _CLASS_ATTR.finditer(source):
+        literal, single, expression = match.groups()
+        if expression is None:
+            _class_features(literal if literal is not None else single, features)
+        else:
+            for string in _STRING.finditer(expression):
+                _class_features(next(g for g in string.groups() if g is not None), features)
+
+    _word_features(_IDENTIFIER.findall(_CLASS_ATTR.sub(" ", source)), features)
+    if name:
+        _word_features([Path(name).stem], features)
+    return features
+
+
+class _SnippetParser(HTMLParser):
+    _VOID = frozenset({"area", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"})
+
+    def __init__(self, features: Counter):
+        super().__init__(convert_charrefs=True)
+        self.features = features
+        self.stack: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        tag = _tag(tag)
+        self.features[f"tag:{tag}"] += 1
+        if self.stack:
+            self.features[f"edge:{self.stack[-1]}>{tag}"] += 1
+        for key, value in attrs:
+            if key in ("class", "classname") and value:
+                _class_features(value, self.features)
+            elif key in ("alt", "aria-label", "placeholder", "title") and value:
+                _word_features(re.findall(r"[A-Za-z]+", value), self.features)
+        if tag not in self._VOID:
+            self.stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if self.stack and self.stack[-1] == _tag(tag) and _tag(tag) not in self._VOID:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        tag = _tag(tag)
+        if tag in self.stack:
+            del self.stack[len(self.stack) - 1 - self.stack[::-1].index(tag):]
+
+    def handle_data(self, data):
+        _word_features(re.findall(r"[A-Za-z]+", data), self.features)
+
+
+def html_features(html: str) -> Counter:
+    """Extract the similarity features of an HTML snippet."""
+    features: Counter = Counter()
+    parser = _SnippetParser(features)
+    parser.feed(html)
+    parser.close()
+    return features
+
+
+@dataclass(frozen=True)
+class ComponentHit:
+    """One component similar to a snippet.
+
+    Attributes:
+        path: Component path relative to the project root (``components/x/Y.tsx``)
+        score: Cosine similarity (0-1)
+        shared: The shared features that contributed most
+    """
+
+    path: str
+    score: float
+    shared: tuple[str, ...]
+
+
+class ComponentIndex:
+    """Incrementally maintained similarity index over a project's components."""
+
+    def __init__(
+        self,
+        root: str | Path,
+        index_dir: str | Path | None = None,
+        refresh_interval: float = 5.0,
+        max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+    ):
+        """Initialize the index and load any previously persisted state.
+
+        Args:
+            root: Project (frontend) root
+            index_dir: Where the index is stored (default: ``default_index_dir([root], "components")``)
+            refresh_interval: Seconds after which a query re-checks the tree
+            max_file_size: Components above this size are skipped
+        """
+        self.root = Path(root).resolve()
+        self.index_dir = Path(index_dir) if index_dir else default_index_dir([self.root], "components")
+        self.refresh_interval = refresh_interval
+        self.max_file_size = max_file_size
+        self.last_refresh = 0.0
+
+        self._lock = threading.RLock()
+        self._files: dict[str, tuple[int, int]] = {}
+        self._features: dict[str, dict[str, int]] = {}
+        self._postings: dict[str, set[str]] = {}
+        self._norms: Optional[dict[str, float]] = None
+        self._load()
+
+    @property
+    def path(self) -> Path:
+        return self.index_dir / "index.json"
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+
+    def _idf(self, feature: str) -> float:
+        return math.log(1 + len(self._features) / len(self._postings.get(feature, ())))
+
+    def _weight(self, feature: str, tf: int) -> float:
+        return GROUP_WEIGHTS.get(feature.split(":", 1)[0], 1.0) * (1 + math.log(tf)) * self._idf(feature)
+
+    def _doc_norms(self) -> dict[str, float]:
+        if self._norms is None:
+            self._norms = {
+                path: math.sqrt(sum(self._weight(f, tf) ** 2 for f, tf in features.items())) or 1.0
+                for path, features in self._features.items()
+            }
+        return self._norms
+
+    def similar(self, html: str, k: int = 5, exclude: Iterable[str] = ()) -> list[ComponentHit]:
+        """Return the ``k`` components most similar to an HTML snippet.
+
+        Args:
+            html: HTML snippet
+            k: Number of components
+            exclude: Paths (relative to the root) left out of the ranking
+        """
+        return self.similar_to(html_features(html), k, exclude)
+
+    def similar_to(self, query: Counter, k: int = 5, exclude: Iterable[str] = ()) -> list[ComponentHit]:
+        """Rank components against extracted features (see ``similar``)."""
+        if time.time() - self.last_refresh > self.refresh_interval:
+            self.refresh()
+        excluded = {path.replace("\\", "/").lstrip("/") for path in exclude}
+        with self._lock:
+            weights = {f: self._weight(f, tf) for f, tf in query.items() if f in self._postings}
+            if not weights:
+                return []
+            norms = self._doc_norms()
+            query_norm = math.sqrt(sum(self._weight(f, tf) ** 2 for f, tf in query.items() if f in self._postings))
+            contributions: dict[str, list[tuple[float, str]]] = {}
+            for feature, weight in weights.items():
+                for path in self._postings[feature]:
+                    if path not in excluded:
+                        contribution = weight * self._weight(feature, self._features[path][feature])
+                        contributions.setdefault(path, []).append((contribution, feature))
+            ranked = sorted(
+                ((sum(c for c, _ in parts) / (norms[path] * query_norm), path, parts) for path, parts in contributions.items()),
+                key=lambda item: (-item[0], item[1]),
+            )
+            return [
+                ComponentHit(path, round(score, 4), tuple(f for _, f in sorted(parts, reverse=True)[:5]))
+                for score, path, parts in ranked[:k]
+            ]
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def refresh(self) -> bool:
+        """Bring the index up to date with the tree on disk.
+
+        Returns:
+            True if any component was (re-)indexed or dropped
+        """
+        with self._lock:
+            started = time.monotonic()
+            current = self._scan()
+            changed = sorted(path for path, stat in current.items() if self._files.get(path) != stat)
+            removed = [path for path in self._files if path not in current]
+            for path in removed:
+                self._drop(path)
+            for path in changed:
+                self._drop(path)
+                try:
+                    source = (self.root / path).read_text(encoding="utf-8", errors="replace")
+                except OSError:
+                    continue
+                self._add(path, current[path], dict(jsx_features(source, path)))
+            self.last_refresh = time.time()
+            if not changed and not removed:
+                return False
+            self._norms = None
+            self._save()
+            logger.info(
+                "Component index for %s: %d component(s) re-indexed, %d dropped in %.3fs",
+                self.root, len(changed), len(removed), time.monotonic() - started,
+            )
+            return True
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        found: dict[str, tuple[int, int]] = {}
+        for directory, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if d not in DEFAULT_EXCLUDED_DIRS]
+            for name in files:
+                if os.path.splitext(name)[1].lower() not in COMPONENT_SUFFIXES:
+                    continue
+                full = os.path.join(directory, name)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                if st.st_size <= self.max_file_size:
+                    found[Path(full).relative_to(self.root).as_posix()] = (st.st_mtime_ns, st.st_size)
+        return found
+
+    def _add(self, path: str, stat: tuple[int, int], features: dict[str, int]) -> None:
+        self._files[path] = stat
+        self._features[path] = features
+        for feature in features:
+            self._postings.setdefault(feature, set()).add(path)
+
+    def _drop(self, path: str) -> None:
+        self._files.pop(path, None)
+        for feature in self._features.pop(path, {}):
+            postings = self._postings.get(feature)
+            if postings is not None:
+                postings.discard(path)
+                if not postings:
+                    del self._postings[feature]
+
+    def _save(self) -> None:
+        data = {
+            "version": FORMAT_VERSION,
+            "root": str(self.root),
+            "components": {
+                path: {"stat": list(self._files[path]), "features": self._features[path]}
+                for path in sorted(self._files)
+            },
+        }
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("version") != FORMAT_VERSION:
+            return
+        for path, entry in data.get("components", {}).items():
+            self._add(path, tuple(entry["stat"]), entry["features"])
+
+
+_indexes: dict[str, ComponentIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_component_index(project: Optional[str] = None) -> ComponentIndex:
+    """Return the shared index over a project's frontend root.
+
+    Raises:
+        LookupError: If no project is selected (see ``BackendPool.resolve``)
+    """
+    from src.backends.pool import get_pool
+
+    root = get_pool().config(project).frontend_root
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = ComponentIndex(root)
+        return index
+
+
+def suggest_references(step: str, project: Optional[str] = None, k: Optional[int] = None) -> str:
+    """Fill in the ``reference_files`` of a step that lists none.
+
+    Args:
+        step: Step JSON text
+        project: Project the step targets
+        k: Number of references (default: ``LITIUM_AUTO_REFERENCES`` or 3)
+
+    Returns:
+        The step JSON with the most similar components as references, or
+        ``step`` unchanged when it has references, no snippet, or no
+        configured project
+    """
+    if k is None:
+        k = int(os.environ.get(AUTO_REFERENCES_ENV, DEFAULT_AUTO_REFERENCES))
+    if k <= 0:
+        return step
+    try:
+        parsed = json.loads(step)
+    except ValueError:
+        return step
+    if not isinstance(parsed, dict) or parsed.get("reference_files") or not parsed.get("html_snippet"):
+        return step
+    try:
+        index = get_component_index(project)
+    except (LookupError, OSError, ValueError):
+        return step
+    target = (parsed.get("target_component") or "").replace("\\", "/").lstrip("/")
+    if target.startswith("project/"):
+        target = target[len("project/"):]
+    hits = index.similar(parsed["html_snippet"], k, exclude=[target] if target else ())
+    if not hits:
+        return step
+    logger.info("suggested reference files %s", ", ".join(hit.path for hit in hits))
+    parsed["reference_files"] = [hit.path for hit in hits]
+    return json.dumps(parsed, ensure_ascii=False)
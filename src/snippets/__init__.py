@@ -0,0 +1,35 @@
+"""HTML snippet processing: canonical form and sectioning for parallel analysis."""
+
+from src.snippets.canonical import (
+    SnippetTable,
+    canonicalize_snippet,
+    canonicalize_step,
+    current_table,
+    expand_result,
+    expand_text,
+    use_table,
+)
+from src.snippets.chunking import (
+    SECTION_CONCURRENCY,
+    SnippetSection,
+    chunk_task,
+    find_snippet,
+    merge_sections,
+    split_snippet,
+)
+
+__all__ = [
+    "SECTION_CONCURRENCY",
+    "SnippetSection",
+    "SnippetTable",
+    "canonicalize_snippet",
+    "canonicalize_step",
+    "chunk_task",
+    "current_table",
+    "expand_result",
+    "expand_text",
+    "find_snippet",
+    "merge_sections",
+    "split_snippet",
+    "use_table",
+]
@@ -0,0 +1,235 @@
+"""Reversible canonical form of HTML snippets.
+
+Snippets exported from the design tool are verbose in ways that cost tokens
+on every turn that carries them (and again when the orchestrator re-emits
+the step in a ``task`` call). ``canonicalize_snippet`` shrinks them:
+- Whitespace runs collapse to one space, and indentation (a run containing
+  a newline) next to a tag or before the end of a tag is dropped, which is
+  how JSX reads it anyway; ``<pre>`` and ``<textarea>`` content is kept as is
+- Expiring ``storage.googleapis.com/..._expires_30_days.png`` URLs become
+  short asset handles (``asset://3rs02mfw``)
+- A class list used more than once becomes a reference (``@c1``)
+
+The ``SnippetTable`` it returns maps handles and references back, and
+``expand`` restores them in any text, so TSX written with ``asset://`` or
+``@c`` values ends up with the original URLs and classes. ``run_step``
+canonicalizes the step's ``html_snippet`` (set
+``LITIUM_CANONICAL_SNIPPETS=0`` to turn it off), makes the table current for
+the step (subagents get a legend of the references in their task) and
+expands the step's writes before they are committed.
+"""
+
+import json
+import os
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+from deepagents.backends.utils import create_file_data
+
+from src.state import file_text
+
+
+CANONICAL_ENV = "LITIUM_CANONICAL_SNIPPETS"
+
+# Shorter class lists are cheaper inline than as a reference
+MIN_CLASS_CHARS = 16
+
+_ASSET_URL = re.compile(
+    r"https?://storage\.googleapis\.com/[^\s\"'()<>]*?/([A-Za-z0-9]+)_expires_\d+_days\.(?:png|jpe?g|gif|svg|webp)"
+)
+_ASSET_HANDLE = re.compile(r"asset://([A-Za-z0-9]+(?:-\d+)?)")
+_CLASS_ATTR = re.compile(r"(\bclass(?:Name)?=)([\"'])(.*?)\2", re.S)
+_CLASS_REF = re.compile(r"(?<![\w@])@c(\d+)\b")
+_PRESERVED = re.compile(r"(<(pre|textarea)\b.*?</\2\s*>)", re.S | re.I)
+_WHITESPACE = re.compile(r"\s+")
+
+_current: ContextVar[Optional["SnippetTable"]] = ContextVar("snippet_table", default=None)
+
+
+def canonical_enabled() -> bool:
+    """Whether ``run_step`` canonicalizes snippets (``LITIUM_CANONICAL_SNIPPETS``, default on)."""
+    return os.environ.get(CANONICAL_ENV, "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+@dataclass
+class SnippetTable:
+    """Mapping from canonical handles back to the original snippet text.
+
+    Attributes:
+        assets: Asset handle (``asset://id``) -> original URL
+        classes: Class reference (``@c1``) -> original class list
+    """
+
+    assets: dict[str, str] = field(default_factory=dict)
+    classes: dict[str, str] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.assets or self.classes)
+
+    def expand(self, text: str) -> str:
+        """Replace every known handle and reference in ``text`` by its original."""
+        if not self or not text:
+            return text
+        text = _CLASS_REF.sub(lambda m: self.classes.get(m.group(0), m.group(0)), text)
+        return _ASSET_HANDLE.sub(lambda m: self.assets.get(m.group(0), m.group(0)), text)
+
+    def legend(self, text: str) -> Optional[str]:
+        """Explain the references and handles that occur in ``text`` (None when there are none)."""
+        refs = sorted({m.group(0) for m in _CLASS_REF.finditer(text)} & self.classes.keys(), key=lambda r: int(r[2:]))
+        has_assets = any(m.group(0) in self.assets for m in _ASSET_HANDLE.finditer(text))
+        if not refs and not has_assets:
+            return None
+        lines = ["The snippet is in canonical form:"]
+        if refs:
+            lines.append("- `class=\"@cN\"` stands for a class list used more than once:")
+            lines += [f"  {ref} = {self.classes[ref]}" for ref in refs]
+        if has_assets:
+            lines.append("- Images are `asset://<id>` handles for their URLs")
+        lines.append("Write handles and references as they are; they are expanded when files are saved.")
+        return "\n".join(lines)
+
+
+def _collapse(html: str) -> str:
+    parts = _PRESERVED.split(html)
+    out = []
+    # split() yields text, (block, tag name) pairs, text...
+    for i in range(0, len(parts), 3):
+        out.append(_WHITESPACE.sub(lambda m: _replace_space(m, parts[i]), parts[i]))
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return "".join(out).strip()
+
+
+def _replace_space(match: re.Match, text: str) -> str:
+    before = text[match.start() - 1] if match.start() else ">"
+    after = text[match.end()] if match.end() < len(text) else "<"
+    if before == '"' and text.startswith((">", "/>"), match.end()):
+        return ""
+    if "\n" not in match.group(0):
+        return " "
+    return "" if before == ">" or after == "<" else " "
+
+
+def canonicalize_snippet(html: str, table: Optional[SnippetTable] = None) -> tuple[str, SnippetTable]:
+    """Return the canonical form of a snippet and the table that expands it.
+
+    Args:
+        html: HTML snippet
+        table: Table to extend (handles already in it are reused)
+
+    Returns:
+        ``(canonical html, table)``; ``table.expand(canonical)`` gives the
+        snippet back up to whitespace
+    """
+    table = table if table is not None else SnippetTable()
+    text = _collapse(html)
+
+    urls = {url: handle for handle, url in table.assets.items()}
+
+    def asset(match: re.Match) -> str:
+        url = match.group(0)
+        if url not in urls:
+            handle = f"asset://{match.group(1)}"
+            suffix = 1
+            while handle in table.assets:
+                suffix += 1
+                handle = f"asset://{match.group(1)}-{suffix}"
+            table.assets[handle] = url
+            urls[url] = handle
+        return urls[url]
+
+    text = _ASSET_URL.sub(asset, text)
+
+    counts: dict[str, int] = {}
+    for match in _CLASS_ATTR.finditer(text):
+        value = match.group(3).strip()
+        counts[value] = counts.get(value, 0) + 1
+    refs = {value: ref for ref, value in table.classes.items()}
+    for value, count in counts.items():
+        if count > 1 and len(value) >= MIN_CLASS_CHARS and value not in refs:
+            ref = f"@c{len(table.classes) + 1}"
+            table.classes[ref] = value
+            refs[value] = ref
+    if refs:
+        text = _CLASS_ATTR.sub(
+            lambda m: f"{m.group(1)}{m.group(2)}{refs.get(m.group(3).strip(), m.group(3))}{m.group(2)}", text
+        )
+    return text, table
+
+
+def canonicalize_step(step: str) -> tuple[str, SnippetTable]:
+    """Canonicalize the ``html_snippet`` of a step JSON.
+
+    Returns:
+        The step text (unchanged when it is not JSON or has no snippet) and
+        the snippet's table
+    """
+    try:
+        parsed = json.loads(step)
+    except ValueError:
+        return step, SnippetTable()
+    if not isinstance(parsed, dict) or not isinstance(parsed.get("html_snippet"), str):
+        return step, SnippetTable()
+    parsed["html_snippet"], table = canonicalize_snippet(parsed["html_snippet"])
+    return json.dumps(parsed, ensure_ascii=False), table
+
+
+def current_table() -> Optional[SnippetTable]:
+    """The table of the step being run in this context, if any."""
+    return _current.get()
+
+
+@contextmanager
+def use_table(table: Optional[SnippetTable]) -> Iterator[Optional[SnippetTable]]:
+    """Make ``table`` current for the block (subagent runs see it too)."""
+    token = _current.set(table)
+    try:
+        yield table
+    finally:
+        _current.reset(token)
+
+
+def expand_text(text: str) -> str:
+    """Expand ``text`` with the current table (unchanged when there is none)."""
+    table = current_table()
+    return table.expand(text) if table else text
+
+
+def expand_result(result: dict, transaction: Any, table: Optional[SnippetTable]) -> dict:
+    """Expand handles in a step's buffered ``/project/`` writes and its state.
+
+    Args:
+        result: Final agent state
+        transaction: The step's ``/project/`` transaction (still open)
+        table: The step's snippet table
+
+    Returns:
+        The state with expanded ``files`` (as ``FileData``) and ``diffs``
+    """
+    if not table:
+        return result
+    for path, content in transaction.pending_writes.items():
+        expanded = table.expand(content)
+        if expanded != content:
+            transaction.write(path, expanded)
+    result = dict(result)
+    for key in ("files", "diffs"):
+        values = result.get(key)
+        if not values:
+            continue
+        updated = {}
+        for path, value in values.items():
+            content = file_text(value)
+            expanded = table.expand(content) if isinstance(content, str) else content
+            if expanded == content:
+                updated[path] = value
+            elif key == "files":
+                created_at = value.get("created_at") if isinstance(value, dict) else None
+                updated[path] = create_file_data(expanded, created_at=created_at)
+            else:
+                updated[path] = expanded
+        result[key] = updated
+    return result
@@ -0,0 +1,272 @@
+"""Split full-page HTML snippets into independent sections.
+
+A step can carry a whole page (a ``w-[1512px]`` canvas with deep nesting
+and dozens of images) for one analyser pass. ``split_snippet`` cuts such a
+snippet at layout boundaries so each section can be analysed on its own:
+- The snippet is parsed into an element tree with source offsets, so every
+  section is an exact slice of the original HTML
+- An element larger than ``max_chars`` with several element children is
+  replaced by its children (a single child is descended into), and
+  neighbouring small siblings are packed back together up to ``max_chars``
+- Neighbouring sections that fit together are merged, and at most
+  ``MAX_SECTIONS`` are kept
+- Each section records the opening tags of its ancestors, the layout it
+  sits in, which every analyser run gets as shared context
+
+``chunk_task`` applies this to a delegated task (the snippet may be raw
+HTML or the ``html_snippet`` string of an embedded step JSON) and
+``merge_sections`` folds the per-section scratch pads back in section
+order, whatever order the runs finished in.
+"""
+
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Optional
+
+
+# Snippets up to this many characters are analysed in one pass
+CHUNK_ENV = "LITIUM_SNIPPET_CHUNK_CHARS"
+DEFAULT_CHUNK_CHARS = 4000
+
+# Never fan a snippet out into more sections than this
+MAX_SECTIONS = 8
+
+# Sections analysed at the same time
+SECTION_CONCURRENCY = 4
+
+_VOID = frozenset({"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"})
+_SNIPPET_KEY = re.compile(r"\"html_snippet\"\s*:\s*")
+_RAW_HTML = re.compile(r"<[A-Za-z][\s\S]*>")
+
+
+def chunk_chars() -> int:
+    """Section size from ``LITIUM_SNIPPET_CHUNK_CHARS`` (0 disables chunking)."""
+    return int(os.environ.get(CHUNK_ENV, DEFAULT_CHUNK_CHARS))
+
+
+@dataclass
+class _Node:
+    tag: str
+    start: int
+    end: int
+    open_tag: str
+    children: list["_Node"] = field(default_factory=list)
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self, html: str):
+        super().__init__(convert_charrefs=False)
+        self.html = html
+        self.line_starts = [0] + [m.end() for m in re.finditer(r"\n", html)]
+        self.root = _Node("", 0, len(html), "")
+        self.stack = [self.root]
+
+    def _offset(self) -> int:
+        line, column = self.getpos()
+        return self.line_starts[line - 1] + column
+
+    def handle_starttag(self, tag, attrs):
+        start = self._offset()
+        text = self.get_starttag_text() or f"<{tag}>"
+        node = _Node(tag, start, start + len(text), text)
+        self.stack[-1].children.append(node)
+        if tag not in _VOID and not text.endswith("/>"):
+            self.stack.append(node)
+
+    def handle_endtag(self, tag):
+        for depth in range(len(self.stack) - 1, 0, -1):
+            if self.stack[depth].tag == tag:
+                end = self.html.find(">", self._offset())
+                end = len(self.html) if end < 0 else end + 1
+                for node in self.stack[depth:]:
+                    node.end = end
+                del self.stack[depth:]
+                return
+
+    def close(self):
+        super().close()
+        for node in self.stack[1:]:
+            node.end = len(self.html)
+
+
+def _parse(html: str) -> _Node:
+    builder = _TreeBuilder(html)
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+@dataclass(frozen=True)
+class SnippetSection:
+    """One independently analysable part of a snippet.
+
+    Attributes:
+        index: Position among the sections (0-based, document order)
+        html: The section's HTML, an exact slice of the snippet
+        start: Offset of the section in the snippet
+        context: Opening tags of the enclosing elements, outermost first
+    """
+
+    index: int
+    html: str
+    start: int
+    context: tuple[str, ...]
+
+    @property
+    def label(self) -> str:
+        return f"section {self.index + 1}"
+
+
+def split_snippet(html: str, max_chars: Optional[int] = None) -> list[SnippetSection]:
+    """Split a snippet into sections of at most about ``max_chars`` characters.
+
+    Args:
+        html: HTML snippet
+        max_chars: Target section size (default: ``chunk_chars()``)
+
+    Returns:
+        The sections in document order; a single section when the snippet
+        is small enough or has no layout boundary to cut at
+    """
+    max_chars = chunk_chars() if max_chars is None else max_chars
+    if max_chars <= 0 or len(html) <= max_chars:
+        return [SnippetSection(0, html, 0, ())]
+
+    units: list[tuple[int, int, tuple[str, ...]]] = []
+
+    def visit(node: _Node, context: tuple[str, ...]) -> None:
+        inner = context + ((node.open_tag,) if node.tag else ())
+        if node.tag and node.end - node.start <= max_chars:
+            units.append((node.start, node.end, context))
+        elif len(node.children) == 1:
+            visit(node.children[0], inner)
+        elif node.children:
+            pending: list[tuple[int, int, tuple[str, ...]]] = []
+            for child in node.children:
+                if child.end - child.start > max_chars and len(child.children) > 0:
+                    _flush(pending)
+                    pending = []
+                    visit(child, inner)
+                elif pending and child.end - pending[0][0] > max_chars:
+                    _flush(pending)
+                    pending = [(child.start, child.end, inner)]
+                else:
+                    pending.append((child.start, child.end, inner))
+            _flush(pending)
+        else:
+            units.append((node.start, node.end, context))
+
+    def _flush(pending: list[tuple[int, int, tuple[str, ...]]]) -> None:
+        if pending:
+            units.append((pending[0][0], pending[-1][1], pending[0][2]))
+
+    visit(_parse(html), ())
+    units = _limit(units, max_chars)
+    if len(units) <= 1:
+        return [SnippetSection(0, html, 0, ())]
+    return [SnippetSection(i, html[start:end], start, context) for i, (start, end, context) in enumerate(units)]
+
+
+def _limit(units: list[tuple[int, int, tuple[str, ...]]], max_chars: int) -> list[tuple[int, int, tuple[str, ...]]]:
+    """Merge neighbouring sections that fit in ``max_chars`` together, then down to ``MAX_SECTIONS``."""
+    units = list(units)
+    while len(units) > 1:
+        spans = [units[j + 1][1] - units[j][0] for j in range(len(units) - 1)]
+        i = min(range(len(spans)), key=spans.__getitem__)
+        if spans[i] > max_chars and len(units) <= MAX_SECTIONS:
+            break
+        common = tuple(a for a, b in zip(units[i][2], units[i + 1][2]) if a == b)
+        units[i:i + 2] = [(units[i][0], units[i + 1][1], common)]
+    return units
+
+
+@dataclass(frozen=True)
+class _SnippetSpan:
+    start: int
+    end: int
+    html: str
+    encoded: bool
+
+
+def find_snippet(text: str) -> Optional[_SnippetSpan]:
+    """Locate the HTML snippet of a task: an ``html_snippet`` JSON string or raw HTML."""
+    match = _SNIPPET_KEY.search(text)
+    if match:
+        try:
+            value, end = json.JSONDecoder().raw_decode(text, match.end())
+        except ValueError:
+            value = None
+        if isinstance(value, str):
+            return _SnippetSpan(match.end(), end, value, True)
+    match = _RAW_HTML.search(text)
+    if match:
+        return _SnippetSpan(match.start(), match.end(), match.group(), False)
+    return None
+
+
+def chunk_task(text: str, max_chars: Optional[int] = None) -> Optional[list[tuple[SnippetSection, str]]]:
+    """Split a delegated task into one task per snippet section.
+
+    Each task is the original text with the snippet replaced by one section
+    and a note saying where the section sits and that the other sections
+    are analysed separately.
+
+    Returns:
+        ``(section, task text)`` pairs, or None when the task needs no split
+    """
+    span = find_snippet(text)
+    if span is None:
+        return None
+    sections = split_snippet(span.html, max_chars)
+    if len(sections) <= 1:
+        return None
+    tasks = []
+    for section in sections:
+        replacement = json.dumps(section.html, ensure_ascii=False) if span.encoded else section.html
+        wrappers = "\n".join(section.context) or "(top level of the snippet)"
+        note = (
+            f"\n\nThis task covers {section.label} of {len(sections)} of a large snippet; the other sections are "
+            "analysed separately, so only propose changes for this section and keep entries in the scratch pad "
+            f"specific to it. The section sits inside these elements (outermost first):\n{wrappers}"
+        )
+        tasks.append((section, text[:span.start] + replacement + text[span.end:] + note))
+    return tasks
+
+
+def merge_sections(
+    sections: list[SnippetSection],
+    results: list[dict],
+    before: Optional[dict] = None,
+) -> tuple[dict[str, str], str]:
+    """Fold per-section scratch pads and answers in section order.
+
+    Args:
+        sections: The sections, in the order of ``results``
+        results: Final state of each section's run
+        before: Scratch pad the runs started from
+
+    Returns:
+        The merged scratch pad (``before`` plus every entry a run wrote; an
+        entry written by several sections joins their parts under section
+        headers) and the runs' final answers joined the same way
+    """
+    before = before or {}
+    parts: dict[str, list[tuple[SnippetSection, str]]] = {}
+    answers = []
+    for section, result in sorted(zip(sections, results), key=lambda pair: pair[0].index):
+        for path, value in (result.get("diffs") or {}).items():
+            if before.get(path) != value:
+                parts.setdefault(path, []).append((section, value))
+        messages = result.get("messages") or []
+        if messages:
+            answers.append(f"## {section.label} of {len(sections)}\n{messages[-1].text}")
+    merged = dict(before)
+    for path, entries in parts.items():
+        if len(entries) == 1:
+            merged[path] = entries[0][1]
+        else:
+            merged[path] = "\n\n".join(f"### {section.label} of {len(sections)}\n{value}" for section, value in entries)
+    return merged, "\n\n".join(answers)
@@ -11,6 +11,11 @@ from typing_extensions import TypedDict
 
 #from langgraph.prebuilt.chat_agent_executor import AgentState
 from langchain.agents import AgentState  # updated in 1.0
+from deepagents.backends.protocol import FileData
+from deepagents.backends.utils import file_data_to_string
+
+TodoStatus = Literal["pending", "in_progress", "completed"]
+
 
 class Todo(TypedDict):
     """A structured task item for tracking progress through complex workflows.
@@ -18,10 +23,96 @@ class Todo(TypedDict):
     Attributes:
         content: Short, specific description of the task
         status: Current state - pending, in_progress, or completed
+        id: Stable identifier used by incremental todo operations
     """
 
     content: str
-    status: Literal["pending", "in_progress", "completed"]
+    status: TodoStatus
+    id: NotRequired[str]
+
+
+class TodoOp(TypedDict):
+    """An incremental, id-addressed change to the TODO list.
+
+    Attributes:
+        op: add, set_status or remove
+        id: Id of the todo to change (for add, assigned by ``todo_reducer`` if omitted)
+        content: Task description (add only)
+        status: New status (set_status, optionally add)
+    """
+
+    op: Literal["add", "set_status", "remove"]
+    id: NotRequired[str]
+    content: NotRequired[str]
+    status: NotRequired[TodoStatus]
+
+
+class TodoBatch(list):
+    """Operations sent by ``update_todos``; an empty batch changes nothing.
+
+    A plain empty list stays a full replacement (an empty plan).
+    """
+
+
+def next_todo_id(todos: list[Todo]) -> str:
+    """Return the next free numeric id for a TODO list."""
+    numeric = [int(t["id"]) for t in todos if t.get("id", "").isdigit()]
+    return str(max(numeric, default=len(todos)) + 1)
+
+
+def _with_ids(todos: list[Todo]) -> list[Todo]:
+    """Assign positional ids to todos that were written without one."""
+    if all("id" in t for t in todos):
+        return todos
+    return [t if "id" in t else {**t, "id": str(i)} for i, t in enumerate(todos, 1)]
+
+
+def todo_reducer(left, right):
+    """Apply a TODO update, either a full list or a batch of operations.
+
+    A list of ``Todo`` items replaces the current list (``write_todos``).
+    A list of ``TodoOp`` items is applied in order to the current list
+    (``update_todos``), so an update costs the size of the change rather
+    than the size of the plan. Ids of added todos are assigned here, against
+    the list the update actually lands on, so two updates in the same turn
+    cannot hand out the same id; an add whose explicit id is already taken
+    is dropped.
+
+    Args:
+        left: Current TODO list
+        right: Replacement list, or list of operations (a ``TodoBatch`` from
+            ``update_todos``, which leaves the list as it is when empty)
+
+    Returns:
+        The updated TODO list
+    """
+    if right is None:
+        return left
+    if isinstance(right, TodoBatch):
+        if not right:
+            return left
+    elif not right or not all("op" in item for item in right):
+        return _with_ids(right)
+
+    todos = [dict(t) for t in _with_ids(left or [])]
+    for op in right:
+        if op["op"] == "add":
+            todo_id = op.get("id") or next_todo_id(todos)
+            if any(t["id"] == todo_id for t in todos):
+                continue
+            todos.append({"content": op.get("content", ""), "status": op.get("status", "pending"), "id": todo_id})
+        elif op["op"] == "set_status":
+            for todo in todos:
+                if todo["id"] == op.get("id"):
+                    todo["status"] = op.get("status", todo["status"])
+        elif op["op"] == "remove":
+            todos = [t for t in todos if t["id"] != op.get("id")]
+    return todos
+
+
+def file_text(value: FileData | str) -> str:
+    """Return the text of a ``files`` entry (``FileData``, or a plain string from older state)."""
+    return value if isinstance(value, str) else file_data_to_string(value)
 
 
 def file_reducer(left, right):
@@ -49,11 +140,14 @@ class DeepAgentState(AgentState):
     """Extended agent state that includes task tracking, virtual file system, and diff tracking.
 
     Inherits from LangGraph's AgentState and adds:
-    - todos: List of Todo items for task planning and progress tracking
-    - files: Virtual file system stored as dict mapping filenames to content
+    - todos: List of Todo items for task planning and progress tracking, updated
+      wholesale or through incremental id-addressed operations
+    - files: Virtual file system stored as dict mapping filenames to deepagents
+      ``FileData`` entries, the format the orchestrator's state backend uses (plain
+      strings from older state are still read, see ``file_text``)
     - diffs: Scratch pad for tracking file diffs/changes as dict mapping filenames to diff content
     """
 
-    todos: NotRequired[list[Todo]]
-    files: Annotated[NotRequired[dict[str, str]], file_reducer]
+    todos: Annotated[NotRequired[list[Todo]], todo_reducer]
+    files: Annotated[NotRequired[dict[str, FileData | str]], file_reducer]
     diffs: Annotated[NotRequired[dict[str, str]], file_reducer]
@@ -0,0 +1,247 @@
+"""Step result cache keyed on the step and the content of its files.
+
+Re-running a step whose inputs did not change would produce the same
+result, so ``run_step`` can answer it from a cache instead (set
+``LITIUM_STEP_CACHE=<dir>`` or pass ``--step-cache DIR``). The key hashes:
+- the step JSON, normalized (parsed and dumped with sorted keys)
+- the agent's versions: the model of the orchestrator (or of the pipeline
+  summary) and of each subagent (recorded by ``build_orchestrator`` and
+  ``build_pipeline``), the source of ``src.prompts`` and
+  ``src.tools`` (prompts and tool descriptions) and ``FORMAT_VERSION``
+- the current content of ``target_component`` and every ``reference_files``
+  entry, read through the step's ``/project/`` transaction, and the
+  initial state files
+
+A miss runs the step and records its ``/project/`` writes and deletions,
+its scratch pad (``diffs``), state files and final message. A hit replays
+the writes into the transaction (they are committed like the agent's own)
+and returns the recorded state. Touching one component changes the key of
+exactly the steps that target or reference it; steps that read a file an
+earlier step wrote see the replayed content, so unchanged chains stay hits.
+
+Files the agent reads beyond the target and references (through grep,
+glob or ``read_file``) are not part of the key, which is why the cache is
+opt-in. Entries are JSON files named by key, written atomically, so several
+processes can share a cache directory.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+import weakref
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+
+from src.state import file_text
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENV = "LITIUM_STEP_CACHE"
+
+# Bump to invalidate every entry when the recorded format or replay changes
+FORMAT_VERSION = 1
+
+# Packages whose source shapes what the agents are told
+PROMPT_PACKAGES = ("prompts", "tools")
+
+_PROJECT_PREFIX = "/project/"
+
+_versions: "weakref.WeakKeyDictionary[Any, dict[str, str]]" = weakref.WeakKeyDictionary()
+_caches: dict[str, "StepCache"] = {}
+_caches_lock = threading.Lock()
+
+
+def model_id(model: Any) -> str:
+    """Stable identity of a chat model or model name."""
+    if isinstance(model, str):
+        from src.llms.factory import MODEL_REGISTRY
+
+        return MODEL_REGISTRY.get(model, model)
+    name = getattr(model, "model_name", None) or getattr(model, "model", None)
+    return f"{type(model).__name__}:{name}" if name else type(model).__name__
+
+
+@lru_cache(maxsize=1)
+def prompt_version() -> str:
+    """Hash of the prompt and tool sources (see ``PROMPT_PACKAGES``)."""
+    root = Path(__file__).resolve().parent
+    digest = hashlib.sha256()
+    for package in PROMPT_PACKAGES:
+        for path in sorted((root / package).glob("*.py")):
+            digest.update(path.name.encode("utf-8"))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def register_agent(agent: Any, models: dict[str, Any]) -> None:
+    """Record the models a compiled orchestrator was built with."""
+    _versions[agent] = {
+        "format": str(FORMAT_VERSION),
+        "prompts": prompt_version(),
+        **{name: model_id(model) for name, model in sorted(models.items())},
+    }
+
+
+def agent_versions(agent: Any) -> dict[str, str]:
+    """Versions recorded for ``agent`` (unregistered agents are keyed by type)."""
+    try:
+        versions = _versions.get(agent)
+    except TypeError:
+        versions = None
+    return versions or {"format": str(FORMAT_VERSION), "prompts": prompt_version(), "agent": type(agent).__name__}
+
+
+def project_path(path: str) -> str:
+    """Normalize a step path (``/project/x``, ``/x`` or ``x``) to the ``/project/`` backend's ``/x``."""
+    path = path.replace("\\", "/").strip()
+    if path.startswith(_PROJECT_PREFIX):
+        path = path[len(_PROJECT_PREFIX) - 1:]
+    return "/" + path.strip("/")
+
+
+def step_paths(step: dict) -> list[str]:
+    """The project files a step depends on: its target and reference files."""
+    paths = [step.get("target_component")] + list(step.get("reference_files") or [])
+    return sorted({project_path(path) for path in paths if isinstance(path, str) and path.strip()})
+
+
+def _digest(value: Optional[str]) -> str:
+    return "missing" if value is None else hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedStep:
+    """What a step produced, enough to replay it.
+
+    Attributes:
+        writes: ``/project/`` writes as ``path -> content``
+        deletes: Deleted ``/project/`` paths
+        diffs: Final scratch pad
+        files: Final state files (contents, not ``FileData``)
+        response: Final message (``message_to_dict`` form)
+        created: Unix time the entry was recorded
+        seconds: How long the original run took
+    """
+
+    writes: dict[str, str] = field(default_factory=dict)
+    deletes: list[str] = field(default_factory=list)
+    diffs: dict[str, str] = field(default_factory=dict)
+    files: dict[str, str] = field(default_factory=dict)
+    response: Optional[dict] = None
+    created: float = 0.0
+    seconds: float = 0.0
+
+
+class StepCache:
+    """Directory of recorded step results.
+
+    Attributes:
+        directory: Where entries are stored
+        hits: Lookups answered from the cache
+        misses: Lookups that ran the step
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, step: str, versions: dict[str, str], transaction: Any, files: Optional[dict] = None) -> str:
+        """Cache key of a step against the current project files.
+
+        Args:
+            step: Step JSON text
+            versions: Agent versions (``agent_versions``)
+            transaction: The step's ``/project/`` transaction, used to read files
+            files: Initial state files passed to the step
+        """
+        parsed = json.loads(step)
+        inputs = {
+            "step": parsed,
+            "versions": versions,
+            "project": {path: _digest(transaction.content(path)) for path in step_paths(parsed)},
+            "files": {path: _digest(file_text(value)) for path, value in sorted((files or {}).items())},
+        }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[CachedStep]:
+        """Return the entry for ``key``, or None (unreadable entries count as misses)."""
+        try:
+            entry = CachedStep(**json.loads(self._path(key).read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError):
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is not None:
+            logger.info("step cache hit %s (replaying %d writes, saves ~%.1fs)", key[:12], len(entry.writes), entry.seconds)
+        return entry
+
+    def put(self, key: str, entry: CachedStep) -> None:
+        """Store an entry atomically."""
+        target = self._path(key)
+        tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(json.dumps(asdict(entry), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, target)
+
+    @staticmethod
+    def record(result: dict, transaction: Any, seconds: float = 0.0) -> CachedStep:
+        """Capture a finished step's result and its still-buffered ``/project/`` changes."""
+        from langchain_core.messages import message_to_dict
+
+        messages = result.get("messages") or []
+        return CachedStep(
+            writes=transaction.pending_writes,
+            deletes=sorted(transaction.pending_deletes),
+            diffs=dict(result.get("diffs") or {}),
+            files={path: file_text(value) for path, value in (result.get("files") or {}).items()},
+            response=message_to_dict(messages[-1]) if messages else None,
+            created=time.time(),
+            seconds=round(seconds, 3),
+        )
+
+    @staticmethod
+    def replay(entry: CachedStep, transaction: Any, step: str) -> dict:
+        """Apply a recorded step to the transaction and return its final state."""
+        from deepagents.backends.utils import create_file_data
+        from langchain_core.messages import HumanMessage, messages_from_dict
+
+        for path, content in entry.writes.items():
+            transaction.write(path, content)
+        for path in entry.deletes:
+            transaction.delete(path)
+        messages = [HumanMessage(content=step)]
+        if entry.response:
+            messages += messages_from_dict([entry.response])
+        files = {path: create_file_data(content) for path, content in entry.files.items()}
+        return {"messages": messages, "diffs": dict(entry.diffs), "files": files}
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": sum(1 for _ in self.directory.glob("*.json"))}
+
+
+def step_cache() -> Optional[StepCache]:
+    """The cache in the directory named by ``LITIUM_STEP_CACHE`` (None when unset)."""
+    directory = os.environ.get(CACHE_ENV)
+    if not directory:
+        return None
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = _caches[directory] = StepCache(directory)
+        return cache
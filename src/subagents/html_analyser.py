@@ -2,12 +2,15 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from src.llms import get_model
+from src.middleware import ToolMemoMiddleware
 from langchain.agents import create_agent
 from src.prompts.html_analyser import get_html_analyser_prompt
 from src.prompts.prompts import TODO_USAGE_INSTRUCTIONS
 from src.state import DeepAgentState
 from src.tools.tsx_tools import read_tsx, write_tsx
 from src.tools.scratch_pad_tools import write_scratch_pad, read_scratch_pad
+from src.tools.litium_tools import litium_lookup
+from src.tools.docs_tools import search_docs
 
 import os
 import warnings
@@ -19,24 +22,46 @@ warnings.filterwarnings(
 )
 
 
-model = get_model("reliable")
-
 # Configure tools for HTML analyzer agent
 tools = [
     read_tsx,
     write_scratch_pad,
     read_scratch_pad,
+    litium_lookup,
+    search_docs,
 ]
 
-# Get the HTML analyzer prompt
-html_analyser_prompt = get_html_analyser_prompt()
 
-html_analyser_agent = create_agent(
-    model=model,
-    tools=tools,
-    system_prompt=html_analyser_prompt,
-    state_schema=DeepAgentState,
-)
+def build_html_analyser_agent(model=None):
+    """Build the HTML analyser agent.
+
+    Args:
+        model: Chat model to use (default: the "reliable" model)
+
+    Returns:
+        Compiled agent graph
+    """
+    return create_agent(
+        model=model or get_model("reliable"),
+        tools=tools,
+        system_prompt=get_html_analyser_prompt(),
+        state_schema=DeepAgentState,
+        middleware=[ToolMemoMiddleware()],
+    )
+
+
+_agent = None
+
+
+def __getattr__(name):
+    # The module-level agent is built on first access so importing this module
+    # does not construct a model client.
+    global _agent
+    if name == "html_analyser_agent":
+        if _agent is None:
+            _agent = build_html_analyser_agent()
+        return _agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
@@ -59,7 +84,7 @@ if __name__ == "__main__":
         "implementation_step": 3
     }'''
 
-    result = html_analyser_agent .invoke(
+    result = build_html_analyser_agent().invoke(
         {"messages":
         [{"role": "user",
         "content": input_content}]
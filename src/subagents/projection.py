@@ -0,0 +1,223 @@
+"""Declarative state projection for compiled subagents.
+
+When the orchestrator delegates through the ``task`` tool, deepagents hands
+the compiled subagent every non-private key of the parent state and merges
+back every key the subagent returns. ``project_subagent`` wraps a compiled
+graph so that:
+- ``@ref:`` handles in the task are resolved to the step fields they stand
+  for (see ``src.handles``) before anything else reads the task
+- Only the declared state keys go in, and ``files`` is narrowed to the
+  working set (files named in the task or in the scratch pad, plus globs)
+- Input notes computed from the parent state (such as the design tokens
+  matching the snippet's arbitrary values, or the legend of a canonical
+  snippet's references) are added after the task
+- A large snippet can be split into sections (``src.snippets``), each
+  analysed by its own concurrent run, with the scratch pads merged back in
+  section order
+- Only the final message and the declared output keys come back, with
+  ``files`` reduced to the entries the subagent actually changed
+"""
+
+import fnmatch
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.runnables import Runnable, RunnableLambda
+
+
+def _task_text(state: dict) -> str:
+    """Return the task description the parent sent (first message content)."""
+    messages = state.get("messages") or []
+    if not messages:
+        return ""
+    first = messages[0]
+    content = first.content if isinstance(first, BaseMessage) else first.get("content", "")
+    return content if isinstance(content, str) else str(content)
+
+
+def _resolve_task_handles(state: dict) -> dict:
+    """Return ``state`` with the handles in its task replaced by their content."""
+    from src.handles import resolve_handles
+
+    text = _task_text(state)
+    resolved = resolve_handles(text)
+    if resolved == text:
+        return state
+    return {**state, "messages": [HumanMessage(content=resolved), *state["messages"][1:]]}
+
+
+def mentioned_in_task(path: str, state: dict) -> bool:
+    """Select files whose path (or root-relative path) appears in the task."""
+    text = _task_text(state)
+    return path in text or path.lstrip("/") in text
+
+
+def named_in_diffs(path: str, state: dict) -> bool:
+    """Select files that have an entry in the scratch pad."""
+    from src.step_cache import project_path
+
+    diffs = state.get("diffs") or {}
+    return path in diffs or project_path(path) in {project_path(k) for k in diffs}
+
+
+def design_tokens_in_task(state: dict) -> str | None:
+    """Note the project tokens matching the arbitrary values of the task's snippet."""
+    from src.design_tokens import design_token_note
+    from src.snippets import expand_text
+
+    return design_token_note(expand_text(_task_text(state)))
+
+
+def snippet_legend(state: dict) -> str | None:
+    """Explain the canonical snippet references used in the task or the scratch pad."""
+    from src.snippets import current_table
+
+    table = current_table()
+    if not table:
+        return None
+    diffs = state.get("diffs") or {}
+    return table.legend("\n".join([_task_text(state), *(str(v) for v in diffs.values())]))
+
+
+@dataclass(frozen=True)
+class StateProjection:
+    """What a subagent receives from and returns to the parent state.
+
+    Attributes:
+        input_keys: State keys passed in besides ``messages``
+        file_selectors: Predicates ``(path, state) -> bool``; a file goes in
+            if any selector accepts it
+        file_globs: Additional fnmatch patterns for files that always go in
+        output_keys: State keys returned besides the final message
+        changed_files_only: Return only ``files`` entries the subagent changed
+        input_notes: Functions ``state -> str | None``; each note returned is
+            added as a user message after the task
+        split_snippets: Run a task whose snippet is larger than
+            ``LITIUM_SNIPPET_CHUNK_CHARS`` once per snippet section
+    """
+
+    input_keys: tuple[str, ...] = ("files", "diffs")
+    file_selectors: tuple[Callable[[str, dict], bool], ...] = (mentioned_in_task,)
+    file_globs: tuple[str, ...] = field(default_factory=tuple)
+    output_keys: tuple[str, ...] = ("diffs",)
+    changed_files_only: bool = True
+    input_notes: tuple[Callable[[dict], str | None], ...] = ()
+    split_snippets: bool = False
+
+    def project_input(self, state: dict) -> dict:
+        """Narrow the parent state down to the subagent's working set."""
+        state = _resolve_task_handles(state)
+        projected: dict[str, Any] = {"messages": state.get("messages", [])}
+        notes = [note for note in (make(state) for make in self.input_notes) if note]
+        if notes:
+            projected["messages"] = [*projected["messages"], *(HumanMessage(content=note) for note in notes)]
+        for key in self.input_keys:
+            if key in state and key != "files":
+                projected[key] = state[key]
+        if "files" in self.input_keys and "files" in state:
+            projected["files"] = {
+                path: content
+                for path, content in state["files"].items()
+                if any(select(path, state) for select in self.file_selectors)
+                or any(fnmatch.fnmatch(path, pattern) for pattern in self.file_globs)
+            }
+        return projected
+
+    def project_output(self, result: dict, inputs: dict) -> dict:
+        """Reduce the subagent's final state to what the parent needs."""
+        final = [m for m in result.get("messages", []) if isinstance(m, AIMessage) and m.text]
+        projected: dict[str, Any] = {"messages": final[-1:] or result.get("messages", [])[-1:]}
+        for key in self.output_keys:
+            if key in result and key != "files":
+                projected[key] = result[key]
+        if "files" in self.output_keys and "files" in result:
+            files = result["files"] or {}
+            if self.changed_files_only:
+                before = inputs.get("files") or {}
+                files = {path: value for path, value in files.items() if before.get(path) != value}
+            if files:
+                projected["files"] = files
+        if "structured_response" in result:
+            projected["structured_response"] = result["structured_response"]
+        return projected
+
+    def split_input(self, inputs: dict) -> list[tuple[Any, dict]]:
+        """Per-section inputs for a projected input, or [] when the task is not split."""
+        if not self.split_snippets:
+            return []
+        from src.snippets import chunk_task
+
+        tasks = chunk_task(_task_text(inputs))
+        if not tasks:
+            return []
+        rest = inputs["messages"][1:]
+        return [(section, {**inputs, "messages": [HumanMessage(content=task), *rest]}) for section, task in tasks]
+
+    @staticmethod
+    def merge_results(sections: list, results: list[dict], inputs: dict) -> dict:
+        """Fold per-section final states into one, as if a single run produced it."""
+        from src.snippets import merge_sections
+
+        diffs, answer = merge_sections(sections, results, inputs.get("diffs"))
+        before = inputs.get("files") or {}
+        files = dict(before)
+        for result in results:
+            files.update({path: value for path, value in (result.get("files") or {}).items() if before.get(path) != value})
+        return {"messages": [AIMessage(content=answer)], "diffs": diffs, "files": files}
+
+
+def _batch_config(config) -> dict:
+    from src.snippets import SECTION_CONCURRENCY
+
+    return {**(config or {}), "max_concurrency": SECTION_CONCURRENCY}
+
+
+def project_subagent(runnable: Runnable, projection: StateProjection, name: str | None = None) -> Runnable:
+    """Wrap a compiled subagent graph with a state projection.
+
+    Args:
+        runnable: Compiled subagent graph (e.g. from ``create_agent``)
+        projection: What goes in and what comes back
+        name: Run name for tracing (defaults to the wrapped runnable's name)
+
+    Returns:
+        A runnable usable as ``CompiledSubAgent(runnable=...)``
+    """
+
+    def invoke(state: dict, config=None) -> dict:
+        inputs = projection.project_input(state)
+        split = projection.split_input(inputs)
+        if split:
+            sections, batch = zip(*split)
+            results = runnable.batch(list(batch), _batch_config(config))
+            return projection.project_output(projection.merge_results(list(sections), results, inputs), inputs)
+        return projection.project_output(runnable.invoke(inputs, config), inputs)
+
+    async def ainvoke(state: dict, config=None) -> dict:
+        inputs = projection.project_input(state)
+        split = projection.split_input(inputs)
+        if split:
+            sections, batch = zip(*split)
+            results = await runnable.abatch(list(batch), _batch_config(config))
+            return projection.project_output(projection.merge_results(list(sections), results, inputs), inputs)
+        return projection.project_output(await runnable.ainvoke(inputs, config), inputs)
+
+    return RunnableLambda(invoke, afunc=ainvoke, name=name or runnable.get_name())
+
+
+# Working sets for the pipeline's subagents
+HTML_ANALYSER_PROJECTION = StateProjection(
+    input_keys=("files", "diffs"),
+    file_selectors=(mentioned_in_task,),
+    output_keys=("diffs",),
+    input_notes=(snippet_legend, design_tokens_in_task),
+    split_snippets=True,
+)
+
+TSX_STYLING_PROJECTION = StateProjection(
+    input_keys=("files", "diffs"),
+    file_selectors=(mentioned_in_task, named_in_diffs),
+    output_keys=("files",),
+    input_notes=(snippet_legend,),
+)
@@ -19,7 +19,7 @@ warnings.filterwarnings(
 
 
 model = get_model("reliable")
-tools = [write_todos, read_todos]
+tools = [write_todos, update_todos, read_todos]
 
 # Use the orchestrator prompt from src/prompts/orchestrator.py
 todo_prompt = get_todo_prompt()
@@ -2,6 +2,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from src.llms import get_model
+from src.middleware import ToolMemoMiddleware
 from langchain.agents import create_agent
 from src.prompts.tsx_styling_agent import get_tsx_styling_agent_prompt
 from src.state import DeepAgentState
@@ -18,8 +19,6 @@ warnings.filterwarnings(
 )
 
 
-model = get_model("smart")
-
 # Configure tools for TSX Styling agent
 tools = [
     read_scratch_pad,
@@ -27,15 +26,37 @@ tools = [
     write_tsx,
 ]
 
-# Get the TSX Styling agent prompt
-tsx_styling_agent_prompt = get_tsx_styling_agent_prompt()
 
-tsx_styling_agent = create_agent(
-    model=model,
-    tools=tools,
-    system_prompt=tsx_styling_agent_prompt,
-    state_schema=DeepAgentState,
-)
+def build_tsx_styling_agent(model=None):
+    """Build the TSX styling agent.
+
+    Args:
+        model: Chat model to use (default: the "smart" model)
+
+    Returns:
+        Compiled agent graph
+    """
+    return create_agent(
+        model=model or get_model("smart"),
+        tools=tools,
+        system_prompt=get_tsx_styling_agent_prompt(),
+        state_schema=DeepAgentState,
+        middleware=[ToolMemoMiddleware()],
+    )
+
+
+_agent = None
+
+
+def __getattr__(name):
+    # The module-level agent is built on first access so importing this module
+    # does not construct a model client.
+    global _agent
+    if name == "tsx_styling_agent":
+        if _agent is None:
+            _agent = build_tsx_styling_agent()
+        return _agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
@@ -45,7 +66,7 @@ if __name__ == "__main__":
         "message": "Please read the scratch pad and apply all proposed changes to the TSX files"
     }'''
 
-    result = tsx_styling_agent.invoke(
+    result = build_tsx_styling_agent().invoke(
         {"messages":
         [{"role": "user",
         "content": input_content}]
@@ -0,0 +1,31 @@
+"""Offline search over internal notes and project docs.
+
+``search_docs`` answers from the BM25 index of ``src.retrieval`` (the
+``MYResearch`` notes, ``LITIUM_DOC_DIRS`` and the project's ``docs``
+folders) without any network call, and returns short snippets rather than
+whole documents.
+"""
+
+from langchain_core.tools import tool
+
+from src.retrieval import get_doc_index
+
+
+MAX_RESULTS = 10
+
+
+@tool(parse_docstring=True)
+def search_docs(query: str, k: int = 5) -> str:
+    """Search the team's notes and project docs (Tailwind, Litium and backend conventions).
+
+    Args:
+        query: Keywords to look for
+        k: Number of results (at most 10)
+
+    Returns:
+        One "path:line [heading]" header per result followed by its snippet
+    """
+    hits = get_doc_index().search(query, max(1, min(k, MAX_RESULTS)))
+    if not hits:
+        return f"No docs match '{query}'"
+    return "\n\n".join(f"{hit.path}:{hit.line} [{hit.heading}]\n{hit.snippet}" for hit in hits)
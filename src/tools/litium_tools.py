@@ -0,0 +1,67 @@
+"""Litium product data tools.
+
+``litium_lookup`` gives agents real product, variant and image records from
+the project's Litium admin API (see ``src.litium``). All ids of a task go
+in one call; the shared client of the step's project (``configurable.project``
+of the run, as for the backends) answers from its cache and fetches the rest
+in a single batched round.
+"""
+
+import json
+from typing import Optional
+
+from langchain.tools import ToolRuntime
+from langchain_core.tools import tool
+
+from src.backends.pool import runtime_project
+from src.litium import LitiumError, get_client
+from src.llms.tokens import pack_to_budget, turn_budget
+
+
+@tool(parse_docstring=True)
+def litium_lookup(
+    runtime: ToolRuntime,
+    products: Optional[list[str]] = None,
+    variants: Optional[list[str]] = None,
+    images: Optional[list[str]] = None,
+) -> str:
+    """Look up products, variants and images in the project's Litium API.
+
+    Pass every id the task needs in a single call. Image ids may also be the
+    names listed in the project's productVariantImages (for example "glove1").
+    Records that do not fit the context budget are listed by id and can be
+    looked up on their own.
+
+    Args:
+        runtime: Injected tool runtime (the run's project and, from its state,
+            the context budget)
+        products: Base product system ids
+        variants: Variant system ids
+        images: Media file system ids or productVariantImages names
+
+    Returns:
+        One JSON record per line as "kind id: {...}", followed by the ids that were not found
+    """
+    requests = {"product": products or [], "variant": variants or [], "image": images or []}
+    if not any(requests.values()):
+        return "Error: pass at least one product, variant or image id"
+    try:
+        results = get_client(runtime_project(runtime)).lookup(requests)
+    except (LookupError, LitiumError) as e:
+        return f"Error: {e}"
+
+    found = [
+        (f"{kind} {ident}", json.dumps(record, separators=(",", ":"), ensure_ascii=False))
+        for kind, records in results.items()
+        for ident, record in records.items()
+        if record is not None
+    ]
+    missing = [f"{kind} {ident}" for kind, records in results.items() for ident, record in records.items() if record is None]
+    packed, dropped = pack_to_budget(found, turn_budget(runtime.state.get("messages")))
+
+    lines = [f"{key}: {text}" for key, text in packed]
+    if missing:
+        lines.append(f"Not found: {', '.join(missing)}")
+    if dropped:
+        lines.append(f"[Not shown to fit the context budget: {', '.join(dropped)}. Look them up one at a time.]")
+    return "\n".join(lines)
@@ -4,13 +4,14 @@ This module provides tools for reading and writing to a scratch pad that maintai
 a record of file diffs and modifications made during the agent's execution.
 """
 
-from typing import Annotated
+from typing import Annotated, Optional
 
 from langchain_core.messages import ToolMessage
 from langchain_core.tools import InjectedToolCallId, tool
 from langgraph.prebuilt import InjectedState
 from langgraph.types import Command
 
+from src.llms.tokens import pack_to_budget, turn_budget
 from src.state import DeepAgentState
 
 
@@ -45,15 +46,18 @@ def write_scratch_pad(
 def read_scratch_pad(
     state: Annotated[DeepAgentState, InjectedState],
     tool_call_id: Annotated[str, InjectedToolCallId],
+    file_path: Optional[str] = None,
 ) -> str:
     """Read the current scratch pad containing file diffs.
 
     This tool allows you to retrieve and review all recorded diffs and changes
-    to track what modifications have been made to files.
+    to track what modifications have been made to files. Entries that do not
+    fit the context budget are listed by name and can be read one at a time.
 
     Args:
         state: Injected agent state containing the current diffs
         tool_call_id: Injected tool call identifier for message tracking
+        file_path: Optional file path to read only that entry
 
     Returns:
         Formatted string representation of the current scratch pad
@@ -61,11 +65,25 @@ def read_scratch_pad(
     diffs = state.get("diffs", {})
     if not diffs:
         return "Scratch pad is empty. No diffs recorded yet."
+    if file_path is not None:
+        if file_path not in diffs:
+            return f"No scratch pad entry for '{file_path}'. Entries: {', '.join(diffs)}"
+        diffs = {file_path: diffs[file_path]}
+
+    if file_path is not None:
+        packed, dropped = list(diffs.items()), []
+    else:
+        packed, dropped = pack_to_budget(diffs.items(), turn_budget(state.get("messages")))
 
     result = "Current Scratch Pad:\n" + "=" * 50 + "\n"
-    for i, (filename, diff_content) in enumerate(diffs.items(), 1):
+    for i, (filename, diff_content) in enumerate(packed, 1):
         result += f"\n{i}. {filename}\n"
         result += "-" * 50 + "\n"
         result += diff_content + "\n"
+    if dropped:
+        result += (
+            f"\n[Not shown to fit the context budget: {', '.join(dropped)}. "
+            "Read them one at a time with file_path.]\n"
+        )
 
     return result.strip()
@@ -2,7 +2,8 @@
 
 This module provides tools for creating and managing structured task lists
 that enable agents to plan complex workflows and track progress through
-multi-step operations.
+multi-step operations. Plans are written once with ``write_todos`` and then
+advanced with small id-addressed operations through ``update_todos``.
 """
 
 from typing import Annotated
@@ -12,8 +13,8 @@ from langchain_core.tools import InjectedToolCallId, tool
 from langgraph.prebuilt import InjectedState
 from langgraph.types import Command
 
-from src.prompts.prompts import WRITE_TODOS_DESCRIPTION
-from src.state import DeepAgentState, Todo
+from src.prompts.prompts import UPDATE_TODOS_DESCRIPTION, WRITE_TODOS_DESCRIPTION
+from src.state import DeepAgentState, Todo, TodoBatch, TodoOp, todo_reducer
 
 
 @tool(description=WRITE_TODOS_DESCRIPTION,parse_docstring=True)
@@ -33,12 +34,69 @@ def write_todos(
         update={
             "todos": todos,
             "messages": [
-                ToolMessage(f"Updated todo list to {todos}", tool_call_id=tool_call_id)
+                ToolMessage(f"Updated todo list ({len(todos)} items)", tool_call_id=tool_call_id)
             ],
         }
     )
 
 
+@tool(description=UPDATE_TODOS_DESCRIPTION, parse_docstring=True)
+def update_todos(
+    operations: list[TodoOp],
+    state: Annotated[DeepAgentState, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+) -> Command:
+    """Apply incremental add, set_status and remove operations to the TODO list.
+
+    Args:
+        operations: Id-addressed operations applied in order
+        state: Injected agent state containing the current TODO list
+        tool_call_id: Tool call identifier for message response
+
+    Returns:
+        Command to update agent state with the operations
+    """
+    if not operations:
+        return Command(
+            update={
+                "messages": [ToolMessage("Error: pass at least one operation", tool_call_id=tool_call_id)],
+            }
+        )
+    known = {t["id"] for t in todo_reducer(None, state.get("todos", []))}
+    added = 0
+    for op in operations:
+        if op["op"] == "add":
+            error = f"todo id '{op['id']}' already exists" if op.get("id") in known else None
+            added += 1
+        else:
+            error = None if op.get("id") in known else f"unknown todo id '{op.get('id')}'"
+        if error:
+            return Command(
+                update={
+                    "messages": [
+                        ToolMessage(
+                            f"Error: {error}. Known ids: {', '.join(sorted(known)) or 'none'}",
+                            tool_call_id=tool_call_id,
+                        )
+                    ],
+                }
+            )
+        if op["op"] == "add" and op.get("id"):
+            known.add(op["id"])
+        elif op["op"] == "remove":
+            known.discard(op["id"])
+
+    ack = f"Applied {len(operations)} todo operation(s)"
+    if added:
+        ack += f"; added {added} todo(s), see read_todos for their ids"
+    return Command(
+        update={
+            "todos": TodoBatch(operations),
+            "messages": [ToolMessage(ack, tool_call_id=tool_call_id)],
+        }
+    )
+
+
 @tool(parse_docstring=True)
 def read_todos(
     state: Annotated[DeepAgentState, InjectedState],
@@ -64,6 +122,6 @@ def read_todos(
     for i, todo in enumerate(todos, 1):
         status_emoji = {"pending": "⏳", "in_progress": "🔄", "completed": "✅"}
         emoji = status_emoji.get(todo["status"], "❓")
-        result += f"{i}. {emoji} {todo['content']} ({todo['status']})\n"
+        result += f"{todo.get('id', i)}. {emoji} {todo['content']} ({todo['status']})\n"
 
     return result.strip()
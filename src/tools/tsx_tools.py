@@ -1,18 +1,23 @@
 """TSX file management tools for agent state management.
 
 This module provides tools for reading and writing TSX/TypeScript React files
-stored in the agent state virtual filesystem.
+stored in the agent state virtual filesystem, as deepagents ``FileData`` entries.
+Project files are keyed by their ``/project/``-relative path, so ``x.tsx``,
+``/x.tsx`` and ``/project/x.tsx`` all name the same entry.
 """
 
 from typing import Annotated
 
+from deepagents.backends.utils import create_file_data
 from langchain_core.messages import ToolMessage
 from langchain_core.tools import InjectedToolCallId, tool
 from langgraph.prebuilt import InjectedState
 from langgraph.types import Command
 
+from src.llms.tokens import fit_lines, turn_budget
 from src.prompts.tsx import READ_TSX_DESCRIPTION, WRITE_TSX_DESCRIPTION
-from src.state import DeepAgentState
+from src.state import DeepAgentState, file_text
+from src.step_cache import project_path
 
 
 @tool(description=READ_TSX_DESCRIPTION, parse_docstring=True)
@@ -24,6 +29,9 @@ def read_tsx(
 ) -> str:
     """Read TSX file content from virtual filesystem with optional offset and limit.
 
+    The window is shrunk automatically when the requested lines would not fit
+    the per-turn token budget left by the current message history.
+
     Args:
         file_path: Path to the TSX file to read
         state: Agent state containing virtual filesystem (injected in tool node)
@@ -34,10 +42,11 @@ def read_tsx(
         Formatted file content with line numbers, or error message if file not found
     """
     files = state.get("files", {})
-    if file_path not in files:
+    key = file_path if file_path in files else project_path(file_path)
+    if key not in files:
         return f"Error: TSX file '{file_path}' not found"
 
-    content = files[file_path]
+    content = file_text(files[key])
     if not content:
         return "System reminder: TSX file exists but has empty contents"
 
@@ -48,11 +57,19 @@ def read_tsx(
     if start_idx >= len(lines):
         return f"Error: Line offset {offset} exceeds file length ({len(lines)} lines)"
 
+    window = [line[:2000] for line in lines[start_idx:end_idx]]  # Truncate long lines
+    budget = turn_budget(state.get("messages"))
+    end_idx = start_idx + fit_lines(window, budget)
+
     result_lines = []
     for i in range(start_idx, end_idx):
-        line_content = lines[i][:2000]  # Truncate long lines
-        result_lines.append(f"{i + 1:6d}\t{line_content}")
+        result_lines.append(f"{i + 1:6d}\t{window[i - start_idx]}")
 
+    if end_idx < min(start_idx + limit, len(lines)):
+        result_lines.append(
+            f"\n[Window shrunk to fit the context budget ({budget} tokens). "
+            f"Continue with offset={end_idx} to read more.]"
+        )
     return "\n".join(result_lines)
 
 
@@ -74,11 +91,12 @@ def write_tsx(
     Returns:
         Command to update agent state with new TSX file content
     """
-    files = state.get("files", {})
-    files[file_path] = content
+    key = project_path(file_path)
+    existing = state.get("files", {}).get(key)
+    created_at = existing.get("created_at") if isinstance(existing, dict) else None
     return Command(
         update={
-            "files": files,
+            "files": {key: create_file_data(content, created_at=created_at)},
             "messages": [
                 ToolMessage(f"Updated TSX file {file_path}", tool_call_id=tool_call_id)
             ],
@@ -1,12 +0,0 @@
-import os
-from typing import Literal
-
-
-def hr_search(
-):
-    """Run a hr search"""
-    return "Vipulnath is a good boy , " \
-    "he lives in calicut." \
-    "He Completed his Btech from NSS palakkad and " \
-    "Mtech from NIT jalandhar"
-    
\ No newline at end of file
@@ -0,0 +1,290 @@
+"""Long-lived worker that keeps the compiled orchestrator warm.
+
+A one-shot ``python -m src run`` pays for imports, model client construction
+and graph compilation on every step. ``Worker`` does that once and then runs
+steps against the same compiled graph:
+- Steps run concurrently on a bounded thread pool, each in its own
+  ``/project/`` transaction
+- At most ``concurrency + max_queue`` steps are accepted at a time; beyond
+  that ``submit`` either blocks or raises ``WorkerBusy`` (backpressure)
+- ``health()`` reports uptime, in-flight and queued steps, and totals
+
+Two front ends are provided: ``serve_http`` (``POST /step``, ``GET /health``
+on a local port) and ``serve_stdio`` (JSONL requests on stdin, JSONL results
+on stdout in completion order).
+"""
+
+import json
+import logging
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional, TextIO
+
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerBusy(RuntimeError):
+    """Raised when a step is submitted while the queue is full."""
+
+
+def _step_text(step: Any) -> str:
+    """Normalize a step (JSON text or already-parsed object) to JSON text."""
+    parsed = json.loads(step) if isinstance(step, str) else step
+    if not isinstance(parsed, dict):
+        raise ValueError("a step must be a JSON object")
+    return step if isinstance(step, str) else json.dumps(step)
+
+
+class Worker:
+    """Run steps concurrently against one compiled orchestrator.
+
+    Attributes:
+        agent: The compiled orchestrator graph shared by all steps
+        concurrency: Number of steps that run at the same time
+        max_queue: Number of accepted steps allowed to wait for a slot
+    """
+
+    def __init__(
+        self,
+        agent=None,
+        concurrency: int = 4,
+        max_queue: int = 16,
+        build: Optional[Callable[[], Any]] = None,
+        callbacks: Optional[list] = None,
+        project: Optional[str] = None,
+    ):
+        """Build (or adopt) the orchestrator and start the thread pool.
+
+        Args:
+            agent: Pre-built orchestrator graph
+            concurrency: Maximum steps running at once
+            max_queue: Maximum steps waiting for a slot
+            build: Called once to build the orchestrator when ``agent`` is None
+                (default: ``build_orchestrator()``)
+            callbacks: LangChain callback handlers passed to every step
+            project: Project used by steps that do not name one
+        """
+        if agent is None:
+            if build is None:
+                from src.agent import build_orchestrator
+
+                build = build_orchestrator
+            agent = build()
+        self.agent = agent
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.callbacks = callbacks
+        self.project = project
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="step")
+        self._slots = threading.BoundedSemaphore(concurrency + max_queue)
+        self._lock = threading.Lock()
+        self._running = 0
+        self._accepted = 0
+        self._completed = 0
+        self._failed = 0
+        self._started_at = time.time()
+
+    def submit(
+        self,
+        step: Any,
+        block: bool = False,
+        timeout: Optional[float] = None,
+        project: Optional[str] = None,
+    ) -> Future:
+        """Accept a step for execution.
+
+        Args:
+            step: Step JSON text or object
+            block: Wait for queue space instead of failing when full
+            timeout: Maximum seconds to wait when ``block`` is True
+            project: Project the step targets (see ``run_step``)
+
+        Returns:
+            Future resolving to the final agent state
+
+        Raises:
+            ValueError: If the step is not valid JSON
+            WorkerBusy: If the queue is full (and ``block`` is False or timed out)
+        """
+        text = _step_text(step)
+        if not self._slots.acquire(blocking=block, timeout=timeout if block else None):
+            raise WorkerBusy(f"Worker queue is full ({self.concurrency} running, {self.max_queue} queued)")
+        with self._lock:
+            self._accepted += 1
+        try:
+            return self._executor.submit(self._run, text, project or self.project)
+        except RuntimeError:
+            self._slots.release()
+            raise
+
+    def run(self, step: Any, timeout: Optional[float] = None, project: Optional[str] = None) -> dict:
+        """Submit a step (failing fast when busy) and wait for its final state."""
+        return self.submit(step, project=project).result(timeout)
+
+    def _run(self, step: str, project: Optional[str]) -> dict:
+        from src.agent import run_step
+
+        with self._lock:
+            self._running += 1
+        try:
+            result = run_step(self.agent, step, callbacks=self.callbacks, project=project)
+        except BaseException:
+            with self._lock:
+                self._failed += 1
+            raise
+        else:
+            with self._lock:
+                self._completed += 1
+            return result
+        finally:
+            with self._lock:
+                self._running -= 1
+            self._slots.release()
+
+    def health(self) -> dict:
+        """Return liveness and queue statistics."""
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "status": "ok",
+                "uptime_s": round(time.time() - self._started_at, 1),
+                "concurrency": self.concurrency,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._accepted - finished - self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting steps and (optionally) wait for running ones."""
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def _final_text(result: dict) -> str:
+    messages = result.get("messages") or []
+    return messages[-1].content if messages else ""
+
+
+def _parse_request(payload: Any) -> tuple[str, Any, Optional[str]]:
+    """Split a request into ``(id, step, project)``; a bare step gets a generated id."""
+    if isinstance(payload, dict) and "step" in payload:
+        return str(payload.get("id") or uuid.uuid4().hex), payload["step"], payload.get("project")
+    return uuid.uuid4().hex, payload, None
+
+
+class _StepHandler(BaseHTTPRequestHandler):
+    worker: Worker
+
+    def _reply(self, status: HTTPStatus, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply(HTTPStatus.OK, self.worker.health())
+        else:
+            self._reply(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/step":
+            self._reply(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError(f"negative Content-Length {length}")
+            request_id, step, project = _parse_request(json.loads(self.rfile.read(length) or b"null"))
+            future = self.worker.submit(step, project=project)
+        except ValueError as e:
+            self._reply(HTTPStatus.BAD_REQUEST, {"error": f"Invalid step request: {e}"})
+            return
+        except WorkerBusy as e:
+            self._reply(HTTPStatus.TOO_MANY_REQUESTS, {"error": str(e), **self.worker.health()})
+            return
+        start = time.perf_counter()
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.exception("Step %s failed", request_id)
+            self._reply(HTTPStatus.INTERNAL_SERVER_ERROR, {"id": request_id, "error": f"{type(e).__name__}: {e}"})
+            return
+        self._reply(
+            HTTPStatus.OK,
+            {"id": request_id, "response": _final_text(result), "seconds": round(time.perf_counter() - start, 3)},
+        )
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def serve_http(worker: Worker, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """Create an HTTP server for the worker (call ``serve_forever()`` to run it).
+
+    Endpoints:
+        ``POST /step``: body is a step JSON or ``{"id", "project", "step"}``;
+            answers 200 with the final response, 400 on invalid JSON or an
+            invalid Content-Length, 429 when the worker is busy and 500 when
+            the step failed
+        ``GET /health``: ``Worker.health()``
+    """
+    handler = type("StepHandler", (_StepHandler,), {"worker": worker})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve_stdio(worker: Worker, stdin: TextIO = sys.stdin, stdout: TextIO = sys.stdout) -> int:
+    """Serve JSONL requests from ``stdin`` until EOF.
+
+    Each input line is a step JSON or ``{"id", "project", "step"}``. Reading
+    blocks while the queue is full, and each result is written as one JSON
+    line (``id`` plus ``response`` or ``error``) as soon as its step finishes.
+
+    Returns:
+        Number of failed requests
+    """
+    write_lock = threading.Lock()
+    failures = 0
+    pending: list[Future] = []
+
+    def emit(record: dict) -> None:
+        nonlocal failures
+        with write_lock:
+            failures += "error" in record
+            stdout.write(json.dumps(record) + "\n")
+            stdout.flush()
+
+    def on_done(request_id: str, start: float, future: Future) -> None:
+        seconds = round(time.perf_counter() - start, 3)
+        try:
+            emit({"id": request_id, "response": _final_text(future.result()), "seconds": seconds})
+        except Exception as e:
+            emit({"id": request_id, "error": f"{type(e).__name__}: {e}", "seconds": seconds})
+
+    for line in stdin:
+        if not line.strip():
+            continue
+        try:
+            request_id, step, project = _parse_request(json.loads(line))
+            future = worker.submit(step, block=True, project=project)
+        except ValueError as e:
+            emit({"id": None, "error": f"Invalid step JSON: {e}"})
+            continue
+        start = time.perf_counter()
+        future.add_done_callback(lambda f, rid=request_id, t=start: on_done(rid, t, f))
+        pending.append(future)
+
+    for future in pending:
+        future.exception()
+    return failures
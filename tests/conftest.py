@@ -0,0 +1,56 @@
+"""Shared fixtures: a scratch project registered in a fresh backend pool, tool output capture."""
+
+import pytest
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.backends import pool as pool_module
+from src.backends.pool import BackendPool, ProjectConfig
+
+
+@pytest.fixture(autouse=True)
+def _isolated_env(monkeypatch):
+    """Keep the developer's caching and profiling settings out of the tests."""
+    for name in ("LITIUM_STEP_CACHE", "LITIUM_PROFILE"):
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """An empty process-wide pool (``get_pool()`` returns it)."""
+    fresh = BackendPool()
+    monkeypatch.setattr(pool_module, "_pool", fresh)
+    return fresh
+
+
+@pytest.fixture
+def project(pool, tmp_path):
+    """A project named ``test`` with empty frontend and agent roots."""
+    (tmp_path / "frontend").mkdir()
+    config = ProjectConfig(
+        name="test",
+        frontend_root=str(tmp_path / "frontend"),
+        agent_root=str(tmp_path / "agent"),
+    )
+    pool.add(config)
+    return config
+
+
+class ToolOutputs(BaseCallbackHandler):
+    """Collect tool results by tool name."""
+
+    def __init__(self):
+        self.outputs: dict[str, list[str]] = {}
+        self._names = {}
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._names[run_id] = (serialized or {}).get("name") or kwargs.get("name")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        content = getattr(output, "content", output)
+        self.outputs.setdefault(self._names.pop(run_id, "?"), []).append(str(content))
+
+
+@pytest.fixture
+def tool_outputs():
+    """A callback handler collecting tool results by tool name."""
+    return ToolOutputs()
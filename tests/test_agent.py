@@ -0,0 +1,63 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from src.agent import arun_step, build_orchestrator, run_step
+from src.backends import ProjectRoute, create_backend, project_transaction
+from src.backends.pool import ProjectConfig
+from src.bench.stub_model import ScriptedChatModel
+
+
+STEP = json.dumps({"html_snippet": "<div></div>", "target_component": "components/A.tsx", "reference_files": []})
+
+
+def _writing_model():
+    return ScriptedChatModel(turns=[
+        {"tool_calls": [{"name": "write_file", "args": {
+            "file_path": "/project/components/A.tsx", "content": "export const A = () => null;\n",
+        }}]},
+        {"content": "Done."},
+    ])
+
+
+def test_orchestrator_writes_through_default_backend(project):
+    model = _writing_model()
+    agent = build_orchestrator(model=model, subagents=())
+
+    run_step(agent, STEP, project="test")
+
+    assert model.remaining == 0
+    written = Path(project.frontend_root, "components", "A.tsx")
+    assert written.read_text(encoding="utf-8") == "export const A = () => null;\n"
+
+
+def test_project_route_follows_the_current_project(pool, tmp_path):
+    for name in ("one", "two"):
+        (tmp_path / name).mkdir()
+        pool.add(ProjectConfig(name=name, frontend_root=str(tmp_path / name), agent_root=str(tmp_path / name / "agent")))
+    backend = create_backend()
+    assert isinstance(backend.routes["/project/"], ProjectRoute)
+
+    for name in ("one", "two"):
+        with project_transaction(name):
+            backend.write("/project/page.tsx", name)
+
+    assert (tmp_path / "one" / "page.tsx").read_text() == "one"
+    assert (tmp_path / "two" / "page.tsx").read_text() == "two"
+
+
+@pytest.mark.parametrize("run", ["sync", "async"])
+def test_steps_are_profiled_and_committed(project, tmp_path, monkeypatch, run):
+    monkeypatch.setenv("LITIUM_PROFILE", str(tmp_path / "profiles"))
+    agent = build_orchestrator(model=_writing_model(), subagents=())
+
+    if run == "sync":
+        result = run_step(agent, STEP, project="test")
+    else:
+        result = asyncio.run(arun_step(agent, STEP, project="test"))
+
+    assert result["messages"][-1].content == "Done."
+    assert Path(project.frontend_root, "components", "A.tsx").is_file()
+    assert any((tmp_path / "profiles").iterdir())
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from src.retrieval.bm25 import DocIndex, root_labels
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    # Make the change visible even on filesystems with coarse mtimes
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def docs(tmp_path):
+    root = tmp_path / "docs"
+    _write(root / "grid.md", "# Grid\nProduct grids use four columns on desktop.\n")
+    _write(root / "colors.md", "# Colors\nThe brand black is used for headings.\n")
+    return root
+
+
+def _paths(index, query):
+    return [hit.path for hit in index.search(query)]
+
+
+def test_search_finds_passage(docs, tmp_path):
+    index = DocIndex([docs], index_dir=tmp_path / ".index")
+    hits = index.search("product grid columns")
+    assert hits[0].path == "docs/grid.md"
+    assert hits[0].heading == "# Grid"
+    assert hits[0].line == 1
+
+
+def test_refresh_picks_up_changed_added_and_removed_docs(docs, tmp_path):
+    index = DocIndex([docs], index_dir=tmp_path / ".index")
+    assert index.refresh()
+    assert not index.refresh()
+
+    _write(docs / "grid.md", "# Grid\nProduct grids use a carousel on mobile.\n")
+    _write(docs / "guides" / "checkout.md", "# Checkout\nThe checkout button is sticky.\n")
+    (docs / "colors.md").unlink()
+    assert index.refresh()
+
+    assert _paths(index, "carousel") == ["docs/grid.md"]
+    assert _paths(index, "columns") == []
+    assert _paths(index, "checkout sticky") == ["docs/guides/checkout.md"]
+    assert _paths(index, "brand black") == []
+
+
+def test_index_is_persisted_and_reloaded(docs, tmp_path):
+    index = DocIndex([docs], index_dir=tmp_path / ".index")
+    index.refresh()
+    assert index.path.is_file()
+
+    reloaded = DocIndex([docs], index_dir=tmp_path / ".index")
+    assert len(reloaded) == len(index)
+    assert not reloaded.refresh()
+    assert reloaded.search("brand black") == index.search("brand black")
+
+
+def test_folders_with_the_same_name_do_not_collide(tmp_path):
+    first, second = tmp_path / "a" / "docs", tmp_path / "b" / "docs"
+    _write(first / "readme.md", "# First\nAlpha conventions.\n")
+    _write(second / "readme.md", "# Second\nBeta conventions.\n")
+    index = DocIndex([first, second], index_dir=tmp_path / ".index")
+
+    assert _paths(index, "alpha") == ["a/docs/readme.md"]
+    assert _paths(index, "beta") == ["b/docs/readme.md"]
+
+
+def test_root_labels_use_the_shortest_unique_suffix(tmp_path):
+    roots = [tmp_path / "a" / "docs", tmp_path / "b" / "docs", tmp_path / "notes"]
+    assert root_labels(roots) == ["a/docs", "b/docs", "notes"]
@@ -0,0 +1,60 @@
+import json
+
+from deepagents.backends.utils import create_file_data, file_data_to_string
+
+from src.backends import project_transaction
+from src.snippets.canonical import canonicalize_snippet, canonicalize_step, expand_result
+
+
+URL = "https://storage.googleapis.com/bucket/aida/3rs02mfw_expires_30_days.png"
+CLASSES = "flex items-center gap-2 rounded-md"
+SNIPPET = f"""
+<div class="{CLASSES}">
+    <img src="{URL}" alt="logo">
+    <span class="{CLASSES}">  Sale  </span>
+</div>
+"""
+
+
+def test_snippet_round_trip():
+    canonical, table = canonicalize_snippet(SNIPPET)
+
+    assert URL not in canonical and CLASSES not in canonical
+    assert table.assets == {"asset://3rs02mfw": URL}
+    assert table.classes == {"@c1": CLASSES}
+    assert table.expand(canonical) == (
+        f'<div class="{CLASSES}"><img src="{URL}" alt="logo"><span class="{CLASSES}"> Sale </span></div>'
+    )
+
+
+def test_preformatted_text_is_kept():
+    snippet = "<div>\n  <pre>  a\n    b</pre>\n</div>"
+    canonical, _ = canonicalize_snippet(snippet)
+    assert "<pre>  a\n    b</pre>" in canonical
+
+
+def test_step_without_snippet_is_unchanged():
+    step = json.dumps({"target_component": "components/A.tsx"})
+    assert canonicalize_step(step)[0] == step
+
+
+def test_expand_result_expands_writes_and_state(project, tmp_path):
+    _, table = canonicalize_snippet(SNIPPET)
+    tsx = 'export const A = () => <img className="@c1" src="asset://3rs02mfw" />;\n'
+    expanded = f'export const A = () => <img className="{CLASSES}" src="{URL}" />;\n'
+    state = {
+        "files": {"/components/A.tsx": create_file_data(tsx), "/components/B.tsx": create_file_data("unchanged")},
+        "diffs": {"/components/A.tsx": "+ @c1"},
+    }
+
+    with project_transaction("test") as transaction:
+        transaction.write("/components/A.tsx", tsx)
+        result = expand_result(state, transaction, table)
+
+    files = result["files"]
+    assert all(isinstance(value, dict) for value in files.values())
+    assert file_data_to_string(files["/components/A.tsx"]) == expanded
+    assert files["/components/A.tsx"]["created_at"] == state["files"]["/components/A.tsx"]["created_at"]
+    assert files["/components/B.tsx"] is state["files"]["/components/B.tsx"]
+    assert result["diffs"] == {"/components/A.tsx": f"+ {CLASSES}"}
+    assert (tmp_path / "frontend" / "components" / "A.tsx").read_text() == expanded
@@ -0,0 +1,73 @@
+import json
+
+from langchain_core.messages import AIMessage
+
+from src.snippets.chunking import MAX_SECTIONS, SnippetSection, chunk_task, merge_sections, split_snippet
+
+
+def _page(sections=6, items=8):
+    blocks = "".join(
+        f'<section class="block-{s}">' + "".join(f'<p class="item">text {s}.{i}</p>' for i in range(items)) + "</section>"
+        for s in range(sections)
+    )
+    return f'<div class="w-[1512px]"><main class="flex flex-col">{blocks}</main></div>'
+
+
+def test_small_snippet_is_one_section():
+    html = "<div><p>hi</p></div>"
+    assert split_snippet(html, 4000) == [SnippetSection(0, html, 0, ())]
+
+
+def test_sections_are_exact_slices_in_order():
+    html = _page()
+    sections = split_snippet(html, 300)
+
+    assert 1 < len(sections) <= MAX_SECTIONS
+    assert [s.index for s in sections] == list(range(len(sections)))
+    for section in sections:
+        assert html[section.start:section.start + len(section.html)] == section.html
+        assert section.context[:2] == ('<div class="w-[1512px]">', '<main class="flex flex-col">')
+    starts = [s.start for s in sections]
+    assert starts == sorted(starts)
+    assert all(a.start + len(a.html) <= b.start for a, b in zip(sections, sections[1:]))
+
+
+def test_section_count_is_capped():
+    assert len(split_snippet(_page(sections=30, items=2), 60)) == MAX_SECTIONS
+
+
+def test_chunk_task_replaces_the_step_snippet():
+    html = _page()
+    task = "Analyse this step: " + json.dumps({"html_snippet": html, "target_component": "components/Page.tsx"})
+
+    tasks = chunk_task(task, 300)
+
+    assert tasks is not None and len(tasks) > 1
+    for section, text in tasks:
+        step = json.loads(text[len("Analyse this step: "):text.index("\n\nThis task covers")])
+        assert step["html_snippet"] == section.html
+        assert step["target_component"] == "components/Page.tsx"
+        assert f"{section.label} of {len(tasks)}" in text
+    assert chunk_task("Analyse <div>small</div>", 300) is None
+
+
+def test_merge_sections_in_section_order():
+    sections = [SnippetSection(i, f"<p>{i}</p>", i * 10, ()) for i in range(3)]
+    results = [
+        {"diffs": {"/A.tsx": "a1"}, "messages": [AIMessage(content="one")]},
+        {"diffs": {"/A.tsx": "a2", "/B.tsx": "b2"}, "messages": [AIMessage(content="two")]},
+        {"diffs": {"/C.tsx": "unchanged"}, "messages": [AIMessage(content="three")]},
+    ]
+    # Finished out of order
+    order = [2, 0, 1]
+
+    merged, answer = merge_sections(
+        [sections[i] for i in order], [results[i] for i in order], before={"/C.tsx": "unchanged"}
+    )
+
+    assert merged == {
+        "/C.tsx": "unchanged",
+        "/A.tsx": "### section 1 of 3\na1\n\n### section 2 of 3\na2",
+        "/B.tsx": "b2",
+    }
+    assert answer == "## section 1 of 3\none\n\n## section 2 of 3\ntwo\n\n## section 3 of 3\nthree"
@@ -0,0 +1,104 @@
+import json
+import os
+
+import pytest
+
+from src.retrieval.components import ComponentIndex, suggest_references
+
+PRODUCT_CARD = """export default function ProductCard({ product }) {
+  return (
+    <div className="flex flex-col gap-2">
+      <Image src={product.image} alt={product.name} className="rounded-md" />
+      <h3 className="text-sm font-medium">{product.name}</h3>
+      <span className="text-lg font-bold">{product.price}</span>
+    </div>
+  );
+}
+"""
+
+FOOTER = """export default function Footer() {
+  return (
+    <footer className="bg-black px-8 py-12">
+      <ul className="grid grid-cols-4">
+        <li><Link href="/about" className="text-white">About</Link></li>
+      </ul>
+    </footer>
+  );
+}
+"""
+
+CARD_HTML = """<div class="flex flex-col gap-2">
+  <img src="shoe.jpg" alt="Running shoe" class="rounded-md">
+  <h3 class="text-sm font-medium">Running shoe</h3>
+  <span class="text-lg font-bold">$120</span>
+</div>"""
+
+FOOTER_HTML = """<footer class="bg-black px-8 py-12">
+  <ul class="grid grid-cols-4"><li><a href="/about" class="text-white">About</a></li></ul>
+</footer>"""
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    # Make the change visible even on filesystems with coarse mtimes
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def frontend(tmp_path):
+    root = tmp_path / "frontend"
+    _write(root / "components" / "product" / "ProductCard.tsx", PRODUCT_CARD)
+    _write(root / "components" / "layout" / "Footer.tsx", FOOTER)
+    return root
+
+
+def _ranking(index, html):
+    return [hit.path for hit in index.similar(html)]
+
+
+def test_snippet_ranks_the_matching_component_first(frontend, tmp_path):
+    index = ComponentIndex(frontend, index_dir=tmp_path / ".index")
+    assert _ranking(index, CARD_HTML)[0] == "components/product/ProductCard.tsx"
+    assert _ranking(index, FOOTER_HTML)[0] == "components/layout/Footer.tsx"
+    assert _ranking(index, CARD_HTML)[1:] == ["components/layout/Footer.tsx"]
+
+
+def test_exclude_leaves_a_component_out(frontend, tmp_path):
+    index = ComponentIndex(frontend, index_dir=tmp_path / ".index")
+    hits = index.similar(CARD_HTML, exclude=["/components/product/ProductCard.tsx"])
+    assert [hit.path for hit in hits] == ["components/layout/Footer.tsx"]
+
+
+def test_refresh_picks_up_changed_added_and_removed_components(frontend, tmp_path):
+    index = ComponentIndex(frontend, index_dir=tmp_path / ".index")
+    assert index.refresh()
+    assert not index.refresh()
+
+    _write(frontend / "components" / "layout" / "Footer.tsx", PRODUCT_CARD.replace("ProductCard", "Teaser"))
+    _write(frontend / "components" / "product" / "Tile.tsx", FOOTER.replace("Footer", "Tile"))
+    (frontend / "components" / "product" / "ProductCard.tsx").unlink()
+    assert index.refresh()
+
+    assert len(index) == 2
+    assert _ranking(index, CARD_HTML)[0] == "components/layout/Footer.tsx"
+    assert _ranking(index, FOOTER_HTML)[0] == "components/product/Tile.tsx"
+
+    reloaded = ComponentIndex(frontend, index_dir=tmp_path / ".index")
+    assert not reloaded.refresh()
+    assert reloaded.similar(CARD_HTML) == index.similar(CARD_HTML)
+
+
+def test_suggest_references_fills_in_an_empty_step(project, monkeypatch, tmp_path):
+    monkeypatch.setenv("LITIUM_INDEX_DIR", str(tmp_path / ".index"))
+    frontend = tmp_path / "frontend"
+    _write(frontend / "components" / "product" / "ProductCard.tsx", PRODUCT_CARD)
+    _write(frontend / "components" / "layout" / "Footer.tsx", FOOTER)
+    step = json.dumps({"html_snippet": CARD_HTML, "target_component": "project/components/product/Teaser.tsx"})
+
+    suggested = json.loads(suggest_references(step, "test", k=1))
+    assert suggested["reference_files"] == ["components/product/ProductCard.tsx"]
+
+    with_references = json.dumps({"html_snippet": CARD_HTML, "reference_files": ["a.tsx"]})
+    assert suggest_references(with_references, "test", k=1) == with_references
@@ -0,0 +1,99 @@
+import pytest
+
+from src.design_tokens import (
+    DesignToken,
+    TokenTable,
+    _ciede2000,
+    arbitrary_values,
+    tailwind_theme,
+)
+
+TAILWIND_CONFIG = """
+import type { Config } from "tailwindcss";
+
+export default {
+  content: ["./app/**/*.tsx"],
+  theme: {
+    colors: {
+      // Brand palette
+      brand: { black: "#1A2332", DEFAULT: "#E30613" },
+      white: "#fff",
+    },
+    extend: {
+      spacing: { "18": "4.5rem", gutter: "24px" },
+      fontSize: { hero: ["3rem", { lineHeight: "1" }], small: "13px" },
+      colors: { white: "#FAFAFA" },
+    },
+  },
+} satisfies Config;
+"""
+
+# Sharma, Wu and Dalal's CIEDE2000 test data
+REFERENCE_PAIRS = [
+    ((50.0, 2.6772, -79.7751), (50.0, 0.0, -82.7485), 2.0425),
+    ((50.0, 2.5, 0.0), (73.0, 25.0, -18.0), 27.1492),
+    ((50.0, 2.5, 0.0), (50.0, 0.0, -2.5), 4.3065),
+    ((2.0776, 0.0795, -1.1350), (0.9033, -0.0636, -0.5514), 0.9082),
+]
+
+
+def test_tailwind_theme_flattens_and_extends():
+    theme = tailwind_theme(TAILWIND_CONFIG)
+    assert theme["colors"] == {"brand-black": "#1A2332", "brand": "#E30613", "white": "#FAFAFA"}
+    assert theme["spacing"] == {"18": "4.5rem", "gutter": "24px"}
+    assert theme["fontSize"]["small"] == "13px"
+
+
+def test_tailwind_theme_without_theme_is_empty():
+    assert tailwind_theme("export default { content: [] };") == {"colors": {}, "spacing": {}, "fontSize": {}}
+
+
+@pytest.mark.parametrize("lab1, lab2, expected", REFERENCE_PAIRS)
+def test_ciede2000_reference_pairs(lab1, lab2, expected):
+    assert _ciede2000(lab1, lab2) == pytest.approx(expected, abs=1e-4)
+    assert _ciede2000(lab2, lab1) == pytest.approx(expected, abs=1e-4)
+
+
+@pytest.fixture
+def table():
+    theme = tailwind_theme(TAILWIND_CONFIG)
+    tokens = [DesignToken("color", name, value, "tailwind.config.ts") for name, value in theme["colors"].items()]
+    tokens += [DesignToken("spacing", name, value, "tailwind.config.ts") for name, value in theme["spacing"].items()]
+    tokens += [DesignToken("font-size", name, value, "tailwind.config.ts") for name, value in theme["fontSize"].items()]
+    tokens += [DesignToken("spacing", "4", "1rem", "tailwind"), DesignToken("font-size", "sm", "0.875rem", "tailwind")]
+    return TokenTable(tokens)
+
+
+def _best(matches):
+    return {match.value.cls: match.candidates[0][0] if match.candidates else None for match in matches}
+
+
+def test_match_maps_colors_spacing_and_font_sizes(table):
+    values = arbitrary_values(
+        '<div class="text-[#1A2332] hover:bg-[#1b2433] border-[#00ff00] mr-[73px] '
+        '-mt-[15px] px-[24px] text-[13px] text-[14px]">'
+    )
+    assert _best(table.match(values)) == {
+        "text-[#1A2332]": "text-brand-black",
+        "hover:bg-[#1b2433]": "hover:bg-brand-black",
+        "border-[#00ff00]": None,
+        "mr-[73px]": "mr-18",
+        "-mt-[15px]": "-mt-4",
+        "px-[24px]": "px-gutter",
+        "text-[13px]": "text-small",
+        "text-[14px]": "text-sm",
+    }
+
+
+def test_match_reports_distances(table):
+    [exact, near] = table.match(arbitrary_values('<p class="text-[#1A2332] mr-[73px]">'))
+    assert exact.candidates[0][1] == 0.0
+    assert near.candidates[0][1] == -1.0
+
+
+def test_ciede2000_reference_pairs_with_numpy():
+    numpy = pytest.importorskip("numpy")
+    lab1 = numpy.array([pair[0] for pair in REFERENCE_PAIRS]).T
+    lab2 = numpy.array([pair[1] for pair in REFERENCE_PAIRS]).T
+    distances = _ciede2000(lab1, lab2, m=numpy)
+    assert distances.tolist() == pytest.approx([pair[2] for pair in REFERENCE_PAIRS], abs=1e-4)
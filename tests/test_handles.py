@@ -0,0 +1,42 @@
+import json
+import os
+
+import pytest
+
+from src.backends.pool import ProjectConfig
+from src.handles import HANDLE_PREFIX, resolve_handles, store_step_fields
+
+
+SNIPPET = "<div class=\"card\">" + "<span>item</span>" * 40 + "</div>"
+
+
+def test_large_fields_round_trip(project, tmp_path):
+    step = json.dumps({"html_snippet": SNIPPET, "target_component": "components/Card.tsx"})
+
+    stored = store_step_fields(step, "test")
+
+    parsed = json.loads(stored)
+    assert parsed["html_snippet"].startswith(HANDLE_PREFIX + "/agent/inputs/")
+    assert parsed["target_component"] == "components/Card.tsx"
+    handle = parsed["html_snippet"][len(HANDLE_PREFIX + "/agent"):]
+    assert (tmp_path / "agent" / handle.lstrip("/")).read_text() == SNIPPET
+    assert json.loads(resolve_handles(stored, "test")) == json.loads(step)
+
+
+def test_small_fields_stay_inline(project):
+    step = json.dumps({"html_snippet": "<div></div>", "target_component": "components/Card.tsx"})
+    assert store_step_fields(step, "test") == step
+
+
+@pytest.mark.skipif(os.name == "nt", reason="drive paths are valid on Windows")
+def test_windows_agent_root_is_refused(pool, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = ProjectConfig.from_dict(
+        {"project_name": "shop", "frontend": str(tmp_path), "agent_root": "C:\\litiumdeepagents\\ecom\\shop"}
+    )
+    pool.add(config)
+    assert config.agent_root == "C:/litiumdeepagents/ecom/shop"
+
+    with pytest.raises(ValueError, match="Windows path"):
+        store_step_fields(json.dumps({"html_snippet": SNIPPET}), "shop")
+    assert not (tmp_path / "C:").exists()
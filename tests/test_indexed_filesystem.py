@@ -0,0 +1,62 @@
+import pytest
+
+from src.backends.indexed_filesystem import IndexedFilesystemBackend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return IndexedFilesystemBackend(root_dir=tmp_path, index_dir=tmp_path / ".index", build_in_background=False)
+
+
+@pytest.mark.parametrize("path", ["/app/[...slug]/page.tsx", "/app/[[...slug]]/page.tsx"])
+def test_catch_all_route_segments_are_allowed(backend, tmp_path, path):
+    assert backend.write(path, "export default function Page() {}\n").error is None
+    assert (tmp_path / path.lstrip("/")).is_file()
+
+
+@pytest.mark.parametrize("path", ["/../outside.tsx", "/app/../../outside.tsx", "/app/.."])
+def test_traversal_is_rejected(backend, path):
+    with pytest.raises(ValueError):
+        backend._resolve_path(path)
+
+
+def _indexed(backend, tmp_path, files):
+    for path, content in files.items():
+        target = tmp_path / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(content)
+    backend.index.refresh()
+    assert backend.index.ready
+
+
+def test_grep_uses_index_candidates(backend, tmp_path):
+    _indexed(backend, tmp_path, {"a.tsx": "const needle = 1;\n", "b.tsx": "const other = 2;\n"})
+    assert backend.index.candidates("needle") == ["a.tsx"]
+    result = backend.grep("needle")
+    assert [(m["path"], m["line"]) for m in result.matches] == [("/a.tsx", 1)]
+
+
+def test_written_file_is_found_before_refresh(backend, tmp_path):
+    _indexed(backend, tmp_path, {"a.tsx": "const a = 1;\n"})
+    assert backend.write("/b.tsx", "const needle = 1;\n").error is None
+    assert [m["path"] for m in backend.grep("needle").matches] == ["/b.tsx"]
+    assert [m["path"] for m in backend.glob("*.tsx").matches] == ["/a.tsx", "/b.tsx"]
+
+
+def test_glob_skips_deleted_files(backend, tmp_path):
+    _indexed(backend, tmp_path, {"a.tsx": "a\n", "b.tsx": "b\n", "app/c.tsx": "c\n", "app/d.tsx": "d\n"})
+    assert backend.delete("/a.tsx").error is None
+    assert backend.delete("/app").error is None
+    assert [m["path"] for m in backend.glob("**/*.tsx").matches] == ["/b.tsx"]
+
+
+def test_index_uses_backend_size_cap(tmp_path):
+    large = "x" * (2 * 1024 * 1024) + "\nconst needle = 1;\n"
+    small_cap = IndexedFilesystemBackend(root_dir=tmp_path, max_file_size_mb=1, index_dir=tmp_path / ".i1",
+                                         build_in_background=False)
+    default_cap = IndexedFilesystemBackend(root_dir=tmp_path, index_dir=tmp_path / ".i2", build_in_background=False)
+    assert default_cap.index.max_file_size == 10 * 1024 * 1024
+    _indexed(default_cap, tmp_path, {"large.tsx": large})
+    small_cap.index.refresh()
+    assert default_cap.index.candidates("needle") == ["large.tsx"]
+    assert small_cap.index.candidates("needle") == []
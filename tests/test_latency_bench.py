@@ -0,0 +1,53 @@
+import copy
+
+import pytest
+
+from src.bench.latency import STAGES, Pipeline, load_corpus
+
+
+@pytest.fixture
+def case():
+    return load_corpus(names=["product-price-edit"])[0]
+
+
+@pytest.mark.parametrize("mode", ["agent", "pipeline"])
+def test_case_runs_and_writes_its_target(pool, case, mode):
+    pipeline = Pipeline(mode=mode)
+    try:
+        metrics = pipeline.run(case)
+    finally:
+        pipeline.close()
+    assert set(STAGES) <= set(metrics)
+    assert pool.projects == []
+
+
+def test_pipelines_can_be_created_one_after_another(pool, case):
+    for _ in range(2):
+        pipeline = Pipeline()
+        try:
+            pipeline.run(case)
+        finally:
+            pipeline.close()
+
+
+def test_run_without_write_fails(pool, case):
+    broken = copy.deepcopy(case)
+    styler = broken["script"]["tsx_styling_agent"]
+    broken["script"]["tsx_styling_agent"] = [turn for turn in styler if "write_tsx" not in str(turn)]
+    pipeline = Pipeline()
+    try:
+        with pytest.raises(RuntimeError, match="did not write"):
+            pipeline.run(broken)
+    finally:
+        pipeline.close()
+
+
+def test_tool_errors_fail_the_run(pool, case):
+    broken = copy.deepcopy(case)
+    broken["script"]["html_analyser"][0]["tool_calls"][0]["args"]["file_path"] = "/components/Missing.tsx"
+    pipeline = Pipeline()
+    try:
+        with pytest.raises(RuntimeError, match="tool errors"):
+            pipeline.run(broken)
+    finally:
+        pipeline.close()
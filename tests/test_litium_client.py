@@ -0,0 +1,117 @@
+import time
+
+import pytest
+
+from src.litium import LitiumClient, LitiumError, LitiumSettings
+from src.litium.stub import StubLitiumServer
+
+
+RECORDS = {
+    "product": {"p1": {"systemId": "p1", "name": "Glove"}},
+    "variant": {"v1": {"systemId": "v1"}, "v2": {"systemId": "v2"}},
+    "image": {"img-1": {"systemId": "img-1", "file": "glove.png"}},
+}
+
+
+@pytest.fixture(scope="module")
+def server():
+    with StubLitiumServer(RECORDS, token="secret") as server:
+        yield server
+
+
+@pytest.fixture
+def stub(server):
+    server.requests = 0
+    return server
+
+
+@pytest.fixture
+def make_client(stub):
+    clients = []
+
+    def make(**settings):
+        settings = {"base_url": stub.url, "token": "secret", **settings}
+        clients.append(LitiumClient(LitiumSettings(**settings)))
+        return clients[-1]
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client()
+
+
+@pytest.fixture
+def batch_client(make_client):
+    return make_client(batch=True)
+
+
+def test_parallel_gets_one_request_per_id(client, stub):
+    results = client.lookup({"variant": ["v1", "v2", "v1"], "product": ["p1", "missing"]})
+
+    assert results == {
+        "variant": {"v1": RECORDS["variant"]["v1"], "v2": RECORDS["variant"]["v2"]},
+        "product": {"p1": RECORDS["product"]["p1"], "missing": None},
+    }
+    assert stub.requests == 4
+
+
+def test_batch_is_one_request_per_kind(batch_client, stub):
+    results = batch_client.lookup({"variant": ["v1", "v2", "v3"], "product": ["p1"]})
+
+    assert results["variant"] == {"v1": RECORDS["variant"]["v1"], "v2": RECORDS["variant"]["v2"], "v3": None}
+    assert stub.requests == 2
+
+
+def test_cache_answers_repeats(client, stub):
+    client.lookup({"variant": ["v1"], "product": ["missing"]})
+    client.lookup({"variant": ["v1"], "product": ["missing"]})
+
+    assert stub.requests == 2
+    assert client.stats()["cache_hits"] == 2
+
+
+def test_expired_entries_are_fetched_again(make_client, stub):
+    client = make_client(cache_ttl=0.05, negative_ttl=0.05)
+    client.lookup({"variant": ["v1"], "product": ["missing"]})
+    time.sleep(0.1)
+    client.lookup({"variant": ["v1"], "product": ["missing"]})
+    assert stub.requests == 4
+
+
+def test_unknown_ids_expire_before_records(make_client, stub):
+    client = make_client(cache_ttl=60, negative_ttl=0.05)
+    client.lookup({"variant": ["v1"], "product": ["missing"]})
+    time.sleep(0.1)
+    client.lookup({"variant": ["v1"], "product": ["missing"]})
+    assert stub.requests == 3
+
+
+def test_aliases_resolve_image_names(make_client):
+    assert make_client(aliases={"glove1": "img-1"}).get("image", "glove1") == RECORDS["image"]["img-1"]
+
+
+def test_wrong_token_is_an_error(make_client):
+    with pytest.raises(LitiumError, match="401"):
+        make_client(token="wrong").lookup({"product": ["p1"]})
+
+
+def test_settings_from_config():
+    settings = LitiumSettings.from_config({
+        "litium_api": {
+            "LITIUM_API_BASE_URL": "https://localhost:5001/Litium/api/admin/",
+            "LITIUM_API_TOKEN": "YWdlbnQ6bGl0aXVt",
+            "LITIUM_API_CACHE_TTL": "120",
+            "LITIUM_API_NEGATIVE_TTL": "5",
+            "LITIUM_API_BATCH": "true",
+        },
+        "productVariantImages": {"glove1": "img-1"},
+    })
+
+    assert settings.base_url == "https://localhost:5001/Litium/api/admin"
+    assert (settings.cache_ttl, settings.negative_ttl, settings.batch) == (120.0, 5.0, True)
+    assert settings.aliases == {"glove1": "img-1"}
+    assert settings.headers()["Authorization"] == "Basic YWdlbnQ6bGl0aXVt"
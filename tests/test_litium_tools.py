@@ -0,0 +1,42 @@
+from langchain.tools import ToolRuntime
+
+from src.backends.pool import ProjectConfig
+from src.litium import client as client_module
+from src.tools.litium_tools import litium_lookup
+
+
+class FakeClient:
+    def __init__(self, name):
+        self.name = name
+
+    def lookup(self, requests):
+        return {kind: {ident: {"project": self.name} for ident in ids} for kind, ids in requests.items() if ids}
+
+
+def _runtime(project):
+    return ToolRuntime(
+        state={"messages": []},
+        context=None,
+        config={"configurable": {"project": project}},
+        stream_writer=lambda _: None,
+        tool_call_id="call-1",
+        store=None,
+    )
+
+
+def test_lookup_uses_the_runs_project(pool, tmp_path, monkeypatch):
+    for name in ("one", "two"):
+        pool.add(ProjectConfig(name=name, frontend_root=str(tmp_path / name), agent_root=str(tmp_path / name)))
+        monkeypatch.setitem(client_module._clients, name, FakeClient(name))
+
+    for name in ("one", "two"):
+        result = litium_lookup.invoke({"products": ["p1"], "runtime": _runtime(name)})
+        assert result == f'product p1: {{"project":"{name}"}}'
+
+
+def test_lookup_without_project_is_an_error(pool, tmp_path):
+    for name in ("one", "two"):
+        pool.add(ProjectConfig(name=name, frontend_root=str(tmp_path / name), agent_root=str(tmp_path / name)))
+
+    result = litium_lookup.invoke({"products": ["p1"], "runtime": _runtime(None)})
+    assert result.startswith("Error: No project selected")
@@ -0,0 +1,91 @@
+import os
+import threading
+import time
+
+import pytest
+from deepagents.backends import FilesystemBackend
+
+from src.backends.locking import LockingBackend, LockTimeout, PathLockManager
+
+
+@pytest.fixture
+def backend(tmp_path):
+    root = tmp_path / "frontend"
+    root.mkdir()
+    (root / "a.tsx").write_text("const a = 1;\n")
+    return LockingBackend(FilesystemBackend(root_dir=root, virtual_mode=True), PathLockManager())
+
+
+def test_readers_share_and_writers_exclude():
+    locks = PathLockManager()
+    with locks.read_lock("/a.tsx"):
+        with locks.read_lock("/a.tsx", timeout=0.05):
+            pass
+        with pytest.raises(LockTimeout):
+            with locks.write_lock("/a.tsx", timeout=0.05):
+                pass
+    with locks.write_lock("/a.tsx"):
+        with pytest.raises(LockTimeout):
+            with locks.read_lock("/a.tsx", timeout=0.05):
+                pass
+        with locks.write_lock("/b.tsx", timeout=0.05):
+            pass
+
+
+def test_waiting_writer_goes_first():
+    locks = PathLockManager()
+    order = []
+
+    def writer():
+        with locks.write_lock("/a.tsx"):
+            order.append("writer")
+
+    with locks.read_lock("/a.tsx"):
+        thread = threading.Thread(target=writer)
+        thread.start()
+        while not locks._locks["/a.tsx"]._waiting_writers:
+            time.sleep(0.001)
+        # A new reader queues behind the waiting writer
+        with pytest.raises(LockTimeout):
+            with locks.read_lock("/a.tsx", timeout=0.05):
+                pass
+    thread.join()
+    assert order == ["writer"]
+    assert locks._locks == {}
+
+
+@pytest.mark.skipif(os.name == "nt", reason="readers lock exclusively on Windows")
+def test_lock_files_exclude_other_managers(tmp_path):
+    first = PathLockManager(tmp_path / "locks")
+    second = PathLockManager(tmp_path / "locks")
+    with first.write_lock("/a.tsx"):
+        with pytest.raises(LockTimeout, match="another process"):
+            with second.read_lock("/a.tsx", timeout=0.05):
+                pass
+    with first.read_lock("/a.tsx"), second.read_lock("/a.tsx", timeout=0.05):
+        pass
+
+
+def test_stale_write_is_refused(backend, tmp_path):
+    with backend.session():
+        assert backend.read("/a.tsx").error is None
+        (tmp_path / "frontend" / "a.tsx").write_text("changed by another run\n")
+        result = backend.edit("/a.tsx", "changed", "overwritten")
+    assert result.error.startswith("Conflict: '/a.tsx' was changed by another run")
+    assert (tmp_path / "frontend" / "a.tsx").read_text() == "changed by another run\n"
+
+
+def test_own_writes_do_not_conflict(backend, tmp_path):
+    with backend.session():
+        backend.read("/a.tsx")
+        assert backend.edit("/a.tsx", "1", "2").error is None
+        assert backend.edit("/a.tsx", "2", "3").error is None
+    assert (tmp_path / "frontend" / "a.tsx").read_text() == "const a = 3;\n"
+
+
+def test_sessions_track_reads_separately(backend, tmp_path):
+    with backend.session():
+        backend.read("/a.tsx")
+    (tmp_path / "frontend" / "a.tsx").write_text("changed by another run\n")
+    with backend.session():
+        assert backend.write("/a.tsx", "fresh session\n").error is None
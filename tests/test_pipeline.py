@@ -0,0 +1,54 @@
+import json
+from pathlib import Path
+
+from src.agent import run_step
+from src.bench.stub_model import ScriptedChatModel
+from src.pipeline import build_pipeline, validate_step
+
+
+TARGET = "components/Banner.tsx"
+ORIGINAL = 'export const Banner = () => <section className="p-2" />;\n'
+STYLED = 'export const Banner = () => <section className="p-[50px] bg-white" />;\n'
+
+
+def test_validate_step_lists_problems():
+    step, problems = validate_step(json.dumps({"html_snippet": "<div></div>", "reference_files": "a.tsx"}))
+    assert step is not None
+    assert problems == ["missing target_component", "reference_files must be a list of paths"]
+    assert validate_step("not json")[0] is None
+
+
+def test_pipeline_commits_the_styled_target(project, tool_outputs):
+    target = Path(project.frontend_root, TARGET)
+    target.parent.mkdir(parents=True)
+    target.write_text(ORIGINAL, encoding="utf-8")
+    analyser = ScriptedChatModel(turns=[
+        {"tool_calls": [{"name": "read_tsx", "args": {"file_path": TARGET}}]},
+        {"tool_calls": [{"name": "write_scratch_pad", "args": {"diffs": {TARGET: "p-2 -> p-[50px] bg-white"}}}]},
+        {"content": "One change proposed."},
+    ])
+    styler = ScriptedChatModel(turns=[
+        {"tool_calls": [{"name": "read_scratch_pad", "args": {}}]},
+        {"tool_calls": [{"name": "write_tsx", "args": {"file_path": TARGET, "content": STYLED}}]},
+        {"content": "Applied."},
+    ])
+    pipeline = build_pipeline(
+        subagent_model={"html_analyser": analyser, "tsx_styling_agent": styler}, summarize=False
+    )
+    step = json.dumps({"html_snippet": "<section class=\"p-[50px] bg-white\"></section>", "target_component": TARGET,
+                       "reference_files": [TARGET]})
+
+    run_step(pipeline, step, callbacks=[tool_outputs], project="test")
+
+    assert analyser.remaining == 0 and styler.remaining == 0
+    assert ORIGINAL.strip() in tool_outputs.outputs["read_tsx"][0]
+    assert target.read_text(encoding="utf-8") == STYLED
+
+
+def test_rejected_step_leaves_the_project_alone(project):
+    pipeline = build_pipeline(subagent_model=ScriptedChatModel(), summarize=False)
+
+    result = run_step(pipeline, json.dumps({"html_snippet": "<div></div>"}), project="test")
+
+    assert result["messages"][-1].content == "Step rejected: missing target_component"
+    assert not any(Path(project.frontend_root).iterdir())
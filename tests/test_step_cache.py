@@ -0,0 +1,84 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from src.agent import build_orchestrator, run_step
+from src.backends import project_transaction
+from src.bench.stub_model import ScriptedChatModel
+from src.step_cache import StepCache, step_cache
+
+
+STEP = json.dumps({
+    "html_snippet": "<div></div>",
+    "target_component": "/project/components/A.tsx",
+    "reference_files": ["/project/components/B.tsx"],
+})
+
+
+def _write(content):
+    return {"tool_calls": [{"name": "write_file", "args": {"file_path": "/project/components/A.tsx", "content": content}}]}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("LITIUM_STEP_CACHE", str(tmp_path / "cache"))
+    return step_cache()
+
+
+@pytest.fixture
+def frontend(project):
+    root = Path(project.frontend_root)
+    (root / "components").mkdir()
+    (root / "components" / "A.tsx").write_text("old\n")
+    (root / "components" / "B.tsx").write_text("reference\n")
+    return root
+
+
+def _run(model):
+    return run_step(build_orchestrator(model=model, subagents=()), STEP, project="test")
+
+
+def test_unchanged_step_is_replayed(cache, frontend):
+    model = ScriptedChatModel(turns=[_write("styled\n"), {"content": "Done."}])
+    _run(model)
+    assert cache.stats()["misses"] == 1
+    (frontend / "components" / "A.tsx").write_text("old\n")
+
+    replay_model = ScriptedChatModel(turns=[])
+    result = _run(replay_model)
+
+    assert cache.stats()["hits"] == 1
+    assert result["messages"][-1].content == "Done."
+    assert (frontend / "components" / "A.tsx").read_text() == "styled\n"
+
+
+def test_changed_reference_is_a_miss(cache, frontend):
+    _run(ScriptedChatModel(turns=[_write("styled\n"), {"content": "Done."}]))
+    (frontend / "components" / "A.tsx").write_text("old\n")
+    (frontend / "components" / "B.tsx").write_text("changed reference\n")
+
+    model = ScriptedChatModel(turns=[_write("restyled\n"), {"content": "Again."}])
+    result = _run(model)
+
+    assert model.remaining == 0
+    assert cache.stats() == {"hits": 0, "misses": 2, "entries": 2}
+    assert result["messages"][-1].content == "Again."
+    assert (frontend / "components" / "A.tsx").read_text() == "restyled\n"
+
+
+def test_record_and_replay_deletes(frontend, tmp_path):
+    with project_transaction("test") as transaction:
+        transaction.write("/components/C.tsx", "new\n")
+        transaction.delete("/components/B.tsx")
+        entry = StepCache.record({"messages": [], "files": {}, "diffs": {"/components/A.tsx": "+ c"}}, transaction)
+        transaction.rollback()
+    assert entry.writes == {"/components/C.tsx": "new\n"}
+    assert entry.deletes == ["/components/B.tsx"]
+    assert (frontend / "components" / "B.tsx").exists()
+
+    with project_transaction("test") as transaction:
+        result = StepCache.replay(entry, transaction, STEP)
+    assert not (frontend / "components" / "B.tsx").exists()
+    assert (frontend / "components" / "C.tsx").read_text() == "new\n"
+    assert result["diffs"] == {"/components/A.tsx": "+ c"}
@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+
+from src.agent import build_orchestrator, run_step
+from src.bench.stub_model import ScriptedChatModel
+
+
+TARGET = "components/Card.tsx"
+ORIGINAL = 'export const Card = () => <div className="p-2" />;\n'
+STYLED = 'export const Card = () => <div className="p-4 bg-white" />;\n'
+DIFF = 'className="p-2" -> className="p-4 bg-white"'
+
+
+def _models():
+    orchestrator = ScriptedChatModel(turns=[
+        {"tool_calls": [{"name": "task", "args": {"subagent_type": "html_analyser", "description": f"Style {TARGET}"}}]},
+        {"tool_calls": [{"name": "task", "args": {
+            "subagent_type": "tsx_styling_agent", "description": f"Apply the scratch pad to {TARGET}",
+        }}]},
+        {"content": "Step complete."},
+    ])
+    analyser = ScriptedChatModel(turns=[
+        {"tool_calls": [{"name": "read_tsx", "args": {"file_path": TARGET}}]},
+        {"tool_calls": [{"name": "write_scratch_pad", "args": {"diffs": {TARGET: DIFF}}}]},
+        {"content": "Proposed one change."},
+    ])
+    styler = ScriptedChatModel(turns=[
+        {"tool_calls": [{"name": "read_scratch_pad", "args": {}}]},
+        {"tool_calls": [{"name": "read_tsx", "args": {"file_path": "/project/" + TARGET}}]},
+        {"tool_calls": [{"name": "write_tsx", "args": {"file_path": TARGET, "content": STYLED}}]},
+        {"content": "Applied the change."},
+    ])
+    return orchestrator, analyser, styler
+
+
+def test_scratch_pad_reaches_the_next_subagent_and_writes_reach_disk(project, tool_outputs):
+    target = Path(project.frontend_root, TARGET)
+    target.parent.mkdir(parents=True)
+    target.write_text(ORIGINAL, encoding="utf-8")
+    orchestrator, analyser, styler = _models()
+    agent = build_orchestrator(
+        model=orchestrator,
+        subagent_model={"html_analyser": analyser, "tsx_styling_agent": styler},
+    )
+    step = json.dumps({"html_snippet": "<div class=\"p-4 bg-white\"></div>", "target_component": TARGET,
+                       "reference_files": [TARGET]})
+
+    result = run_step(agent, step, callbacks=[tool_outputs], project="test")
+
+    assert all(model.remaining == 0 for model in (orchestrator, analyser, styler))
+    assert all(ORIGINAL.strip() in text for text in tool_outputs.outputs["read_tsx"])
+    assert DIFF in tool_outputs.outputs["read_scratch_pad"][0]
+    assert result["diffs"] == {TARGET: DIFF}
+    assert target.read_text(encoding="utf-8") == STYLED
+
+
+def test_unchanged_files_are_not_written_back(project):
+    target = Path(project.frontend_root, TARGET)
+    target.parent.mkdir(parents=True)
+    target.write_text(ORIGINAL, encoding="utf-8")
+    before = target.stat().st_mtime_ns
+    agent = build_orchestrator(model=ScriptedChatModel(turns=[{"content": "Nothing to do."}]), subagents=())
+
+    result = run_step(agent, json.dumps({"html_snippet": "<div></div>", "target_component": TARGET}), project="test")
+
+    assert result["files"]["/" + TARGET]["content"] == ORIGINAL
+    assert target.stat().st_mtime_ns == before
@@ -0,0 +1,96 @@
+from langchain_core.messages import HumanMessage
+
+from src.state import TodoBatch, todo_reducer
+from src.tools.todo_tools import update_todos
+
+
+PLAN = [
+    {"content": "analyse", "status": "completed", "id": "1"},
+    {"content": "style", "status": "in_progress", "id": "2"},
+]
+
+
+def _update(operations, todos=PLAN):
+    call = {
+        "name": "update_todos",
+        "args": {"operations": operations, "state": {"messages": [HumanMessage(content="step")], "todos": todos}},
+        "id": "call-1",
+        "type": "tool_call",
+    }
+    return update_todos.invoke(call)
+
+
+def test_full_list_gets_positional_ids():
+    todos = todo_reducer(None, [{"content": "a", "status": "pending"}, {"content": "b", "status": "pending"}])
+    assert [t["id"] for t in todos] == ["1", "2"]
+
+
+def test_operations_apply_in_order():
+    todos = todo_reducer(PLAN, [
+        {"op": "set_status", "id": "2", "status": "completed"},
+        {"op": "add", "content": "review"},
+        {"op": "remove", "id": "1"},
+    ])
+    assert todos == [
+        {"content": "style", "status": "completed", "id": "2"},
+        {"content": "review", "status": "pending", "id": "3"},
+    ]
+
+
+def test_concurrent_adds_get_distinct_ids():
+    first = _update([{"op": "add", "content": "review"}]).update["todos"]
+    second = _update([{"op": "add", "content": "report"}]).update["todos"]
+    todos = todo_reducer(todo_reducer(PLAN, first), second)
+    assert [t["id"] for t in todos] == ["1", "2", "3", "4"]
+
+
+def test_reducer_drops_add_with_taken_id():
+    todos = todo_reducer(PLAN, [{"op": "add", "id": "2", "content": "duplicate"}])
+    assert todos == PLAN
+
+
+def test_tool_rejects_add_with_taken_id():
+    command = _update([{"op": "add", "id": "1", "content": "duplicate"}])
+    assert "todos" not in command.update
+    assert command.update["messages"][0].content.startswith("Error: todo id '1' already exists")
+
+
+def test_tool_rejects_unknown_id():
+    command = _update([{"op": "set_status", "id": "9", "status": "completed"}])
+    assert "todos" not in command.update
+    assert "unknown todo id '9'" in command.update["messages"][0].content
+
+
+def test_tool_accepts_ids_added_in_the_same_call():
+    operations = [
+        {"op": "add", "id": "review", "content": "review"},
+        {"op": "set_status", "id": "review", "status": "in_progress"},
+    ]
+    command = _update(operations)
+    assert command.update["todos"] == operations
+    assert todo_reducer(PLAN, operations)[-1] == {"content": "review", "status": "in_progress", "id": "review"}
+
+
+def test_empty_operations_are_rejected():
+    command = _update([])
+    assert "todos" not in command.update
+    assert command.update["messages"][0].content == "Error: pass at least one operation"
+
+
+def test_empty_batch_keeps_the_plan():
+    assert todo_reducer(PLAN, TodoBatch()) == PLAN
+    assert todo_reducer(PLAN, []) == []
+
+
+def test_update_todos_batch_survives_the_graph():
+    from langgraph.graph import END, START, StateGraph
+
+    from src.state import DeepAgentState
+
+    graph = StateGraph(DeepAgentState)
+    graph.add_node("update", lambda state: {"todos": TodoBatch()})
+    graph.add_edge(START, "update")
+    graph.add_edge("update", END)
+
+    result = graph.compile().invoke({"messages": [HumanMessage(content="step")], "todos": PLAN})
+    assert result["todos"] == PLAN
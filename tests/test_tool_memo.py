@@ -0,0 +1,30 @@
+from deepagents.backends.utils import create_file_data
+from langchain_core.messages import ToolMessage
+
+from src.bench.stub_model import ScriptedChatModel
+from src.subagents.tsx_styling_agent import build_tsx_styling_agent
+
+
+def _read(path):
+    return {"tool_calls": [{"name": "read_tsx", "args": {"file_path": path}}]}
+
+
+def test_read_after_write_is_not_memoized():
+    model = ScriptedChatModel(turns=[
+        _read("components/A.tsx"),
+        {"tool_calls": [{"name": "write_tsx", "args": {"file_path": "components/A.tsx", "content": "NEW"}}]},
+        _read("components/A.tsx"),
+        _read("components/A.tsx"),
+        {"content": "Done."},
+    ])
+    agent = build_tsx_styling_agent(model=model)
+
+    result = agent.invoke({
+        "messages": [{"role": "user", "content": "Style A"}],
+        "files": {"/components/A.tsx": create_file_data("OLD")},
+    })
+
+    reads = [m.content for m in result["messages"] if isinstance(m, ToolMessage) and m.name == "read_tsx"]
+    assert "OLD" in reads[0]
+    assert "NEW" in reads[1] and not reads[1].startswith("[unchanged")
+    assert reads[2].startswith("[unchanged since last read]")
@@ -0,0 +1,27 @@
+from src.state import file_reducer
+from src.tools.tsx_tools import read_tsx, write_tsx
+
+
+def test_file_reducer_does_not_touch_its_inputs():
+    left = {"/a.tsx": {"content": "a", "encoding": "utf-8"}}
+    right = {"/a.tsx": {"content": "b", "encoding": "utf-8"}}
+    merged = file_reducer(left, right)
+    assert merged == right
+    assert left == {"/a.tsx": {"content": "a", "encoding": "utf-8"}}
+
+
+def test_write_tsx_stores_file_data():
+    call = {
+        "type": "tool_call",
+        "id": "call-1",
+        "name": "write_tsx",
+        "args": {"file_path": "/a.tsx", "content": "new\n", "state": {"files": {}, "messages": []}},
+    }
+    update = write_tsx.invoke(call).update
+    assert update["files"]["/a.tsx"]["content"] == "new\n"
+    assert read_tsx.invoke({"file_path": "/a.tsx", "state": {**update, "messages": []}}).endswith("new")
+
+
+def test_read_tsx_accepts_plain_string_entries():
+    state = {"files": {"/a.tsx": "legacy\n"}, "messages": []}
+    assert read_tsx.invoke({"file_path": "/project/a.tsx", "state": state}).endswith("legacy")
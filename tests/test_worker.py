@@ -0,0 +1,89 @@
+import http.client
+import io
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.agent import build_orchestrator
+from src.bench.stub_model import ScriptedChatModel
+from src.worker import Worker, serve_http, serve_stdio
+
+STEP = {"html_snippet": "<div></div>", "target_component": "components/A.tsx", "reference_files": []}
+
+
+def _writing_model():
+    return ScriptedChatModel(turns=[
+        {"tool_calls": [{"name": "write_file", "args": {
+            "file_path": "/project/components/A.tsx", "content": "export const A = () => null;\n",
+        }}]},
+        {"content": "Done."},
+    ])
+
+
+@pytest.fixture
+def worker(project):
+    worker = Worker(agent=build_orchestrator(model=_writing_model(), subagents=()), concurrency=1, project="test")
+    yield worker
+    worker.shutdown()
+
+
+@pytest.fixture
+def server(worker):
+    server = serve_http(worker, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def _post(server, body: bytes, headers: dict) -> tuple[int, dict]:
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    try:
+        connection.putrequest("POST", "/step")
+        for name, value in headers.items():
+            connection.putheader(name, value)
+        connection.endheaders(body)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_posted_step_runs_and_commits(server, worker, project):
+    body = json.dumps({"id": "one", "step": STEP}).encode()
+    status, reply = _post(server, body, {"Content-Length": str(len(body))})
+
+    assert status == 200
+    assert reply["id"] == "one" and reply["response"] == "Done."
+    assert Path(project.frontend_root, "components", "A.tsx").read_text() == "export const A = () => null;\n"
+    assert worker.health()["completed"] == 1
+
+
+@pytest.mark.parametrize("length", ["abc", "-1"])
+def test_malformed_content_length_is_a_bad_request(server, worker, length):
+    status, reply = _post(server, b"{}", {"Content-Length": length})
+
+    assert status == 400
+    assert reply["error"].startswith("Invalid step request")
+    assert worker.health()["completed"] == 0
+
+
+def test_invalid_step_is_a_bad_request(server):
+    body = b"[1, 2]"
+    status, reply = _post(server, body, {"Content-Length": str(len(body))})
+    assert status == 400
+    assert "must be a JSON object" in reply["error"]
+
+
+def test_stdio_reports_results_and_invalid_lines(worker, project):
+    stdout = io.StringIO()
+    failures = serve_stdio(worker, io.StringIO(f"not json\n{json.dumps({'id': 'one', 'step': STEP})}\n"), stdout)
+
+    records = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert failures == 1
+    assert records[0]["id"] is None and records[0]["error"].startswith("Invalid step JSON")
+    assert records[1]["id"] == "one" and records[1]["response"] == "Done."
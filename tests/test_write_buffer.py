@@ -0,0 +1,144 @@
+import os
+
+import pytest
+
+from src.backends import write_buffer
+from src.backends.indexed_filesystem import IndexedFilesystemBackend
+from src.backends.locking import LockingBackend, PathLockManager
+from src.backends.write_buffer import CommitError, TransactionalBackend
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "frontend"
+    root.mkdir()
+    (root / "a.tsx").write_text("const a = 1;\n")
+    (root / "b.tsx").write_text("const b = 1;\n")
+    return root
+
+
+@pytest.fixture
+def backend(root, tmp_path):
+    inner = IndexedFilesystemBackend(root_dir=root, index_dir=tmp_path / ".index", build_in_background=False)
+    return TransactionalBackend(LockingBackend(inner, PathLockManager()))
+
+
+def test_transaction_buffers_until_commit(backend, root):
+    with backend.transaction():
+        assert backend.write("/c.tsx", "const c = 1;\n").error is None
+        assert backend.edit("/a.tsx", "1", "2").error is None
+        assert backend.delete("/b.tsx").error is None
+        assert backend.content("/a.tsx") == "const a = 2;\n"
+        assert backend.content("/b.tsx") is None
+        assert [m["path"] for m in backend.glob("*.tsx").matches] == ["/a.tsx", "/c.tsx"]
+        assert not (root / "c.tsx").exists()
+        assert (root / "a.tsx").read_text() == "const a = 1;\n"
+        assert (root / "b.tsx").exists()
+    assert (root / "c.tsx").read_text() == "const c = 1;\n"
+    assert (root / "a.tsx").read_text() == "const a = 2;\n"
+    assert not (root / "b.tsx").exists()
+    assert backend.pending_writes == {} and backend.pending_deletes == set()
+
+
+def test_transaction_rolls_back_on_error(backend, root):
+    with pytest.raises(RuntimeError):
+        with backend.transaction():
+            backend.write("/a.tsx", "changed\n")
+            backend.delete("/b.tsx")
+            raise RuntimeError("step failed")
+    assert (root / "a.tsx").read_text() == "const a = 1;\n"
+    assert (root / "b.tsx").exists()
+
+
+def test_transactions_do_not_share_buffers(backend, root):
+    with backend.transaction():
+        backend.write("/a.tsx", "outer\n")
+        with backend.transaction():
+            assert backend.content("/a.tsx") == "const a = 1;\n"
+            backend.write("/b.tsx", "inner\n")
+        assert (root / "b.tsx").read_text() == "inner\n"
+        assert backend.pending_writes == {"/a.tsx": "outer\n"}
+
+
+def test_changes_outside_a_transaction_are_written_through(backend, root):
+    assert backend.write("/c.tsx", "const c = 1;\n").error is None
+    assert (root / "c.tsx").read_text() == "const c = 1;\n"
+    assert backend.edit("/c.tsx", "1", "2").error is None
+    assert (root / "c.tsx").read_text() == "const c = 2;\n"
+    assert backend.delete("/c.tsx").error is None
+    assert not (root / "c.tsx").exists()
+    assert backend.pending_writes == {} and backend.commit() == []
+
+
+def test_line_endings_are_preserved(backend, root):
+    (root / "crlf.tsx").write_bytes(b"const a = 1;\r\nconst b = 2;\r\n")
+    assert backend.content("/crlf.tsx") == "const a = 1;\r\nconst b = 2;\r\n"
+    with backend.transaction():
+        assert backend.edit("/crlf.tsx", "const a = 1;\nconst b = 2;", "const a = 3;\nconst b = 4;").error is None
+    assert (root / "crlf.tsx").read_bytes() == b"const a = 3;\r\nconst b = 4;\r\n"
+
+
+def test_failed_commit_restores_writes_and_deletes(backend, root, monkeypatch):
+    (root / "c.tsx").write_text("const c = 1;\n")
+    replace = os.replace
+
+    def failing_replace(src, dst):
+        if os.path.basename(dst).startswith(".c.tsx."):
+            raise OSError("disk full")
+        replace(src, dst)
+
+    monkeypatch.setattr(write_buffer.os, "replace", failing_replace)
+    with pytest.raises(CommitError):
+        with backend.transaction():
+            backend.write("/a.tsx", "changed\n")
+            backend.delete("/b.tsx")
+            backend.delete("/c.tsx")
+    assert (root / "a.tsx").read_text() == "const a = 1;\n"
+    assert (root / "b.tsx").read_text() == "const b = 1;\n"
+    assert (root / "c.tsx").read_text() == "const c = 1;\n"
+    assert sorted(p.name for p in root.iterdir()) == ["a.tsx", "b.tsx", "c.tsx"]
+
+
+def test_commit_refuses_files_changed_since_read(backend, root):
+    with pytest.raises(CommitError, match="Conflict"):
+        with backend.transaction():
+            backend.edit("/a.tsx", "1", "2")
+            (root / "a.tsx").write_text("changed by another run\n")
+    assert (root / "a.tsx").read_text() == "changed by another run\n"
+
+
+def test_directory_delete_in_transaction(backend, root):
+    (root / "app" / "shop").mkdir(parents=True)
+    (root / "app" / "page.tsx").write_text("page\n")
+    (root / "app" / "shop" / "[[...slug]].tsx").write_text("slug\n")
+    with backend.transaction():
+        backend.write("/app/new.tsx", "new\n")
+        result = backend.delete("/app")
+        assert result.error is None
+        assert backend.content("/app/page.tsx") is None
+        assert backend.content("/app/new.tsx") is None
+        assert [e["path"] for e in backend.ls("/").entries] == ["/a.tsx", "/b.tsx"]
+        assert backend.ls("/app").entries == []
+        assert [m["path"] for m in backend.glob("**/*.tsx").matches] == ["/a.tsx", "/b.tsx"]
+        assert backend.grep("slug").matches == []
+        assert (root / "app" / "page.tsx").exists()
+        assert backend.delete("/app").error == "Error: '/app' not found"
+    assert not (root / "app").exists()
+    assert not (root / "app" / "new.tsx").exists()
+
+
+def test_directory_delete_keeps_files_written_after_it(backend, root):
+    (root / "app").mkdir()
+    (root / "app" / "page.tsx").write_text("page\n")
+    with backend.transaction():
+        backend.delete("/app")
+        backend.write("/app/page.tsx", "rewritten\n")
+        assert [e["path"] for e in backend.ls("/app").entries] == ["/app/page.tsx"]
+    assert (root / "app" / "page.tsx").read_text() == "rewritten\n"
+
+
+def test_directory_delete_outside_a_transaction(backend, root):
+    (root / "app").mkdir()
+    (root / "app" / "page.tsx").write_text("page\n")
+    assert backend.delete("/app").error is None
+    assert not (root / "app").exists()